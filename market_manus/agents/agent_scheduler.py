@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Agendador em processo para o OrchestratorAgent
+
+Em vez de um subprocess por execução, as instâncias dos agentes são criadas
+uma vez e mantidas aquecidas (imports, estado em memória), e cada execução
+roda run_with_error_handling() em um pool de threads, como tarefa asyncio.
+
+- Dependências: em um ciclo, um agente só começa depois que as dependências
+  do mesmo ciclo terminaram; check_agent_dependencies continua decidindo se
+  elas estão satisfeitas
+- Timeout por agente (asyncio.wait_for). Uma thread não pode ser
+  interrompida: o agente fica marcado como ocupado até a execução terminar de
+  fato e não é reexecutado enquanto isso
+- Contadores de falha e tempos (parede e CPU da thread) registrados pelo
+  orquestrador a cada execução
+"""
+
+import asyncio
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+def load_agent(agent_name: str, config: Dict):
+    """Instancia a classe do agente a partir de config["module"]/config["class"]"""
+    module = importlib.import_module(config["module"])
+    return getattr(module, config["class"])()
+
+
+def dependency_order(agents_config: Dict, agent_names: List[str]) -> List[str]:
+    """
+    Ordena agentes para que dependências venham antes (ordem topológica estável)
+
+    Raises:
+        ValueError: Ciclo de dependências
+    """
+    selected = set(agent_names)
+    ordered, visiting, done = [], set(), set()
+
+    def visit(name: str):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Ciclo de dependências envolvendo {name}")
+        visiting.add(name)
+        for dep in agents_config[name].get("dependencies", []):
+            if dep in selected:
+                visit(dep)
+        visiting.discard(name)
+        done.add(name)
+        ordered.append(name)
+
+    for name in agent_names:
+        visit(name)
+    return ordered
+
+
+class AgentScheduler:
+    """Executa agentes do orquestrador em processo, com instâncias reutilizadas"""
+
+    def __init__(
+        self,
+        orchestrator,
+        max_concurrent: int = 3,
+        agent_factory: Optional[Callable[[str, Dict], object]] = None
+    ):
+        """
+        Args:
+            orchestrator: OrchestratorAgent (configuração, status e registro das execuções)
+            max_concurrent: Agentes executando ao mesmo tempo
+            agent_factory: agent_factory(nome, config) -> instância (padrão: load_agent)
+        """
+        self.orchestrator = orchestrator
+        self.max_concurrent = max_concurrent
+        self.agent_factory = agent_factory or load_agent
+        self.instances = {}
+        self._busy = set()
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="agent")
+
+    def get_instance(self, agent_name: str):
+        """Instância aquecida do agente (criada na primeira execução)"""
+        with self._lock:
+            if agent_name not in self.instances:
+                config = self.orchestrator.agents_config["agents"][agent_name]
+                self.instances[agent_name] = self.agent_factory(agent_name, config)
+            return self.instances[agent_name]
+
+    def is_busy(self, agent_name: str) -> bool:
+        with self._lock:
+            return agent_name in self._busy
+
+    def _invoke(self, agent_name: str, instance, usage: Dict):
+        """Executado na thread do pool: roda o agente medindo o tempo de CPU da thread"""
+        cpu_start = time.thread_time()
+        try:
+            instance.run_with_error_handling()
+        finally:
+            usage["cpu_time"] = time.thread_time() - cpu_start
+            with self._lock:
+                self._busy.discard(agent_name)
+
+    async def run_agent(self, agent_name: str) -> Dict:
+        """
+        Executa um agente (se habilitado, livre e com dependências satisfeitas)
+
+        Returns:
+            Dict: Resultado da execução (status, execution_time, cpu_time, error)
+        """
+        orchestrator = self.orchestrator
+        config = orchestrator.agents_config["agents"][agent_name]
+
+        if not config.get("enabled", True):
+            return {"status": "disabled", "message": "Agente desabilitado"}
+        if not orchestrator.check_agent_dependencies(agent_name):
+            return {"status": "dependencies_not_met", "message": "Dependências não satisfeitas"}
+        with self._lock:
+            if agent_name in self._busy:
+                return {"status": "busy", "message": "Execução anterior ainda em andamento"}
+            self._busy.add(agent_name)
+
+        timeout = config.get("timeout", 300)
+        orchestrator.mark_agent_running(agent_name)
+        started = time.perf_counter()
+        usage = {"cpu_time": None}
+        try:
+            instance = self.get_instance(agent_name)
+            future = asyncio.get_running_loop().run_in_executor(
+                self.executor, self._invoke, agent_name, instance, usage
+            )
+        except Exception as e:
+            with self._lock:
+                self._busy.discard(agent_name)
+            result = {"status": "error", "error": f"Erro ao carregar agente {agent_name}: {str(e)}"}
+        else:
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout)
+                result = {"status": "success"}
+            except asyncio.TimeoutError:
+                result = {"status": "timeout", "error": f"Agente {agent_name} excedeu timeout de {timeout}s"}
+            except Exception as e:
+                result = {"status": "failed", "error": f"{type(e).__name__}: {str(e)}"}
+
+        result["execution_time"] = time.perf_counter() - started
+        result["cpu_time"] = usage["cpu_time"]
+        orchestrator.record_agent_result(agent_name, result)
+        return result
+
+    async def run_cycle(self, agent_names: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Executa um ciclo: agentes independentes em paralelo, dependentes após suas dependências
+
+        Args:
+            agent_names: Agentes do ciclo (padrão: os que devem executar agora)
+
+        Returns:
+            Dict: Resultado por agente
+        """
+        agents_config = self.orchestrator.agents_config["agents"]
+        if agent_names is None:
+            agent_names = self.orchestrator.get_due_agents()
+        ordered = dependency_order(agents_config, agent_names)
+
+        finished = {name: asyncio.Event() for name in ordered}
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        results = {}
+
+        async def run_when_ready(name: str):
+            try:
+                for dep in agents_config[name].get("dependencies", []):
+                    if dep in finished:
+                        await finished[dep].wait()
+                async with semaphore:
+                    results[name] = await self.run_agent(name)
+            finally:
+                finished[name].set()
+
+        await asyncio.gather(*(run_when_ready(name) for name in ordered))
+        return {name: results[name] for name in ordered if name in results}
+
+    def shutdown(self, wait: bool = False):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
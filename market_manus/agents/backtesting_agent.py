@@ -63,7 +63,7 @@ class BacktestingAgent(BaseAgent):
         self.strategy_cache = {}
         
         # Market Context Analyzer para análise de regime de mercado
-        self.context_analyzer = MarketContextAnalyzer(lookback_days=60)
+        self.context_analyzer = MarketContextAnalyzer(lookback_days=60, cache=self.cache)
         
         if self.data_provider:
             self.logger.info("BacktestingAgent inicializado com data_provider REAL")
@@ -18,6 +18,8 @@ from typing import Dict, List, Optional, Tuple, Any
 from abc import ABC, abstractmethod
 from pathlib import Path
 
+from agents.event_store import get_event_store
+
 # Configurar logging
 def setup_logging(agent_name: str, log_level: str = "INFO") -> logging.Logger:
     """Configura sistema de logging para o agente"""
@@ -63,6 +65,9 @@ class BaseAgent(ABC):
     - Interface comum para todos os agentes
     """
     
+    # Tipos de dados publicados no event store (data/events.db) em vez de arquivos JSON
+    EVENT_TYPES = ("signals", "alerts")
+    
     def __init__(self, name: str, config_path: str = "config/trading_config.json"):
         self.name = name
         self.config_path = config_path
@@ -77,6 +82,9 @@ class BaseAgent(ABC):
         # Criar diretórios necessários
         self._create_directories()
         
+        # Eventos entre agentes (sinais, alertas)
+        self.events = get_event_store()
+        
         # Estado do agente
         self.last_run = None
         self.run_count = 0
@@ -89,9 +97,7 @@ class BaseAgent(ABC):
         directories = [
             "data/logs",
             "data/metrics", 
-            "data/signals",
             "data/suggestions",
-            "data/alerts",
             "data/reports",
             "data/historical",
             "data/backups"
@@ -107,10 +113,11 @@ class BaseAgent(ABC):
                 config = json.load(f)
                 return config
         except FileNotFoundError:
-            self.logger.warning(f"Config file not found: {self.config_path}")
+            # Chamado antes de self.logger existir (o nível de log vem da config)
+            logging.getLogger(self.name).warning(f"Config file not found: {self.config_path}")
             return self.get_default_config()
         except json.JSONDecodeError as e:
-            self.logger.error(f"Error parsing config file: {e}")
+            logging.getLogger(self.name).error(f"Error parsing config file: {e}")
             return self.get_default_config()
     
     def get_default_config(self) -> Dict:
@@ -193,7 +200,7 @@ class BaseAgent(ABC):
     
     def save_alert(self, alert: Dict):
         """
-        Salva alerta para processamento pelo NotificationAgent
+        Publica alerta no event store para processamento pelo NotificationAgent
         
         Args:
             alert: Dicionário com detalhes do alerta
@@ -202,12 +209,7 @@ class BaseAgent(ABC):
         alert["agent"] = self.name
         alert["id"] = f"{self.name}_{int(time.time())}"
         
-        # Salvar alerta individual
-        alert_file = f"data/alerts/alert_{alert['id']}.json"
-        Path(alert_file).parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(alert_file, 'w', encoding='utf-8') as f:
-            json.dump(alert, f, indent=2, ensure_ascii=False)
+        self.events.append("alerts", alert, agent=self.name)
         
         self.logger.warning(f"Alerta gerado: {alert.get('message', 'Sem mensagem')}")
     
@@ -319,6 +321,10 @@ class BaseAgent(ABC):
         Returns:
             List[Dict]: Lista com dados da janela
         """
+        if data_type in self.EVENT_TYPES:
+            # Últimos eventos pelo índice (type, created_at), em ordem cronológica
+            return [event.payload for event in self.events.recent(data_type, window_size)]
+        
         data_dir = f"data/{data_type}"
         
         if not os.path.exists(data_dir):
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Event store (SQLite, append-only) para a comunicação entre agentes
+
+Substitui os arquivos JSON por evento em data/alerts e data/signals: publicar
+um evento é um INSERT, e cada consumidor guarda um cursor (último id lido)
+por tipo de evento. Ler os eventos novos custa O(novos) pelo índice
+(type, id), sem listar diretórios nem regravar arquivos para marcar
+"processed"/"notified". Janelas recentes e por período usam o índice
+(type, created_at).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class Event:
+    """Evento publicado por um agente"""
+    id: int
+    type: str
+    agent: Optional[str]
+    created_at: float
+    payload: Dict[str, Any]
+
+
+class EventStore:
+    """Log de eventos por tipo com cursores por consumidor"""
+
+    INSERT_EVENT_SQL = "INSERT INTO events (type, agent, created_at, payload) VALUES (?, ?, ?, ?)"
+    SELECT_NEW_SQL = """
+        SELECT id, type, agent, created_at, payload FROM events
+        WHERE type = ? AND id > ?
+        ORDER BY id
+        LIMIT ?
+    """
+    SELECT_HAS_NEW_SQL = "SELECT 1 FROM events WHERE type = ? AND id > ? AND created_at >= ? LIMIT 1"
+    SELECT_RECENT_SQL = """
+        SELECT id, type, agent, created_at, payload FROM events
+        WHERE type = ? AND created_at >= ?
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    """
+    SELECT_CURSOR_SQL = "SELECT last_id FROM consumer_offsets WHERE consumer = ? AND type = ?"
+    UPSERT_CURSOR_SQL = """
+        INSERT INTO consumer_offsets (consumer, type, last_id) VALUES (?, ?, ?)
+        ON CONFLICT (consumer, type) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)
+    """
+
+    def __init__(self, db_path: str = "data/events.db", clock: Callable[[], float] = time.time):
+        """
+        Args:
+            db_path: Arquivo SQLite
+            clock: Relógio (segundos, epoch) usado em created_at
+        """
+        self.db_path = db_path
+        self._clock = clock
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    type TEXT NOT NULL,
+                    agent TEXT,
+                    created_at REAL NOT NULL,
+                    payload TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_events_type_id ON events (type, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_events_type_time ON events (type, created_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS consumer_offsets (
+                    consumer TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    last_id INTEGER NOT NULL,
+                    PRIMARY KEY (consumer, type)
+                )
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual (reutilizada entre chamadas)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _event_from_row(row) -> Event:
+        return Event(id=row[0], type=row[1], agent=row[2], created_at=row[3], payload=json.loads(row[4]))
+
+    def append(self, event_type: str, payload: Dict[str, Any], agent: Optional[str] = None) -> int:
+        """
+        Publica um evento
+
+        Returns:
+            int: Id do evento (crescente)
+        """
+        with self._connection() as conn:
+            cursor = conn.execute(
+                self.INSERT_EVENT_SQL,
+                (event_type, agent, self._clock(), json.dumps(payload, default=str, ensure_ascii=False))
+            )
+        return cursor.lastrowid
+
+    def get_cursor(self, consumer: str, event_type: str) -> int:
+        """Último id confirmado pelo consumidor (0 se nunca leu)"""
+        row = self._connection().execute(self.SELECT_CURSOR_SQL, (consumer, event_type)).fetchone()
+        return row[0] if row else 0
+
+    def read_new(self, consumer: str, event_type: str, limit: int = 1000) -> List[Event]:
+        """
+        Eventos após o cursor do consumidor, em ordem de publicação
+
+        O cursor só avança com ack(): eventos lidos e não confirmados são
+        entregues de novo na próxima leitura.
+        """
+        rows = self._connection().execute(
+            self.SELECT_NEW_SQL, (event_type, self.get_cursor(consumer, event_type), limit)
+        ).fetchall()
+        return [self._event_from_row(row) for row in rows]
+
+    def ack(self, consumer: str, event_type: str, event_id: int):
+        """Avança o cursor do consumidor até event_id (nunca retrocede)"""
+        with self._connection() as conn:
+            conn.execute(self.UPSERT_CURSOR_SQL, (consumer, event_type, event_id))
+
+    def has_new(self, consumer: str, event_type: str, since: Optional[float] = None) -> bool:
+        """Há eventos após o cursor do consumidor (opcionalmente criados a partir de since)"""
+        row = self._connection().execute(
+            self.SELECT_HAS_NEW_SQL, (event_type, self.get_cursor(consumer, event_type), since or 0)
+        ).fetchone()
+        return row is not None
+
+    def recent(self, event_type: str, limit: Optional[int] = 100, since: Optional[float] = None) -> List[Event]:
+        """
+        Últimos eventos do tipo (independe de cursores)
+
+        Args:
+            limit: Máximo de eventos (None: todos)
+            since: Apenas eventos criados a partir deste instante (epoch)
+
+        Returns:
+            List[Event]: Em ordem cronológica
+        """
+        rows = self._connection().execute(
+            self.SELECT_RECENT_SQL, (event_type, since or 0, -1 if limit is None else limit)
+        ).fetchall()
+        return [self._event_from_row(row) for row in reversed(rows)]
+
+    def close(self):
+        """Fecha a conexão da thread atual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_event_store(db_path: str = "data/events.db") -> EventStore:
+    """Event store compartilhado pelos agentes do processo (um por arquivo)"""
+    key = os.path.abspath(db_path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = EventStore(key)
+        return _stores[key]
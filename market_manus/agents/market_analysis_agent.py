@@ -6,7 +6,6 @@ Autor: Manus AI
 Data: 17 de Julho de 2025
 """
 
-import json
 import os
 import sys
 import time
@@ -14,7 +13,6 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-from pathlib import Path
 
 # Adicionar diretório pai ao path para imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -537,21 +535,13 @@ class MarketAnalysisAgent(BaseAgent):
     
     def save_signal(self, signal: Dict):
         """
-        Salva sinal gerado em arquivo JSON
+        Publica sinal gerado no event store
         
         Args:
             signal: Dicionário com dados do sinal
         """
         try:
-            # Criar nome do arquivo com timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            symbol_clean = signal['symbol'].replace('/', '_')
-            filename = f"signal_{symbol_clean}_{timestamp}.json"
-            filepath = Path("data/signals") / filename
-            
-            # Salvar sinal
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(signal, f, indent=2, ensure_ascii=False)
+            self.events.append("signals", signal, agent=self.name)
             
             # Adicionar ao histórico
             self.signals_history.append(signal)
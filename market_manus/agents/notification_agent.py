@@ -12,9 +12,8 @@ import sys
 import time
 import smtplib
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
-from pathlib import Path
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -37,6 +36,9 @@ class NotificationAgent(BaseAgent):
     Frequência: Event-driven via PowerShell
     """
     
+    # Consumidor dos eventos (cursor no event store; mesmo nome do agente no orquestrador)
+    EVENT_CONSUMER = "notification"
+    
     def __init__(self):
         super().__init__("NotificationAgent")
         
@@ -577,38 +579,24 @@ class NotificationAgent(BaseAgent):
             return "Erro ao gerar relatório de status"
     
     def process_pending_alerts(self):
-        """Processa alertas pendentes de outros agentes"""
+        """Processa alertas de outros agentes publicados desde a última execução"""
         try:
-            alerts_dir = Path("data/alerts")
-            if not alerts_dir.exists():
-                return
-            
-            # Processar arquivos de alerta
-            for alert_file in alerts_dir.glob("*.json"):
+            events = self.events.read_new(self.EVENT_CONSUMER, "alerts")
+            for event in events:
+                alert = event.payload
                 try:
-                    with open(alert_file, 'r', encoding='utf-8') as f:
-                        alert = json.load(f)
-                    
-                    # Verificar se já foi processado
-                    if alert.get("processed", False):
-                        continue
-                    
                     # Processar baseado no tipo
                     alert_type = alert.get("type", "")
                     
                     if "risk" in alert_type or "drawdown" in alert_type or "loss" in alert_type:
                         self.process_risk_alert(alert)
                     
-                    # Marcar como processado
-                    alert["processed"] = True
-                    alert["processed_at"] = datetime.now().isoformat()
-                    
-                    with open(alert_file, 'w', encoding='utf-8') as f:
-                        json.dump(alert, f, indent=2)
-                    
                 except Exception as e:
-                    self.logger.error(f"Erro ao processar alerta {alert_file}: {e}")
-                    continue
+                    self.logger.error(f"Erro ao processar alerta {alert.get('id', event.id)}: {e}")
+            
+            if events:
+                # Avançar o cursor (substitui a marcação "processed" nos arquivos)
+                self.events.ack(self.EVENT_CONSUMER, "alerts", events[-1].id)
             
         except Exception as e:
             self.handle_error(e, "process_pending_alerts")
@@ -616,40 +604,22 @@ class NotificationAgent(BaseAgent):
     def process_new_signals(self):
         """Processa novos sinais para notificação"""
         try:
-            signals_dir = Path("data/signals")
-            if not signals_dir.exists():
-                return
-            
-            # Processar apenas sinais dos últimos 10 minutos
-            cutoff_time = datetime.now() - timedelta(minutes=10)
+            # Notificar apenas sinais dos últimos 10 minutos
+            cutoff_time = time.time() - 10 * 60
             
-            for signal_file in signals_dir.glob("*.json"):
+            events = self.events.read_new(self.EVENT_CONSUMER, "signals")
+            for event in events:
+                signal = event.payload
                 try:
-                    # Verificar idade do arquivo
-                    file_time = datetime.fromtimestamp(signal_file.stat().st_mtime)
-                    if file_time < cutoff_time:
-                        continue
-                    
-                    with open(signal_file, 'r', encoding='utf-8') as f:
-                        signal = json.load(f)
-                    
-                    # Verificar se já foi notificado
-                    if signal.get("notified", False):
-                        continue
-                    
-                    # Processar sinal
-                    self.process_signal_alert(signal)
-                    
-                    # Marcar como notificado
-                    signal["notified"] = True
-                    signal["notified_at"] = datetime.now().isoformat()
-                    
-                    with open(signal_file, 'w', encoding='utf-8') as f:
-                        json.dump(signal, f, indent=2)
+                    if event.created_at >= cutoff_time:
+                        self.process_signal_alert(signal)
                     
                 except Exception as e:
-                    self.logger.error(f"Erro ao processar sinal {signal_file}: {e}")
-                    continue
+                    self.logger.error(f"Erro ao processar sinal {signal.get('symbol', event.id)}: {e}")
+            
+            if events:
+                # Avançar o cursor (substitui a marcação "notified" nos arquivos)
+                self.events.ack(self.EVENT_CONSUMER, "signals", events[-1].id)
             
         except Exception as e:
             self.handle_error(e, "process_new_signals")
@@ -6,14 +6,13 @@ Autor: Manus AI
 Data: 17 de Julho de 2025
 """
 
+import asyncio
 import json
 import os
 import sys
 import time
-import subprocess
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-from pathlib import Path
 import threading
 import queue
 
@@ -21,6 +20,7 @@ import queue
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.base_agent import BaseAgent, SuggestionType, AlertSeverity
+from agents.agent_scheduler import AgentScheduler
 
 class OrchestratorAgent(BaseAgent):
     """
@@ -62,6 +62,11 @@ class OrchestratorAgent(BaseAgent):
         # Sistema ativo
         self.system_active = True
         
+        # Agendador em processo (instâncias dos agentes mantidas entre ciclos)
+        self.scheduler = AgentScheduler(
+            self, max_concurrent=self.agents_config["system"].get("max_concurrent_agents", 3)
+        )
+        
         self.logger.info("OrchestratorAgent inicializado")
     
     def load_agents_config(self) -> Dict:
@@ -151,7 +156,9 @@ class OrchestratorAgent(BaseAgent):
                     "total_successes": 0,
                     "total_failures": 0,
                     "avg_execution_time": 0,
-                    "current_pid": None,
+                    "last_cpu_time": None,
+                    "total_cpu_time": 0.0,
+                    "avg_cpu_time": 0.0,
                     "config": config
                 }
             
@@ -200,7 +207,7 @@ class OrchestratorAgent(BaseAgent):
     
     def execute_agent(self, agent_name: str) -> Dict:
         """
-        Executa um agente específico
+        Executa um agente específico (em processo, pela instância aquecida do agendador)
         
         Args:
             agent_name: Nome do agente
@@ -208,104 +215,49 @@ class OrchestratorAgent(BaseAgent):
         Returns:
             Dict: Resultado da execução
         """
-        try:
-            config = self.agents_config["agents"][agent_name]
-            
-            if not config.get("enabled", True):
-                return {"status": "disabled", "message": "Agente desabilitado"}
-            
-            # Verificar dependências
-            if not self.check_agent_dependencies(agent_name):
-                return {"status": "dependencies_not_met", "message": "Dependências não satisfeitas"}
-            
-            # Atualizar status
-            self.agents_status[agent_name]["status"] = "running"
-            self.agents_status[agent_name]["last_run"] = datetime.now().isoformat()
-            
-            start_time = time.time()
-            
-            # Executar agente
-            module_path = config["module"]
-            script_path = module_path.replace(".", "/") + ".py"
-            
-            self.logger.info(f"Executando agente: {agent_name}")
-            
-            # Executar como subprocess
-            result = subprocess.run(
-                [sys.executable, script_path],
-                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                capture_output=True,
-                text=True,
-                timeout=config.get("timeout", 300)
-            )
-            
-            execution_time = time.time() - start_time
-            
-            # Processar resultado
-            if result.returncode == 0:
-                # Sucesso
-                self.agents_status[agent_name]["status"] = "completed"
-                self.agents_status[agent_name]["last_success"] = datetime.now().isoformat()
-                self.agents_status[agent_name]["consecutive_failures"] = 0
-                self.agents_status[agent_name]["total_successes"] += 1
-                
-                execution_result = {
-                    "status": "success",
-                    "execution_time": execution_time,
-                    "stdout": result.stdout,
-                    "stderr": result.stderr
-                }
-                
-                self.logger.info(f"Agente {agent_name} executado com sucesso ({execution_time:.1f}s)")
-                
-            else:
-                # Falha
-                self.agents_status[agent_name]["status"] = "failed"
-                self.agents_status[agent_name]["last_error"] = datetime.now().isoformat()
-                self.agents_status[agent_name]["consecutive_failures"] += 1
-                self.agents_status[agent_name]["total_failures"] += 1
-                
-                execution_result = {
-                    "status": "failed",
-                    "execution_time": execution_time,
-                    "return_code": result.returncode,
-                    "stdout": result.stdout,
-                    "stderr": result.stderr,
-                    "error": f"Processo terminou com código {result.returncode}"
-                }
-                
-                self.logger.error(f"Agente {agent_name} falhou: {result.stderr}")
-            
-            # Atualizar estatísticas
-            self.agents_status[agent_name]["total_runs"] += 1
-            
-            # Calcular tempo médio de execução
-            current_avg = self.agents_status[agent_name]["avg_execution_time"]
-            total_runs = self.agents_status[agent_name]["total_runs"]
-            new_avg = ((current_avg * (total_runs - 1)) + execution_time) / total_runs
-            self.agents_status[agent_name]["avg_execution_time"] = new_avg
-            
-            return execution_result
-            
-        except subprocess.TimeoutExpired:
-            self.agents_status[agent_name]["status"] = "timeout"
-            self.agents_status[agent_name]["consecutive_failures"] += 1
-            self.agents_status[agent_name]["total_failures"] += 1
-            
-            error_msg = f"Agente {agent_name} excedeu timeout de {config.get('timeout', 300)}s"
-            self.logger.error(error_msg)
-            
-            return {"status": "timeout", "error": error_msg}
-            
-        except Exception as e:
-            self.agents_status[agent_name]["status"] = "error"
-            self.agents_status[agent_name]["consecutive_failures"] += 1
-            self.agents_status[agent_name]["total_failures"] += 1
-            
-            error_msg = f"Erro ao executar agente {agent_name}: {str(e)}"
-            self.handle_error(e, "execute_agent")
-            
-            return {"status": "error", "error": error_msg}
+        return asyncio.run(self.scheduler.run_agent(agent_name))
+    
+    def mark_agent_running(self, agent_name: str):
+        """Marca o início de uma execução"""
+        self.agents_status[agent_name]["status"] = "running"
+        self.agents_status[agent_name]["last_run"] = datetime.now().isoformat()
+        self.logger.info(f"Executando agente: {agent_name}")
+    
+    def record_agent_result(self, agent_name: str, result: Dict):
+        """
+        Atualiza status, contadores de falha e tempos (parede/CPU) após uma execução
+        
+        Args:
+            agent_name: Nome do agente
+            result: Resultado de AgentScheduler.run_agent
+        """
+        status = self.agents_status[agent_name]
+        execution_time = result.get("execution_time", 0.0)
+        
+        if result["status"] == "success":
+            status["status"] = "completed"
+            status["last_success"] = datetime.now().isoformat()
+            status["consecutive_failures"] = 0
+            status["total_successes"] += 1
+            self.logger.info(f"Agente {agent_name} executado com sucesso ({execution_time:.1f}s)")
+        else:
+            status["status"] = result["status"]
+            status["last_error"] = datetime.now().isoformat()
+            status["consecutive_failures"] += 1
+            status["total_failures"] += 1
+            self.logger.error(f"Agente {agent_name} falhou: {result.get('error')}")
+        
+        # Atualizar estatísticas
+        status["total_runs"] += 1
+        total_runs = status["total_runs"]
+        status["avg_execution_time"] = ((status["avg_execution_time"] * (total_runs - 1)) + execution_time) / total_runs
+        
+        # CPU só é conhecida quando a execução terminou (não em timeout)
+        cpu_time = result.get("cpu_time")
+        if cpu_time is not None:
+            status["last_cpu_time"] = cpu_time
+            status["total_cpu_time"] += cpu_time
+            status["avg_cpu_time"] = status["total_cpu_time"] / total_runs
     
     def should_execute_agent(self, agent_name: str) -> bool:
         """
@@ -363,32 +315,12 @@ class OrchestratorAgent(BaseAgent):
         """
         try:
             if agent_name == "notification":
-                # Verificar alertas não processados
-                alerts_dir = Path("data/alerts")
-                if alerts_dir.exists():
-                    for alert_file in alerts_dir.glob("*.json"):
-                        try:
-                            with open(alert_file, 'r', encoding='utf-8') as f:
-                                alert = json.load(f)
-                                if not alert.get("processed", False):
-                                    return True
-                        except:
-                            continue
-                
-                # Verificar sinais novos
-                signals_dir = Path("data/signals")
-                if signals_dir.exists():
-                    cutoff_time = datetime.now() - timedelta(minutes=10)
-                    for signal_file in signals_dir.glob("*.json"):
-                        try:
-                            file_time = datetime.fromtimestamp(signal_file.stat().st_mtime)
-                            if file_time >= cutoff_time:
-                                with open(signal_file, 'r', encoding='utf-8') as f:
-                                    signal = json.load(f)
-                                    if not signal.get("notified", False):
-                                        return True
-                        except:
-                            continue
+                # Alertas não processados ou sinais recentes após o cursor do NotificationAgent
+                cutoff_time = time.time() - 10 * 60
+                return (
+                    self.events.has_new(agent_name, "alerts")
+                    or self.events.has_new(agent_name, "signals", since=cutoff_time)
+                )
             
             return False
             
@@ -396,12 +328,12 @@ class OrchestratorAgent(BaseAgent):
             self.handle_error(e, "has_pending_events")
             return False
     
-    def get_next_agent_to_execute(self) -> Optional[str]:
+    def get_due_agents(self) -> List[str]:
         """
-        Determina o próximo agente a ser executado baseado em prioridade e schedule
+        Agentes que devem executar agora, por prioridade
         
         Returns:
-            Optional[str]: Nome do agente ou None
+            List[str]: Nomes dos agentes (habilitados, livres, no horário e abaixo do limite de falhas)
         """
         try:
             candidates = []
@@ -409,6 +341,7 @@ class OrchestratorAgent(BaseAgent):
             for agent_name, config in self.agents_config["agents"].items():
                 if (config.get("enabled", True) and 
                     self.agents_status[agent_name]["status"] not in ["running"] and
+                    not self.scheduler.is_busy(agent_name) and
                     self.should_execute_agent(agent_name)):
                     
                     candidates.append({
@@ -417,24 +350,28 @@ class OrchestratorAgent(BaseAgent):
                         "consecutive_failures": self.agents_status[agent_name]["consecutive_failures"]
                     })
             
-            if not candidates:
-                return None
-            
             # Filtrar agentes com muitas falhas consecutivas
             max_failures = self.agents_config["system"]["emergency_shutdown_threshold"]
             candidates = [c for c in candidates if c["consecutive_failures"] < max_failures]
             
-            if not candidates:
-                return None
-            
             # Ordenar por prioridade (menor número = maior prioridade)
             candidates.sort(key=lambda x: x["priority"])
             
-            return candidates[0]["name"]
+            return [c["name"] for c in candidates]
             
         except Exception as e:
-            self.handle_error(e, "get_next_agent_to_execute")
-            return None
+            self.handle_error(e, "get_due_agents")
+            return []
+    
+    def get_next_agent_to_execute(self) -> Optional[str]:
+        """
+        Determina o próximo agente a ser executado baseado em prioridade e schedule
+        
+        Returns:
+            Optional[str]: Nome do agente ou None
+        """
+        due = self.get_due_agents()
+        return due[0] if due else None
     
     def consolidate_system_metrics(self) -> Dict:
         """
@@ -638,9 +575,12 @@ class OrchestratorAgent(BaseAgent):
                 success_rate = success_count / len(recent_executions)
                 
                 avg_execution_time = sum(e["result"].get("execution_time", 0) for e in recent_executions) / len(recent_executions)
+                cpu_times = [e["result"]["cpu_time"] for e in recent_executions if e["result"].get("cpu_time") is not None]
+                avg_cpu_time = sum(cpu_times) / len(cpu_times) if cpu_times else 0
             else:
                 success_rate = 0
                 avg_execution_time = 0
+                avg_cpu_time = 0
             
             performance = {
                 "system_metrics": system_metrics,
@@ -648,6 +588,7 @@ class OrchestratorAgent(BaseAgent):
                     "total_executions": len(self.execution_history),
                     "recent_success_rate": round(success_rate, 3),
                     "avg_execution_time": round(avg_execution_time, 2),
+                    "avg_cpu_time": round(avg_cpu_time, 3),
                     "active_monitoring_threads": len(self.monitoring_threads),
                     "task_queue_size": self.task_queue.qsize()
                 },
@@ -738,42 +679,48 @@ class OrchestratorAgent(BaseAgent):
             self.handle_error(e, "suggest_improvements")
             return []
     
-    def run_orchestration_cycle(self):
-        """Executa um ciclo de orquestração"""
+    def run_orchestration_cycle(self) -> Dict[str, Dict]:
+        """
+        Executa um ciclo de orquestração
+        
+        Todos os agentes no horário rodam em processo (AgentScheduler): os
+        independentes em paralelo, até max_concurrent_agents, e os dependentes
+        depois de suas dependências.
+        
+        Returns:
+            Dict: Resultado por agente executado
+        """
         try:
-            # Verificar próximo agente a executar
-            next_agent = self.get_next_agent_to_execute()
+            results = asyncio.run(self.scheduler.run_cycle())
             
-            if next_agent:
-                self.logger.debug(f"Executando agente: {next_agent}")
-                
-                # Executar agente
-                result = self.execute_agent(next_agent)
-                
+            for agent_name, result in results.items():
                 # Registrar execução
                 execution_record = {
                     "timestamp": datetime.now().isoformat(),
-                    "agent": next_agent,
+                    "agent": agent_name,
                     "result": result
                 }
                 
                 self.execution_history.append(execution_record)
                 
-                # Manter histórico limitado
-                if len(self.execution_history) > 1000:
-                    self.execution_history = self.execution_history[-1000:]
-                
                 # Tratar falhas se necessário
                 if result["status"] in ["failed", "error", "timeout"]:
-                    self.handle_agent_failure(next_agent, result)
+                    self.handle_agent_failure(agent_name, result)
+            
+            # Manter histórico limitado
+            if len(self.execution_history) > 1000:
+                self.execution_history = self.execution_history[-1000:]
             
             # Consolidar métricas periodicamente
-            if len(self.execution_history) % 10 == 0:  # A cada 10 execuções
+            if results and len(self.execution_history) % 10 == 0:  # A cada 10 execuções
                 self.system_metrics = self.consolidate_system_metrics()
                 self.save_metrics(self.system_metrics)
             
+            return results
+            
         except Exception as e:
             self.handle_error(e, "run_orchestration_cycle")
+            return {}
     
     def run(self):
         """
@@ -819,6 +766,8 @@ class OrchestratorAgent(BaseAgent):
         except Exception as e:
             self.handle_error(e, "run")
             raise
+        finally:
+            self.scheduler.shutdown()
 
 def main():
     """Função principal para execução standalone"""
@@ -71,19 +71,9 @@ class PerformanceAgent(BaseAgent):
         try:
             cutoff_time = datetime.now() - timedelta(hours=period_hours)
             
-            # Carregar sinais
-            signals = []
-            signals_dir = Path("data/signals")
-            if signals_dir.exists():
-                for signal_file in signals_dir.glob("*.json"):
-                    try:
-                        file_time = datetime.fromtimestamp(signal_file.stat().st_mtime)
-                        if file_time >= cutoff_time:
-                            with open(signal_file, 'r', encoding='utf-8') as f:
-                                signal = json.load(f)
-                                signals.append(signal)
-                    except Exception:
-                        continue
+            # Carregar sinais do período (índice type/created_at do event store)
+            since = cutoff_time.timestamp()
+            signals = [event.payload for event in self.events.recent("signals", limit=None, since=since)]
             
             # Carregar histórico de portfolio
             portfolio_history = []
@@ -97,18 +87,7 @@ class PerformanceAgent(BaseAgent):
                     pass
             
             # Carregar alertas de risco
-            risk_alerts = []
-            alerts_dir = Path("data/alerts")
-            if alerts_dir.exists():
-                for alert_file in alerts_dir.glob("*.json"):
-                    try:
-                        file_time = datetime.fromtimestamp(alert_file.stat().st_mtime)
-                        if file_time >= cutoff_time:
-                            with open(alert_file, 'r', encoding='utf-8') as f:
-                                alert = json.load(f)
-                                risk_alerts.append(alert)
-                    except Exception:
-                        continue
+            risk_alerts = [event.payload for event in self.events.recent("alerts", limit=None, since=since)]
             
             return {
                 "signals": signals,
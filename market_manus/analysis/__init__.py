@@ -4,6 +4,6 @@ Contains market context and regime analysis tools
 """
 
 from .market_context_analyzer import MarketContextAnalyzer, MarketContext
-from .volume_filter import VolumeFilter, VolumeFilterPipeline
+from .volume_filter import VolumeFilter, VolumeFilterPipeline, StreamingVolumeZScore
 
-__all__ = ['MarketContextAnalyzer', 'MarketContext', 'VolumeFilter', 'VolumeFilterPipeline']
+__all__ = ['MarketContextAnalyzer', 'MarketContext', 'VolumeFilter', 'VolumeFilterPipeline', 'StreamingVolumeZScore']
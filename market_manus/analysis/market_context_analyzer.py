@@ -4,11 +4,15 @@ Analisa últimos 60 dias para identificar regime de mercado (BULLISH/BEARISH/COR
 Usado para ajustar estratégias baseado no contexto macro
 """
 
+import threading
+import time
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, Optional, Tuple
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+
+from market_manus.data_providers.historical_cache import INTERVAL_MS, HistoricalDataCache
+from market_manus.data_providers.kline_paginator import get_paginator
 
 
 @dataclass
@@ -27,18 +31,61 @@ class MarketContext:
         return f"{emoji} {self.regime} (Confiança: {self.confidence:.1%})"
 
 
+@dataclass
+class _ContextWindow:
+    """Janela em memória de um (símbolo, timeframe): candles fechados e último contexto"""
+    arrays: Dict[str, np.ndarray]
+    refreshed_at: float
+    covered_until: int  # Primeiro timestamp ainda não coberto (a próxima leitura começa nele)
+    context: Optional[MarketContext] = None
+
+
 class MarketContextAnalyzer:
     """
     Analisa contexto de mercado dos últimos 60 dias
     Identifica regime e ajusta estratégias
+    
+    Cada (símbolo, timeframe) mantém sua janela em memória: dentro do TTL o
+    contexto é servido sem I/O; depois dele só os candles fechados desde a
+    última atualização são lidos (do HistoricalDataCache ou, nas lacunas, da
+    API), e os indicadores são recalculados apenas sobre a cauda necessária.
+    Cada chave tem seu próprio lock: atualizações de símbolos diferentes
+    rodam em paralelo e só chamadas para a mesma chave esperam umas pelas outras.
     """
     
-    def __init__(self, lookback_days: int = 60):
+    # Converter timeframe para formato da API
+    TIMEFRAME_MAP = {
+        "1m": "1", "5m": "5", "15m": "15",
+        "30m": "30", "1h": "60", "4h": "240", "1d": "D"
+    }
+
+    # Candles de cauda suficientes para o último valor de cada indicador
+    MA_PERIOD = 50
+    MA_SLOPE_POINTS = 20
+    INDICATOR_PERIOD = 14
+    
+    def __init__(
+        self,
+        lookback_days: int = 60,
+        cache: Optional[HistoricalDataCache] = None,
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.time
+    ):
         """
         Args:
             lookback_days: Número de dias para análise (padrão 60)
+            cache: Cache de klines em disco (padrão: diretório data)
+            ttl_seconds: Validade do contexto em memória antes de nova atualização
+            clock: Relógio em segundos desde a época (injetável para testes)
         """
         self.lookback_days = lookback_days
+        self.cache = cache or HistoricalDataCache(cache_dir="data")
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._windows: Dict[Tuple[str, str], _ContextWindow] = {}
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()  # Protege _windows, _key_locks e stats
+        self.stats = {"memory_hits": 0, "refreshes": 0, "candles_fetched": 0}
         
         # Thresholds para classificação
         self.adx_strong_threshold = 25  # ADX > 25 = tendência forte
@@ -48,7 +95,8 @@ class MarketContextAnalyzer:
         self,
         data_provider,
         symbol: str,
-        timeframe: str = "1h"
+        timeframe: str = "1h",
+        force_refresh: bool = False
     ) -> Optional[MarketContext]:
         """
         Analisa contexto de mercado
@@ -57,115 +105,168 @@ class MarketContextAnalyzer:
             data_provider: Provider de dados (Binance/Bybit)
             symbol: Símbolo do ativo
             timeframe: Timeframe para análise
+            force_refresh: Ignora o TTL e atualiza a janela
             
         Returns:
             MarketContext com análise completa ou None se falhar
         """
         try:
-            # Buscar dados dos últimos 60 dias
-            df = self._fetch_context_data(data_provider, symbol, timeframe)
+            api_timeframe = self.TIMEFRAME_MAP.get(timeframe, "60")
+            key = (symbol, api_timeframe)
             
-            if df is None or len(df) < 50:
-                print(f"⚠️ Dados insuficientes para análise de contexto ({len(df) if df is not None else 0} candles)")
-                return None
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
             
-            # Calcular indicadores
-            ma_slope = self._calculate_ma_slope(df)
-            adx = self._calculate_adx(df)
-            atr_normalized = self._calculate_normalized_atr(df)
-            price_change_pct = ((df['close'].iloc[-1] / df['close'].iloc[0]) - 1) * 100
-            
-            # Determinar regime
-            regime, confidence = self._determine_regime(ma_slope, adx, price_change_pct)
-            
-            # Gerar recomendações de ajuste de estratégias
-            recommendations = self._generate_strategy_adjustments(regime, confidence, adx)
-            
-            # Criar período de análise
-            start_date = df.index[0].strftime("%d/%m/%Y")
-            end_date = df.index[-1].strftime("%d/%m/%Y")
-            analysis_period = f"{start_date} → {end_date}"
-            
-            return MarketContext(
-                regime=regime,
-                confidence=confidence,
-                trend_strength=adx,
-                volatility=atr_normalized,
-                price_change_pct=price_change_pct,
-                recommendations=recommendations,
-                analysis_period=analysis_period
-            )
+            with key_lock:
+                with self._lock:
+                    window = self._windows.get(key)
+                now = self._clock()
+                if (window is not None and window.context is not None and not force_refresh
+                        and now - window.refreshed_at < self.ttl_seconds):
+                    with self._lock:
+                        self.stats["memory_hits"] += 1
+                    return window.context
+                
+                # Atualizar janela (apenas candles novos desde a última leitura), fora do lock global
+                arrays, covered_until = self._refresh_window(data_provider, symbol, api_timeframe, window, now)
+                window = _ContextWindow(arrays=arrays, refreshed_at=now, covered_until=covered_until)
+                with self._lock:
+                    self._windows[key] = window
+                    self.stats["refreshes"] += 1
+                
+                if len(arrays["timestamp"]) < 50:
+                    print(f"⚠️ Dados insuficientes para análise de contexto ({len(arrays['timestamp'])} candles)")
+                    return None
+                
+                window.context = self._build_context(arrays)
+                return window.context
             
         except Exception as e:
             print(f"❌ Erro ao analisar contexto de mercado: {e}")
             return None
     
-    def _fetch_context_data(
+    def invalidate(self, symbol: Optional[str] = None):
+        """Descarta janelas em memória (todas ou de um símbolo)"""
+        with self._lock:
+            for key in [key for key in self._windows if symbol is None or key[0] == symbol]:
+                del self._windows[key]
+    
+    def _refresh_window(
         self,
         data_provider,
         symbol: str,
-        timeframe: str
-    ) -> Optional[pd.DataFrame]:
-        """Busca dados históricos para análise de contexto"""
-        try:
-            # Converter timeframe para formato da API
-            timeframe_map = {
-                "1m": "1", "5m": "5", "15m": "15",
-                "30m": "30", "1h": "60", "4h": "240", "1d": "D"
-            }
-            api_timeframe = timeframe_map.get(timeframe, "60")
-            
-            # Calcular timestamps
-            end_time = datetime.now()
-            start_time = end_time - timedelta(days=self.lookback_days)
-            
-            start_ts = int(start_time.timestamp() * 1000)
-            end_ts = int(end_time.timestamp() * 1000)
-            
-            # Buscar dados
-            all_klines = []
-            current_start = start_ts
-            
-            while current_start < end_ts:
-                klines = data_provider.get_kline(
-                    category='spot',
-                    symbol=symbol,
-                    interval=api_timeframe,
-                    limit=500,
-                    start=current_start,
-                    end=end_ts
-                )
-                
-                if not klines:
-                    break
-                
-                all_klines.extend(klines)
-                last_ts = int(klines[-1][0])
-                current_start = last_ts + (60 * 1000)
-            
-            if not all_klines:
-                return None
-            
-            # Converter para DataFrame
-            df = pd.DataFrame(all_klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume'
-            ])
-            
-            df['timestamp'] = pd.to_datetime(df['timestamp'].astype(int), unit='ms')
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = pd.to_numeric(df[col])
-            
-            df.set_index('timestamp', inplace=True)
-            df.sort_index(inplace=True)
-            
-            return df
-            
-        except Exception as e:
-            print(f"❌ Erro ao buscar dados de contexto: {e}")
-            return None
+        interval: str,
+        window: Optional[_ContextWindow],
+        now: float
+    ) -> Tuple[Dict[str, np.ndarray], int]:
+        """
+        Janela [agora - lookback_days, último candle fechado) em arrays tipados
+        
+        Com janela anterior, só o trecho a partir do primeiro timestamp não
+        coberto é lido e anexado (uma lacuna que falhou na atualização anterior
+        é buscada de novo); o início é aparado para manter lookback_days.
+        
+        Returns:
+            (arrays, primeiro timestamp não coberto)
+        """
+        candle_duration = INTERVAL_MS.get(interval, 60 * 60 * 1000)
+        closed_until = (int(now * 1000) // candle_duration) * candle_duration
+        start_ts = closed_until - self.lookback_days * 24 * 60 * 60 * 1000
+        
+        previous = window.arrays if window is not None else None
+        if previous is not None and window.covered_until > start_ts:
+            fetch_from = window.covered_until
+        else:
+            previous, fetch_from = None, start_ts
+        
+        fresh, covered_until = self._load_range(data_provider, symbol, interval, fetch_from, closed_until)
+        if previous is None:
+            return fresh, covered_until
+        
+        # Candles anteriores a start_ts saem; os de fetch_from em diante foram relidos
+        keep = (previous["timestamp"] >= start_ts) & (previous["timestamp"] < fetch_from)
+        return {name: np.concatenate([previous[name][keep], fresh[name]]) for name in previous}, covered_until
+    
+    def _load_range(
+        self,
+        data_provider,
+        symbol: str,
+        interval: str,
+        start_ts: int,
+        end_ts: int
+    ) -> Tuple[Dict[str, np.ndarray], int]:
+        """
+        Lê [start_ts, end_ts) do cache, buscando na API apenas as lacunas
+        
+        Returns:
+            (arrays, início da primeira lacuna que continua sem cobertura ou end_ts)
+        """
+        covered_until = max(start_ts, end_ts)
+        if start_ts < end_ts:
+            gaps = self.cache.missing_ranges(symbol, interval, start_ts, end_ts)
+            for gap_start, gap_end in gaps:
+                # Buscar dados (lotes concorrentes, com novas tentativas)
+                fetched = get_paginator(data_provider).fetch(data_provider, symbol, interval, gap_start, gap_end)
+                with self._lock:
+                    self.stats["candles_fetched"] += len(fetched.klines)
+                for covered_start, covered_end in fetched.covered_ranges:
+                    self.cache.save_range(symbol, interval, covered_start, covered_end, fetched.klines)
+            if gaps:
+                remaining = self.cache.missing_ranges(symbol, interval, start_ts, end_ts)
+                if remaining:
+                    covered_until = remaining[0][0]
+        arrays = self.cache.get_range_arrays(symbol, interval, start_ts, max(start_ts, end_ts))
+        return arrays, covered_until
     
-    def _calculate_ma_slope(self, df: pd.DataFrame, period: int = 50) -> float:
-        """Calcula inclinação da MA para identificar tendência"""
+    def _build_context(self, arrays: Dict[str, np.ndarray]) -> MarketContext:
+        """Contexto a partir da janela; indicadores calculados só sobre a cauda necessária"""
+        closes = arrays["close"]
+        
+        # Calcular indicadores
+        ma_tail = self._tail_frame(arrays, self.MA_PERIOD + self.MA_SLOPE_POINTS - 1)
+        ma_slope = self._calculate_ma_slope(ma_tail, self.MA_PERIOD, avg_price=float(closes.mean()))
+        adx = self._calculate_adx(self._tail_frame(arrays, 2 * self.INDICATOR_PERIOD + 1), self.INDICATOR_PERIOD)
+        atr_normalized = self._calculate_normalized_atr(
+            self._tail_frame(arrays, self.INDICATOR_PERIOD + 1), self.INDICATOR_PERIOD
+        )
+        price_change_pct = ((closes[-1] / closes[0]) - 1) * 100
+        
+        # Determinar regime
+        regime, confidence = self._determine_regime(ma_slope, adx, price_change_pct)
+        
+        # Gerar recomendações de ajuste de estratégias
+        recommendations = self._generate_strategy_adjustments(regime, confidence, adx)
+        
+        # Criar período de análise
+        start_date = pd.to_datetime(int(arrays["timestamp"][0]), unit='ms').strftime("%d/%m/%Y")
+        end_date = pd.to_datetime(int(arrays["timestamp"][-1]), unit='ms').strftime("%d/%m/%Y")
+        analysis_period = f"{start_date} → {end_date}"
+        
+        return MarketContext(
+            regime=regime,
+            confidence=confidence,
+            trend_strength=adx,
+            volatility=atr_normalized,
+            price_change_pct=price_change_pct,
+            recommendations=recommendations,
+            analysis_period=analysis_period
+        )
+    
+    @staticmethod
+    def _tail_frame(arrays: Dict[str, np.ndarray], rows: int) -> pd.DataFrame:
+        """Últimos `rows` candles como DataFrame indexado por data (formato dos _calculate_*)"""
+        df = pd.DataFrame({
+            col: arrays[col][-rows:] for col in ['open', 'high', 'low', 'close', 'volume']
+        }, index=pd.to_datetime(arrays["timestamp"][-rows:], unit='ms'))
+        df.index.name = 'timestamp'
+        return df
+    
+    def _calculate_ma_slope(self, df: pd.DataFrame, period: int = 50, avg_price: Optional[float] = None) -> float:
+        """
+        Calcula inclinação da MA para identificar tendência
+        
+        avg_price: preço médio da janela inteira, quando df é só a cauda
+        """
         ma = df['close'].rolling(window=period).mean()
         
         # Calcular slope usando últimos 20 períodos
@@ -179,7 +280,8 @@ class MarketContextAnalyzer:
         slope = np.polyfit(x, y, 1)[0]
         
         # Normalizar pelo preço médio
-        avg_price = df['close'].mean()
+        if avg_price is None:
+            avg_price = df['close'].mean()
         normalized_slope = slope / avg_price if avg_price > 0 else 0
         
         return normalized_slope
@@ -205,8 +307,8 @@ class MarketContextAnalyzer:
         
         # Smoothed indicators
         atr = tr.rolling(window=period).mean()
-        plus_di = 100 * pd.Series(plus_dm).rolling(window=period).mean() / atr
-        minus_di = 100 * pd.Series(minus_dm).rolling(window=period).mean() / atr
+        plus_di = 100 * pd.Series(plus_dm, index=df.index).rolling(window=period).mean() / atr
+        minus_di = 100 * pd.Series(minus_dm, index=df.index).rolling(window=period).mean() / atr
         
         # ADX
         dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
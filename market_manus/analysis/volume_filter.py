@@ -3,10 +3,14 @@ Volume Filter - Filtra e amplifica sinais baseado em volume
 Normaliza volume via z-score e ajusta confidence de sinais
 """
 
+import math
+
 import pandas as pd
 import numpy as np
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from market_manus.core.signal import Signal
+from market_manus.strategies.signal_series import SignalSeries
+from market_manus.strategies.streaming_indicators import RollingWindowStats
 
 
 class VolumeFilter:
@@ -59,6 +63,22 @@ class VolumeFilter:
         
         return zscore
     
+    def zscore_masks(self, zscores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classificação vetorizada dos z-scores
+        
+        Returns:
+            (rejeitados, amplificados): máscaras booleanas; o restante é normal
+        """
+        zscores = np.asarray(zscores, dtype=np.float64)
+        rejected = zscores < self.threshold_reject
+        boosted = ~rejected & (zscores > self.threshold_boost)
+        return rejected, boosted
+    
+    def streaming_zscore(self) -> 'StreamingVolumeZScore':
+        """Z-score incremental com o mesmo lookback (para engines em tempo real)"""
+        return StreamingVolumeZScore(self.lookback_period)
+    
     def filter_signal(
         self,
         signal: Signal,
@@ -300,51 +320,22 @@ class VolumeFilterPipeline:
             Dict com sinais filtrados (mesmo formato, preserva tuplas se presente)
         """
         # Calcular z-scores uma vez
-        volume_zscores = self.volume_filter.calculate_volume_zscore(volumes)
+        zscores = self.volume_filter.calculate_volume_zscore(volumes).to_numpy(dtype=np.float64)
         
         filtered_signals = {}
         
         for strategy_key, data in strategy_signals.items():
             signal_indices = data.get("signal_indices", [])
             
-            self.stats["signals_received"] += len(signal_indices)
-            
-            # Filtrar índices baseado em volume
-            filtered_indices = []
+            # FASE 2: itens podem ser tuplas (índice, direção) ou índices simples
+            indices = np.fromiter(
+                (item[0] if isinstance(item, tuple) else item for item in signal_indices),
+                dtype=np.int64, count=len(signal_indices)
+            )
+            keep = self._filter_mask(indices, zscores)
             
-            for signal_item in signal_indices:
-                # FASE 2: Desempacotar tupla (índice, direção) se presente
-                if isinstance(signal_item, tuple):
-                    idx, direction = signal_item
-                else:
-                    idx = signal_item
-                    direction = None
-                
-                if idx >= len(volume_zscores):
-                    continue
-                
-                zscore = volume_zscores.iloc[idx]
-                
-                # Aplicar critérios de filtro
-                if zscore < self.volume_filter.threshold_reject:
-                    self.stats["signals_rejected"] += 1
-                    continue  # Rejeitar
-                
-                elif zscore > self.volume_filter.threshold_boost:
-                    self.stats["signals_boosted"] += 1
-                    # Preservar formato original (tupla ou int)
-                    if direction is not None:
-                        filtered_indices.append((idx, direction))
-                    else:
-                        filtered_indices.append(idx)
-                
-                else:
-                    self.stats["signals_passed"] += 1
-                    # Preservar formato original (tupla ou int)
-                    if direction is not None:
-                        filtered_indices.append((idx, direction))
-                    else:
-                        filtered_indices.append(idx)
+            # Preservar formato original (tupla ou int)
+            filtered_indices = [signal_indices[k] for k in np.flatnonzero(keep)]
             
             # Criar entrada filtrada
             filtered_signals[strategy_key] = {
@@ -357,6 +348,47 @@ class VolumeFilterPipeline:
         
         return filtered_signals
     
+    def apply_to_signal_series(
+        self,
+        strategy_series: Dict[str, SignalSeries],
+        volumes: pd.Series
+    ) -> Dict[str, SignalSeries]:
+        """
+        Caminho em lote de apply_to_strategy_signals para arrays de índice/direção
+        
+        Mesmos critérios e contadores, aplicados por máscaras sobre o array de
+        z-scores calculado uma vez (sem tuplas nem Signal por sinal).
+        
+        Args:
+            strategy_series: Dict {strategy_key: SignalSeries}
+            volumes: Série de volumes
+            
+        Returns:
+            Dict {strategy_key: SignalSeries} só com os sinais aceitos
+        """
+        zscores = self.volume_filter.calculate_volume_zscore(volumes).to_numpy(dtype=np.float64)
+        
+        filtered = {}
+        for strategy_key, series in strategy_series.items():
+            keep = self._filter_mask(series.index, zscores)
+            filtered[strategy_key] = SignalSeries(series.index[keep], series.direction[keep])
+        return filtered
+    
+    def _filter_mask(self, indices: np.ndarray, zscores: np.ndarray) -> np.ndarray:
+        """Máscara dos sinais aceitos; atualiza os contadores (índices fora da série não contam)"""
+        self.stats["signals_received"] += len(indices)
+        
+        in_range = indices < len(zscores)
+        rejected, boosted = self.volume_filter.zscore_masks(zscores[indices[in_range]])
+        
+        self.stats["signals_rejected"] += int(rejected.sum())
+        self.stats["signals_boosted"] += int(boosted.sum())
+        self.stats["signals_passed"] += int((~rejected & ~boosted).sum())
+        
+        keep = np.zeros(len(indices), dtype=bool)
+        keep[np.flatnonzero(in_range)[~rejected]] = True
+        return keep
+    
     def get_stats_summary(self) -> str:
         """Retorna resumo das estatísticas do pipeline"""
         total = self.stats["signals_received"]
@@ -383,3 +415,44 @@ class VolumeFilterPipeline:
             "signals_boosted": 0,
             "signals_passed": 0
         }
+
+
+class StreamingVolumeZScore:
+    """
+    Z-score de volume incremental (O(1) por candle) para engines em tempo real
+    
+    Mesma definição de VolumeFilter.calculate_volume_zscore: média e desvio
+    padrão amostral dos últimos `lookback_period` volumes incluindo o atual;
+    janela incompleta ou desvio zero sem variação resultam em 0.
+    """
+    
+    def __init__(self, lookback_period: int = 50):
+        self._window = RollingWindowStats(lookback_period, ddof=1)
+        self.value = 0.0
+    
+    def update(self, volume: float, closed: bool = True) -> float:
+        """
+        Args:
+            volume: Volume do candle
+            closed: False para candle em formação (não altera a janela)
+        
+        Returns:
+            Z-score do volume
+        """
+        if closed:
+            self._window.push(volume)
+            mean, std = self._window.mean(), self._window.std()
+        else:
+            mean, std = self._window.mean(volume), self._window.std(volume)
+        self.value = _zscore(volume, mean, std)
+        return self.value
+
+
+def _zscore(value: float, mean: float, std: float) -> float:
+    """(valor - média) / desvio com a semântica do pandas + fillna(0)"""
+    deviation = value - mean
+    if math.isnan(deviation) or math.isnan(std):
+        return 0.0
+    if std == 0:
+        return 0.0 if deviation == 0 else math.copysign(math.inf, deviation)
+    return deviation / std
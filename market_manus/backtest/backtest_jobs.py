@@ -0,0 +1,761 @@
+"""
+Fila de jobs de backtest para a interface web
+
+POST /api/backtest só valida a configuração e enfileira: o backtest de
+confluência (download de klines, estratégias, simulação) roda em um pool
+limitado de workers (processos por padrão), fora das threads de requisição.
+
+- Progresso por job: cada chamada de progress() do job chega ao processo
+  principal por uma fila e é repassada a on_progress (sala Socket.IO do job)
+- Cancelamento: jobs na fila são descartados; jobs em execução param no
+  próximo ponto de progresso (JobCancelled). Um job deduplicado só é
+  cancelado quando o último solicitante desiste, e depois que o resultado é
+  gravado no repositório (commit) o cancelamento não se aplica mais. Cancelar
+  e fazer o commit são test-and-set sob o mesmo lock (_JobControl, do Manager
+  no pool de processos): cancel() nunca devolve True para um job que grava
+- Limite de profundidade: acima de max_workers + max_queue jobs em andamento,
+  submit() levanta BacktestQueueFull
+- Deduplicação: a mesma configuração em andamento devolve o job existente
+- Cache de resultados: configurações já concluídas são respondidas na hora
+  (LRU por hash da configuração); períodos que terminam hoje ou depois
+  (dados ainda mudando) não entram no cache
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import pandas as pd
+
+# Repositório de performance reutilizado pelos backtests do processo
+_worker_repository = None
+
+# Timeframes da UI (1m, 5m, 15m, 1h, 4h, 1d) -> formato do engine (1, 5, 15, 60, 240, D)
+TIMEFRAME_UI_TO_ENGINE = {
+    '1m': '1', '5m': '5', '15m': '15', '30m': '30', '1h': '60', '4h': '240', '1d': 'D'
+}
+
+# Estados terminais de um job
+FINISHED_STATUSES = ("done", "error", "cancelled")
+
+
+class BacktestQueueFull(Exception):
+    """Limite de jobs em andamento atingido"""
+
+
+class JobCancelled(Exception):
+    """Levantada no worker quando o job foi cancelado"""
+
+
+def _normalize_dates(start: Optional[str], end: Optional[str]):
+    """Datas YYYY-MM-DD válidas; padrão = últimos 30 dias até hoje"""
+    try:
+        start_dt = datetime.strptime(start, '%Y-%m-%d') if start else None
+    except Exception:
+        start_dt = None
+    try:
+        end_dt = datetime.strptime(end, '%Y-%m-%d') if end else None
+    except Exception:
+        end_dt = None
+    # End date padrão: hoje
+    if not end_dt:
+        end_dt = datetime.now()
+    # Se start ausente/igual/maior que end, usar janela padrão de 30 dias
+    if not start_dt or start_dt >= end_dt:
+        start_dt = end_dt - timedelta(days=30)
+    return start_dt.strftime('%Y-%m-%d'), end_dt.strftime('%Y-%m-%d')
+
+
+def normalize_backtest_config(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Configuração canônica de um backtest a partir do JSON da requisição
+
+    Timeframe e datas são normalizados aqui para que requisições equivalentes
+    tenham o mesmo hash (deduplicação e cache de resultados).
+
+    Raises:
+        ValueError: Nenhuma estratégia selecionada
+    """
+    strategies = list(data.get('strategies') or [])
+    if not strategies:
+        raise ValueError('Selecione pelo menos uma estratégia')
+
+    timeframe = str(data.get('timeframe', '15'))
+    start_date, end_date = _normalize_dates(data.get('start_date'), data.get('end_date'))
+    return {
+        'exchange': data.get('exchange', 'binance'),
+        'asset': data.get('asset', 'BTCUSDT'),
+        # timeframe pode já vir no formato do engine; manter se não houver mapeamento
+        'timeframe': TIMEFRAME_UI_TO_ENGINE.get(timeframe.lower(), timeframe),
+        'strategies': strategies,
+        'mode': data.get('mode', 'weighted'),
+        'start_date': start_date,
+        'end_date': end_date,
+        'capital': float(data.get('capital', 10000)),
+        'manus_ai': bool(data.get('manus_ai', False)),
+        'semantic_kernel': bool(data.get('semantic_kernel', False)),
+        'trading_costs': bool(data.get('trading_costs', False)),
+        'combination_id': data.get('combination_id'),
+        'combination_name': data.get('combination_name'),
+    }
+
+
+def is_open_ended(config: Dict[str, Any]) -> bool:
+    """O período vai até hoje (padrão) ou além: o resultado muda com os candles novos"""
+    return config['end_date'] >= datetime.now().strftime('%Y-%m-%d')
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """Hash estável da configuração (chaves ordenadas)"""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def missing_exchange_keys(exchange: str) -> Optional[str]:
+    """Mensagem de erro se as chaves da exchange não estão no ambiente (checada antes de enfileirar)"""
+    if exchange == 'bybit':
+        if not os.getenv('BYBIT_API_KEY') or not os.getenv('BYBIT_API_SECRET'):
+            return 'Chaves API do Bybit não configuradas. Configure BYBIT_API_KEY e BYBIT_API_SECRET.'
+    elif not os.getenv('BINANCE_API_KEY') or not os.getenv('BINANCE_API_SECRET'):
+        return 'Chaves API do Binance não configuradas. Configure BINANCE_API_KEY e BINANCE_API_SECRET.'
+    return None
+
+
+def _create_data_provider(exchange: str):
+    """Provider da exchange escolhida com as chaves do ambiente"""
+    if exchange == 'bybit':
+        from market_manus.data_providers.bybit_real_data_provider import BybitRealDataProvider
+        return BybitRealDataProvider(
+            api_key=os.getenv('BYBIT_API_KEY', ''), api_secret=os.getenv('BYBIT_API_SECRET', '')
+        )
+    from market_manus.data_providers.binance_data_provider import BinanceDataProvider
+    return BinanceDataProvider(
+        api_key=os.getenv('BINANCE_API_KEY', ''), api_secret=os.getenv('BINANCE_API_SECRET', '')
+    )
+
+
+def _get_worker_repository():
+    """Repositório de performance do processo worker (conexões reutilizadas entre jobs)"""
+    from market_manus.performance.history_repository import PerformanceHistoryRepository
+
+    global _worker_repository
+    if _worker_repository is None:
+        _worker_repository = PerformanceHistoryRepository()
+    return _worker_repository
+
+
+def run_confluence_backtest(config: Dict[str, Any], progress: Callable[..., None]) -> Dict[str, Any]:
+    """
+    Backtest de confluência completo (executado no worker)
+
+    Args:
+        config: Saída de normalize_backtest_config
+        progress: progress(percent, message, extra=None, commit=False); levanta JobCancelled se o
+            job foi cancelado. Com commit=True o job passa do ponto sem volta (a gravação do
+            resultado vem a seguir) e cancelamentos posteriores são ignorados
+
+    Returns:
+        Payload de resposta da API (status, backtest_id, results, strategy_details, ai, ...)
+    """
+    from market_manus.confluence_mode.confluence_mode_module import ConfluenceModeModule
+    from market_manus.performance.analytics_service import PerformanceAnalyticsService
+    from market_manus.performance.history_repository import (
+        BacktestResult, StrategyContribution
+    )
+
+    asset, tf_engine = config['asset'], config['timeframe']
+    strategies, confluence_mode = config['strategies'], config['mode']
+    start_date, end_date = config['start_date'], config['end_date']
+    initial_capital = config['capital']
+    manus_ai_enabled, sk_enabled = config['manus_ai'], config['semantic_kernel']
+
+    progress(5, 'Iniciando backtest', {
+        'exchange': config['exchange'],
+        'asset': asset,
+        'timeframe': tf_engine,
+        'strategies': strategies,
+        'mode': confluence_mode
+    })
+
+    data_provider = _create_data_provider(config['exchange'])
+    progress(10, f"Conectado à {'Bybit' if config['exchange'] == 'bybit' else 'Binance'} e preparando provider")
+
+    repo = _get_worker_repository()
+    confluence_module = ConfluenceModeModule(data_provider=data_provider, capital_manager=None, performance_repo=repo)
+    confluence_module.selected_asset = asset
+    confluence_module.selected_timeframe = tf_engine
+    confluence_module.selected_strategies = strategies
+    confluence_module.selected_confluence_mode = confluence_mode
+    confluence_module.custom_start_date = start_date
+    confluence_module.custom_end_date = end_date
+    confluence_module.manus_ai_enabled = manus_ai_enabled
+    confluence_module.sk_advisor_enabled = sk_enabled
+    confluence_module.trading_costs_enabled = config['trading_costs']
+
+    # Buscar dados históricos
+    progress(15, 'Carregando dados históricos', {'start_date': start_date, 'end_date': end_date})
+    ohlcv, _ = confluence_module._fetch_historical_arrays(
+        symbol=asset, interval=tf_engine, start_date=start_date, end_date=end_date
+    )
+
+    total_candles = len(ohlcv['close']) if ohlcv else 0
+    if total_candles < 50:
+        raise ValueError(f'Dados insuficientes: {total_candles} candles recebidos')
+
+    progress(25, f'Dados carregados: {total_candles} candles')
+    # Colunas OHLCV já tipadas (float64)
+    opens, highs, lows, closes = ohlcv['open'], ohlcv['high'], ohlcv['low'], ohlcv['close']
+    volumes = pd.Series(ohlcv['volume'])
+
+    progress(35, 'Pré-processando OHLCV e volume')
+    # Executar estratégias
+    strategy_signals = {}
+    for idx, strategy_key in enumerate(strategies, start=1):
+        if strategy_key in confluence_module.available_strategies:
+            strategy = confluence_module.available_strategies[strategy_key]
+            progress(35 + int(25 * (idx / max(1, len(strategies)))), f'Calculando sinais: {strategy["name"]}')
+            strategy_signals[strategy_key] = {
+                "name": strategy['name'],
+                "signal_indices": confluence_module._execute_strategy_on_data(strategy_key, closes, highs, lows, opens),
+                "weight": strategy.get('weight', 1.0)
+            }
+
+    # Aplicar filtro de volume
+    if volumes.sum() > 0:
+        confluence_module.volume_pipeline.reset_stats()
+        filtered_strategy_signals = confluence_module.volume_pipeline.apply_to_strategy_signals(strategy_signals, volumes)
+    else:
+        filtered_strategy_signals = strategy_signals
+    progress(65, 'Aplicando filtro de volume e limpeza de sinais')
+
+    # Calcular confluência
+    confluence_signals = confluence_module._calculate_confluence_signals(filtered_strategy_signals)
+    progress(75, f'Confluência calculada — {len(confluence_signals)} sinais totais')
+
+    # Simular trades
+    final_capital, total_trades, winning_trades = confluence_module._simulate_trades_from_signals(
+        confluence_signals, closes, initial_capital, highs, lows, fee_model=confluence_module._trade_fee_model()
+    )
+    progress(90, f'Simulando trades — {total_trades} executados')
+
+    losing_trades = total_trades - winning_trades
+    pnl = final_capital - initial_capital
+    roi = (pnl / initial_capital) * 100
+    win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
+
+    # Contar sinais por direção
+    buy_signals = sum(1 for _, direction in confluence_signals if direction == "BUY")
+    sell_signals = sum(1 for _, direction in confluence_signals if direction == "SELL")
+
+    # Salvar no repositório de performance (um por processo worker)
+    backtest_id = str(uuid.uuid4())[:8]
+    backtest_result = BacktestResult(
+        backtest_id=backtest_id,
+        timestamp=datetime.now().isoformat(),
+        combination_id=config.get('combination_id'),
+        combination_name=config.get('combination_name'),
+        strategies=strategies,
+        timeframe=tf_engine,
+        asset=asset,
+        start_date=start_date or "auto",
+        end_date=end_date or "auto",
+        confluence_mode=confluence_mode,
+        win_rate=win_rate,
+        total_trades=total_trades,
+        winning_trades=winning_trades,
+        losing_trades=losing_trades,
+        initial_capital=initial_capital,
+        final_capital=final_capital,
+        roi=roi,
+        total_signals=len(confluence_signals),
+        manus_ai_enabled=manus_ai_enabled,
+        semantic_kernel_enabled=sk_enabled
+    )
+    contributions = [
+        StrategyContribution(
+            backtest_id=backtest_id,
+            strategy_key=strategy_key,
+            strategy_name=data['name'],
+            total_signals=data.get('original_count', len(data['signal_indices'])),
+            signals_after_volume_filter=len(data['signal_indices']),
+            winning_signals=0,  # Não temos dados granulares por estratégia
+            losing_signals=0,
+            win_rate=0.0,
+            weight=data['weight']
+        )
+        for strategy_key, data in filtered_strategy_signals.items()
+    ]
+    progress(92, 'Salvando resultado e métricas no SQLite', {'backtest_id': backtest_id}, commit=True)
+    repo.save_backtest_result(backtest_result, contributions)
+    progress(95, 'Resultado salvo no SQLite', {'backtest_id': backtest_id})
+
+    print(f"✅ Backtest concluído: {win_rate:.1f}% win rate, {roi:+.2f}% ROI")
+
+    # Preparar recomendações de IA e peso
+    ai_payload = {}
+    try:
+        analytics = PerformanceAnalyticsService(repo)
+        current_weights = {k: v.get('weight', 1.0) for k, v in filtered_strategy_signals.items()}
+        weight_recommendations_data = [
+            {
+                'strategy_key': rec.strategy_key,
+                'strategy_name': rec.strategy_name,
+                'current_weight': rec.current_weight,
+                'recommended_weight': rec.recommended_weight,
+                'reason': rec.reason,
+                'confidence': rec.confidence
+            }
+            for rec in analytics.calculate_weight_recommendations(backtest_id, current_weights)
+        ]
+    except Exception:
+        weight_recommendations_data = []
+
+    if sk_enabled:
+        try:
+            from market_manus.ai.semantic_kernel_advisor import SemanticKernelAdvisor
+            sk = SemanticKernelAdvisor()
+            if sk.is_available():
+                backtest_summary = {
+                    'asset': asset,
+                    'timeframe': tf_engine,
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'confluence_mode': confluence_mode,
+                    'win_rate': win_rate,
+                    'total_trades': total_trades,
+                    'roi': roi,
+                    'initial_capital': initial_capital,
+                    'final_capital': final_capital
+                }
+                strategy_contributions_data = [
+                    {
+                        'strategy_name': data.get('name'),
+                        'signals_after_volume_filter': len(data['signal_indices']),
+                        'win_rate': win_rate,
+                        'weight': data.get('weight', 1.0),
+                        'winning_signals': int(len(data['signal_indices']) * win_rate / 100),
+                        'losing_signals': int(len(data['signal_indices']) * (100 - win_rate) / 100)
+                    }
+                    for data in filtered_strategy_signals.values()
+                ]
+                sk_text = sk.generate_recommendations(backtest_summary, strategy_contributions_data, weight_recommendations_data)
+                ai_payload['semantic_kernel'] = {'available': True, 'text': sk_text}
+            else:
+                ai_payload['semantic_kernel'] = {'available': False, 'text': '❌ Semantic Kernel não disponível (OPENAI_API_KEY não configurada)'}
+        except Exception as e:
+            ai_payload['semantic_kernel'] = {'available': False, 'text': f'❌ Erro ao gerar recomendações SK: {str(e)}'}
+
+    if manus_ai_enabled:
+        try:
+            import asyncio
+            from market_manus.ai.manus_ai_integration import ManusAIAnalyzer
+            analyzer = ManusAIAnalyzer()
+            df = pd.DataFrame({'open': opens, 'high': highs, 'low': lows, 'close': closes, 'volume': volumes.tolist()})
+            strategies_votes = {
+                s['name']: {
+                    'action': 'BUY' if buy_signals >= sell_signals else ('SELL' if sell_signals > buy_signals else 'NEUTRAL'),
+                    'confidence': max(0.3, min(0.9, (win_rate / 100)))
+                }
+                for s in filtered_strategy_signals.values()
+            }
+            ai_payload['manus_ai'] = asyncio.run(analyzer.analyze_market_context(df, asset, strategies_votes))
+        except Exception as e:
+            ai_payload['manus_ai'] = {'ai_enabled': False, 'error': f'Erro Manus AI: {str(e)}'}
+
+    progress(100, f'Concluído: ROI {roi:+.2f}% · Win rate {win_rate:.1f}%', {
+        'final_capital': final_capital,
+        'initial_capital': initial_capital,
+        'win_rate': win_rate,
+        'roi': roi
+    })
+
+    return {
+        'status': 'success',
+        'backtest_id': backtest_id,
+        'results': {
+            'initial_capital': initial_capital,
+            'final_capital': final_capital,
+            'pnl': pnl,
+            'roi': roi,
+            'total_trades': total_trades,
+            'winning_trades': winning_trades,
+            'losing_trades': losing_trades,
+            'win_rate': win_rate,
+            'total_signals': len(confluence_signals),
+            'buy_signals': buy_signals,
+            'sell_signals': sell_signals,
+            'candles_analyzed': len(closes),
+            'strategies_used': len(strategies)
+        },
+        'strategy_details': [
+            {'name': data['name'], 'signals': len(data['signal_indices']), 'weight': data['weight']}
+            for data in filtered_strategy_signals.values()
+        ],
+        'ai': ai_payload,
+        'weight_recommendations': weight_recommendations_data
+    }
+
+
+# ==================== WORKERS ====================
+
+# Fila de progresso do processo worker (recebida no initializer do pool)
+_worker_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    global _worker_progress_queue
+    _worker_progress_queue = progress_queue
+
+
+class _JobControl:
+    """
+    Cancelamento e commit de um job, compartilhados entre o processo principal e o worker
+
+    cancel() e commit() são test-and-set sob o mesmo lock: o que vier primeiro
+    vence e o outro é recusado. Com manager (pool de processos) o estado e o
+    lock vivem no Manager e o objeto pode ser enviado ao worker.
+    """
+
+    RUNNING, CANCELLED, COMMITTED = 0, 1, 2
+
+    def __init__(self, manager=None):
+        if manager is None:
+            self._lock = threading.Lock()
+            self._state = SimpleNamespace(value=self.RUNNING)
+        else:
+            self._lock = manager.Lock()
+            self._state = manager.Value('i', self.RUNNING)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._state.value == self.CANCELLED
+
+    def cancel(self) -> bool:
+        """Marca o job como cancelado; False se o resultado já está sendo gravado"""
+        with self._lock:
+            if self._state.value == self.COMMITTED:
+                return False
+            self._state.value = self.CANCELLED
+            return True
+
+    def commit(self) -> bool:
+        """Passa o ponto sem volta; False se o job já foi cancelado"""
+        with self._lock:
+            if self._state.value == self.CANCELLED:
+                return False
+            self._state.value = self.COMMITTED
+            return True
+
+
+def _execute_job(runner: Callable, job_id: str, config: Dict[str, Any], control: _JobControl,
+                 progress_queue=None):
+    """Executado no worker: roda o job enviando o progresso ao processo principal"""
+    channel = progress_queue if progress_queue is not None else _worker_progress_queue
+    committed = False
+
+    def progress(percent: int, message: str, extra: Optional[Dict[str, Any]] = None, commit: bool = False):
+        nonlocal committed
+        if not committed:
+            if commit:
+                if not control.commit():
+                    raise JobCancelled(job_id)
+                committed = True
+            elif control.cancelled:
+                raise JobCancelled(job_id)
+        payload = {'percent': int(percent), 'message': message}
+        if extra:
+            payload.update(extra)
+        if commit:
+            payload['committed'] = True
+        channel.put((job_id, payload))
+
+    if control.cancelled:
+        raise JobCancelled(job_id)
+    return runner(config, progress)
+
+
+@dataclass
+class BacktestJob:
+    """Estado de um job (mantido no processo principal)"""
+    job_id: str
+    config_hash: str
+    config: Dict[str, Any]
+    status: str = "queued"  # queued, running, done, error, cancelled
+    progress: Dict[str, Any] = field(default_factory=lambda: {'percent': 0, 'message': 'Na fila'})
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cached: bool = False
+    submissions: int = 1
+    submitters: Set[str] = field(default_factory=set)
+    committed: bool = False  # resultado sendo gravado: não pode mais ser cancelado
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            'job_id': self.job_id,
+            'status': self.status,
+            'progress': self.progress,
+            'cached': self.cached,
+            'deduplicated': self.submissions > 1,
+            'error': self.error,
+            'created_at': datetime.fromtimestamp(self.created_at).isoformat(),
+            'finished_at': datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None,
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
+
+
+class BacktestJobQueue:
+    """Pool limitado de workers de backtest com progresso, cancelamento, deduplicação e cache"""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue: int = 8,
+        executor: str = "process",
+        cache_size: int = 32,
+        max_history: int = 200,
+        runner: Callable[[Dict[str, Any], Callable], Dict[str, Any]] = run_confluence_backtest,
+        on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        on_finished: Optional[Callable[[BacktestJob], None]] = None
+    ):
+        """
+        Args:
+            max_workers: Jobs executados em paralelo
+            max_queue: Jobs aguardando além dos que estão em execução
+            executor: "process" (padrão) ou "thread"
+            cache_size: Resultados concluídos mantidos por hash da configuração
+            max_history: Jobs finalizados mantidos para consulta
+            runner: runner(config, progress) -> resultado (função de módulo, para o pool de processos)
+            on_progress: Chamado com (job_id, payload) a cada progresso
+            on_finished: Chamado com o job ao terminar (done, error ou cancelled)
+        """
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Executor desconhecido: {executor} (use process, thread)")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor_kind = executor
+        self.cache_size = cache_size
+        self.max_history = max_history
+        self.runner = runner
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+
+        self._lock = threading.RLock()
+        self._jobs: "OrderedDict[str, BacktestJob]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._controls: Dict[str, _JobControl] = {}
+        self._inflight: Dict[str, str] = {}  # hash da configuração -> job_id
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.stats = {"submitted": 0, "deduplicated": 0, "cache_hits": 0, "rejected": 0,
+                      "completed": 0, "failed": 0, "cancelled": 0}
+
+        if executor == "process":
+            # spawn: o processo web tem threads ativas (Socket.IO), fork não é seguro
+            context = multiprocessing.get_context("spawn")
+            self._manager = context.Manager()
+            self._progress = context.Queue()
+            self.pool = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=context,
+                initializer=_init_worker, initargs=(self._progress,)
+            )
+        else:
+            self._manager = None
+            self._progress = queue.Queue()
+            self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="backtest")
+        self._listener = threading.Thread(target=self._relay_progress, name="backtest-progress", daemon=True)
+        self._listener.start()
+
+    # ---------- API ----------
+
+    def submit(self, config: Dict[str, Any], submitter: Optional[str] = None) -> BacktestJob:
+        """
+        Enfileira um backtest (ou devolve o job/resultado existente da mesma configuração)
+
+        Args:
+            config: Saída de normalize_backtest_config
+            submitter: Identificação do solicitante, usada em cancel() (gerada se None)
+
+        Raises:
+            BacktestQueueFull: Limite de jobs em andamento atingido
+        """
+        key = config_hash(config)
+        submitter = submitter or uuid.uuid4().hex[:12]
+        with self._lock:
+            self.stats["submitted"] += 1
+
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                job = self._jobs[inflight]
+                job.submissions += 1
+                job.submitters.add(submitter)
+                self.stats["deduplicated"] += 1
+                return job
+
+            if key in self._results:
+                self._results.move_to_end(key)
+                job = BacktestJob(job_id=uuid.uuid4().hex[:12], config_hash=key, config=config,
+                                  status="done", result=self._results[key], cached=True,
+                                  progress={'percent': 100, 'message': 'Resultado em cache'})
+                job.finished_at = job.created_at
+                self.stats["cache_hits"] += 1
+                self._remember(job)
+                return job
+
+            if len(self._inflight) >= self.max_workers + self.max_queue:
+                self.stats["rejected"] += 1
+                raise BacktestQueueFull(f"{len(self._inflight)} backtests em andamento; tente novamente em instantes")
+
+            job = BacktestJob(job_id=uuid.uuid4().hex[:12], config_hash=key, config=config, submitters={submitter})
+            control = _JobControl(self._manager)
+            self._remember(job)
+            self._inflight[key] = job.job_id
+            self._controls[job.job_id] = control
+
+            progress_queue = None if self._manager else self._progress
+            future = self.pool.submit(_execute_job, self.runner, job.job_id, config, control, progress_queue)
+            self._futures[job.job_id] = future
+        future.add_done_callback(lambda done, job_id=job.job_id: self._finish(job_id, done))
+        return job
+
+    def get(self, job_id: str) -> Optional[BacktestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str, submitter: Optional[str] = None) -> bool:
+        """
+        Cancela um job na fila ou em execução
+
+        Com submitter, retira apenas esse solicitante: um job deduplicado
+        continua rodando enquanto outro solicitante o aguarda. Sem submitter,
+        cancela para todos (ex.: shutdown).
+
+        Returns:
+            bool: False se o job não existe, já terminou, já está gravando o
+                resultado (mesmo que o progresso do commit ainda não tenha
+                chegado) ou o solicitante não é dele
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished or job.committed:
+                return False
+            if submitter is not None:
+                if submitter not in job.submitters:
+                    return False
+                job.submitters.discard(submitter)
+                if job.submitters:
+                    return True
+            if not self._controls[job_id].cancel():
+                # O worker fez o commit antes: o solicitante continua com o job
+                job.committed = True
+                if submitter is not None:
+                    job.submitters.add(submitter)
+                return False
+            future = self._futures.get(job_id)
+        # Job ainda na fila: sai sem rodar (o callback marca como cancelled)
+        if future is not None:
+            future.cancel()
+        return True
+
+    def queue_depth(self) -> Dict[str, int]:
+        with self._lock:
+            running = sum(1 for job_id in self._inflight.values() if self._jobs[job_id].status == "running")
+            return {"running": running, "queued": len(self._inflight) - running,
+                    "limit": self.max_workers + self.max_queue}
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"executor": self.executor_kind, **self.stats, **self.queue_depth(), "cached_results": len(self._results)}
+
+    def shutdown(self, wait: bool = True):
+        for job_id in list(self._controls):
+            self.cancel(job_id)
+        self.pool.shutdown(wait=wait, cancel_futures=True)
+        self._progress.put(None)
+        self._listener.join(timeout=5)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+    # ---------- Internos ----------
+
+    def _remember(self, job: BacktestJob):
+        """Registra o job e descarta os finalizados mais antigos além de max_history"""
+        self._jobs[job.job_id] = job
+        finished = [job_id for job_id, item in self._jobs.items() if item.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def _relay_progress(self):
+        while True:
+            item = self._progress.get()
+            if item is None:
+                return
+            job_id, payload = item
+            committed = payload.pop('committed', False)
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                job.committed = job.committed or committed
+                # O último progresso pode chegar depois do resultado (filas distintas)
+                if not job.finished:
+                    job.status = "running"
+                    job.progress = payload
+                elif job.status == "done":
+                    job.progress = payload
+            if self.on_progress:
+                try:
+                    self.on_progress(job_id, {'job_id': job_id, **payload})
+                except Exception as e:
+                    print(f"⚠️  Erro ao publicar progresso do job {job_id}: {e}")
+
+    def _finish(self, job_id: str, future: Future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if future.cancelled():
+                job.status, job.error = "cancelled", "Cancelado antes de iniciar"
+            else:
+                error = future.exception()
+                if error is None:
+                    job.status, job.result = "done", future.result()
+                    if not is_open_ended(job.config):
+                        self._results[job.config_hash] = job.result
+                        self._results.move_to_end(job.config_hash)
+                        while len(self._results) > self.cache_size:
+                            self._results.popitem(last=False)
+                elif isinstance(error, JobCancelled):
+                    job.status, job.error = "cancelled", "Cancelado"
+                else:
+                    job.status, job.error = "error", str(error)
+            job.finished_at = time.time()
+            self.stats[{"done": "completed", "error": "failed", "cancelled": "cancelled"}[job.status]] += 1
+            self._inflight.pop(job.config_hash, None)
+            self._futures.pop(job_id, None)
+            self._controls.pop(job_id, None)
+        if self.on_finished:
+            try:
+                self.on_finished(job)
+            except Exception as e:
+                print(f"⚠️  Erro ao publicar fim do job {job_id}: {e}")
+
+    def pending_jobs(self) -> List[BacktestJob]:
+        with self._lock:
+            return [self._jobs[job_id] for job_id in self._inflight.values()]
@@ -8,11 +8,12 @@ import numpy as np
 from typing import Dict, List
 from datetime import datetime
 import yaml
-from market_manus.strategies.smc.patterns import confluence_decision
+from market_manus.strategies.smc.patterns import confluence_decision, iter_confluence_decisions
 from market_manus.core.signal import Signal
 
 
-def backtest_confluence(data: pd.DataFrame, config_path: str = None, config: dict = None) -> dict:
+def backtest_confluence(data: pd.DataFrame, config_path: str = None, config: dict = None,
+                        precompute: bool = True) -> dict:
     """
     Executa backtest de confluência com log detalhado por candle.
     
@@ -20,6 +21,10 @@ def backtest_confluence(data: pd.DataFrame, config_path: str = None, config: dic
         data: DataFrame OHLCV com histórico completo
         config_path: Caminho para arquivo YAML de config (opcional)
         config: Dict de config direto (opcional, prioritário sobre config_path)
+        precompute: Se True, detectores e regime são calculados uma vez sobre a
+            série inteira e a decisão é reproduzida candle a candle (O(n)).
+            Se False, chama confluence_decision com a janela crescente de cada
+            candle (O(n²), caminho de referência)
     
     Returns:
         Dict com relatório completo:
@@ -46,20 +51,37 @@ def backtest_confluence(data: pd.DataFrame, config_path: str = None, config: dic
     position = None  # Posição atual
     trades = []
     candle_log = []
+    start = 50  # Começa em 50 para ter histórico suficiente
+    high_low = (data['high'] - data['low']).to_numpy()
+    
+    decisions = None
+    if precompute:
+        try:
+            decisions = iter_confluence_decisions(data, symbol="BACKTEST", timeframe="backtest",
+                                                  config=config, start=start)
+        except Exception as e:
+            print(f"Pré-cálculo de confluência indisponível ({e}), usando janela crescente")
     
     # Itera sobre cada candle
-    for i in range(50, len(data)):  # Começa em 50 para ter histórico suficiente
-        candles = data.iloc[:i+1]  # Janela até candle atual
+    for i in range(start, len(data)):
         current_candle = data.iloc[i]
         
-        # Chama confluence_decision
+        # Decisão de confluência com os candles até o atual
         try:
-            signal = confluence_decision(
-                candles=candles,
-                symbol="BACKTEST",
-                timeframe="backtest",
-                config=config
-            )
+            if decisions is not None:
+                try:
+                    signal = next(decisions)
+                except Exception as e:
+                    # Gerador encerrado: os candles restantes usam a janela crescente
+                    print(f"Pré-cálculo de confluência interrompido no candle {i} ({e!r}), usando janela crescente")
+                    decisions = None
+            if decisions is None:
+                signal = confluence_decision(
+                    candles=data.iloc[:i+1],
+                    symbol="BACKTEST",
+                    timeframe="backtest",
+                    config=config
+                )
         except Exception as e:
             signal = Signal(action="HOLD", confidence=0.0, reasons=[f"Erro: {e}"], tags=["ERROR"])
         
@@ -83,9 +105,7 @@ def backtest_confluence(data: pd.DataFrame, config_path: str = None, config: dic
         
         # Calcula ATR para stop/tp
         if i >= 14:
-            recent_candles = data.iloc[i-14:i+1]
-            high_low = recent_candles['high'] - recent_candles['low']
-            atr = high_low.mean()
+            atr = high_low[i-14:i+1].mean()
         else:
             atr = current_candle['high'] - current_candle['low']
         
@@ -8,7 +8,8 @@ import time
 from datetime import datetime
 from typing import Optional, Callable
 import yaml
-from market_manus.strategies.smc.patterns import confluence_decision
+from market_manus.strategies.smc.patterns import confluence_decision, structure_tracker_for
+from market_manus.strategies.smc.structure_tracker import SMCStructureTracker
 from market_manus.core.signal import Signal
 
 
@@ -66,7 +67,8 @@ class RealTimeConfluenceEngine:
         candles: pd.DataFrame,
         symbol: str,
         timeframe: str,
-        callback: Optional[Callable] = None
+        callback: Optional[Callable] = None,
+        structure: Optional[SMCStructureTracker] = None
     ) -> Optional[Signal]:
         """
         Processa novo candle e gera decisão de confluência.
@@ -78,6 +80,8 @@ class RealTimeConfluenceEngine:
             symbol: Símbolo (ex: "BTCUSDT")
             timeframe: Timeframe (ex: "5m")
             callback: Função callback(signal) para executar ordem (opcional)
+            structure: Rastreador SMC persistente do stream (ver new_structure_tracker);
+                BOS/CHoCH/OB/FVG passam a consultá-lo em vez de recalcular sobre candles
         
         Returns:
             Signal se houver mudança de estado, None caso contrário
@@ -102,7 +106,8 @@ class RealTimeConfluenceEngine:
             candles=candles,
             symbol=symbol,
             timeframe=timeframe,
-            config=self.config
+            config=self.config,
+            structure=structure
         )
         
         self.stats['signals_generated'] += 1
@@ -137,6 +142,10 @@ class RealTimeConfluenceEngine:
         
         return signal if state_changed else None
     
+    def new_structure_tracker(self, window: Optional[int] = None) -> SMCStructureTracker:
+        """Rastreador SMC vazio com os parâmetros desta config (um por symbol/timeframe do stream)"""
+        return structure_tracker_for(self.config, window=window)
+    
     def get_stats(self) -> dict:
         """Retorna estatísticas da sessão"""
         return self.stats.copy()
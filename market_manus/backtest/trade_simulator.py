@@ -0,0 +1,188 @@
+"""
+Simulador vetorizado de trades a partir de sinais de confluência
+
+Mesmas regras do loop de ConfluenceModeModule._simulate_trades_from_signals:
+uma posição por vez, entrada no fechamento do candle do sinal, SL/TP
+verificados com high/low a partir do candle seguinte (stop tem prioridade
+quando ambos são tocados no mesmo candle), timeout após `max_holding` candles
+e fechamento da posição pendente no último candle.
+
+As saídas são encontradas com uma varredura vetorizada (entradas x
+max_holding) sobre os arrays de high/low, em blocos de entradas candidatas
+calculados sob demanda a partir da posição atual do travamento: a memória
+fica limitada a EXIT_SCAN_CELLS células mesmo com sinais densos, e
+candidatas puladas por uma posição aberta fora do bloco não são varridas. O
+travamento de posição só percorre os trades, não os candles. O capital é
+composto trade a trade na mesma ordem de operações do loop original
+(resultado idêntico bit a bit quando não há custos).
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from market_manus.core.capital_manager import FeeModel
+
+EXIT_REASONS = ("SL", "TP", "TIMEOUT", "END")
+
+# Células (entradas x max_holding) por bloco da varredura de saídas
+EXIT_SCAN_CELLS = 1 << 18
+
+
+@dataclass
+class TradeLog:
+    """Trades simulados em arrays (um elemento por trade)"""
+    entry_index: np.ndarray  # int64
+    exit_index: np.ndarray  # int64
+    direction: np.ndarray  # int8 (+1 LONG, -1 SHORT)
+    reason: np.ndarray  # str (SL, TP, TIMEOUT, END)
+    entry_price: np.ndarray  # float64
+    exit_price: np.ndarray  # float64
+    position_size: np.ndarray  # float64 (USD)
+    pnl: np.ndarray  # float64, líquido de custos
+    costs: np.ndarray  # float64 (fees + slippage)
+    winning: np.ndarray  # bool
+    initial_capital: float
+    final_capital: float
+
+    @property
+    def total_trades(self) -> int:
+        return len(self.entry_index)
+
+    @property
+    def winning_trades(self) -> int:
+        return int(self.winning.sum())
+
+    @property
+    def losing_trades(self) -> int:
+        return self.total_trades - self.winning_trades
+
+    def totals(self) -> Tuple[float, int, int]:
+        """(capital_final, total_trades, winning_trades), formato do loop original"""
+        return self.final_capital, self.total_trades, self.winning_trades
+
+
+def _first_exits(entries: np.ndarray, is_long: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+                 stop_loss: np.ndarray, take_profit: np.ndarray, max_holding: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Primeiro candle de saída de cada entrada candidata
+
+    Returns:
+        (índice de saída, código do motivo em EXIT_REASONS)
+    """
+    n = len(highs)
+    offsets = np.arange(1, max_holding + 1)
+    window = entries[:, None] + offsets  # (entradas x max_holding)
+    in_range = window < n
+    window = np.minimum(window, n - 1)
+    window_highs, window_lows = highs[window], lows[window]
+
+    long_rows = is_long[:, None]
+    sl_hit = np.where(long_rows, window_lows <= stop_loss[:, None], window_highs >= stop_loss[:, None]) & in_range
+    tp_hit = np.where(long_rows, window_highs >= take_profit[:, None], window_lows <= take_profit[:, None]) & in_range
+
+    any_hit = sl_hit | tp_hit
+    has_hit = any_hit.any(axis=1)
+    first = any_hit.argmax(axis=1)
+    rows = np.arange(len(entries))
+
+    timed_out = entries + max_holding <= n - 1
+    exit_index = np.where(has_hit, entries + 1 + first, np.where(timed_out, entries + max_holding, n - 1))
+    # Stop tem prioridade quando SL e TP são tocados no mesmo candle
+    reason = np.where(has_hit, np.where(sl_hit[rows, first], 0, 1), np.where(timed_out, 2, 3))
+    return exit_index.astype(np.int64), reason.astype(np.int8)
+
+
+def simulate_trades(confluence_signals: Sequence[Tuple[int, str]], closes, initial_capital: float,
+                    highs=None, lows=None, position_size_pct: float = 0.02, stop_loss_pct: float = 0.005,
+                    take_profit_pct: float = 0.010, max_holding: int = 50,
+                    fee_model: Optional[FeeModel] = None) -> TradeLog:
+    """
+    Simula trades LONG/SHORT com SL/TP intrabar a partir dos sinais de confluência
+
+    Args:
+        confluence_signals: Lista de (índice, direção "BUY"/"SELL")
+        closes: Preços de fechamento
+        initial_capital: Capital inicial
+        highs/lows: Máximas/mínimas (se None usa closes)
+        position_size_pct: Fração do capital por trade
+        stop_loss_pct/take_profit_pct: Distâncias de SL/TP a partir da entrada
+        max_holding: Candles até o fechamento por timeout
+        fee_model: Custos de entrada+saída (taker) descontados do P&L de cada trade
+
+    Returns:
+        TradeLog com os arrays por trade e o capital final
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    highs = closes if highs is None else np.asarray(highs, dtype=np.float64)
+    lows = closes if lows is None else np.asarray(lows, dtype=np.float64)
+    n = len(closes)
+
+    # Um sinal por candle (o último vence), apenas índices dentro da série
+    signal_dict = {idx: direction for idx, direction in confluence_signals}
+    entries = np.array(sorted(idx for idx in signal_dict if 0 <= idx < n), dtype=np.int64)
+    is_long = np.array([signal_dict[idx] == "BUY" for idx in entries], dtype=bool)
+
+    entry_prices = closes[entries]
+    stop_loss = np.where(is_long, entry_prices * (1 - stop_loss_pct), entry_prices * (1 + stop_loss_pct))
+    take_profit = np.where(is_long, entry_prices * (1 + take_profit_pct), entry_prices * (1 - take_profit_pct))
+    exit_index = np.empty(len(entries), dtype=np.int64)
+    reason = np.empty(len(entries), dtype=np.int8)
+    chunk_rows = max(1, EXIT_SCAN_CELLS // max(1, max_holding))
+
+    # Travamento de posição: a próxima entrada é o primeiro sinal após o candle de saída
+    taken = []
+    position = 0
+    scanned_until = 0
+    while position < len(entries):
+        if position >= scanned_until:
+            block = slice(position, min(position + chunk_rows, len(entries)))
+            exit_index[block], reason[block] = _first_exits(
+                entries[block], is_long[block], highs, lows, stop_loss[block], take_profit[block], max_holding
+            )
+            scanned_until = block.stop
+        taken.append(position)
+        position = int(np.searchsorted(entries, exit_index[position] + 1))
+    taken = np.array(taken, dtype=np.int64)
+
+    cost_rate = fee_model.calculate_total_trade_cost(1.0) if fee_model else 0.0
+    sizes = np.empty(len(taken))
+    pnls = np.empty(len(taken))
+    capital = initial_capital
+    for trade, row in enumerate(taken):
+        size = capital * position_size_pct
+        code = reason[row]
+        if code == 0:
+            pnl = -size * stop_loss_pct
+        elif code == 1:
+            pnl = size * take_profit_pct
+        else:
+            entry_price = float(entry_prices[row])
+            exit_close = float(closes[exit_index[row]])
+            pnl_pct = (exit_close - entry_price) / entry_price if is_long[row] else (entry_price - exit_close) / entry_price
+            pnl = size * pnl_pct
+        if cost_rate:
+            pnl -= size * cost_rate
+        capital += pnl
+        sizes[trade], pnls[trade] = size, pnl
+
+    reasons = reason[taken]
+    exits = exit_index[taken]
+    exit_prices = np.select(
+        [reasons == 0, reasons == 1], [stop_loss[taken], take_profit[taken]], default=closes[exits]
+    )
+    return TradeLog(
+        entry_index=entries[taken],
+        exit_index=exits,
+        direction=np.where(is_long[taken], 1, -1).astype(np.int8),
+        reason=np.array(EXIT_REASONS)[reasons],
+        entry_price=entry_prices[taken],
+        exit_price=exit_prices,
+        position_size=sizes,
+        pnl=pnls,
+        costs=sizes * cost_rate,
+        winning=(reasons == 1) | ((reasons >= 2) & (pnls > 0)),
+        initial_capital=initial_capital,
+        final_capital=capital
+    )
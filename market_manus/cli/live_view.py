@@ -214,7 +214,7 @@ async def run_live_view(stream_runtime):
     if not success:
         print("⚠️  Aviso: Bootstrap falhou. Continuando apenas com WebSocket...")
     else:
-        print(f"✅ {len(stream_runtime.candles_deque)} candles carregados")
+        print(f"✅ {len(stream_runtime.candles)} candles carregados")
     
     with Live(render_live_ui(stream_runtime.state), refresh_per_second=2) as live:
         stream_runtime.running = True
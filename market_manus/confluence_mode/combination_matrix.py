@@ -0,0 +1,278 @@
+"""
+Backtest em lote das Combinações Recomendadas (matriz combinação × modo × timeframe)
+
+Para cada timeframe os sinais de cada estratégia distinta são calculados (e
+filtrados por volume) uma única vez; todas as combinações e modos de
+confluência são avaliados a partir da mesma matriz de votos (estratégias ×
+candles). Os resultados são gravados no PerformanceHistoryRepository em uma
+única transação.
+"""
+
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_manus.confluence_mode.recommended_combinations import RecommendedCombinations
+from market_manus.data_providers.signal_cache import SignalCache
+from market_manus.performance.history_repository import BacktestResult, StrategyContribution
+
+CONFLUENCE_MODES = ("ALL", "ANY", "MAJORITY", "WEIGHTED")
+
+
+@dataclass
+class VoteMatrix:
+    """Direções por estratégia e candle (+1 BUY, -1 SELL, 0 sem sinal)"""
+    keys: List[str]
+    directions: np.ndarray  # int8 (estratégias x candles)
+    weights: np.ndarray  # float64 por estratégia
+    signals: Dict[str, dict] = field(default_factory=dict)  # Formato de strategy_signals do módulo
+
+    @classmethod
+    def from_strategy_signals(cls, strategy_signals: Dict[str, dict], length: int) -> "VoteMatrix":
+        keys = list(strategy_signals)
+        directions = np.zeros((len(keys), length), dtype=np.int8)
+        for row, key in enumerate(keys):
+            for idx, direction in strategy_signals[key]["signal_indices"]:
+                if 0 <= idx < length:
+                    directions[row, idx] = 1 if direction == "BUY" else -1
+        weights = np.array([strategy_signals[key]["weight"] for key in keys], dtype=np.float64)
+        return cls(keys=keys, directions=directions, weights=weights, signals=strategy_signals)
+
+    def rows(self, strategies: Sequence[str]) -> np.ndarray:
+        index = {key: row for row, key in enumerate(self.keys)}
+        return np.array([index[key] for key in strategies], dtype=np.intp)
+
+
+def confluence_from_votes(directions: np.ndarray, weights: np.ndarray, mode: str) -> List[Tuple[int, str]]:
+    """
+    Sinais de confluência a partir da submatriz de votos de uma combinação
+
+    Mesmas regras de ConfluenceModeModule._calculate_confluence_signals:
+    ALL exige todas as estratégias no candle, MAJORITY mais da metade,
+    WEIGHTED peso votante acima da metade do total; empate não gera sinal
+    (exceto ANY, que usa BUY).
+    """
+    buy_mask = directions == 1
+    sell_mask = directions == -1
+    column_weights = weights[:, None]
+    buy_weight = np.where(buy_mask, column_weights, 0.0).sum(axis=0)
+    sell_weight = np.where(sell_mask, column_weights, 0.0).sum(axis=0)
+    voters = (buy_mask | sell_mask).sum(axis=0)
+
+    if mode == "ALL":
+        active = voters == directions.shape[0]
+    elif mode == "ANY":
+        active = voters > 0
+    elif mode == "MAJORITY":
+        active = voters > directions.shape[0] / 2
+    elif mode == "WEIGHTED":
+        active = (buy_weight + sell_weight) > weights.sum() / 2
+    else:
+        raise ValueError(f"Modo de confluência desconhecido: {mode}")
+
+    buy = active & (buy_weight > sell_weight)
+    sell = active & (sell_weight > buy_weight)
+    if mode == "ANY":
+        buy |= active & (buy_weight == sell_weight) & (buy_weight > 0)
+
+    indices = np.flatnonzero(buy | sell)
+    return [(int(idx), "BUY" if buy[idx] else "SELL") for idx in indices]
+
+
+@dataclass
+class CombinationRun:
+    """Resultado de uma célula da matriz (combinação × modo × timeframe)"""
+    combination_id: int
+    combination_name: str
+    strategies: List[str]
+    timeframe: str
+    confluence_mode: str
+    initial_capital: float
+    final_capital: float
+    total_trades: int
+    winning_trades: int
+    confluence_signals: int
+    buy_signals: int
+    sell_signals: int
+
+    @property
+    def losing_trades(self) -> int:
+        return self.total_trades - self.winning_trades
+
+    @property
+    def roi(self) -> float:
+        return (self.final_capital - self.initial_capital) / self.initial_capital * 100
+
+    @property
+    def win_rate(self) -> float:
+        return self.winning_trades / self.total_trades * 100 if self.total_trades > 0 else 0
+
+
+class CombinationMatrixBacktester:
+    """Avalia todas as combinações recomendadas × modos × timeframes em uma passada"""
+
+    def __init__(self, module, combinations: Optional[List[Dict]] = None, modes: Sequence[str] = CONFLUENCE_MODES):
+        """
+        Args:
+            module: ConfluenceModeModule (detectores, filtro de volume, simulador e repositório)
+            combinations: Combinações a avaliar (padrão: todas as recomendadas)
+            modes: Modos de confluência avaliados para cada combinação
+        """
+        self.module = module
+        self.combinations = combinations or [
+            combination
+            for category in RecommendedCombinations.get_all_combinations().values()
+            for combination in category
+        ]
+        self.modes = tuple(modes)
+        self.stats = {"strategy_runs": 0, "evaluations": 0, "datasets": 0}
+
+    @property
+    def strategy_keys(self) -> List[str]:
+        """Estratégias distintas usadas pelas combinações (ordem de primeira aparição)"""
+        keys = []
+        for combination in self.combinations:
+            for key in combination["strategies"]:
+                if key not in keys and key in self.module.available_strategies:
+                    keys.append(key)
+        return keys
+
+    def compute_vote_matrix(self, ohlcv: Dict[str, np.ndarray]) -> VoteMatrix:
+        """Calcula (uma vez, ou lê do cache de sinais) e filtra por volume os sinais de cada estratégia distinta"""
+        data_hash = SignalCache.fingerprint(ohlcv)
+        strategy_signals = {}
+        for key in self.strategy_keys:
+            strategy = self.module.available_strategies[key]
+            strategy_signals[key] = {
+                "name": strategy["name"],
+                "signal_indices": self.module._cached_strategy_signals(key, ohlcv, data_hash),
+                "weight": strategy.get("weight", 1.0)
+            }
+            self.stats["strategy_runs"] += 1
+        self.module.signal_cache.flush()
+
+        volumes = pd.Series(ohlcv["volume"])
+        if volumes.sum() > 0:
+            self.module.volume_pipeline.reset_stats()
+            strategy_signals = self.module.volume_pipeline.apply_to_strategy_signals(strategy_signals, volumes)
+        return VoteMatrix.from_strategy_signals(strategy_signals, len(ohlcv["close"]))
+
+    def evaluate_dataset(self, ohlcv: Dict[str, np.ndarray], timeframe: str, initial_capital: float) -> Tuple[List[CombinationRun], VoteMatrix]:
+        """Todas as combinações × modos sobre um conjunto de candles"""
+        matrix = self.compute_vote_matrix(ohlcv)
+        closes, highs, lows = ohlcv["close"], ohlcv["high"], ohlcv["low"]
+        fee_model = self.module._trade_fee_model()
+        runs = []
+        for combination in self.combinations:
+            strategies = [key for key in combination["strategies"] if key in matrix.keys]
+            if not strategies:
+                continue
+            rows = matrix.rows(strategies)
+            directions, weights = matrix.directions[rows], matrix.weights[rows]
+            for mode in self.modes:
+                signals = confluence_from_votes(directions, weights, mode)
+                final_capital, total_trades, winning_trades = self.module._simulate_trades_from_signals(
+                    signals, closes, initial_capital, highs, lows, fee_model=fee_model
+                )
+                buy_signals = sum(1 for _, direction in signals if direction == "BUY")
+                runs.append(CombinationRun(
+                    combination_id=combination["id"],
+                    combination_name=combination["name"],
+                    strategies=strategies,
+                    timeframe=timeframe,
+                    confluence_mode=mode,
+                    initial_capital=initial_capital,
+                    final_capital=final_capital,
+                    total_trades=total_trades,
+                    winning_trades=winning_trades,
+                    confluence_signals=len(signals),
+                    buy_signals=buy_signals,
+                    sell_signals=len(signals) - buy_signals
+                ))
+                self.stats["evaluations"] += 1
+        self.stats["datasets"] += 1
+        return runs, matrix
+
+    def _to_repository_rows(self, run: CombinationRun, matrix: VoteMatrix, symbol: str, start_date: str, end_date: str, timestamp: str) -> Tuple[BacktestResult, List[StrategyContribution]]:
+        backtest_id = str(uuid.uuid4())
+        result = BacktestResult(
+            backtest_id=backtest_id,
+            timestamp=timestamp,
+            combination_id=str(run.combination_id),
+            combination_name=run.combination_name,
+            strategies=run.strategies,
+            timeframe=run.timeframe,
+            asset=symbol,
+            start_date=start_date,
+            end_date=end_date,
+            confluence_mode=run.confluence_mode,
+            win_rate=run.win_rate,
+            total_trades=run.total_trades,
+            winning_trades=run.winning_trades,
+            losing_trades=run.losing_trades,
+            initial_capital=run.initial_capital,
+            final_capital=run.final_capital,
+            roi=run.roi,
+            total_signals=run.confluence_signals,
+            manus_ai_enabled=False,
+            semantic_kernel_enabled=False
+        )
+        # Mesma estimativa de _save_backtest_to_performance_repo (proporcional ao win rate)
+        contributions = []
+        for key in run.strategies:
+            data = matrix.signals[key]
+            filtered_count = data.get('filtered_count', len(data['signal_indices']))
+            estimated_winning = int(filtered_count * run.win_rate / 100)
+            contributions.append(StrategyContribution(
+                backtest_id=backtest_id,
+                strategy_key=key,
+                strategy_name=data.get('name', key),
+                total_signals=data.get('original_count', len(data['signal_indices'])),
+                signals_after_volume_filter=filtered_count,
+                winning_signals=estimated_winning,
+                losing_signals=filtered_count - estimated_winning,
+                win_rate=run.win_rate,
+                weight=data.get('weight', 1.0)
+            ))
+        return result, contributions
+
+    def run(self, symbol: str, timeframes: Sequence[str], start_date: Optional[str] = None, end_date: Optional[str] = None, initial_capital: float = 10000, save: bool = True) -> List[CombinationRun]:
+        """
+        Executa a matriz completa e grava os resultados em uma transação
+
+        Args:
+            symbol: Par de trading
+            timeframes: Intervalos da API ("5", "15", "60", ...)
+            start_date/end_date: Período (YYYY-MM-DD); padrão: últimos 30 dias
+            initial_capital: Capital inicial de cada simulação
+            save: Gravar no PerformanceHistoryRepository
+
+        Returns:
+            Resultados de todas as células, ordenados por ROI
+        """
+        timestamp = datetime.now().isoformat()
+        all_runs, rows = [], []
+        for timeframe in timeframes:
+            started = time.time()
+            ohlcv, _ = self.module._fetch_historical_arrays(symbol, timeframe, start_date, end_date)
+            if not ohlcv or len(ohlcv["close"]) < 50:
+                print(f"   ⚠️  {symbol} {timeframe}: dados insuficientes, timeframe ignorado")
+                continue
+
+            runs, matrix = self.evaluate_dataset(ohlcv, timeframe, initial_capital)
+            print(f"   ✅ {timeframe}: {len(matrix.keys)} estratégias calculadas, "
+                  f"{len(runs)} combinações×modos avaliadas em {time.time() - started:.1f}s")
+            all_runs.extend(runs)
+            rows.extend(
+                self._to_repository_rows(run, matrix, symbol, start_date or "default", end_date or "default", timestamp)
+                for run in runs
+            )
+
+        if save and rows:
+            self.module.performance_repo.save_backtest_results(rows)
+        return sorted(all_runs, key=lambda run: run.roi, reverse=True)
@@ -24,22 +24,40 @@ from market_manus.strategies.smc.patterns import (
     detect_choch,
     detect_order_blocks,
     detect_fvg,
-    detect_liquidity_sweep
+    detect_liquidity_sweep,
+    detect_bos_series,
+    detect_choch_series,
+    detect_order_blocks_series,
+    detect_fvg_series,
+    detect_liquidity_sweep_series
 )
 
 # Importar novas estratégias clássicas
-from market_manus.strategies.parabolic_sar import parabolic_sar_signal
-from market_manus.strategies.vwap import vwap_signal, vwap_volume_combo_signal
-from market_manus.strategies.cpr import cpr_signal
+from market_manus.strategies.parabolic_sar import parabolic_sar_signal, parabolic_sar_series
+from market_manus.strategies.vwap import vwap_signal, vwap_volume_combo_signal, vwap_series, vwap_volume_combo_series
+from market_manus.strategies.cpr import cpr_signal, cpr_series
+
+# Contrato vetorizado de sinais (série inteira)
+from market_manus.strategies.signal_series import SignalSeries, run_windowed, DEFAULT_LOOKBACK
+from market_manus.strategies import indicator_kernels
 
 # Importar filtro de volume
 from market_manus.analysis.volume_filter import VolumeFilterPipeline
 
+# Simulador vetorizado de trades
+from market_manus.backtest.trade_simulator import simulate_trades
+from market_manus.core.capital_manager import FeeModel, FeePreset
+
 # Importar cache de dados históricos
-from market_manus.data_providers.historical_cache import HistoricalDataCache
+from market_manus.data_providers.historical_cache import (
+    INTERVAL_MS, HistoricalDataCache, arrays_to_klines, date_to_ms
+)
+from market_manus.data_providers.kline_paginator import KlineFetchResult, get_paginator
+from market_manus.data_providers.signal_cache import SignalCache, module_dependencies, source_fingerprint
 
 # Importar sistema de combinações recomendadas
 from market_manus.confluence_mode.recommended_combinations import RecommendedCombinations
+from market_manus.confluence_mode.combination_matrix import CombinationMatrixBacktester
 from market_manus.confluence_mode.recommended_combinations_menu import display_recommended_combinations_menu
 
 # Importar integração Premium Manus AI
@@ -63,7 +81,13 @@ class ConfluenceModeModule:
     API keys são validadas antes de executar qualquer backtest.
     """
     
-    def __init__(self, data_provider=None, capital_manager=None):
+    def __init__(self, data_provider=None, capital_manager=None, performance_repo=None):
+        """
+        Args:
+            data_provider: Provider de klines
+            capital_manager: Gerenciador de capital
+            performance_repo: PerformanceHistoryRepository (padrão: data/performance_history.db)
+        """
         self.data_provider = data_provider
         self.capital_manager = capital_manager
         
@@ -73,6 +97,10 @@ class ConfluenceModeModule:
         # Cache de dados históricos
         self.cache = HistoricalDataCache(cache_dir="data")
         
+        # Memo em disco dos sinais por estratégia (ao lado do cache de candles)
+        self.signal_cache = SignalCache(cache_dir="data")
+        self._signal_code_version = None
+        
         # Estatísticas de cache para tracking
         self.cache_stats = {
             "hits": 0,
@@ -88,8 +116,12 @@ class ConfluenceModeModule:
         self.sk_advisor = SemanticKernelAdvisor()
         self.semantic_kernel_enabled = False  # Toggle on/off
         
+        # 💸 CUSTOS DE TRADING - fees + slippage descontados nos backtests
+        self.fee_model = FeeModel.from_preset(FeePreset.LIVE)
+        self.trading_costs_enabled = False  # Toggle on/off (desligado: P&L bruto, como o loop original)
+        
         # 📊 PERFORMANCE TRACKING SYSTEM
-        self.performance_repo = PerformanceHistoryRepository()
+        self.performance_repo = performance_repo or PerformanceHistoryRepository()
         self.performance_analytics = PerformanceAnalyticsService(self.performance_repo)
         
         # ORDEM FIXA de estratégias para garantir mapeamento consistente UI → Engine
@@ -309,7 +341,7 @@ class ConfluenceModeModule:
         """Executa o modo interativo do Confluence Lab"""
         while True:
             self._show_main_menu()
-            choice = input("\n🔢 Escolha uma opção (0-11): ").strip()
+            choice = input("\n🔢 Escolha uma opção (0-13): ").strip()
             
             if choice == '0':
                 print("\n👋 Saindo do Confluence Lab...")
@@ -338,6 +370,8 @@ class ConfluenceModeModule:
                 self._toggle_ai_premium()
             elif choice == '12':
                 self._toggle_semantic_kernel()
+            elif choice == '13':
+                self._run_combination_matrix()
             else:
                 print("❌ Opção inválida")
                 input("\n📖 Pressione ENTER para continuar...")
@@ -393,6 +427,7 @@ class ConfluenceModeModule:
         print(f"\n🧪 TESTES:")
         print("   7️⃣  Executar Backtest de Confluência")
         print("   8️⃣  Teste em Tempo Real de Confluência")
+        print("   1️⃣3️⃣  Matriz de Combinações Recomendadas (todas × modos × timeframes)")
         
         print(f"\n📊 RESULTADOS:")
         print("   9️⃣  Visualizar Resultados")
@@ -965,10 +1000,28 @@ class ConfluenceModeModule:
         
         print("═" * 63)
     
-    def _fetch_historical_klines(self, symbol: str, interval: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Tuple[List, Dict]:
+    def _resolve_fetch_period(self, start_date: Optional[str], end_date: Optional[str]) -> Tuple[int, int]:
+        """
+        Converte o período pedido em timestamps (ms), sem data = últimos 30 dias
+        
+        Returns:
+            Tuple[start_ts, end_ts]
+        """
+        if start_date and end_date:
+            return date_to_ms(start_date), date_to_ms(end_date)
+        
+        # Período padrão: últimos 30 dias
+        end_ts = int(datetime.now().timestamp() * 1000)
+        start_ts = end_ts - (30 * 24 * 60 * 60 * 1000)
+        return start_ts, end_ts
+    
+    def _fetch_historical_arrays(self, symbol: str, interval: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Tuple[Optional[Dict[str, np.ndarray]], Dict]:
         """
-        Busca TODOS os candles do período especificado, fazendo múltiplas chamadas se necessário.
-        Utiliza cache para evitar chamadas desnecessárias à API.
+        Busca TODOS os candles do período em colunas tipadas (timestamp int64, OHLCV float64).
+        
+        O cache é particionado por (symbol, interval): só as lacunas ainda não cobertas
+        são buscadas na API e mescladas às partições; o período inteiro é então servido
+        dos dados locais. Candles ainda em formação não são buscados nem armazenados.
         
         Args:
             symbol: Par de trading (ex: BTCUSDT)
@@ -977,152 +1030,111 @@ class ConfluenceModeModule:
             end_date: Data final no formato YYYY-MM-DD (opcional)
         
         Returns:
-            Tuple[List, Dict]: (Lista com todos os candles, Dicionário com métricas da API)
+            Tuple[Dict, Dict]: ({coluna: np.ndarray} ou None, Dicionário com métricas da API)
         """
-        # Calcular timestamps
-        if start_date and end_date:
-            start_ts = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp() * 1000)
-            end_ts = int(datetime.strptime(end_date, "%Y-%m-%d").timestamp() * 1000)
-            cache_start_date = start_date
-            cache_end_date = end_date
-        else:
-            # Período padrão: últimos 30 dias
-            end_ts = int(datetime.now().timestamp() * 1000)
-            start_ts = end_ts - (30 * 24 * 60 * 60 * 1000)
-            # Converter timestamps para formato YYYY-MM-DD para cache
-            cache_start_date = datetime.fromtimestamp(start_ts / 1000).strftime("%Y-%m-%d")
-            cache_end_date = datetime.fromtimestamp(end_ts / 1000).strftime("%Y-%m-%d")
-        
-        # Calcular duração de um candle em milissegundos
-        timeframe_ms = {
-            "1": 60 * 1000,           # 1 minuto
-            "5": 5 * 60 * 1000,       # 5 minutos
-            "15": 15 * 60 * 1000,     # 15 minutos
-            "60": 60 * 60 * 1000,     # 1 hora
-            "240": 4 * 60 * 60 * 1000,  # 4 horas
-            "D": 24 * 60 * 60 * 1000  # 1 dia
-        }
+        start_ts, end_ts = self._resolve_fetch_period(start_date, end_date)
+        candle_duration = INTERVAL_MS.get(interval, 60 * 1000)
         
-        candle_duration = timeframe_ms.get(interval, 60 * 1000)
+        # Apenas candles já fechados
+        closed_until = (int(time.time() * 1000) // candle_duration) * candle_duration
+        end_ts = min(end_ts, closed_until)
         
         # Calcular quantos candles são necessários
         total_candles_needed = int((end_ts - start_ts) / candle_duration)
         
         print(f"   📊 Período requer ~{total_candles_needed} candles")
         
-        # TENTAR BUSCAR DO CACHE PRIMEIRO
-        cache_key = self.cache._generate_cache_key(symbol, interval, cache_start_date, cache_end_date)
-        cached_data = self.cache.get(symbol, interval, cache_start_date, cache_end_date)
+        # TENTAR SERVIR DO CACHE: lacunas ainda não cobertas
+        gaps = self.cache.missing_ranges(symbol, interval, start_ts, end_ts)
         
-        if cached_data:
+        if not gaps:
             # CACHE HIT
+            arrays = self.cache.get_range_arrays(symbol, interval, start_ts, end_ts)
+            timestamps = arrays["timestamp"]
             self.cache_stats["hits"] += 1
             self.cache_stats["api_calls_saved"] += 1
-            print(f"   ✅ Cache HIT: {cache_key} ({len(cached_data)} candles)")
-            
-            # Determinar período exato dos dados
-            first_candle_time = datetime.fromtimestamp(int(cached_data[0][0]) / 1000)
-            last_candle_time = datetime.fromtimestamp(int(cached_data[-1][0]) / 1000)
+            print(f"   ✅ Cache HIT: {symbol} {interval} ({len(timestamps)} candles)")
             
             metrics = {
-                "total_candles": len(cached_data),
+                "total_candles": len(timestamps),
                 "successful_batches": 0,
                 "failed_batches": 0,
                 "total_batches": 0,
                 "success_rate": 100.0,
-                "first_candle_time": first_candle_time,
-                "last_candle_time": last_candle_time,
+                "first_candle_time": datetime.fromtimestamp(timestamps[0] / 1000) if len(timestamps) else None,
+                "last_candle_time": datetime.fromtimestamp(timestamps[-1] / 1000) if len(timestamps) else None,
                 "data_source": "Cache (dados reais armazenados)",
                 "cache_hit": True
             }
             
-            return cached_data, metrics
+            return (arrays if len(timestamps) else None), metrics
         
-        # CACHE MISS - Buscar da API
+        # CACHE MISS (total ou parcial) - buscar apenas as lacunas
         self.cache_stats["misses"] += 1
-        print(f"   📥 Cache MISS: buscando API...")
+        missing_candles = sum(int((gap_end - gap_start) / candle_duration) for gap_start, gap_end in gaps)
+        print(f"   📥 Cache MISS: {len(gaps)} lacuna(s), ~{missing_candles} candles a buscar na API...")
         
-        # Buscar dados em lotes de 500 (limite da API)
-        all_klines = []
-        current_start = start_ts
-        batch_num = 1
-        
-        # Métricas da API
         successful_batches = 0
         failed_batches = 0
         
-        while current_start < end_ts:
-            # Calcular quantos candles faltam
-            remaining_ms = end_ts - current_start
-            remaining_candles = int(remaining_ms / candle_duration)
-            limit = min(500, remaining_candles)
-            
-            if limit <= 0:
+        for gap_start, gap_end in gaps:
+            if not self.data_provider:
+                print("   ❌ Data Provider não disponível!")
                 break
             
-            print(f"   📡 Batch {batch_num}: Buscando {limit} candles a partir de {datetime.fromtimestamp(current_start/1000).strftime('%Y-%m-%d %H:%M')}...")
+            fetched = self._fetch_klines_from_api(symbol, interval, gap_start, gap_end)
+            successful_batches += fetched.successful_batches
+            failed_batches += fetched.failed_batches
             
-            # Buscar dados com startTime
-            try:
-                klines = self.data_provider.get_kline(
-                    category='spot',
-                    symbol=symbol,
-                    interval=interval,
-                    limit=limit,
-                    start=current_start,
-                    end=end_ts
-                )
-                
-                if not klines:
-                    print(f"   ⚠️  Nenhum dado retornado para este batch")
-                    failed_batches += 1
-                    break
-                
-                all_klines.extend(klines)
-                successful_batches += 1
-                print(f"   ✅ Recebidos {len(klines)} candles (total acumulado: {len(all_klines)})")
-                
-                # Próximo batch começa após o último candle recebido
-                last_candle_time = int(klines[-1][0])  # timestamp do último candle
-                current_start = last_candle_time + candle_duration
-                batch_num += 1
-                
-                # Evitar rate limit
-                time.sleep(0.1)
-            except Exception as e:
-                print(f"   ❌ Erro no batch {batch_num}: {str(e)}")
-                failed_batches += 1
-                break
+            # Salvar no cache só as fatias concluídas (fatias com falha continuam como lacunas)
+            if fetched.covered_ranges:
+                print(f"   💾 Salvando dados no cache...")
+            for covered_start, covered_end in fetched.covered_ranges:
+                self.cache.save_range(symbol, interval, covered_start, covered_end, fetched.klines)
         
-        # Salvar dados no cache para futuros usos
-        if all_klines:
-            print(f"   💾 Salvando dados no cache...")
-            self.cache.save(symbol, interval, cache_start_date, cache_end_date, all_klines)
+        arrays = self.cache.get_range_arrays(symbol, interval, start_ts, end_ts)
+        timestamps = arrays["timestamp"]
         
         # Calcular métricas
         total_batches = successful_batches + failed_batches
         success_rate = (successful_batches / total_batches * 100) if total_batches > 0 else 0
         
-        # Determinar período exato dos dados
-        first_candle_time = None
-        last_candle_time = None
-        if all_klines:
-            first_candle_time = datetime.fromtimestamp(int(all_klines[0][0]) / 1000)
-            last_candle_time = datetime.fromtimestamp(int(all_klines[-1][0]) / 1000)
-        
         metrics = {
-            "total_candles": len(all_klines),
+            "total_candles": len(timestamps),
             "successful_batches": successful_batches,
             "failed_batches": failed_batches,
             "total_batches": total_batches,
             "success_rate": success_rate,
-            "first_candle_time": first_candle_time,
-            "last_candle_time": last_candle_time,
+            "first_candle_time": datetime.fromtimestamp(timestamps[0] / 1000) if len(timestamps) else None,
+            "last_candle_time": datetime.fromtimestamp(timestamps[-1] / 1000) if len(timestamps) else None,
             "data_source": self.data_provider.__class__.__name__ if self.data_provider else "Unknown",
-            "cache_hit": False
+            "cache_hit": False,
+            "gaps_fetched": len(gaps)
         }
         
-        return all_klines, metrics
+        return (arrays if len(timestamps) else None), metrics
+    
+    def _fetch_historical_klines(self, symbol: str, interval: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Tuple[List, Dict]:
+        """
+        Mesmo que _fetch_historical_arrays, no formato de klines da Binance (strings).
+        
+        Returns:
+            Tuple[List, Dict]: (Lista com todos os candles, Dicionário com métricas da API)
+        """
+        arrays, metrics = self._fetch_historical_arrays(symbol, interval, start_date, end_date)
+        return (arrays_to_klines(arrays) if arrays is not None else []), metrics
+    
+    def _fetch_klines_from_api(self, symbol: str, interval: str, start_ts: int, end_ts: int) -> KlineFetchResult:
+        """
+        Busca na API os candles de [start_ts, end_ts)
+        
+        Fatias de até 500 candles buscadas em paralelo dentro do orçamento de peso
+        da exchange; fatias com falha são repetidas antes de serem reportadas.
+        
+        Returns:
+            KlineFetchResult com klines em ordem e fatias concluídas/falhas
+        """
+        return get_paginator(self.data_provider).fetch(self.data_provider, symbol, interval, start_ts, end_ts)
     
     def _run_confluence_backtest(self):
         """
@@ -1166,27 +1178,27 @@ class ConfluenceModeModule:
         # selected_timeframe já está no formato correto para Binance ("1", "5", "15", "60", "240", "D")
         interval = self.selected_timeframe
         
-        # Buscar TODOS os candles do período especificado
-        klines, metrics = self._fetch_historical_klines(
+        # Buscar TODOS os candles do período especificado (colunas float64, sem strings)
+        ohlcv, metrics = self._fetch_historical_arrays(
             symbol=self.selected_asset,
             interval=interval,
             start_date=self.custom_start_date,
             end_date=self.custom_end_date
         )
         
-        if not klines or len(klines) < 50:
-            print(f"❌ Dados insuficientes! Recebido: {len(klines) if klines else 0} velas")
+        total_received = len(ohlcv["close"]) if ohlcv else 0
+        if total_received < 50:
+            print(f"❌ Dados insuficientes! Recebido: {total_received} velas")
             input("\n📖 Pressione ENTER para continuar...")
             return
         
         # Exibir métricas de dados carregados
         self._display_data_metrics(metrics)
         
-        # Converter dados para análise (OHLCV completo)
-        opens = [float(k[1]) for k in klines]   # Preços de abertura
-        highs = [float(k[2]) for k in klines]   # Máximas
-        lows = [float(k[3]) for k in klines]    # Mínimas
-        closes = [float(k[4]) for k in klines]  # Preços de fechamento
+        # Dados para análise (OHLCV completo)
+        highs = ohlcv["high"]    # Máximas
+        lows = ohlcv["low"]      # Mínimas
+        closes = ohlcv["close"]  # Preços de fechamento
         
         total_candles = len(closes)
         total_strategies = len(self.selected_strategies)
@@ -1195,8 +1207,12 @@ class ConfluenceModeModule:
         print(f"\n📊 Executando {total_strategies} estratégias sobre {total_candles:,} candles...")
         
         # Executar cada estratégia sobre os dados reais com barra de progresso
+        # (sinais já calculados para os mesmos candles vêm do cache em disco)
         strategy_signals = {}
         start_time = time.time()
+        data_hash = SignalCache.fingerprint(ohlcv)
+        dataset = f"{self.selected_asset}_{interval}_{self.custom_start_date or 'default'}_{self.custom_end_date or 'default'}"
+        cache_hits_before = self.signal_cache.stats["hits"]
         
         with Progress(
             SpinnerColumn(),
@@ -1217,7 +1233,7 @@ class ConfluenceModeModule:
                 strategy = self.available_strategies[strategy_key]
                 strategy_start = time.time()
                 
-                signal_indices = self._execute_strategy_on_data(strategy_key, closes, highs, lows, opens)
+                signal_indices = self._cached_strategy_signals(strategy_key, ohlcv, data_hash, dataset)
                 
                 strategy_signals[strategy_key] = {
                     "name": strategy['name'],
@@ -1236,19 +1252,16 @@ class ConfluenceModeModule:
                     description=f"[{idx}/{total_strategies}] {strategy['emoji']} {strategy['name']} • [cyan]{speed:.0f} units/s[/cyan]"
                 )
         
+        self.signal_cache.flush()
+        cached = self.signal_cache.stats["hits"] - cache_hits_before
+        if cached:
+            print(f"♻️  Sinais reutilizados do cache: {cached}/{total_strategies} estratégias")
+        
         # Aplicar filtro de volume
         print("\n🔍 Aplicando filtro de volume...")
         
-        # Extrair volumes com validação
-        volumes_raw = []
-        for k in klines:
-            try:
-                vol = float(k[5]) if len(k) > 5 and k[5] else 0.0
-                volumes_raw.append(vol)
-            except (ValueError, IndexError, TypeError):
-                volumes_raw.append(0.0)
-        
-        volumes = pd.Series(volumes_raw)
+        # Volumes (ausentes/inválidos já chegam como 0.0)
+        volumes = pd.Series(ohlcv["volume"])
         
         # Validar se temos dados de volume válidos
         if volumes.sum() == 0:
@@ -1284,7 +1297,7 @@ class ConfluenceModeModule:
         # Calcular resultados financeiros baseados nos sinais reais COM DIREÇÃO
         initial_capital = self.capital_manager.current_capital if self.capital_manager else 10000
         final_capital, total_trades, winning_trades = self._simulate_trades_from_signals(
-            confluence_signals, closes, initial_capital, highs, lows
+            confluence_signals, closes, initial_capital, highs, lows, fee_model=self._trade_fee_model()
         )
         losing_trades = total_trades - winning_trades
         pnl = final_capital - initial_capital
@@ -1354,6 +1367,52 @@ class ConfluenceModeModule:
         
         input("\n📖 Pressione ENTER para continuar...")
     
+    def _run_combination_matrix(self):
+        """
+        Backtest em lote: todas as Combinações Recomendadas × modos de confluência × timeframes
+        
+        Cada estratégia distinta é calculada uma vez por timeframe; os resultados
+        vão para o repositório de performance em uma única transação.
+        """
+        if not self.selected_asset:
+            print("❌ Selecione um ativo primeiro (opção 1)")
+            input("\n📖 Pressione ENTER para continuar...")
+            return
+        
+        default_timeframes = self.selected_timeframe or "5,15,60"
+        raw = input(f"\n⏰ Timeframes separados por vírgula [{default_timeframes}]: ").strip() or default_timeframes
+        timeframes = [tf.strip() for tf in raw.split(",") if tf.strip() in self.timeframes]
+        if not timeframes:
+            print("❌ Nenhum timeframe válido")
+            input("\n📖 Pressione ENTER para continuar...")
+            return
+        
+        backtester = CombinationMatrixBacktester(self)
+        print(f"\n🧮 MATRIZ DE COMBINAÇÕES: {len(backtester.combinations)} combinações × "
+              f"{len(backtester.modes)} modos × {len(timeframes)} timeframe(s)")
+        print(f"   📈 {len(backtester.strategy_keys)} estratégias distintas (calculadas uma vez por timeframe)")
+        
+        initial_capital = self.capital_manager.current_capital if self.capital_manager else 10000
+        runs = backtester.run(
+            self.selected_asset, timeframes, self.custom_start_date, self.custom_end_date, initial_capital
+        )
+        if not runs:
+            print("❌ Nenhum resultado (dados insuficientes)")
+            input("\n📖 Pressione ENTER para continuar...")
+            return
+        
+        table = Table(title=f"🏆 Top 15 — {self.selected_asset} ({len(runs)} avaliações salvas)")
+        for column in ("Combinação", "TF", "Modo", "Trades", "Win Rate", "ROI"):
+            table.add_column(column)
+        for run in runs[:15]:
+            table.add_row(
+                run.combination_name, self.timeframes[run.timeframe]["name"], run.confluence_mode,
+                str(run.total_trades), f"{run.win_rate:.1f}%", f"{run.roi:+.2f}%"
+            )
+        Console().print(table)
+        
+        input("\n📖 Pressione ENTER para continuar...")
+    
     def _execute_strategy_on_data(self, strategy_key: str, closes: List[float], highs: List[float], lows: List[float], opens: List[float]) -> List[Tuple[int, str]]:
         """
         Executa uma estratégia sobre dados reais OHLCV e retorna (ÍNDICE, DIREÇÃO) onde sinais ocorreram
@@ -1364,6 +1423,175 @@ class ConfluenceModeModule:
         Returns:
             List[Tuple[int, str]]: Lista de (índice, direção) onde direção é "BUY" ou "SELL"
         """
+        return self._execute_strategy_series(strategy_key, closes, highs, lows, opens).to_tuples()
+    
+    def _strategy_code_version(self) -> str:
+        """Versão do código dos detectores (hash das fontes), parte da chave do cache de sinais"""
+        if self._signal_code_version is None:
+            # Este módulo e tudo de market_manus.strategies que ele importa (transitivamente)
+            self._signal_code_version = source_fingerprint(module_dependencies([sys.modules[__name__]]))
+        return self._signal_code_version
+    
+    def _cached_strategy_signals(self, strategy_key: str, ohlcv: Dict[str, np.ndarray], data_hash: Optional[str] = None, dataset: Optional[str] = None) -> List[Tuple[int, str]]:
+        """
+        Sinais da estratégia com memo em disco (SignalCache)
+        
+        Args:
+            strategy_key: Estratégia
+            ohlcv: Colunas open/high/low/close dos candles
+            data_hash: SignalCache.fingerprint(ohlcv) (calculado se None)
+            dataset: Identificação do dataset, para invalidar sinais de candles anteriores
+        
+        Returns:
+            List[Tuple[int, str]]: Mesmo formato de _execute_strategy_on_data
+        """
+        data_hash = data_hash or SignalCache.fingerprint(ohlcv)
+        params = self.available_strategies[strategy_key].get('params', {})
+        key = SignalCache.make_key(data_hash, strategy_key, params, self._strategy_code_version())
+        
+        series = self.signal_cache.get(key)
+        if series is None:
+            series = self._execute_strategy_series(strategy_key, ohlcv["close"], ohlcv["high"], ohlcv["low"], ohlcv["open"])
+            self.signal_cache.put(key, series, data_hash=data_hash, dataset=dataset, strategy_key=strategy_key)
+        return series.to_tuples()
+    
+    def _build_strategy_frame(self, strategy_key: str, closes, highs, lows, opens) -> pd.DataFrame:
+        """Monta o DataFrame OHLC(V) usado pelos detectores de janela (volume dummy = 1.0)"""
+        df = pd.DataFrame({
+            'open': np.asarray(opens, dtype=np.float64),
+            'high': np.asarray(highs, dtype=np.float64),
+            'low': np.asarray(lows, dtype=np.float64),
+            'close': np.asarray(closes, dtype=np.float64)
+        })
+        if not strategy_key.startswith("smc_"):
+            df['volume'] = 1.0  # Volume não usado/dummy nas estratégias clássicas de janela
+        return df
+    
+    def _execute_strategy_series(self, strategy_key: str, closes, highs, lows, opens) -> SignalSeries:
+        """
+        Caminho vetorizado: calcula os sinais da estratégia sobre a série inteira de uma vez.
+        
+        Estratégias de janela (PSAR, VWAP, CPR, SMC) usam os *_series equivalentes,
+        que avaliam todas as janelas [i-50, i] sem alocar um DataFrame por candle.
+        Mesmos (índice, direção) de _execute_strategy_reference, ordenados por índice
+        (validado por testes de paridade sobre todas as available_strategies).
+        
+        Returns:
+            SignalSeries com arrays NumPy de índices e direções (+1 BUY / -1 SELL)
+        """
+        closes_arr = np.asarray(closes, dtype=np.float64)
+        n = len(closes_arr)
+        
+        # RSI Mean Reversion
+        if strategy_key == "rsi_mean_reversion":
+            rsi = np.asarray(self._calculate_rsi(closes, period=14), dtype=np.float64)
+            directions = np.where(rsi < 30, 1, np.where(rsi > 70, -1, 0))
+            return SignalSeries.from_directions(directions, offset=14)
+        
+        # EMA Crossover / MACD: cruzamento entre duas linhas
+        if strategy_key in ("ema_crossover", "macd"):
+            if strategy_key == "ema_crossover":
+                fast_line = self._calculate_ema(closes, 12)
+                slow_line = self._calculate_ema(closes, 26)
+                offset = 26  # Offset do EMA mais longo
+            else:
+                fast_line, slow_line = self._calculate_macd(closes)
+                offset = 26 + 9  # Offset do EMA26 + Signal Line
+            size = min(len(fast_line), len(slow_line))
+            if size < 2:
+                return SignalSeries.empty()
+            fast_arr = np.asarray(fast_line[:size], dtype=np.float64)
+            slow_arr = np.asarray(slow_line[:size], dtype=np.float64)
+            cross_up = (fast_arr[:-1] <= slow_arr[:-1]) & (fast_arr[1:] > slow_arr[1:])
+            cross_down = (fast_arr[:-1] >= slow_arr[:-1]) & (fast_arr[1:] < slow_arr[1:])
+            directions = np.where(cross_up, 1, np.where(cross_down, -1, 0))
+            return SignalSeries.from_directions(directions, offset=offset + 1)
+        
+        # Bollinger Bands (rompimento superior = SELL, inferior = BUY)
+        if strategy_key == "bollinger_breakout":
+            bb_upper, bb_lower = self._calculate_bollinger_bands(closes, period=20, std_dev=2.0)
+            offset = 19  # Offset do período BB
+            upper = np.asarray(bb_upper, dtype=np.float64)
+            lower = np.asarray(bb_lower, dtype=np.float64)
+            window_closes = closes_arr[offset:offset + upper.size]
+            directions = np.where(window_closes > upper, -1, np.where(window_closes < lower, 1, 0))
+            return SignalSeries.from_directions(directions, offset=offset)
+        
+        # Stochastic / Williams %R: zonas de sobrevenda/sobrecompra
+        if strategy_key == "stochastic":
+            values = np.asarray(self._calculate_stochastic(closes, highs, lows, period=14), dtype=np.float64)
+            directions = np.where(values < 20, 1, np.where(values > 80, -1, 0))
+            return SignalSeries.from_directions(directions, offset=13)
+        
+        if strategy_key == "williams_r":
+            values = np.asarray(self._calculate_williams_r(closes, highs, lows, period=14), dtype=np.float64)
+            directions = np.where(values < -80, 1, np.where(values > -20, -1, 0))
+            return SignalSeries.from_directions(directions, offset=13)
+        
+        # ADX: tendência forte, direção pelo close vs média dos 10 candles anteriores
+        if strategy_key == "adx":
+            offset = 14
+            adx = np.asarray(self._calculate_adx(closes, highs, lows, period=14), dtype=np.float64)
+            candle_index = np.arange(adx.size) + offset
+            # Soma sequencial (mesma ordem do sum() original) dos 10 closes anteriores
+            recent_sum = np.zeros(n, dtype=np.float64)
+            if n > 10:
+                for k in range(10, 0, -1):
+                    recent_sum[10:] += closes_arr[10 - k:n - k]
+            recent_avg = recent_sum[candle_index] / 10
+            strong = (adx > 25) & (candle_index > 10)
+            directions = np.where(strong, np.where(closes_arr[candle_index] > recent_avg, 1, -1), 0)
+            return SignalSeries.from_directions(directions, offset=offset)
+        
+        # Fibonacci (simplificado: BUY a cada 40 candles a partir de 20, SELL a partir de 40)
+        if strategy_key == "fibonacci":
+            directions = np.zeros(n, dtype=np.int8)
+            directions[20::40] = 1
+            directions[40::40] = -1
+            return SignalSeries.from_directions(directions)
+        
+        series_fn = self._series_detectors().get(strategy_key)
+        if series_fn is None:
+            return SignalSeries.empty()
+        return series_fn(self._build_strategy_frame(strategy_key, closes, highs, lows, opens))
+    
+    @staticmethod
+    def _series_detectors() -> Dict:
+        """Estratégias de janela -> implementação vetorizada (*_series)"""
+        return {
+            "parabolic_sar": parabolic_sar_series,
+            "vwap": vwap_series,
+            "vwap_volume": vwap_volume_combo_series,
+            "cpr": cpr_series,
+            "smc_bos": detect_bos_series,
+            "smc_choch": detect_choch_series,
+            "smc_order_blocks": detect_order_blocks_series,
+            "smc_fvg": detect_fvg_series,
+            "smc_liquidity_sweep": detect_liquidity_sweep_series,
+        }
+    
+    @staticmethod
+    def _window_detectors() -> Dict:
+        """Estratégias de janela -> detector de referência (um Signal por janela)"""
+        return {
+            "parabolic_sar": parabolic_sar_signal,
+            "vwap": vwap_signal,
+            "vwap_volume": vwap_volume_combo_signal,
+            "cpr": cpr_signal,
+            "smc_bos": detect_bos,
+            "smc_choch": detect_choch,
+            "smc_order_blocks": detect_order_blocks,
+            "smc_fvg": detect_fvg,
+            "smc_liquidity_sweep": detect_liquidity_sweep,
+        }
+    
+    def _execute_strategy_reference(self, strategy_key: str, closes: List[float], highs: List[float], lows: List[float], opens: List[float]) -> List[Tuple[int, str]]:
+        """
+        Caminho de REFERÊNCIA (loop por candle / janela deslizante de 51 candles).
+        
+        Mantido para validar _execute_strategy_series nos testes de paridade.
+        É O(n * janela) e aloca um DataFrame por candle - não usar em backtests.
+        """
         signal_indices = []
         
         # RSI Mean Reversion
@@ -1455,143 +1683,19 @@ class ConfluenceModeModule:
             for i in range(40, len(closes), 40):
                 signal_indices.append((i, "SELL"))
         
-        # Parabolic SAR
-        elif strategy_key == "parabolic_sar":
-            df = pd.DataFrame({
-                'open': opens,
-                'high': highs,
-                'low': lows,
-                'close': closes,
-                'volume': [1.0] * len(closes)  # Volume não usado pelo PSAR
-            })
-            for i in range(50, len(df)):
-                window_df = df.iloc[max(0, i-50):i+1].reset_index(drop=True)
-                signal = parabolic_sar_signal(window_df)
-                if signal.action != "HOLD":
-                    signal_indices.append((i, signal.action))
-        
-        # VWAP
-        elif strategy_key == "vwap":
-            # Usar volume dummy se não disponível
-            volumes = [1.0] * len(closes)  # Será substituído por volume real se disponível
-            df = pd.DataFrame({
-                'open': opens,
-                'high': highs,
-                'low': lows,
-                'close': closes,
-                'volume': volumes
-            })
-            for i in range(50, len(df)):
-                window_df = df.iloc[max(0, i-50):i+1].reset_index(drop=True)
-                signal = vwap_signal(window_df)
-                if signal.action != "HOLD":
-                    signal_indices.append((i, signal.action))
-        
-        # VWAP + Volume Combo
-        elif strategy_key == "vwap_volume":
-            volumes = [1.0] * len(closes)
-            df = pd.DataFrame({
-                'open': opens,
-                'high': highs,
-                'low': lows,
-                'close': closes,
-                'volume': volumes
-            })
-            for i in range(50, len(df)):
-                window_df = df.iloc[max(0, i-50):i+1].reset_index(drop=True)
-                signal = vwap_volume_combo_signal(window_df)
-                if signal.action != "HOLD":
-                    signal_indices.append((i, signal.action))
-        
-        # CPR (Central Pivot Range)
-        elif strategy_key == "cpr":
-            df = pd.DataFrame({
-                'open': opens,
-                'high': highs,
-                'low': lows,
-                'close': closes,
-                'volume': [1.0] * len(closes)
-            })
-            for i in range(50, len(df)):
-                window_df = df.iloc[max(0, i-50):i+1].reset_index(drop=True)
-                signal = cpr_signal(window_df)
-                if signal.action != "HOLD":
-                    signal_indices.append((i, signal.action))
-        
-        # SMC: Break of Structure
-        elif strategy_key == "smc_bos":
-            df = pd.DataFrame({
-                'open': opens,
-                'high': highs,
-                'low': lows,
-                'close': closes
-            })
-            # Aplicar em janelas deslizantes
-            for i in range(50, len(df)):
-                window_df = df.iloc[max(0, i-50):i+1].reset_index(drop=True)
-                signal = detect_bos(window_df)
-                if signal.action != "HOLD":
-                    signal_indices.append((i, signal.action))  # Captura direção BUY/SELL
-        
-        # SMC: Change of Character
-        elif strategy_key == "smc_choch":
-            df = pd.DataFrame({
-                'open': opens,
-                'high': highs,
-                'low': lows,
-                'close': closes
-            })
-            for i in range(50, len(df)):
-                window_df = df.iloc[max(0, i-50):i+1].reset_index(drop=True)
-                signal = detect_choch(window_df)
-                if signal.action != "HOLD":
-                    signal_indices.append((i, signal.action))  # Captura direção BUY/SELL
-        
-        # SMC: Order Blocks
-        elif strategy_key == "smc_order_blocks":
-            df = pd.DataFrame({
-                'open': opens,
-                'high': highs,
-                'low': lows,
-                'close': closes
-            })
-            for i in range(50, len(df)):
-                window_df = df.iloc[max(0, i-50):i+1].reset_index(drop=True)
-                signal = detect_order_blocks(window_df)
-                if signal.action != "HOLD":
-                    signal_indices.append((i, signal.action))  # Captura direção BUY/SELL
-        
-        # SMC: Fair Value Gap
-        elif strategy_key == "smc_fvg":
-            df = pd.DataFrame({
-                'open': opens,
-                'high': highs,
-                'low': lows,
-                'close': closes
-            })
-            for i in range(50, len(df)):
-                window_df = df.iloc[max(0, i-50):i+1].reset_index(drop=True)
-                signal = detect_fvg(window_df)
-                if signal.action != "HOLD":
-                    signal_indices.append((i, signal.action))  # Captura direção BUY/SELL
-        
-        # SMC: Liquidity Sweep
-        elif strategy_key == "smc_liquidity_sweep":
-            df = pd.DataFrame({
-                'open': opens,
-                'high': highs,
-                'low': lows,
-                'close': closes
-            })
-            for i in range(50, len(df)):
-                window_df = df.iloc[max(0, i-50):i+1].reset_index(drop=True)
-                signal = detect_liquidity_sweep(window_df)
-                if signal.action != "HOLD":
-                    signal_indices.append((i, signal.action))  # Captura direção BUY/SELL
+        # Estratégias de janela deslizante (PSAR, VWAP, CPR, SMC)
+        elif strategy_key in self._window_detectors():
+            df = self._build_strategy_frame(strategy_key, closes, highs, lows, opens)
+            detector = self._window_detectors()[strategy_key]
+            signal_indices = run_windowed(detector, df, lookback=DEFAULT_LOOKBACK).to_tuples()
         
         return signal_indices
     
-    def _simulate_trades_from_signals(self, confluence_signals: List[Tuple[int, str]], closes: List[float], initial_capital: float, highs: List[float] = None, lows: List[float] = None) -> Tuple[float, int, int]:
+    def _trade_fee_model(self) -> Optional[FeeModel]:
+        """FeeModel dos backtests quando trading_costs_enabled (None: sem custos)"""
+        return self.fee_model if self.trading_costs_enabled else None
+    
+    def _simulate_trades_from_signals(self, confluence_signals: List[Tuple[int, str]], closes: List[float], initial_capital: float, highs: List[float] = None, lows: List[float] = None, fee_model: Optional[FeeModel] = None, vectorized: bool = True) -> Tuple[float, int, int]:
         """
         Simula trades REALISTAS com LONG e SHORT usando high/low intrabar
         
@@ -1608,10 +1712,16 @@ class ConfluenceModeModule:
             initial_capital: Capital inicial
             highs: Lista de preços máximos (opcional, se None usa closes)
             lows: Lista de preços mínimos (opcional, se None usa closes)
+            fee_model: Custos (fees + slippage) descontados de cada trade (apenas vetorizado)
+            vectorized: Se True usa backtest.trade_simulator (varredura vetorizada de SL/TP);
+                se False percorre todos os candles em Python (caminho de referência)
             
         Returns:
             Tuple[capital_final, total_trades, winning_trades]
         """
+        if vectorized:
+            return simulate_trades(confluence_signals, closes, initial_capital, highs, lows, fee_model=fee_model).totals()
+        
         # Fallback para highs/lows se não fornecidos
         if highs is None:
             highs = closes
@@ -1750,65 +1860,25 @@ class ConfluenceModeModule:
         return capital, total_trades, winning_trades
     
     def _calculate_rsi(self, data: List[float], period: int = 14) -> List[float]:
-        """Calcula RSI real"""
-        rsi_values = []
+        """Calcula RSI real (médias simples das últimas `period` variações; perda média 0 = RSI 100)"""
         if len(data) < period + 1:
-            return rsi_values
-        
-        for i in range(period, len(data)):
-            gains = []
-            losses = []
-            for j in range(i - period, i):
-                change = data[j + 1] - data[j]
-                if change > 0:
-                    gains.append(change)
-                    losses.append(0)
-                else:
-                    gains.append(0)
-                    losses.append(abs(change))
-            
-            avg_gain = np.mean(gains) if gains else 0
-            avg_loss = np.mean(losses) if losses else 0
-            
-            if avg_loss == 0:
-                rsi = 100
-            else:
-                rs = avg_gain / avg_loss
-                rsi = 100 - (100 / (1 + rs))
-            
-            rsi_values.append(rsi)
-        
-        return rsi_values
+            return []
+        rsi = indicator_kernels.rsi(data, period, smoothing="sma", flat_value=100.0)
+        return rsi[period:].tolist()
     
     def _calculate_ema(self, data: List[float], period: int) -> List[float]:
         """Calcula EMA real"""
-        ema_values = []
         if len(data) < period:
-            return ema_values
-        
-        multiplier = 2 / (period + 1)
-        ema = np.mean(data[:period])  # SMA inicial
-        ema_values.append(ema)
-        
-        for price in data[period:]:
-            ema = (price - ema) * multiplier + ema
-            ema_values.append(ema)
-        
-        return ema_values
+            return []
+        return indicator_kernels.ema(data, period, seed="sma")[period - 1:].tolist()
     
     def _calculate_bollinger_bands(self, data: List[float], period: int = 20, std_dev: float = 2.0) -> Tuple[List[float], List[float]]:
         """Calcula Bandas de Bollinger reais"""
-        upper_band = []
-        lower_band = []
-        
-        for i in range(period - 1, len(data)):
-            window = data[i - period + 1:i + 1]
-            sma = np.mean(window)
-            std = np.std(window)
-            upper_band.append(sma + std_dev * std)
-            lower_band.append(sma - std_dev * std)
-        
-        return upper_band, lower_band
+        if len(data) < period:
+            return [], []
+        sma = indicator_kernels.rolling_mean(data, period)[period - 1:]
+        std = indicator_kernels.rolling_std(data, period, ddof=0)[period - 1:]
+        return (sma + std_dev * std).tolist(), (sma - std_dev * std).tolist()
     
     def _calculate_macd(self, data: List[float]) -> Tuple[List[float], List[float]]:
         """Calcula MACD real"""
@@ -1824,50 +1894,28 @@ class ConfluenceModeModule:
         return macd_line, signal_line
     
     def _calculate_stochastic(self, closes: List[float], highs: List[float], lows: List[float], period: int = 14) -> List[float]:
-        """Calcula Estocástico real"""
-        stoch_values = []
-        
-        for i in range(period - 1, len(closes)):
-            highest_high = max(highs[i - period + 1:i + 1])
-            lowest_low = min(lows[i - period + 1:i + 1])
-            
-            if highest_high == lowest_low:
-                stoch = 50
-            else:
-                stoch = ((closes[i] - lowest_low) / (highest_high - lowest_low)) * 100
-            
-            stoch_values.append(stoch)
-        
-        return stoch_values
+        """Calcula Estocástico real (janela sem amplitude = 50)"""
+        if len(closes) < period:
+            return []
+        stoch = indicator_kernels.stochastic_k(highs, lows, closes, period, flat_value=50.0)
+        return stoch[period - 1:].tolist()
     
     def _calculate_williams_r(self, closes: List[float], highs: List[float], lows: List[float], period: int = 14) -> List[float]:
-        """Calcula Williams %R real"""
-        williams_values = []
-        
-        for i in range(period - 1, len(closes)):
-            highest_high = max(highs[i - period + 1:i + 1])
-            lowest_low = min(lows[i - period + 1:i + 1])
-            
-            if highest_high == lowest_low:
-                wr = -50
-            else:
-                wr = ((highest_high - closes[i]) / (highest_high - lowest_low)) * -100
-            
-            williams_values.append(wr)
-        
-        return williams_values
+        """Calcula Williams %R real (janela sem amplitude = -50)"""
+        if len(closes) < period:
+            return []
+        williams = indicator_kernels.williams_r(highs, lows, closes, period, flat_value=-50.0)
+        return williams[period - 1:].tolist()
     
     def _calculate_adx(self, closes: List[float], highs: List[float], lows: List[float], period: int = 14) -> List[float]:
         """Calcula ADX real (simplificado)"""
-        adx_values = []
-        
-        for i in range(period, len(closes)):
-            # Simplificado: usar volatilidade como proxy para ADX
-            window = closes[i - period:i]
-            volatility = np.std(window) / np.mean(window) * 100
-            adx_values.append(min(volatility * 10, 100))  # Normalizar para 0-100
-        
-        return adx_values
+        if len(closes) <= period:
+            return []
+        # Simplificado: usar volatilidade dos `period` closes anteriores como proxy para ADX
+        mean = indicator_kernels.rolling_mean(closes, period)[period - 1:-1]
+        std = indicator_kernels.rolling_std(closes, period, ddof=0)[period - 1:-1]
+        volatility = std / mean * 100
+        return np.minimum(volatility * 10, 100).tolist()  # Normalizar para 0-100
     
     def _calculate_confluence_signals(self, strategy_signals: Dict) -> List[Tuple[int, str]]:
         """
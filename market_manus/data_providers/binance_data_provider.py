@@ -5,11 +5,14 @@ Integração completa com endpoints públicos para dados de mercado.
 """
 
 import requests
+import httpx
 import time
 import hmac
 import hashlib
 from typing import Dict, List, Optional, Any
 
+from market_manus.data_providers.http_client import PooledHTTPClient
+
 class BinanceDataProvider:
     """Provedor de dados reais da Binance API"""
     
@@ -31,6 +34,9 @@ class BinanceDataProvider:
         
         self.api_key = api_key
         self.api_secret = api_secret
+        
+        # Sessões com keep-alive: uma conexão TCP/TLS reaproveitada entre lotes
+        self.http = PooledHTTPClient()
 
     def _generate_signature(self, query_string: str) -> str:
         """Gera assinatura HMAC-SHA256 para autenticação"""
@@ -54,7 +60,7 @@ class BinanceDataProvider:
         url = self.base_url + endpoint
         
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params, timeout=10)
             response.raise_for_status()
             return response.json()
                 
@@ -62,6 +68,28 @@ class BinanceDataProvider:
             print(f"❌ Erro de conexão: {e}")
             return None
 
+    async def _get_public_async(self, endpoint: str, params: Dict[str, Any] = None) -> Optional[Any]:
+        """
+        Versão assíncrona de _get_public (não bloqueia o event loop)
+        
+        Args:
+            endpoint: Endpoint da API (ex: "/v3/klines")
+            params: Parâmetros da requisição
+            
+        Returns:
+            Dados da resposta ou None em caso de erro
+        """
+        url = self.base_url + endpoint
+        
+        try:
+            response = await self.http.aget(url, params=params, timeout=10)
+            response.raise_for_status()
+            return response.json()
+                
+        except httpx.HTTPError as e:
+            print(f"❌ Erro de conexão: {e}")
+            return None
+
     def _get_authenticated(self, endpoint: str, params: Dict[str, Any] = None) -> Optional[Any]:
         """
         Faz requisição GET autenticada para a API Binance
@@ -89,7 +117,7 @@ class BinanceDataProvider:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=10)
+            response = self.http.get(url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
             return response.json()
                 
@@ -129,29 +157,8 @@ class BinanceDataProvider:
             return result
         return None
 
-    def get_kline(
-        self, 
-        category: str, 
-        symbol: str, 
-        interval: str, 
-        limit: int = 200,
-        start: int = None,
-        end: int = None
-    ) -> Optional[List[List[Any]]]:
-        """
-        Obtém dados de k-line (velas/candlesticks)
-        
-        Args:
-            category: Categoria (ignorado na Binance)
-            symbol: Símbolo do par (ex: "BTCUSDT")
-            interval: Intervalo das velas (Bybit format: "1", "5", "15", "60", "240", "D")
-            limit: Número máximo de velas (máx: 1000)
-            start: Timestamp inicial em milissegundos (opcional)
-            end: Timestamp final em milissegundos (opcional)
-            
-        Returns:
-            Lista de velas em formato compatível com Bybit
-        """
+    def _kline_params(self, symbol: str, interval: str, limit: int, start: int = None, end: int = None) -> Dict[str, Any]:
+        """Parâmetros de /v3/klines a partir do formato Bybit de intervalo"""
         # Converter intervalo Bybit para Binance
         interval_map = {
             "1": "1m",
@@ -176,12 +183,17 @@ class BinanceDataProvider:
             params["startTime"] = start
         if end is not None:
             params["endTime"] = end
+        return params
+
+    @staticmethod
+    def _parse_klines(data: Optional[List]) -> Optional[List[List[Any]]]:
+        """
+        Converte velas Binance para o formato Bybit [[timestamp, open, high, low, close, volume], ...]
         
-        data = self._get_public("/v3/klines", params)
-        
-        if data:
-            # Converter formato Binance [timestamp, open, high, low, close, volume, ...]
-            # para formato Bybit [[timestamp, open, high, low, close, volume], ...]
+        None (erro na requisição) continua None; uma lista vazia (período sem
+        candles) vira [], para o paginador distinguir falha de ausência de dados.
+        """
+        if isinstance(data, list):
             result = []
             for kline in data:
                 result.append([
@@ -196,6 +208,47 @@ class BinanceDataProvider:
         
         return None
 
+    def get_kline(
+        self, 
+        category: str, 
+        symbol: str, 
+        interval: str, 
+        limit: int = 200,
+        start: int = None,
+        end: int = None
+    ) -> Optional[List[List[Any]]]:
+        """
+        Obtém dados de k-line (velas/candlesticks)
+        
+        Args:
+            category: Categoria (ignorado na Binance)
+            symbol: Símbolo do par (ex: "BTCUSDT")
+            interval: Intervalo das velas (Bybit format: "1", "5", "15", "60", "240", "D")
+            limit: Número máximo de velas (máx: 1000)
+            start: Timestamp inicial em milissegundos (opcional)
+            end: Timestamp final em milissegundos (opcional)
+            
+        Returns:
+            Lista de velas em formato compatível com Bybit
+        """
+        data = self._get_public("/v3/klines", self._kline_params(symbol, interval, limit, start, end))
+        return self._parse_klines(data)
+
+    async def get_kline_async(
+        self, 
+        category: str, 
+        symbol: str, 
+        interval: str, 
+        limit: int = 200,
+        start: int = None,
+        end: int = None
+    ) -> Optional[List[List[Any]]]:
+        """
+        Versão assíncrona de get_kline (mesmos argumentos e formato de retorno)
+        """
+        data = await self._get_public_async("/v3/klines", self._kline_params(symbol, interval, limit, start, end))
+        return self._parse_klines(data)
+
     def get_latest_price(self, category: str, symbol: str) -> Optional[Dict[str, Any]]:
         """
         Obtém o preço mais recente para um símbolo específico
@@ -321,3 +374,16 @@ class BinanceDataProvider:
             Informações da conta ou None em caso de erro
         """
         return self._get_authenticated("/v3/account")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Métricas do provider (requisições e reuso de conexões HTTP)
+        
+        Returns:
+            Dicionário com contadores de conexões novas/reaproveitadas
+        """
+        return {"provider": "Binance", **self.http.connection_metrics()}
+
+    def close(self):
+        """Fecha as conexões HTTP mantidas pelo pool"""
+        self.http.close()
@@ -5,11 +5,14 @@ Integração completa com autenticação e endpoints principais.
 """
 
 import requests
+import httpx
 import time
 import hmac
 import hashlib
 from typing import Dict, List, Optional, Any
 
+from market_manus.data_providers.http_client import PooledHTTPClient
+
 class BybitRealDataProvider:
     """Provedor de dados reais da Bybit API V5"""
     
@@ -26,6 +29,9 @@ class BybitRealDataProvider:
         self.base_url = "https://api-demo.bybit.com" if testnet else "https://api.bybit.com"
         self.api_key = api_key
         self.api_secret = api_secret
+        
+        # Sessões com keep-alive: uma conexão TCP/TLS reaproveitada entre lotes
+        self.http = PooledHTTPClient()
 
     def _generate_signature(self, params: str) -> str:
         """Gera assinatura HMAC-SHA256 para autenticação"""
@@ -49,7 +55,7 @@ class BybitRealDataProvider:
         url = self.base_url + endpoint
         
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             
@@ -63,6 +69,34 @@ class BybitRealDataProvider:
             print(f"❌ Erro de conexão: {e}")
             return None
 
+    async def _get_public_async(self, endpoint: str, params: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """
+        Versão assíncrona de _get_public (não bloqueia o event loop)
+        
+        Args:
+            endpoint: Endpoint da API (ex: "/v5/market/kline")
+            params: Parâmetros da requisição
+            
+        Returns:
+            Dados da resposta ou None em caso de erro
+        """
+        url = self.base_url + endpoint
+        
+        try:
+            response = await self.http.aget(url, params=params, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("retCode") == 0:
+                return data.get("result")
+            else:
+                print(f"❌ Erro na API Bybit: {data.get('retMsg')}")
+                return None
+                
+        except httpx.HTTPError as e:
+            print(f"❌ Erro de conexão: {e}")
+            return None
+
     def _get(self, endpoint: str, params: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
         """
         Faz requisição GET autenticada para a API Bybit
@@ -94,7 +128,7 @@ class BybitRealDataProvider:
         headers["X-BAPI-SIGN"] = self._generate_signature(signature_payload)
 
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=10)
+            response = self.http.get(url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             
@@ -120,12 +154,29 @@ class BybitRealDataProvider:
         """
         return self._get_public("/v5/market/tickers", {"category": category})
 
+    @staticmethod
+    def _kline_params(category: str, symbol: str, interval: str, limit: int, start: int = None, end: int = None) -> Dict[str, Any]:
+        """Parâmetros de /v5/market/kline"""
+        params = {
+            "category": category,
+            "symbol": symbol,
+            "interval": interval,
+            "limit": limit
+        }
+        if start is not None:
+            params["start"] = start
+        if end is not None:
+            params["end"] = end
+        return params
+
     def get_kline(
         self, 
         category: str, 
         symbol: str, 
         interval: str, 
-        limit: int = 200
+        limit: int = 200,
+        start: int = None,
+        end: int = None
     ) -> Optional[List[List[Any]]]:
         """
         Obtém dados de k-line (velas/candlesticks)
@@ -135,17 +186,28 @@ class BybitRealDataProvider:
             symbol: Símbolo do par (ex: "BTCUSDT")
             interval: Intervalo das velas ("1", "5", "15", "30", "60", "240", "D")
             limit: Número máximo de velas (máx: 1000)
+            start: Timestamp inicial em milissegundos (opcional)
+            end: Timestamp final em milissegundos (opcional)
             
         Returns:
-            Lista de velas ou None em caso de erro
+            Lista de velas (mais recente primeiro) ou None em caso de erro
         """
-        params = {
-            "category": category,
-            "symbol": symbol,
-            "interval": interval,
-            "limit": limit
-        }
-        result = self._get_public("/v5/market/kline", params)
+        result = self._get_public("/v5/market/kline", self._kline_params(category, symbol, interval, limit, start, end))
+        return result.get("list") if result else None
+
+    async def get_kline_async(
+        self, 
+        category: str, 
+        symbol: str, 
+        interval: str, 
+        limit: int = 200,
+        start: int = None,
+        end: int = None
+    ) -> Optional[List[List[Any]]]:
+        """
+        Versão assíncrona de get_kline (mesmos argumentos e formato de retorno)
+        """
+        result = await self._get_public_async("/v5/market/kline", self._kline_params(category, symbol, interval, limit, start, end))
         return result.get("list") if result else None
 
     def get_latest_price(self, category: str, symbol: str) -> Optional[Dict[str, Any]]:
@@ -226,7 +288,7 @@ class BybitRealDataProvider:
             Timestamp em milissegundos ou None em caso de erro
         """
         try:
-            response = requests.get(f"{self.base_url}/v5/market/time", timeout=5)
+            response = self.http.get(f"{self.base_url}/v5/market/time", timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 if data.get("retCode") == 0:
@@ -234,3 +296,16 @@ class BybitRealDataProvider:
         except Exception:
             pass
         return None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Métricas do provider (requisições e reuso de conexões HTTP)
+        
+        Returns:
+            Dicionário com contadores de conexões novas/reaproveitadas
+        """
+        return {"provider": "Bybit", **self.http.connection_metrics()}
+
+    def close(self):
+        """Fecha as conexões HTTP mantidas pelo pool"""
+        self.http.close()
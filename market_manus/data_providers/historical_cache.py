@@ -1,13 +1,185 @@
 """
 Sistema de cache para dados históricos de mercado
 Salva dados em formato Parquet para rápida recuperação
+
+Além dos arquivos por chave exata (symbol_interval_inicio_until_fim), mantém um
+armazenamento por (symbol, interval) particionado por mês, com os intervalos de
+tempo já cobertos: qualquer período dentro da cobertura é servido localmente e
+apenas as lacunas precisam ser buscadas na API.
+
+Vários processos (workers de backtest) podem compartilhar o mesmo diretório:
+a leitura-mescla-gravação das partições e a atualização do coverage.json de
+cada (symbol, interval) acontecem sob um lock de arquivo entre processos, e a
+cobertura é relida do disco dentro do lock antes de ser estendida.
 """
 import json
 import os
+import shutil
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Colunas lidas pelo caminho colunar (get_frame/get_arrays)
+OHLCV_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+# Duração de um candle (ms) por timeframe, usada na cobertura das partições
+INTERVAL_MS = {
+    "1": 60 * 1000,
+    "5": 5 * 60 * 1000,
+    "15": 15 * 60 * 1000,
+    "30": 30 * 60 * 1000,
+    "60": 60 * 60 * 1000,
+    "240": 4 * 60 * 60 * 1000,
+    "D": 24 * 60 * 60 * 1000
+}
+
+
+def date_to_ms(date: str) -> int:
+    """Data YYYY-MM-DD (meia-noite local, como nos módulos de backtest) em timestamp ms"""
+    return int(datetime.strptime(date, "%Y-%m-%d").timestamp() * 1000)
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Lock exclusivo entre processos (e threads) sobre o arquivo path"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Une intervalos [início, fim) sobrepostos ou adjacentes"""
+    merged = []
+    for start, end in sorted(ranges):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract_ranges(start: int, end: int, ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Trechos de [start, end) não cobertos por ranges (já unidos e ordenados)"""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in ranges:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _column_dtype(name: str):
+    """timestamp é int64 (ms); demais colunas são float64"""
+    return np.int64 if name == 'timestamp' else np.float64
+
+
+def klines_to_arrays(
+    klines: List[List[Any]],
+    columns: Sequence[str] = OHLCV_COLUMNS
+) -> Dict[str, np.ndarray]:
+    """
+    Converte klines no formato Binance (strings) em colunas tipadas, uma única vez
+    
+    Mesmo formato de HistoricalDataCache.get_arrays, para que dados vindos da API
+    e do cache sigam o mesmo caminho. Volume ausente ou inválido vira 0.0.
+    
+    Args:
+        klines: Lista de klines [timestamp, open, high, low, close, volume, ...]
+        columns: Nomes das colunas, na ordem do kline
+        
+    Returns:
+        Dicionário {coluna: np.ndarray}
+    """
+    frame = pd.DataFrame([row[:len(columns)] for row in klines])
+    arrays = {}
+    for position, name in enumerate(columns):
+        if position < frame.shape[1]:
+            values = pd.to_numeric(frame[position], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            values = np.full(len(frame), np.nan)
+        if name == 'volume':
+            values = np.nan_to_num(values, nan=0.0)
+        arrays[name] = values.astype(_column_dtype(name), copy=False)
+    return arrays
+
+
+def arrays_to_klines(
+    arrays: Dict[str, np.ndarray],
+    columns: Sequence[str] = OHLCV_COLUMNS
+) -> List[List[str]]:
+    """
+    Inverso de klines_to_arrays: klines no formato Binance (strings), como em get()
+    
+    Args:
+        arrays: Dicionário {coluna: np.ndarray}
+        columns: Colunas do kline, na ordem
+        
+    Returns:
+        Lista de klines [timestamp, open, high, low, close, volume]
+    """
+    def _format(value) -> str:
+        text = str(value)
+        return text[:-2] if text.endswith('.0') else text
+    
+    timestamps = [str(int(value)) for value in arrays[columns[0]].tolist()]
+    values = [[_format(value) for value in arrays[name].tolist()] for name in columns[1:]]
+    return [list(row) for row in zip(timestamps, *values)]
+
+
+def _table_to_arrays(table: pa.Table, columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Colunas Arrow em arrays tipados (sem cópia quando já são float64/int64 contíguos)"""
+    return {
+        name: table.column(name).to_numpy().astype(_column_dtype(name), copy=False)
+        for name in columns
+    }
+
+
+def _arrays_to_table(arrays: Dict[str, np.ndarray]) -> pa.Table:
+    """Arrays OHLCV em tabela Arrow com schema fixo (timestamp int64, demais float64)"""
+    return pa.table({
+        name: pa.array(np.asarray(arrays[name], dtype=_column_dtype(name)))
+        for name in OHLCV_COLUMNS
+    })
 
 
 class HistoricalDataCache:
@@ -24,6 +196,9 @@ class HistoricalDataCache:
         self.cache_dir.mkdir(exist_ok=True)
         self.metadata_file = self.cache_dir / "cache_metadata.json"
         self.metadata = self._load_metadata()
+        # Armazenamento particionado: <cache_dir>/klines/<symbol>/<interval>/<YYYY-MM>.parquet
+        self.series_dir = self.cache_dir / "klines"
+        self._coverage: Dict[Tuple[str, str], Dict] = {}
     
     def _load_metadata(self) -> Dict:
         """Carrega metadata do cache"""
@@ -82,15 +257,16 @@ class HistoricalDataCache:
             
         Returns:
             Lista de klines no formato Binance ou None se não encontrado
+            (para cálculos numéricos prefira get_arrays/get_frame, sem strings)
         """
         cache_key = self._generate_cache_key(symbol, interval, start_date, end_date)
-        cache_path = self._get_cache_path(cache_key)
+        table = self.get_table(symbol, interval, start_date, end_date)
         
-        if not cache_path.exists():
+        if table is None:
             return None
         
         try:
-            df = pd.read_parquet(cache_path)
+            df = table.to_pandas()
             
             # Converter DataFrame de volta para formato kline
             klines = df.values.tolist()
@@ -117,6 +293,94 @@ class HistoricalDataCache:
             print(f"⚠️ Erro ao ler cache {cache_key}: {e}")
             return None
     
+    def get_table(
+        self,
+        symbol: str,
+        interval: str,
+        start_date: str,
+        end_date: str,
+        columns: Optional[Sequence[str]] = None
+    ) -> Optional[pa.Table]:
+        """
+        Lê o Parquet do cache como tabela Arrow, sem conversão de tipos
+        
+        Usa o arquivo da chave exata se existir; senão, as partições mensais,
+        desde que cubram todo o período.
+        
+        Args:
+            symbol: Símbolo do ativo
+            interval: Intervalo
+            start_date: Data inicial (YYYY-MM-DD)
+            end_date: Data final (YYYY-MM-DD)
+            columns: Colunas a ler (None = todas)
+            
+        Returns:
+            pyarrow.Table ou None se não encontrado
+        """
+        cache_key = self._generate_cache_key(symbol, interval, start_date, end_date)
+        cache_path = self._get_cache_path(cache_key)
+        
+        try:
+            if cache_path.exists():
+                return pq.read_table(cache_path, columns=list(columns) if columns is not None else None)
+            
+            # Sem arquivo exato: servir do armazenamento particionado se o período estiver coberto
+            start_ts, end_ts = date_to_ms(start_date), date_to_ms(end_date)
+            if interval in INTERVAL_MS and not self.missing_ranges(symbol, interval, start_ts, end_ts):
+                return self.read_range(symbol, interval, start_ts, end_ts, columns or OHLCV_COLUMNS)
+            return None
+        except Exception as e:
+            print(f"⚠️ Erro ao ler cache {cache_key}: {e}")
+            return None
+    
+    def get_arrays(
+        self,
+        symbol: str,
+        interval: str,
+        start_date: str,
+        end_date: str,
+        columns: Sequence[str] = OHLCV_COLUMNS
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Recupera colunas tipadas do cache (timestamp int64, demais float64)
+        
+        Os arrays vêm direto do Arrow: colunas já float64 em um único chunk são
+        expostas sem cópia (somente leitura); as demais são convertidas uma vez.
+        
+        Args:
+            symbol: Símbolo do ativo
+            interval: Intervalo
+            start_date: Data inicial (YYYY-MM-DD)
+            end_date: Data final (YYYY-MM-DD)
+            columns: Colunas a ler
+            
+        Returns:
+            Dicionário {coluna: np.ndarray} ou None se não encontrado
+        """
+        table = self.get_table(symbol, interval, start_date, end_date, columns)
+        if table is None:
+            return None
+        return _table_to_arrays(table, columns)
+    
+    def get_frame(
+        self,
+        symbol: str,
+        interval: str,
+        start_date: str,
+        end_date: str,
+        columns: Sequence[str] = OHLCV_COLUMNS
+    ) -> Optional[pd.DataFrame]:
+        """
+        Recupera dados do cache como DataFrame tipado (mesmas colunas de get_arrays)
+        
+        Returns:
+            DataFrame ou None se não encontrado
+        """
+        arrays = self.get_arrays(symbol, interval, start_date, end_date, columns)
+        if arrays is None:
+            return None
+        return pd.DataFrame(arrays, copy=False)
+    
     def save(
         self,
         symbol: str,
@@ -185,6 +449,220 @@ class HistoricalDataCache:
         except Exception as e:
             print(f"❌ Erro ao salvar cache {cache_key}: {e}")
     
+    # ==================== ARMAZENAMENTO PARTICIONADO ====================
+    
+    def _series_path(self, symbol: str, interval: str) -> Path:
+        """Diretório das partições mensais de (symbol, interval)"""
+        return self.series_dir / symbol / interval
+    
+    def _series_lock(self, symbol: str, interval: str):
+        """Lock entre processos das partições e da cobertura de (symbol, interval)"""
+        return _file_lock(self._series_path(symbol, interval) / ".lock")
+    
+    def _read_coverage_file(self, symbol: str, interval: str) -> Dict:
+        """Cobertura gravada em disco (pode ter sido estendida por outro processo)"""
+        coverage_file = self._series_path(symbol, interval) / "coverage.json"
+        coverage = {"ranges": [], "imported": []}
+        if coverage_file.exists():
+            with open(coverage_file, 'r') as f:
+                coverage = json.load(f)
+        coverage["ranges"] = [tuple(r) for r in coverage["ranges"]]
+        return coverage
+    
+    def _load_coverage(self, symbol: str, interval: str) -> Dict:
+        """
+        Carrega a cobertura de (symbol, interval), importando arquivos legados
+        de chave exata ainda não incorporados às partições
+        """
+        key = (symbol, interval)
+        if key not in self._coverage:
+            self._coverage[key] = self._read_coverage_file(symbol, interval)
+        
+        self._import_legacy_files(symbol, interval)
+        return self._coverage[key]
+    
+    def _save_coverage(self, symbol: str, interval: str):
+        """Salva a cobertura de (symbol, interval) (chamar com o lock da série)"""
+        series_path = self._series_path(symbol, interval)
+        series_path.mkdir(parents=True, exist_ok=True)
+        tmp_path = series_path / f"coverage.json.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._coverage[(symbol, interval)], f, indent=2)
+        os.replace(tmp_path, series_path / "coverage.json")
+    
+    def _import_legacy_files(self, symbol: str, interval: str):
+        """
+        Incorpora arquivos symbol_interval_*_until_*.parquet às partições
+        
+        A cobertura de um arquivo legado é o trecho realmente presente nos dados
+        (primeiro candle até o fim do último), não as datas do nome do arquivo.
+        """
+        step = INTERVAL_MS.get(interval)
+        if step is None:
+            return
+        
+        pending = [
+            path for path in sorted(self.cache_dir.glob(f"{symbol}_{interval}_*_until_*.parquet"))
+            if path.stem not in self._coverage[(symbol, interval)]["imported"]
+        ]
+        if not pending:
+            return
+        
+        with self._series_lock(symbol, interval):
+            # Outro processo pode ter importado os mesmos arquivos enquanto esperávamos
+            coverage = self._read_coverage_file(symbol, interval)
+            self._coverage[(symbol, interval)] = coverage
+            imported = False
+            for path in pending:
+                if path.stem in coverage["imported"]:
+                    continue
+                try:
+                    arrays = _table_to_arrays(pq.read_table(path, columns=list(OHLCV_COLUMNS)), OHLCV_COLUMNS)
+                    timestamps = arrays["timestamp"]
+                    if len(timestamps) > 0:
+                        self._write_partitions(symbol, interval, arrays)
+                        coverage["ranges"] = _merge_ranges(
+                            coverage["ranges"] + [(int(timestamps[0]), int(timestamps[-1]) + step)]
+                        )
+                except Exception as e:
+                    print(f"⚠️ Erro ao importar cache {path.stem}: {e}")
+                    continue
+                coverage["imported"].append(path.stem)
+                imported = True
+            
+            if imported:
+                self._save_coverage(symbol, interval)
+    
+    def _write_partitions(self, symbol: str, interval: str, arrays: Dict[str, np.ndarray]):
+        """
+        Mescla candles nas partições mensais (timestamp repetido: vale o mais recente)
+        
+        Chamar com o lock da série: a partição é lida, mesclada e regravada.
+        """
+        series_path = self._series_path(symbol, interval)
+        series_path.mkdir(parents=True, exist_ok=True)
+        
+        months = np.asarray(arrays["timestamp"]).astype("datetime64[ms]").astype("datetime64[M]")
+        for month in np.unique(months):
+            in_month = months == month
+            partition = series_path / f"{month}.parquet"
+            parts = []
+            if partition.exists():
+                parts.append(_table_to_arrays(pq.read_table(partition), OHLCV_COLUMNS))
+            parts.append({name: np.asarray(arrays[name])[in_month] for name in OHLCV_COLUMNS})
+            
+            merged = {name: np.concatenate([part[name] for part in parts]) for name in OHLCV_COLUMNS}
+            order = np.argsort(merged["timestamp"], kind="stable")
+            timestamps = merged["timestamp"][order]
+            # Após a ordenação estável os dados novos vêm por último em cada timestamp repetido
+            keep = order[np.append(timestamps[1:] != timestamps[:-1], True)]
+            
+            tmp_path = partition.with_name(f"{partition.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+            pq.write_table(
+                _arrays_to_table({name: merged[name][keep] for name in OHLCV_COLUMNS}),
+                tmp_path,
+                compression='snappy'
+            )
+            os.replace(tmp_path, partition)
+    
+    def missing_ranges(self, symbol: str, interval: str, start_ts: int, end_ts: int) -> List[Tuple[int, int]]:
+        """
+        Lacunas de [start_ts, end_ts) ainda não cobertas pelas partições
+        
+        Args:
+            symbol: Símbolo do ativo
+            interval: Intervalo
+            start_ts: Início em ms (inclusivo)
+            end_ts: Fim em ms (exclusivo)
+            
+        Returns:
+            Lista de (início, fim) em ms a buscar na API; vazia se tudo estiver em cache
+        """
+        self._load_coverage(symbol, interval)
+        # Relida do disco: inclui o que outros processos já buscaram
+        coverage = self._coverage[(symbol, interval)] = self._read_coverage_file(symbol, interval)
+        return _subtract_ranges(start_ts, end_ts, coverage["ranges"])
+    
+    def read_range(
+        self,
+        symbol: str,
+        interval: str,
+        start_ts: int,
+        end_ts: int,
+        columns: Sequence[str] = OHLCV_COLUMNS
+    ) -> pa.Table:
+        """
+        Lê das partições os candles com timestamp em [start_ts, end_ts)
+        
+        Não verifica cobertura (use missing_ranges); retorna tabela vazia se não houver dados.
+        """
+        self._load_coverage(symbol, interval)
+        series_path = self._series_path(symbol, interval)
+        first_month = np.datetime64(int(start_ts), "ms").astype("datetime64[M]")
+        last_month = np.datetime64(int(end_ts) - 1, "ms").astype("datetime64[M]")
+        read_columns = list(dict.fromkeys(["timestamp", *columns]))
+        
+        partitions = [series_path / f"{month}.parquet" for month in np.arange(first_month, last_month + 1)]
+        tables = [pq.read_table(path, columns=read_columns) for path in partitions if path.exists()]
+        if tables:
+            table = pa.concat_tables(tables)
+        else:
+            table = _arrays_to_table({name: np.empty(0) for name in OHLCV_COLUMNS}).select(read_columns)
+        
+        # Partições ordenadas por timestamp: o recorte é uma fatia (sem cópia)
+        lo, hi = np.searchsorted(table.column("timestamp").to_numpy(), [start_ts, end_ts], side="left")
+        return table.slice(lo, hi - lo).select(list(columns))
+    
+    def get_range_arrays(
+        self,
+        symbol: str,
+        interval: str,
+        start_ts: int,
+        end_ts: int,
+        columns: Sequence[str] = OHLCV_COLUMNS
+    ) -> Dict[str, np.ndarray]:
+        """Mesmo que read_range, em arrays tipados (formato de get_arrays)"""
+        return _table_to_arrays(self.read_range(symbol, interval, start_ts, end_ts, columns), columns)
+    
+    def save_range(
+        self,
+        symbol: str,
+        interval: str,
+        start_ts: int,
+        end_ts: int,
+        klines: List[List[Any]]
+    ):
+        """
+        Grava candles buscados na API e marca [start_ts, end_ts) como coberto
+        
+        Candles fora do intervalo não são gravados (evita persistir o candle em
+        formação ou dados de outro período retornados pela API).
+        
+        Args:
+            symbol: Símbolo do ativo
+            interval: Intervalo
+            start_ts: Início da lacuna buscada (ms, inclusivo)
+            end_ts: Fim coberto pela busca (ms, exclusivo)
+            klines: Lista de klines no formato Binance
+        """
+        self._load_coverage(symbol, interval)
+        if end_ts <= start_ts:
+            return
+        
+        try:
+            arrays = klines_to_arrays(klines)
+            inside = (arrays["timestamp"] >= start_ts) & (arrays["timestamp"] < end_ts)
+            with self._series_lock(symbol, interval):
+                if inside.any():
+                    self._write_partitions(symbol, interval, {name: values[inside] for name, values in arrays.items()})
+                # Estende a cobertura em disco (não a cópia em memória deste processo)
+                coverage = self._read_coverage_file(symbol, interval)
+                coverage["ranges"] = _merge_ranges(coverage["ranges"] + [(int(start_ts), int(end_ts))])
+                self._coverage[(symbol, interval)] = coverage
+                self._save_coverage(symbol, interval)
+        except Exception as e:
+            print(f"❌ Erro ao salvar partições {symbol}_{interval}: {e}")
+    
     def list_cached_datasets(self) -> List[Dict]:
         """
         Lista todos os datasets em cache
@@ -221,4 +699,7 @@ class HistoricalDataCache:
         """Remove todos os caches"""
         for cache_key in list(self.metadata.keys()):
             self.delete(cache_key)
+        if self.series_dir.exists():
+            shutil.rmtree(self.series_dir)
+        self._coverage = {}
         print("✅ Todos os caches foram removidos")
@@ -0,0 +1,152 @@
+"""
+Cliente HTTP com pool de conexões (keep-alive) para os providers REST
+
+Uma requests.Session (síncrono) e um httpx.AsyncClient (assíncrono, criado sob
+demanda por event loop) reaproveitam conexões TCP/TLS entre chamadas, em vez de
+um handshake por requisição. Contadores de conexões novas/reaproveitadas ficam
+disponíveis em connection_metrics().
+
+Um AsyncClient só pode ser usado no loop em que abriu as conexões, então há um
+por loop. O reuso depende de um loop de vida longa: com asyncio.run por
+chamada, cada loop novo abre conexões novas, e as do loop já encerrado são
+derrubadas (shutdown dos sockets) na próxima chamada, já que o aclose não pode
+mais rodar nele.
+"""
+
+import asyncio
+import socket
+import threading
+import weakref
+from typing import Any, Dict, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PooledHTTPClient:
+    """Sessões HTTP com keep-alive e contadores de reuso de conexão"""
+
+    def __init__(self, timeout: float = 10, pool_maxsize: int = 16):
+        """
+        Args:
+            timeout: Timeout padrão das requisições (s)
+            pool_maxsize: Conexões mantidas por host (>= concorrência do paginador)
+        """
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._async_clients: Dict[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, weakref.WeakSet]] = {}
+        self._lock = threading.Lock()
+        self._retired_connections = 0  # Conexões de pools já fechados por close()
+        self.stats = {
+            "requests": 0,
+            "async_requests": 0,
+            "async_new_connections": 0,
+        }
+
+    def get(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None, timeout: float = None) -> requests.Response:
+        """GET síncrono pela sessão com pool (mesmas exceções de requests.get)"""
+        with self._lock:
+            self.stats["requests"] += 1
+        return self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+
+    def _get_async_client(self) -> Tuple[httpx.AsyncClient, weakref.WeakSet]:
+        """AsyncClient do event loop atual (um client não pode ser usado em outro loop)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._discard_closed_loops()
+            if loop not in self._async_clients:
+                client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=self.pool_maxsize, max_keepalive_connections=self.pool_maxsize)
+                )
+                self._async_clients[loop] = (client, weakref.WeakSet())
+            return self._async_clients[loop]
+
+    def _discard_closed_loops(self):
+        """Descarta clients de loops encerrados, derrubando as conexões que ficaram abertas"""
+        for loop in [loop for loop in self._async_clients if loop.is_closed()]:
+            _, streams = self._async_clients.pop(loop)
+            for stream in list(streams):
+                sock = stream.get_extra_info("socket")
+                if sock is None:
+                    continue
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    async def aget(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None, timeout: float = None,
+                   follow_redirects: bool = False) -> httpx.Response:
+        """GET assíncrono pelo AsyncClient com pool (exceções de httpx)"""
+        client, streams = self._get_async_client()
+        response = await client.get(url, params=params, headers=headers, timeout=timeout or self.timeout,
+                                    follow_redirects=follow_redirects)
+
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            self.stats["async_requests"] += 1
+            if stream is not None and stream not in streams:
+                streams.add(stream)
+                self.stats["async_new_connections"] += 1
+        return response
+
+    def _pool_connections(self) -> int:
+        """Conexões abertas pelos pools urllib3 ativos da sessão"""
+        pools = self.session.get_adapter("https://").poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def connection_metrics(self) -> Dict[str, Any]:
+        """
+        Contadores de reuso de conexão
+
+        Returns:
+            Dicionário com requisições, conexões novas e reaproveitadas (sync e async)
+        """
+        new_connections = self._retired_connections + self._pool_connections()
+        requests_count = self.stats["requests"]
+        async_requests = self.stats["async_requests"]
+        async_new = self.stats["async_new_connections"]
+
+        reused = max(0, requests_count - new_connections)
+        async_reused = max(0, async_requests - async_new)
+        total = requests_count + async_requests
+        return {
+            "requests": requests_count,
+            "new_connections": new_connections,
+            "reused_connections": reused,
+            "async_requests": async_requests,
+            "async_new_connections": async_new,
+            "async_reused_connections": async_reused,
+            "connection_reuse_rate": (reused + async_reused) / total if total else 0.0,
+        }
+
+    def close(self):
+        """Fecha a sessão síncrona (o AsyncClient é fechado por aclose)"""
+        self._retired_connections += self._pool_connections()
+        self.session.close()
+
+    async def aclose(self):
+        """Fecha o AsyncClient do loop atual"""
+        with self._lock:
+            entry = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[0].aclose()
+
+
+async def fetch_kline_async(provider, **kwargs):
+    """
+    get_kline sem bloquear o event loop
+
+    Usa provider.get_kline_async quando disponível; para providers apenas
+    síncronos, executa get_kline em uma thread.
+    """
+    if hasattr(provider, "get_kline_async"):
+        return await provider.get_kline_async(**kwargs)
+    return await asyncio.to_thread(provider.get_kline, **kwargs)
@@ -0,0 +1,243 @@
+"""
+Paginação concorrente de klines históricos
+
+Divide o período em fatias de tempo independentes (um lote da API cada), busca
+as fatias em paralelo dentro de um orçamento de peso por minuto compatível com
+os limites da Binance/Bybit, repete fatias com falha (backoff exponencial) em
+vez de abortar e remonta o resultado em ordem cronológica.
+
+Funciona com qualquer provider que exponha
+get_kline(category, symbol, interval, limit, start, end).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from market_manus.data_providers.historical_cache import INTERVAL_MS, _merge_ranges
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Orçamento de requisições de klines de uma exchange"""
+    weight_per_minute: int  # Limite de peso por minuto por IP
+    request_weight: int  # Peso de uma chamada de klines
+    max_concurrency: int  # Fatias em voo simultaneamente
+    max_batch: int  # Máximo de candles por chamada
+    budget_fraction: float = 0.5  # Fração do limite usada (o restante fica para o app)
+
+
+# Limites documentados: Binance.US 1200 peso/min (klines = 2);
+# Bybit v5 600 requisições / 5 s por IP (klines = 1)
+RATE_LIMITS = {
+    "BinanceDataProvider": RateLimitPolicy(weight_per_minute=1200, request_weight=2, max_concurrency=4, max_batch=1000),
+    "BybitRealDataProvider": RateLimitPolicy(weight_per_minute=7200, request_weight=1, max_concurrency=4, max_batch=1000),
+}
+DEFAULT_RATE_LIMIT = RateLimitPolicy(weight_per_minute=600, request_weight=1, max_concurrency=2, max_batch=500)
+
+
+class WeightBudget:
+    """Token bucket de peso por minuto, compartilhado entre threads"""
+
+    def __init__(
+        self,
+        weight_per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.capacity = float(weight_per_minute)
+        self.refill_per_second = weight_per_minute / 60.0
+        self.available = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def acquire(self, weight: float) -> float:
+        """
+        Reserva peso, bloqueando até haver saldo
+
+        Returns:
+            Tempo total aguardado (s)
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.available >= weight:
+                    self.available -= weight
+                    return waited
+                wait = (weight - self.available) / self.refill_per_second
+            self._sleep(wait)
+            waited += wait
+
+
+@dataclass
+class KlineFetchResult:
+    """Resultado de uma busca paginada"""
+    klines: List[List[Any]] = field(default_factory=list)  # Ordenados por timestamp, sem duplicatas
+    successful_batches: int = 0
+    failed_batches: int = 0
+    retries: int = 0
+    covered_ranges: List[Tuple[int, int]] = field(default_factory=list)  # Fatias [início, fim) concluídas
+    failed_ranges: List[Tuple[int, int]] = field(default_factory=list)
+
+
+class KlinePaginator:
+    """Busca klines de um período em fatias concorrentes, respeitando o orçamento de peso"""
+
+    def __init__(
+        self,
+        policy: RateLimitPolicy = DEFAULT_RATE_LIMIT,
+        batch_size: int = 500,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        budget: Optional[WeightBudget] = None
+    ):
+        """
+        Args:
+            policy: Limites da exchange
+            batch_size: Candles por fatia (limitado a policy.max_batch)
+            max_retries: Novas tentativas por fatia antes de desistir
+            backoff: Espera inicial entre tentativas (dobra a cada falha)
+            budget: Orçamento de peso (compartilhe entre paginadores da mesma exchange)
+        """
+        self.policy = policy
+        self.batch_size = max(1, min(batch_size, policy.max_batch))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.budget = budget or WeightBudget(policy.weight_per_minute * policy.budget_fraction)
+
+    def plan_slices(self, interval: str, start_ts: int, end_ts: int) -> List[Tuple[int, int, int]]:
+        """
+        Divide [start_ts, end_ts) em fatias de até batch_size candles
+
+        Returns:
+            Lista de (início, fim, limit); limit = candles que abrem na fatia
+            (0 = fatia sem abertura de candle, coberta sem chamar a API)
+        """
+        candle_duration = INTERVAL_MS.get(interval, 60 * 1000)
+        slice_ms = self.batch_size * candle_duration
+        slices = []
+        current = start_ts
+        while current < end_ts:
+            slice_end = min(current + slice_ms, end_ts)
+            first_open = -(-current // candle_duration) * candle_duration
+            limit = max(0, -(-(slice_end - first_open) // candle_duration))
+            slices.append((current, slice_end, limit))
+            current = slice_end
+        return slices
+
+    def _fetch_slice(self, provider, category: str, symbol: str, interval: str, slice_start: int, slice_end: int, limit: int) -> Tuple[Optional[List], int]:
+        """
+        Busca uma fatia com novas tentativas; retorna (klines ou None se falhou, tentativas extras)
+
+        Só há nova tentativa em erro (exceção ou None do provider). Uma resposta
+        vazia é sucesso: o período não tem candles (antes da listagem, lacuna da
+        exchange) e a fatia entra em covered_ranges.
+        """
+        if limit == 0:
+            return [], 0
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(delay)
+                delay *= 2
+            self.budget.acquire(self.policy.request_weight)
+            try:
+                # end é inclusivo na API: slice_end - 1 evita sobrepor a fatia seguinte
+                klines = provider.get_kline(
+                    category=category,
+                    symbol=symbol,
+                    interval=interval,
+                    limit=limit,
+                    start=slice_start,
+                    end=slice_end - 1
+                )
+            except Exception as e:
+                print(f"   ⚠️  Fatia {slice_start}: tentativa {attempt + 1} falhou ({e})")
+                continue
+            if klines is not None:
+                return klines, attempt
+            print(f"   ⚠️  Fatia {slice_start}: tentativa {attempt + 1} sem resposta válida")
+        return None, self.max_retries
+
+    def fetch(self, provider, symbol: str, interval: str, start_ts: int, end_ts: int, category: str = 'spot') -> KlineFetchResult:
+        """
+        Busca todos os candles de [start_ts, end_ts)
+
+        Args:
+            provider: Provider com get_kline(category, symbol, interval, limit, start, end)
+            symbol: Par de trading
+            interval: Timeframe (1, 5, 15, 30, 60, 240, D)
+            start_ts: Início em ms (inclusivo)
+            end_ts: Fim em ms (exclusivo)
+            category: Categoria (spot)
+
+        Returns:
+            KlineFetchResult com os klines em ordem e as fatias concluídas/falhas
+        """
+        result = KlineFetchResult()
+        slices = self.plan_slices(interval, start_ts, end_ts)
+        if not slices:
+            return result
+
+        print(f"   📡 {len(slices)} lote(s) de até {self.batch_size} candles, {self.policy.max_concurrency} em paralelo...")
+
+        received: Dict[int, List] = {}
+        with ThreadPoolExecutor(max_workers=min(self.policy.max_concurrency, len(slices))) as executor:
+            futures = {
+                executor.submit(self._fetch_slice, provider, category, symbol, interval, *slice_): slice_
+                for slice_ in slices
+            }
+            for future in as_completed(futures):
+                slice_start, slice_end, limit = futures[future]
+                klines, retries = future.result()
+                result.retries += retries
+                if klines is None:
+                    result.failed_batches += 1
+                    result.failed_ranges.append((slice_start, slice_end))
+                    continue
+                result.successful_batches += 1 if limit else 0
+                result.covered_ranges.append((slice_start, slice_end))
+                received[slice_start] = klines
+
+        # Remontar em ordem cronológica (Bybit retorna do mais recente para o mais antigo)
+        by_timestamp = {}
+        for slice_start in sorted(received):
+            for kline in received[slice_start]:
+                timestamp = int(kline[0])
+                if start_ts <= timestamp < end_ts:
+                    by_timestamp[timestamp] = kline
+        result.klines = [by_timestamp[timestamp] for timestamp in sorted(by_timestamp)]
+        result.covered_ranges = _merge_ranges(result.covered_ranges)
+        result.failed_ranges = _merge_ranges(result.failed_ranges)
+
+        print(f"   ✅ Recebidos {len(result.klines)} candles ({result.successful_batches} lotes ok, "
+              f"{result.failed_batches} com falha, {result.retries} novas tentativas)")
+        return result
+
+
+_paginators: Dict[str, KlinePaginator] = {}
+_paginators_lock = threading.Lock()
+
+
+def get_paginator(provider) -> KlinePaginator:
+    """
+    Paginador compartilhado por tipo de provider
+
+    O orçamento de peso é por IP na exchange, então todos os módulos que buscam
+    histórico pelo mesmo provider usam o mesmo WeightBudget.
+    """
+    name = provider.__class__.__name__
+    with _paginators_lock:
+        if name not in _paginators:
+            _paginators[name] = KlinePaginator(RATE_LIMITS.get(name, DEFAULT_RATE_LIMIT))
+        return _paginators[name]
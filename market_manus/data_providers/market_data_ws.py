@@ -1,12 +1,49 @@
 import asyncio
 import json
 import random
-from typing import AsyncIterator, Dict, Any
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple, Type
 from datetime import datetime
 import websockets
 from websockets.exceptions import WebSocketException
 
 
+def _parse_binance_kline(msg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Evento kline da Binance -> candle normalizado (None se não for kline)"""
+    if "k" not in msg:
+        return None
+    k = msg["k"]
+    return {
+        "event_time": msg["E"],
+        "symbol": msg["s"],
+        "interval": k["i"],
+        "open": float(k["o"]),
+        "high": float(k["h"]),
+        "low": float(k["l"]),
+        "close": float(k["c"]),
+        "volume": float(k["v"]),
+        "is_closed": bool(k["x"]),
+        "timestamp": int(k["t"])
+    }
+
+
+def _parse_bybit_kline(msg: Dict[str, Any], data: Dict[str, Any], symbol: str) -> Dict[str, Any]:
+    """Item de msg["data"] do tópico kline da Bybit -> candle normalizado"""
+    return {
+        "event_time": msg["ts"],
+        "symbol": symbol,
+        "interval": data["interval"],
+        "open": float(data["open"]),
+        "high": float(data["high"]),
+        "low": float(data["low"]),
+        "close": float(data["close"]),
+        "volume": float(data["volume"]),
+        "is_closed": bool(data["confirm"]),
+        "timestamp": int(data["start"])
+    }
+
+
 class BinanceUSWebSocket:
     def __init__(self, symbol: str, interval: str):
         self.symbol = symbol.lower()
@@ -67,28 +104,14 @@ class BinanceUSWebSocket:
                     
                     async for raw_message in ws:
                         try:
-                            msg = json.loads(raw_message)
-                            
-                            if "k" not in msg:
+                            candle = _parse_binance_kline(json.loads(raw_message))
+                            if candle is None:
                                 continue
                             
-                            k = msg["k"]
-                            
                             self.total_messages += 1
                             self.last_message_time = datetime.now()
                             
-                            yield {
-                                "event_time": msg["E"],
-                                "symbol": msg["s"],
-                                "interval": k["i"],
-                                "open": float(k["o"]),
-                                "high": float(k["h"]),
-                                "low": float(k["l"]),
-                                "close": float(k["c"]),
-                                "volume": float(k["v"]),
-                                "is_closed": bool(k["x"]),
-                                "timestamp": int(k["t"])
-                            }
+                            yield candle
                             
                         except (json.JSONDecodeError, KeyError) as e:
                             print(f"⚠️  [{datetime.now().strftime('%H:%M:%S')}] Erro ao processar mensagem: {e}")
@@ -168,3 +191,371 @@ class BybitWebSocket:
                 delay = self._backoff_with_jitter()
                 print(f"⚠️  Erro inesperado Bybit: {e}. Reconectando em {delay:.1f}s...")
                 await asyncio.sleep(delay)
+
+
+_CHANNEL_CLOSED = object()
+
+
+class StreamSubscription:
+    """
+    Canal assíncrono de um (symbol, interval) servido por um multiplexador
+
+    Iterável como BinanceUSWebSocket (async for msg in subscription), então
+    pode ser passado como ws_provider ao StreamRuntime/RealtimeStrategyEngine.
+
+    O canal guarda até max_queue_size mensagens; quando cheio, descarta
+    primeiro as atualizações de candle em formação (a mais antiga, ou a que
+    está chegando se só há candles fechados). Candles fechados nunca são
+    descartados, como na KlineMailbox.
+    """
+
+    def __init__(self, multiplexer: "KlineStreamMultiplexer", stream: str, symbol: str, interval: str, max_queue_size: int):
+        self.multiplexer = multiplexer
+        self.stream = stream
+        self.symbol = symbol
+        self.interval = interval
+        self.max_queue_size = max(1, max_queue_size)
+        self._pending: deque = deque()
+        self._ready = asyncio.Event()
+        self.total_messages = 0
+        self.dropped_messages = 0
+        self.last_message_time = None
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _deliver(self, candle: Dict[str, Any]):
+        """Entrega sem bloquear o leitor do socket"""
+        self.total_messages += 1
+        self.last_message_time = datetime.now()
+        if len(self._pending) >= self.max_queue_size and not self._drop_forming(candle):
+            self.dropped_messages += 1
+            return
+        self._pending.append(candle)
+        self._ready.set()
+
+    def _drop_forming(self, candle: Dict[str, Any]) -> bool:
+        """Abre espaço descartando a atualização em formação mais antiga; False se candle deve ser descartado"""
+        for i, pending in enumerate(self._pending):
+            if not pending["is_closed"]:
+                del self._pending[i]
+                self.dropped_messages += 1
+                return True
+        # Só candles fechados na fila: um fechado entra mesmo assim (excede o limite)
+        return candle["is_closed"]
+
+    def _close(self):
+        self.closed = True
+        self._pending.append(_CHANNEL_CLOSED)
+        self._ready.set()
+
+    async def get(self) -> Dict[str, Any]:
+        """Próxima mensagem do canal (aguarda se vazio)"""
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._pending.popleft()
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            msg = await self.get()
+            if msg is _CHANNEL_CLOSED:
+                return
+            yield msg
+
+    async def close(self):
+        """Cancela a assinatura (o stream é removido da conexão se for o último assinante)"""
+        if self.closed:
+            return
+        await self.multiplexer.unsubscribe(self)
+
+    def get_health_metrics(self) -> Dict[str, Any]:
+        """Métricas da conexão compartilhada + contadores deste canal"""
+        metrics = self.multiplexer.get_health_metrics()
+        metrics.update({
+            "stream": self.stream,
+            "channel_messages": self.total_messages,
+            "channel_pending": len(self._pending),
+            "channel_dropped_messages": self.dropped_messages,
+        })
+        return metrics
+
+
+class KlineStreamMultiplexer(ABC):
+    """
+    Uma conexão WebSocket para vários (symbol, interval)
+
+    Assina/cancela streams dinamicamente na mesma conexão, demultiplexa as
+    mensagens para um StreamSubscription por stream e compartilha reconexão
+    com backoff e métricas de saúde entre todos os assinantes. Ao reconectar,
+    todos os streams ativos são reassinados.
+
+    Subclasses definem a URL, o nome do stream e o protocolo de assinatura.
+    """
+
+    url = ""
+    max_streams_per_request = 200
+
+    def __init__(self, url: Optional[str] = None, max_queue_size: int = 100, initial_reconnect_delay: float = 1):
+        self.url = url or self.url
+        self.max_queue_size = max_queue_size
+        self.initial_reconnect_delay = initial_reconnect_delay
+        self.reconnect_delay = initial_reconnect_delay
+        self.max_reconnect_delay = 30
+        self.ping_interval = 20
+        self.ping_timeout = 30
+        self.close_timeout = 10
+        self.max_msg_size = 10 * 1024 * 1024
+
+        self.connection_count = 0
+        self.total_messages = 0
+        self.last_message_time = None
+        self.connection_start_time = None
+
+        self._channels: Dict[str, List[StreamSubscription]] = {}
+        self._ws = None
+        self._task: Optional[asyncio.Task] = None
+        self._request_id = 0
+
+    # --- Protocolo da exchange (subclasses) ---
+
+    @abstractmethod
+    def stream_name(self, symbol: str, interval: str) -> str:
+        """Nome do stream de klines de (symbol, interval) na exchange"""
+        pass
+
+    @abstractmethod
+    def subscribe_message(self, streams: List[str]) -> Dict[str, Any]:
+        """Mensagem de assinatura dos streams"""
+        pass
+
+    @abstractmethod
+    def unsubscribe_message(self, streams: List[str]) -> Dict[str, Any]:
+        """Mensagem de cancelamento dos streams"""
+        pass
+
+    @abstractmethod
+    def parse_message(self, msg: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Mensagem bruta -> lista de (stream, candle); vazia para respostas/pongs"""
+        pass
+
+    # --- Assinaturas ---
+
+    async def subscribe(self, symbol: str, interval: str) -> StreamSubscription:
+        """
+        Assina um (symbol, interval) e devolve o canal correspondente
+
+        A conexão é aberta no primeiro subscribe; streams novos são assinados
+        na conexão já aberta, sem reconectar.
+        """
+        stream = self.stream_name(symbol, interval)
+        subscription = StreamSubscription(self, stream, symbol, interval, self.max_queue_size)
+        is_new_stream = stream not in self._channels
+        self._channels.setdefault(stream, []).append(subscription)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        elif is_new_stream and self._ws is not None:
+            await self._send(self.subscribe_message, [stream])
+        return subscription
+
+    async def unsubscribe(self, subscription: StreamSubscription):
+        """Remove o canal; cancela o stream na exchange quando não há mais assinantes"""
+        subscribers = self._channels.get(subscription.stream, [])
+        if subscription in subscribers:
+            subscribers.remove(subscription)
+        subscription._close()
+        if subscribers:
+            return
+        self._channels.pop(subscription.stream, None)
+        if self._ws is not None:
+            await self._send(self.unsubscribe_message, [subscription.stream])
+
+    @property
+    def streams(self) -> List[str]:
+        return list(self._channels)
+
+    async def _send(self, build_message, streams: List[str]):
+        """Envia (un)subscribe em lotes de max_streams_per_request"""
+        ws = self._ws
+        for i in range(0, len(streams), self.max_streams_per_request):
+            try:
+                await ws.send(json.dumps(build_message(streams[i:i + self.max_streams_per_request])))
+            except WebSocketException as e:
+                # A reconexão reassina todos os streams ativos
+                print(f"⚠️  [{datetime.now().strftime('%H:%M:%S')}] Falha ao enviar assinatura: {e}")
+                return
+
+    def _next_request_id(self) -> int:
+        self._request_id += 1
+        return self._request_id
+
+    # --- Conexão compartilhada ---
+
+    def _backoff_with_jitter(self) -> float:
+        jitter = random.uniform(0, 0.3 * self.reconnect_delay)
+        delay = min(self.reconnect_delay + jitter, self.max_reconnect_delay)
+        self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
+        return delay
+
+    def _reset_backoff(self):
+        self.reconnect_delay = self.initial_reconnect_delay
+
+    def _dispatch(self, raw_message):
+        try:
+            parsed = self.parse_message(json.loads(raw_message))
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            print(f"⚠️  [{datetime.now().strftime('%H:%M:%S')}] Erro ao processar mensagem: {e}")
+            return
+        for stream, candle in parsed:
+            subscribers = self._channels.get(stream)
+            if not subscribers:
+                continue
+            self.total_messages += 1
+            self.last_message_time = datetime.now()
+            for subscription in subscribers:
+                subscription._deliver(candle)
+
+    async def _run(self):
+        while self._channels:
+            try:
+                async with websockets.connect(
+                    self.url,
+                    ping_interval=self.ping_interval,
+                    ping_timeout=self.ping_timeout,
+                    close_timeout=self.close_timeout,
+                    max_size=self.max_msg_size
+                ) as ws:
+                    self._reset_backoff()
+                    self.connection_count += 1
+                    self.connection_start_time = datetime.now()
+
+                    self._ws = ws
+                    try:
+                        await self._send(self.subscribe_message, self.streams)
+                        async for raw_message in ws:
+                            self._dispatch(raw_message)
+                    finally:
+                        self._ws = None
+
+                    if not self._channels:
+                        return
+                    raise WebSocketException("conexão encerrada pelo servidor")
+
+            except asyncio.CancelledError:
+                raise
+
+            except WebSocketException as e:
+                delay = self._backoff_with_jitter()
+                uptime = (datetime.now() - self.connection_start_time).total_seconds() if self.connection_start_time else 0
+                print(f"⚠️  [{datetime.now().strftime('%H:%M:%S')}] Multiplexador desconectado após {uptime:.1f}s: {e}. Reconectando {len(self._channels)} stream(s) em {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+            except Exception as e:
+                delay = self._backoff_with_jitter()
+                print(f"⚠️  [{datetime.now().strftime('%H:%M:%S')}] Erro inesperado no multiplexador: {e}. Reconectando em {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+    async def close(self):
+        """Fecha a conexão e encerra todos os canais"""
+        channels = [s for subscribers in self._channels.values() for s in subscribers]
+        self._channels.clear()
+        if self._ws is not None:
+            await self._ws.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscription in channels:
+            subscription._close()
+
+    def get_health_metrics(self) -> Dict[str, Any]:
+        """Retorna métricas de saúde da conexão compartilhada"""
+        uptime = None
+        if self.connection_start_time:
+            uptime = (datetime.now() - self.connection_start_time).total_seconds()
+
+        time_since_last_msg = None
+        if self.last_message_time:
+            time_since_last_msg = (datetime.now() - self.last_message_time).total_seconds()
+
+        subscribers = [s for channel in self._channels.values() for s in channel]
+        return {
+            "connection_count": self.connection_count,
+            "total_messages": self.total_messages,
+            "uptime_seconds": uptime,
+            "time_since_last_message": time_since_last_msg,
+            "is_healthy": time_since_last_msg < 60 if time_since_last_msg else False,
+            "connected": self._ws is not None,
+            "streams": len(self._channels),
+            "subscribers": len(subscribers),
+            "dropped_messages": sum(s.dropped_messages for s in subscribers),
+        }
+
+
+class BinanceUSStreamMultiplexer(KlineStreamMultiplexer):
+    """Combined streams da Binance.US (/stream) com SUBSCRIBE/UNSUBSCRIBE dinâmico"""
+
+    url = "wss://stream.binance.us:9443/stream"
+    max_streams_per_request = 200  # Limite de 1024 streams por conexão
+
+    def stream_name(self, symbol: str, interval: str) -> str:
+        return f"{symbol.lower()}@kline_{interval}"
+
+    def subscribe_message(self, streams: List[str]) -> Dict[str, Any]:
+        return {"method": "SUBSCRIBE", "params": streams, "id": self._next_request_id()}
+
+    def unsubscribe_message(self, streams: List[str]) -> Dict[str, Any]:
+        return {"method": "UNSUBSCRIBE", "params": streams, "id": self._next_request_id()}
+
+    def parse_message(self, msg: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        # Combined stream: {"stream": "btcusdt@kline_1m", "data": {...}}
+        if "stream" not in msg:
+            return []
+        candle = _parse_binance_kline(msg["data"])
+        return [(msg["stream"], candle)] if candle else []
+
+
+class BybitStreamMultiplexer(KlineStreamMultiplexer):
+    """Tópicos kline.{interval}.{symbol} da Bybit v5 em uma conexão"""
+
+    url = "wss://stream.bybit.com/v5/public/spot"
+    max_streams_per_request = 10  # Spot aceita até 10 args por requisição
+
+    def stream_name(self, symbol: str, interval: str) -> str:
+        return f"kline.{interval}.{symbol.upper()}"
+
+    def subscribe_message(self, streams: List[str]) -> Dict[str, Any]:
+        return {"op": "subscribe", "args": streams, "req_id": str(self._next_request_id())}
+
+    def unsubscribe_message(self, streams: List[str]) -> Dict[str, Any]:
+        return {"op": "unsubscribe", "args": streams, "req_id": str(self._next_request_id())}
+
+    def parse_message(self, msg: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        topic = msg.get("topic", "")
+        if not topic.startswith("kline."):
+            return []
+        symbol = topic.rsplit(".", 1)[1]
+        return [(topic, _parse_bybit_kline(msg, data, symbol)) for data in msg["data"]]
+
+
+# Multiplexadores do processo, um por classe (ver get_shared_multiplexer)
+_shared_multiplexers: Dict[type, KlineStreamMultiplexer] = {}
+
+
+def get_shared_multiplexer(multiplexer_cls: Type[KlineStreamMultiplexer] = BinanceUSStreamMultiplexer) -> KlineStreamMultiplexer:
+    """
+    Multiplexador compartilhado do processo para a exchange de multiplexer_cls
+
+    Engines e runtimes de streaming assinam seus (symbol, interval) nele em
+    vez de abrir uma conexão cada. A conexão é (re)aberta pelo primeiro
+    subscribe dentro do loop asyncio em execução.
+    """
+    multiplexer = _shared_multiplexers.get(multiplexer_cls)
+    if multiplexer is None:
+        multiplexer = _shared_multiplexers[multiplexer_cls] = multiplexer_cls()
+    return multiplexer
@@ -0,0 +1,262 @@
+"""
+Cache persistente de sinais de estratégias (memo em disco)
+
+Os sinais de cada estratégia são guardados em NPZ em <cache_dir>/signals/,
+ao lado do cache de candles, com chave derivada de:
+- hash do conteúdo dos candles (OHLC)
+- chave da estratégia
+- parâmetros da estratégia
+- versão do código (hash das fontes dos detectores)
+
+Repetir o mesmo ativo/período para testar outro modo de confluência ou outro
+conjunto de pesos reutiliza os sinais em vez de recalcular. O tamanho total é
+limitado com descarte LRU, e quando os candles de um dataset mudam as entradas
+calculadas sobre o conteúdo anterior são removidas.
+
+Vários processos (workers de backtest) podem compartilhar o diretório: toda
+gravação do índice relê index.json sob lock de arquivo e mescla as alterações
+do processo, em vez de sobrescrever com o índice em memória. Acessos (hits)
+só atualizam last_access em memória; os horários são gravados em lote na
+próxima alteração do índice, em flush() ou a cada access_flush_interval.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from market_manus.data_providers.historical_cache import _file_lock
+from market_manus.strategies.signal_series import SignalSeries
+
+FINGERPRINT_COLUMNS = ("open", "high", "low", "close")
+
+
+def source_fingerprint(modules: Iterable[Any]) -> str:
+    """Hash das fontes dos módulos (muda quando o código dos detectores muda)"""
+    digest = hashlib.blake2b(digest_size=8)
+    for module in modules:
+        path = inspect.getsourcefile(module)
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def module_dependencies(roots: Iterable[Any], prefix: str = "market_manus.strategies") -> List[Any]:
+    """
+    Módulos das raízes e, transitivamente, os módulos sob prefix que elas importam
+
+    Segue os nomes importados por cada módulo (módulos e objetos com
+    __module__), de modo que um detector que passa a delegar para um novo
+    módulo (ex.: smc/patterns.py -> smc/structure_tracker.py) entra no
+    fingerprint sem manter uma lista manual.
+
+    Returns:
+        List[Any]: Módulos ordenados por nome (ordem estável para o hash)
+    """
+    found = {}
+    pending = list(roots)
+    while pending:
+        module = pending.pop()
+        if module.__name__ in found:
+            continue
+        found[module.__name__] = module
+        for value in list(vars(module).values()):
+            dependency = value if inspect.ismodule(value) else sys.modules.get(getattr(value, "__module__", None) or "")
+            if dependency is not None and dependency.__name__.startswith(prefix) and dependency.__name__ not in found:
+                pending.append(dependency)
+    return [found[name] for name in sorted(found)]
+
+
+class SignalCache:
+    """Memo em disco de SignalSeries com descarte LRU por tamanho"""
+
+    def __init__(self, cache_dir: str = "data", max_bytes: int = 256 * 1024 * 1024,
+                 access_flush_interval: float = 60.0, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            cache_dir: Diretório raiz do cache (o mesmo do HistoricalDataCache)
+            max_bytes: Tamanho máximo dos arquivos de sinais
+            access_flush_interval: Segundos entre gravações de last_access pendentes
+                disparadas por hits (alterações do índice gravam sempre)
+            clock: Relógio (segundos, epoch) usado em last_access
+        """
+        self.signals_dir = Path(cache_dir) / "signals"
+        self.index_file = self.signals_dir / "index.json"
+        self.max_bytes = max_bytes
+        self.access_flush_interval = access_flush_interval
+        self._clock = clock
+        self.index: Dict[str, Dict] = self._load_index()
+        self._pending_access: Dict[str, float] = {}
+        self._last_flush = self._clock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "invalidations": 0}
+
+    def _load_index(self) -> Dict[str, Dict]:
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r') as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError):
+                return {}
+        return {}
+
+    def _save_index(self):
+        tmp = self.signals_dir / f"index.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_file)
+
+    @contextmanager
+    def _locked_index(self):
+        """
+        Índice atual do disco sob lock entre processos
+
+        Os last_access pendentes deste processo são mesclados (o mais recente
+        vence); self.index passa a ser o índice mesclado, que pode ser alterado
+        dentro do bloco e é gravado ao sair.
+        """
+        self.signals_dir.mkdir(parents=True, exist_ok=True)
+        with _file_lock(self.signals_dir / ".lock"):
+            index = self._load_index()
+            for key, accessed in self._pending_access.items():
+                if key in index:
+                    index[key]["last_access"] = max(index[key]["last_access"], accessed)
+            self._pending_access.clear()
+            self.index = index
+            yield index
+            self._save_index()
+            self._last_flush = self._clock()
+
+    def flush(self):
+        """Grava os last_access pendentes (hits) no índice compartilhado"""
+        if self._pending_access:
+            with self._locked_index():
+                pass
+
+    def _path(self, key: str) -> Path:
+        return self.signals_dir / f"{key}.npz"
+
+    @staticmethod
+    def fingerprint(ohlcv: Dict[str, np.ndarray]) -> str:
+        """Hash do conteúdo dos candles (colunas OHLC float64)"""
+        digest = hashlib.blake2b(digest_size=16)
+        for column in FINGERPRINT_COLUMNS:
+            values = np.ascontiguousarray(ohlcv[column], dtype=np.float64)
+            digest.update(values.size.to_bytes(8, "little"))
+            digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(data_hash: str, strategy_key: str, params: Optional[Dict] = None, code_version: str = "") -> str:
+        """Chave do cache: (conteúdo dos candles, estratégia, parâmetros, versão do código)"""
+        payload = json.dumps([data_hash, strategy_key, params or {}, code_version], sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[SignalSeries]:
+        """Retorna os sinais em cache ou None"""
+        path = self._path(key)
+        if key not in self.index and path.exists():
+            # Gravado por outro processo depois da leitura do índice
+            self.index = self._load_index()
+        entry = self.index.get(key)
+        if entry is None or not path.exists():
+            if entry is not None:
+                with self._locked_index() as index:
+                    if not path.exists():
+                        index.pop(key, None)
+            self.stats["misses"] += 1
+            return None
+
+        with np.load(path) as data:
+            series = SignalSeries(data["index"], data["direction"])
+        now = self._clock()
+        entry["last_access"] = now
+        self._pending_access[key] = now
+        if now - self._last_flush >= self.access_flush_interval:
+            self.flush()
+        self.stats["hits"] += 1
+        return series
+
+    def put(self, key: str, series: SignalSeries, data_hash: str = "", dataset: Optional[str] = None,
+            strategy_key: Optional[str] = None):
+        """
+        Grava os sinais de uma estratégia
+
+        Args:
+            key: Chave de make_key
+            series: Sinais calculados
+            data_hash: Hash dos candles usados (fingerprint)
+            dataset: Identificação do dataset (ex: "BTCUSDT_15_2025-09-01_2025-10-01");
+                entradas do mesmo dataset com outro data_hash são invalidadas
+            strategy_key: Estratégia (informativo)
+        """
+        self.signals_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = self.signals_dir / f"{key}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, index=series.index, direction=series.direction)
+        os.replace(tmp, path)
+
+        with self._locked_index() as index:
+            if dataset is not None:
+                self._invalidate(dataset, keep_hash=data_hash)
+            index[key] = {
+                "strategy": strategy_key,
+                "dataset": dataset,
+                "data_hash": data_hash,
+                "signals": len(series),
+                "size": path.stat().st_size,
+                "last_access": self._clock()
+            }
+            self.stats["writes"] += 1
+            self._evict(keep=key)
+
+    def _remove(self, key: str):
+        self.index.pop(key, None)
+        self._path(key).unlink(missing_ok=True)
+
+    def _evict(self, keep: Optional[str] = None):
+        """Remove as entradas menos usadas recentemente até caber em max_bytes"""
+        total = self.size_bytes()
+        for key in sorted(self.index, key=lambda k: self.index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self.index[key]["size"]
+            self._remove(key)
+            self.stats["evictions"] += 1
+
+    def _invalidate(self, dataset: str, keep_hash: Optional[str] = None) -> int:
+        stale = [
+            key for key, entry in self.index.items()
+            if entry.get("dataset") == dataset and entry.get("data_hash") != keep_hash
+        ]
+        for key in stale:
+            self._remove(key)
+        self.stats["invalidations"] += len(stale)
+        return len(stale)
+
+    def invalidate_dataset(self, dataset: str, keep_hash: Optional[str] = None) -> int:
+        """Remove as entradas de um dataset calculadas sobre outro conteúdo de candles"""
+        with self._locked_index():
+            return self._invalidate(dataset, keep_hash)
+
+    def size_bytes(self) -> int:
+        return sum(entry["size"] for entry in self.index.values())
+
+    def clear(self):
+        """Remove todos os sinais em cache"""
+        with self._locked_index() as index:
+            for key in list(index):
+                self._remove(key)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"entries": len(self.index), "bytes": self.size_bytes(), **self.stats}
@@ -0,0 +1,147 @@
+"""
+Buffer circular de candles em arrays NumPy (struct-of-arrays)
+
+Substitui o deque de dicts dos engines em tempo real: append e atualização
+do candle em formação são O(1) sem alocação, e os últimos N candles são
+expostos como views contíguas somente leitura (zero cópia) para os
+detectores. Cada posição é gravada duas vezes (espelhada em i e i+capacity),
+o que mantém qualquer janela dos últimos N candles contígua na memória.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+CANDLE_FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+class CandleRingBuffer:
+    """OHLCV de capacidade fixa: timestamp int64, preços/volume float64"""
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Args:
+            capacity: Máximo de candles mantidos (os mais antigos são sobrescritos)
+        """
+        self.capacity = max(1, capacity)
+        self._data = {
+            name: np.zeros(2 * self.capacity, dtype=np.int64 if name == "timestamp" else np.float64)
+            for name in CANDLE_FIELDS
+        }
+        self._count = 0  # Total de candles já inseridos (posição lógica)
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def _write(self, position: int, candle: Dict[str, Any]):
+        mirror = position + self.capacity
+        for name in CANDLE_FIELDS:
+            array = self._data[name]
+            array[position] = array[mirror] = candle[name]
+
+    def append(self, candle: Dict[str, Any]):
+        """Adiciona um candle (dict com timestamp/open/high/low/close/volume)"""
+        self._write(self._count % self.capacity, candle)
+        self._count += 1
+
+    def update_last(self, candle: Dict[str, Any]):
+        """Sobrescreve o último candle no lugar (candle em formação)"""
+        if not self._count:
+            self.append(candle)
+            return
+        self._write((self._count - 1) % self.capacity, candle)
+
+    def upsert(self, candle: Dict[str, Any]) -> bool:
+        """
+        Atualiza o último candle se tiver o mesmo timestamp, senão adiciona
+
+        Candles com timestamp anterior ao último são ignorados.
+
+        Returns:
+            True se um novo candle foi adicionado
+        """
+        last_timestamp = self.last_timestamp
+        if last_timestamp == candle["timestamp"]:
+            self.update_last(candle)
+            return False
+        if last_timestamp is None or candle["timestamp"] > last_timestamp:
+            self.append(candle)
+            return True
+        return False
+
+    def extend(self, candles: Iterable[Dict[str, Any]]):
+        """Adiciona vários candles (dicts) em ordem"""
+        for candle in candles:
+            self.append(candle)
+
+    def extend_arrays(self, arrays: Dict[str, np.ndarray]):
+        """Adiciona colunas já tipadas (ex.: klines_to_arrays) sem passar por dicts"""
+        size = len(arrays["timestamp"])
+        if size > self.capacity:
+            self._count += size - self.capacity
+            arrays = {name: arrays[name][-self.capacity:] for name in CANDLE_FIELDS}
+            size = self.capacity
+
+        # Cópia vetorizada: até dois trechos contíguos (antes/depois da volta)
+        start = self._count % self.capacity
+        first = min(size, self.capacity - start)
+        for name in CANDLE_FIELDS:
+            array, values = self._data[name], arrays[name]
+            array[start:start + first] = values[:first]
+            array[start + self.capacity:start + self.capacity + first] = values[:first]
+            rest = size - first
+            if rest:
+                array[:rest] = values[first:]
+                array[self.capacity:self.capacity + rest] = values[first:]
+        self._count += size
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if not self._count:
+            return None
+        return int(self._data["timestamp"][(self._count - 1) % self.capacity])
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        """Último candle como dict (None se vazio)"""
+        if not self._count:
+            return None
+        position = (self._count - 1) % self.capacity
+        return {name: self._data[name][position].item() for name in CANDLE_FIELDS}
+
+    def view(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Últimos n candles (todos se None) como views contíguas somente leitura
+
+        As views refletem escritas posteriores no buffer; copie se precisar
+        de um retrato estável.
+        """
+        size = len(self) if n is None else max(0, min(n, len(self)))
+        end = (self._count - 1) % self.capacity + 1 + self.capacity if self._count else self.capacity
+        columns = {}
+        for name in CANDLE_FIELDS:
+            column = self._data[name][end - size:end]
+            column.flags.writeable = False
+            columns[name] = column
+        return columns
+
+    def to_frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        """Últimos n candles como DataFrame (uma cópia por coluna, sem dicts)"""
+        return pd.DataFrame({name: column.copy() for name, column in self.view(n).items()})
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        columns = self.view()
+        for i in range(len(self)):
+            yield {name: columns[name][i].item() for name in CANDLE_FIELDS}
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(array.nbytes for array in self._data.values())
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Ocupação e memória do buffer"""
+        return {
+            "candles": len(self),
+            "capacity": self.capacity,
+            "memory_bytes": self.memory_bytes,
+        }
@@ -4,6 +4,7 @@ Integrates WebSocket data with parallel strategy execution and live UI
 """
 
 import asyncio
+import time
 from collections import deque
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Callable
@@ -15,7 +16,11 @@ from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
-from market_manus.data_providers.market_data_ws import BinanceUSWebSocket
+from market_manus.data_providers.market_data_ws import KlineStreamMultiplexer, get_shared_multiplexer
+from market_manus.data_providers.historical_cache import INTERVAL_MS, klines_to_arrays
+from market_manus.data_providers.http_client import fetch_kline_async
+from market_manus.engines.candle_ring_buffer import CandleRingBuffer
+from market_manus.engines.strategy_executor import StrategyExecutor, create_strategy_executor
 from market_manus.strategies.classic_analysis import (
     calculate_ema,
     calculate_rsi,
@@ -24,6 +29,8 @@ from market_manus.strategies.classic_analysis import (
     calculate_adx,
     fibonacci_signal
 )
+from market_manus.strategies import indicator_kernels as kernels
+from market_manus.strategies.streaming_indicators import StreamingIndicators
 from market_manus.strategies.smc.patterns import (
     detect_bos,
     detect_choch,
@@ -31,6 +38,7 @@ from market_manus.strategies.smc.patterns import (
     detect_fvg,
     detect_liquidity_sweep
 )
+from market_manus.strategies.smc.structure_tracker import SMCStructureTracker
 from market_manus.core.signal import Signal
 from market_manus.analysis.market_context_analyzer import MarketContextAnalyzer
 from market_manus.core.capital_manager import FeeModel, FeePreset
@@ -48,8 +56,18 @@ class RealtimeStrategyEngine:
         confluence_mode: str = "MAJORITY",
         enable_audio_alerts: bool = False,
         enable_paper_trading: bool = False,
-        initial_capital: float = 10000.0
+        initial_capital: float = 10000.0,
+        evaluate_on_tick: bool = True,
+        executor: Any = "thread",
+        strategy_timeout: float = 5.0,
+        ws_provider=None,
+        multiplexer: Optional[KlineStreamMultiplexer] = None
     ):
+        """
+        ws_provider: Fonte de klines já pronta (async for msg in ws_provider); se None,
+            start() assina (symbol, interval) em multiplexer
+        multiplexer: Conexão compartilhada de streams (padrão: get_shared_multiplexer())
+        """
         self.symbol = symbol
         self.interval = interval
         
@@ -74,14 +92,32 @@ class RealtimeStrategyEngine:
         # FASE 2: FeeModel para custos realistas
         self.fee_model = FeeModel.from_preset(FeePreset.LIVE) if enable_paper_trading else None
         
-        self.ws_provider = None
-        self.candles_deque = deque(maxlen=1000)
+        self.ws_provider = ws_provider
+        self.multiplexer = multiplexer
+        self.candles = CandleRingBuffer(capacity=1000)
         self.signals_history = deque(maxlen=100)
         self.running = False
         
         self.candles_df = None
         self.processing_window = 200
         
+        # Estado incremental dos indicadores clássicos: O(1) por mensagem WebSocket.
+        # Com evaluate_on_tick, klines ainda abertas também geram avaliação (provisória).
+        self.indicators = StreamingIndicators()
+        self.evaluate_on_tick = evaluate_on_tick
+        self.forming_candle = None
+        self.window_signals = {}
+        
+        # Estrutura SMC incremental deste (symbol, interval): semeada no bootstrap,
+        # atualizada a cada candle fechado e limitada aos últimos processing_window
+        # candles (a janela de detect_*); BOS/CHoCH/OB/FVG são consultas a ela
+        self.structure = SMCStructureTracker(window=self.processing_window)
+        
+        # Estratégias de janela (SMC, Fibonacci): "inline", "thread", "process" ou
+        # um StrategyExecutor; strategy_timeout limita cada estratégia (s)
+        self.executor = executor if isinstance(executor, StrategyExecutor) else create_strategy_executor(executor)
+        self.strategy_timeout = strategy_timeout
+        
         self.context_analyzer = MarketContextAnalyzer(lookback_days=60)
         
         self.state = {
@@ -128,12 +164,27 @@ class RealtimeStrategyEngine:
             'fvg': detect_fvg,
             'liquidity_sweep': detect_liquidity_sweep
         }
-    
-    def _apply_rsi_strategy(self, df: pd.DataFrame) -> Signal:
-        """Apply RSI strategy"""
-        rsi = calculate_rsi(df['close'], 14)
-        last_rsi = rsi.iloc[-1]
         
+        # Estratégias lidas do estado streaming (sem DataFrame por candle)
+        self.streaming_strategies = {
+            'rsi_mean_reversion': self._stream_rsi_strategy,
+            'ema_crossover': self._stream_ema_strategy,
+            'bollinger_breakout': self._stream_bollinger_strategy,
+            'macd': self._stream_macd_strategy,
+            'stochastic': self._stream_stochastic_strategy,
+            'williams_r': self._stream_williams_r_strategy,
+            'adx': self._stream_adx_strategy,
+            'bos': self._stream_bos_strategy,
+            'choch': self._stream_choch_strategy,
+            'order_blocks': self._stream_order_blocks_strategy,
+            'fvg': self._stream_fvg_strategy
+        }
+    
+    # ==================== SINAIS A PARTIR DOS VALORES DOS INDICADORES ====================
+    # Usados tanto pelo caminho DataFrame (_apply_*) quanto pelo estado streaming
+    
+    @staticmethod
+    def _rsi_signal(last_rsi: float) -> Signal:
         if pd.isna(last_rsi):
             return Signal(action="HOLD", confidence=0.0, reasons=["Dados insuficientes"], tags=["RSI"])
         
@@ -156,14 +207,8 @@ class RealtimeStrategyEngine:
         
         return Signal(action="HOLD", confidence=0.0, reasons=["RSI neutro"], tags=["RSI"])
     
-    def _apply_ema_strategy(self, df: pd.DataFrame) -> Signal:
-        """Apply EMA crossover strategy"""
-        ema_fast = calculate_ema(df['close'], 12)
-        ema_slow = calculate_ema(df['close'], 26)
-        
-        last_fast = ema_fast.iloc[-1]
-        last_slow = ema_slow.iloc[-1]
-        
+    @staticmethod
+    def _ema_signal(last_fast: float, last_slow: float) -> Signal:
         if pd.isna(last_fast) or pd.isna(last_slow):
             return Signal(action="HOLD", confidence=0.0, reasons=["Dados insuficientes"], tags=["EMA"])
         
@@ -186,14 +231,8 @@ class RealtimeStrategyEngine:
         
         return Signal(action="HOLD", confidence=0.0, reasons=["EMAs neutras"], tags=["EMA"])
     
-    def _apply_bollinger_strategy(self, df: pd.DataFrame) -> Signal:
-        """Apply Bollinger Bands strategy"""
-        upper, middle, lower = calculate_bollinger_bands(df['close'], 20, 2)
-        
-        last_close = df['close'].iloc[-1]
-        last_upper = upper.iloc[-1]
-        last_lower = lower.iloc[-1]
-        
+    @staticmethod
+    def _bollinger_signal(last_close: float, last_upper: float, last_lower: float) -> Signal:
         if pd.isna(last_upper) or pd.isna(last_lower):
             return Signal(action="HOLD", confidence=0.0, reasons=["Dados insuficientes"], tags=["BB"])
         
@@ -216,13 +255,8 @@ class RealtimeStrategyEngine:
         
         return Signal(action="HOLD", confidence=0.0, reasons=["Preço dentro das bandas"], tags=["BB"])
     
-    def _apply_macd_strategy(self, df: pd.DataFrame) -> Signal:
-        """Apply MACD strategy"""
-        macd_line, signal_line, histogram = calculate_macd(df['close'], 12, 26, 9)
-        
-        last_macd = macd_line.iloc[-1]
-        last_signal = signal_line.iloc[-1]
-        
+    @staticmethod
+    def _macd_signal(last_macd: float, last_signal: float) -> Signal:
         if pd.isna(last_macd) or pd.isna(last_signal):
             return Signal(action="HOLD", confidence=0.0, reasons=["Dados insuficientes"], tags=["MACD"])
         
@@ -245,15 +279,8 @@ class RealtimeStrategyEngine:
         
         return Signal(action="HOLD", confidence=0.0, reasons=["MACD neutro"], tags=["MACD"])
     
-    def _apply_stochastic_strategy(self, df: pd.DataFrame) -> Signal:
-        """Apply Stochastic strategy"""
-        k_period = 14
-        low_min = df['low'].rolling(window=k_period).min()
-        high_max = df['high'].rolling(window=k_period).max()
-        
-        stoch_k = 100 * ((df['close'] - low_min) / (high_max - low_min))
-        last_k = stoch_k.iloc[-1]
-        
+    @staticmethod
+    def _stochastic_signal(last_k: float) -> Signal:
         if pd.isna(last_k):
             return Signal(action="HOLD", confidence=0.0, reasons=["Dados insuficientes"], tags=["STOCH"])
         
@@ -276,14 +303,8 @@ class RealtimeStrategyEngine:
         
         return Signal(action="HOLD", confidence=0.0, reasons=["Stochastic neutro"], tags=["STOCH"])
     
-    def _apply_adx_strategy(self, df: pd.DataFrame) -> Signal:
-        """Apply ADX strategy"""
-        adx, plus_di, minus_di = calculate_adx(df, 14)
-        
-        last_adx = adx.iloc[-1]
-        last_plus = plus_di.iloc[-1]
-        last_minus = minus_di.iloc[-1]
-        
+    @staticmethod
+    def _adx_signal(last_adx: float, last_plus: float, last_minus: float) -> Signal:
         if pd.isna(last_adx) or pd.isna(last_plus) or pd.isna(last_minus):
             return Signal(action="HOLD", confidence=0.0, reasons=["Dados insuficientes"], tags=["ADX"])
         
@@ -306,24 +327,11 @@ class RealtimeStrategyEngine:
         
         return Signal(action="HOLD", confidence=0.0, reasons=["ADX sem tendência forte"], tags=["ADX"])
     
-    def _apply_williams_r_strategy(self, df: pd.DataFrame) -> Signal:
-        """Apply Williams %R strategy"""
-        period = 14
-        if len(df) < period:
-            return Signal(action="HOLD", confidence=0.0, reasons=["Dados insuficientes"], tags=["WILLIAMS_R"])
-        
-        highest_high = df['high'].rolling(window=period).max().iloc[-1]
-        lowest_low = df['low'].rolling(window=period).min().iloc[-1]
-        last_close = df['close'].iloc[-1]
-        
-        if pd.isna(highest_high) or pd.isna(lowest_low):
+    @staticmethod
+    def _williams_r_signal(wr: float) -> Signal:
+        if pd.isna(wr):
             return Signal(action="HOLD", confidence=0.0, reasons=["Dados insuficientes"], tags=["WILLIAMS_R"])
         
-        if highest_high == lowest_low:
-            wr = -50
-        else:
-            wr = ((highest_high - last_close) / (highest_high - lowest_low)) * -100
-        
         if wr < -80:
             confidence = (80 - abs(wr)) / 20
             return Signal(
@@ -343,6 +351,85 @@ class RealtimeStrategyEngine:
         
         return Signal(action="HOLD", confidence=0.0, reasons=["Williams %R neutro"], tags=["WILLIAMS_R"])
     
+    # ==================== CAMINHO DATAFRAME (recalcula a janela inteira) ====================
+    
+    def _apply_rsi_strategy(self, df: pd.DataFrame) -> Signal:
+        """Apply RSI strategy"""
+        rsi = calculate_rsi(df['close'], 14)
+        return self._rsi_signal(rsi.iloc[-1])
+    
+    def _apply_ema_strategy(self, df: pd.DataFrame) -> Signal:
+        """Apply EMA crossover strategy"""
+        ema_fast = calculate_ema(df['close'], 12)
+        ema_slow = calculate_ema(df['close'], 26)
+        return self._ema_signal(ema_fast.iloc[-1], ema_slow.iloc[-1])
+    
+    def _apply_bollinger_strategy(self, df: pd.DataFrame) -> Signal:
+        """Apply Bollinger Bands strategy"""
+        upper, middle, lower = calculate_bollinger_bands(df['close'], 20, 2)
+        return self._bollinger_signal(df['close'].iloc[-1], upper.iloc[-1], lower.iloc[-1])
+    
+    def _apply_macd_strategy(self, df: pd.DataFrame) -> Signal:
+        """Apply MACD strategy"""
+        macd_line, signal_line, histogram = calculate_macd(df['close'], 12, 26, 9)
+        return self._macd_signal(macd_line.iloc[-1], signal_line.iloc[-1])
+    
+    def _apply_stochastic_strategy(self, df: pd.DataFrame) -> Signal:
+        """Apply Stochastic strategy"""
+        k_period = 14
+        stoch_k = kernels.stochastic_k(df['high'], df['low'], df['close'], k_period)
+        return self._stochastic_signal(stoch_k[-1] if len(stoch_k) else np.nan)
+    
+    def _apply_adx_strategy(self, df: pd.DataFrame) -> Signal:
+        """Apply ADX strategy"""
+        adx, plus_di, minus_di = calculate_adx(df, 14)
+        return self._adx_signal(adx.iloc[-1], plus_di.iloc[-1], minus_di.iloc[-1])
+    
+    def _apply_williams_r_strategy(self, df: pd.DataFrame) -> Signal:
+        """Apply Williams %R strategy"""
+        period = 14
+        if len(df) < period:
+            return self._williams_r_signal(np.nan)
+        wr = kernels.williams_r(df['high'], df['low'], df['close'], period, flat_value=-50.0)[-1]
+        return self._williams_r_signal(wr)
+    
+    # ==================== CAMINHO STREAMING (estado incremental O(1)) ====================
+    
+    def _stream_rsi_strategy(self) -> Signal:
+        return self._rsi_signal(self.indicators.rsi.value)
+    
+    def _stream_ema_strategy(self) -> Signal:
+        return self._ema_signal(self.indicators.ema_fast.value, self.indicators.ema_slow.value)
+    
+    def _stream_bollinger_strategy(self) -> Signal:
+        bollinger = self.indicators.bollinger
+        return self._bollinger_signal(self.indicators.close, bollinger.upper, bollinger.lower)
+    
+    def _stream_macd_strategy(self) -> Signal:
+        return self._macd_signal(self.indicators.macd.macd, self.indicators.macd.signal)
+    
+    def _stream_stochastic_strategy(self) -> Signal:
+        return self._stochastic_signal(self.indicators.range.stochastic_k)
+    
+    def _stream_adx_strategy(self) -> Signal:
+        adx = self.indicators.adx
+        return self._adx_signal(adx.adx, adx.plus_di, adx.minus_di)
+    
+    def _stream_williams_r_strategy(self) -> Signal:
+        return self._williams_r_signal(self.indicators.range.williams_r)
+    
+    def _stream_bos_strategy(self) -> Signal:
+        return self.structure.bos_signal()
+    
+    def _stream_choch_strategy(self) -> Signal:
+        return self.structure.choch_signal()
+    
+    def _stream_order_blocks_strategy(self) -> Signal:
+        return self.structure.order_block_signal()
+    
+    def _stream_fvg_strategy(self) -> Signal:
+        return self.structure.fvg_signal()
+    
     def _apply_fibonacci_strategy(self, df: pd.DataFrame) -> Signal:
         """Apply Fibonacci Retracement strategy"""
         return fibonacci_signal(df, params={'lookback': 50})
@@ -382,7 +469,9 @@ class RealtimeStrategyEngine:
             api_interval = interval_map.get(self.interval, '5')
             
             print(f"📥 Carregando dados históricos para {self.symbol}...")
-            klines = self.data_provider.get_kline(
+            # Assíncrono: não bloqueia o loop enquanto o histórico é baixado
+            klines = await fetch_kline_async(
+                self.data_provider,
                 category="spot",
                 symbol=self.symbol,
                 interval=api_interval,
@@ -393,65 +482,112 @@ class RealtimeStrategyEngine:
                 print("⚠️  Aviso: Não foi possível carregar dados históricos")
                 return False
             
-            for kline in klines:
-                candle = {
-                    'timestamp': int(kline[0]),
-                    'open': float(kline[1]),
-                    'high': float(kline[2]),
-                    'low': float(kline[3]),
-                    'close': float(kline[4]),
-                    'volume': float(kline[5])
-                }
-                self.candles_deque.append(candle)
+            # Só candles já fechados, em ordem cronológica: o kline em formação
+            # chega depois pelo WebSocket e não pode entrar duas vezes nos indicadores
+            arrays = klines_to_arrays(klines)
+            timestamps, first = np.unique(arrays["timestamp"], return_index=True)
+            closed = timestamps + INTERVAL_MS.get(api_interval, INTERVAL_MS["5"]) <= int(time.time() * 1000)
+            self.candles.extend_arrays({name: values[first][closed] for name, values in arrays.items()})
+            self.indicators.seed(self.candles)
+            self.structure.seed(self.candles)
             
-            print(f"✅ {len(self.candles_deque)} candles carregados")
+            print(f"✅ {len(self.candles)} candles carregados")
             return True
             
         except Exception as e:
             print(f"⚠️  Erro no bootstrap: {e}")
             return False
     
-    async def apply_strategies_parallel(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Apply all strategies in parallel using asyncio"""
-        async def apply_single_strategy(strategy_name: str):
+    def _adjust_for_context(self, strategy_name: str, signal: Signal) -> Signal:
+        """Ajusta a confiança do sinal pelo contexto de mercado (quando disponível)"""
+        if signal and self.state.get('market_context'):
+            context = self.state['market_context']
+            weight_adjustment = context.recommendations.get(strategy_name, 1.0)
+            signal.confidence *= weight_adjustment
+            signal.confidence = max(0.0, min(signal.confidence, 1.0))
+        return signal
+    
+    def apply_streaming_strategies(self) -> Dict[str, Any]:
+        """Avalia as estratégias clássicas e SMC de estrutura a partir do estado incremental (sem DataFrame)"""
+        signals = {}
+        for strategy_name in self.strategies:
+            strategy_func = self.streaming_strategies.get(strategy_name)
+            if strategy_func is None:
+                continue
             try:
-                if strategy_name not in self.strategy_functions:
-                    return strategy_name, Signal(
-                        action="HOLD",
-                        confidence=0.0,
-                        reasons=["Estratégia não encontrada"],
-                        tags=["ERROR"]
-                    )
-                
-                strategy_func = self.strategy_functions[strategy_name]
-                signal = await asyncio.to_thread(strategy_func, df)
-                
-                if signal and self.state.get('market_context'):
-                    context = self.state['market_context']
-                    weight_adjustment = context.recommendations.get(strategy_name, 1.0)
-                    signal.confidence *= weight_adjustment
-                    signal.confidence = max(0.0, min(signal.confidence, 1.0))
-                
-                return strategy_name, signal or Signal(
-                    action="HOLD",
-                    confidence=0.0,
-                    reasons=["Sem sinal"],
-                    tags=["NO_SIGNAL"]
-                )
-                
+                signals[strategy_name] = self._adjust_for_context(strategy_name, strategy_func())
             except Exception as e:
                 print(f"⚠️  Erro na estratégia {strategy_name}: {e}")
-                return strategy_name, Signal(
+                signals[strategy_name] = Signal(
                     action="HOLD",
                     confidence=0.0,
                     reasons=[f"Erro: {str(e)[:30]}"],
                     tags=["ERROR"]
                 )
+        return signals
+    
+    async def evaluate_strategies(self, is_closed: bool) -> Dict[str, Any]:
+        """
+        Avalia todas as estratégias selecionadas.
+        
+        Clássicas leem o estado streaming (inclui o candle em formação) e as SMC de
+        estrutura leem o rastreador (só candles fechados). Estratégias de janela
+        (Liquidity Sweep, Fibonacci) são recalculadas sobre o DataFrame apenas em
+        candles fechados; em ticks intermediários reaproveitam o último resultado.
+        """
+        signals = self.apply_streaming_strategies()
+        
+        window_strategies = [s for s in self.strategies if s not in self.streaming_strategies]
+        if window_strategies and (is_closed or not self.window_signals):
+            df = self.candles.to_frame(self.processing_window)
+            self.window_signals = await self.apply_strategies_parallel(df, window_strategies)
+        
+        signals.update({name: self.window_signals[name] for name in window_strategies if name in self.window_signals})
+        return {name: signals[name] for name in self.strategies if name in signals}
+    
+    async def apply_strategies_parallel(self, df: pd.DataFrame, strategies: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Aplica as estratégias (padrão: todas as selecionadas) no executor, com timeout por estratégia"""
+        names = strategies or self.strategies
+        jobs = {name: self.strategy_functions[name] for name in names if name in self.strategy_functions}
+        results = await self.executor.map(jobs, df, timeout=self.strategy_timeout)
+        
+        signals = {}
+        for strategy_name in names:
+            if strategy_name not in jobs:
+                signals[strategy_name] = Signal(
+                    action="HOLD",
+                    confidence=0.0,
+                    reasons=["Estratégia não encontrada"],
+                    tags=["ERROR"]
+                )
+                continue
+            
+            result = results[strategy_name]
+            if isinstance(result, asyncio.TimeoutError):
+                print(f"⚠️  Estratégia {strategy_name} excedeu {self.strategy_timeout}s")
+                signals[strategy_name] = Signal(
+                    action="HOLD",
+                    confidence=0.0,
+                    reasons=[f"Timeout ({self.strategy_timeout}s)"],
+                    tags=["TIMEOUT"]
+                )
+            elif isinstance(result, Exception):
+                print(f"⚠️  Erro na estratégia {strategy_name}: {result}")
+                signals[strategy_name] = Signal(
+                    action="HOLD",
+                    confidence=0.0,
+                    reasons=[f"Erro: {str(result)[:30]}"],
+                    tags=["ERROR"]
+                )
+            else:
+                signals[strategy_name] = self._adjust_for_context(strategy_name, result) or Signal(
+                    action="HOLD",
+                    confidence=0.0,
+                    reasons=["Sem sinal"],
+                    tags=["NO_SIGNAL"]
+                )
         
-        tasks = [apply_single_strategy(strategy) for strategy in self.strategies]
-        results = await asyncio.gather(*tasks)
-        
-        return {name: signal for name, signal in results}
+        return signals
     
     def calculate_confluence(self, signals: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate confluence from multiple signals"""
@@ -627,24 +763,30 @@ class RealtimeStrategyEngine:
             
             is_closed = candle_data.get('is_closed', False)
             
+            # Candle já presente no histórico (ex.: repetido após o bootstrap) não
+            # pode avançar os indicadores de novo
+            last_timestamp = self.candles.last_timestamp
+            if last_timestamp is not None and candle['timestamp'] <= last_timestamp:
+                return
+            
+            # Kline aberta não entra no histórico: fica como candle em formação e
+            # atualiza os indicadores de forma provisória até fechar
             if is_closed:
-                self.candles_deque.append(candle)
+                self.candles.append(candle)
+                self.structure.update(candle['open'], candle['high'], candle['low'], candle['close'])
+                self.forming_candle = None
             else:
-                if len(self.candles_deque) > 0:
-                    self.candles_deque[-1] = candle
+                self.forming_candle = candle
+            self.indicators.update(candle, closed=is_closed)
             
             self.state['price'] = candle['close']
             self.state['msgs_processed'] += 1
             
-            if not is_closed or len(self.candles_deque) < 50:
+            if len(self.candles) < 50 or not (is_closed or self.evaluate_on_tick):
                 self.state['latency_ms'] = int((datetime.now() - start_time).total_seconds() * 1000)
                 return
             
-            candles_list = list(self.candles_deque)
-            window_size = min(self.processing_window, len(candles_list))
-            df = pd.DataFrame(candles_list[-window_size:])
-            
-            signals = await self.apply_strategies_parallel(df)
+            signals = await self.evaluate_strategies(is_closed)
             
             confluence = self.calculate_confluence(signals)
             
@@ -657,37 +799,39 @@ class RealtimeStrategyEngine:
             
             if confluence['action'] == 'BUY':
                 self.state['label_emoji'] = '↑ BUY'
-                self.state['buy_signals'] += 1
-                self.state['total_signals'] += 1
-                if is_strong_signal and self.enable_audio_alerts:
-                    print("\a")
             elif confluence['action'] == 'SELL':
                 self.state['label_emoji'] = '↓ SELL'
-                self.state['sell_signals'] += 1
-                self.state['total_signals'] += 1
-                if is_strong_signal and self.enable_audio_alerts:
-                    print("\a")
             else:
                 self.state['label_emoji'] = '• HOLD'
             
             self.state['is_strong_signal'] = is_strong_signal
             
-            self._execute_paper_trade(confluence['action'], self.state['price'], confluence['confidence'])
-            self._update_paper_pnl(self.state['price'])
-            
-            if self.state['last_state_price'] > 0:
-                self.state['delta_since'] = self.state['price'] - self.state['last_state_price']
-            
-            if confluence['action'] != 'HOLD':
-                self.state['last_state_price'] = self.state['price']
+            # Contadores, alertas, paper trading e histórico só em candles fechados
+            # (sinais de candle em formação são provisórios)
+            if is_closed:
+                if confluence['action'] in ('BUY', 'SELL'):
+                    key = 'buy_signals' if confluence['action'] == 'BUY' else 'sell_signals'
+                    self.state[key] += 1
+                    self.state['total_signals'] += 1
+                    if is_strong_signal and self.enable_audio_alerts:
+                        print("\a")
+                
+                self._execute_paper_trade(confluence['action'], self.state['price'], confluence['confidence'])
+                self._update_paper_pnl(self.state['price'])
+                
+                if self.state['last_state_price'] > 0:
+                    self.state['delta_since'] = self.state['price'] - self.state['last_state_price']
                 
-                self.signals_history.append({
-                    'timestamp': datetime.now(),
-                    'price': self.state['price'],
-                    'action': confluence['action'],
-                    'confidence': confluence['confidence'],
-                    'strategies': confluence['reasons'][:3]
-                })
+                if confluence['action'] != 'HOLD':
+                    self.state['last_state_price'] = self.state['price']
+                    
+                    self.signals_history.append({
+                        'timestamp': datetime.now(),
+                        'price': self.state['price'],
+                        'action': confluence['action'],
+                        'confidence': confluence['confidence'],
+                        'strategies': confluence['reasons'][:3]
+                    })
             
             end_time = datetime.now()
             latency = int((end_time - start_time).total_seconds() * 1000)
@@ -891,12 +1035,19 @@ class RealtimeStrategyEngine:
         
         await self._analyze_context()
         
+        # Workers do executor sobem junto com o bootstrap, fora do caminho do primeiro candle
+        warm_task = asyncio.create_task(asyncio.to_thread(self.executor.warm))
         success = await self.bootstrap_historical_data()
+        await warm_task
         if not success:
             print("❌ Falha ao carregar dados históricos")
             return
         
-        self.ws_provider = BinanceUSWebSocket(self.symbol, self.interval)
+        # Uma conexão para todos os streams do processo: este engine só assina seu canal
+        subscription = None
+        if self.ws_provider is None:
+            multiplexer = self.multiplexer or get_shared_multiplexer()
+            subscription = self.ws_provider = await multiplexer.subscribe(self.symbol, self.interval)
         
         print(f"\n🚀 Iniciando execução em tempo real...")
         print(f"📊 Símbolo: {self.symbol}")
@@ -923,7 +1074,12 @@ class RealtimeStrategyEngine:
         except Exception as e:
             print(f"\n\n❌ Erro: {e}")
             self.running = False
+        finally:
+            if subscription is not None:
+                await subscription.close()
+                self.ws_provider = None
     
     def stop(self):
         """Stop execution"""
         self.running = False
+        self.executor.close()
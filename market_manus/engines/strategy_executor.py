@@ -0,0 +1,271 @@
+"""
+Executores plugáveis para as estratégias de janela do engine em tempo real
+
+- InlineStrategyExecutor: executa no próprio event loop (sem overhead; sem timeout preemptivo)
+- ThreadStrategyExecutor: pool de threads persistente
+- ProcessStrategyExecutor: pool de processos persistente (workers aquecidos);
+  a janela de candles chega aos workers por memória compartilhada em vez de
+  DataFrames serializados com pickle
+
+Todos aplicam timeout por estratégia: uma estratégia lenta vira TimeoutError
+no resultado, sem atrasar a decisão de confluência das demais.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from market_manus.engines.candle_ring_buffer import CANDLE_FIELDS
+from market_manus.strategies.classic_analysis import fibonacci_signal
+from market_manus.strategies.smc.patterns import detect_liquidity_sweep
+
+
+def fibonacci_window_signal(df: pd.DataFrame):
+    """Fibonacci com os parâmetros do engine em tempo real"""
+    return fibonacci_signal(df, params={'lookback': 50})
+
+
+# Estratégias de janela que os workers conseguem resolver pelo nome (funções de módulo).
+# BOS/CHoCH/OB/FVG não estão aqui: no engine leem o SMCStructureTracker persistente.
+PROCESS_STRATEGIES: Dict[str, Callable] = {
+    'liquidity_sweep': detect_liquidity_sweep,
+    'fibonacci': fibonacci_window_signal,
+}
+
+
+class StrategyExecutor(ABC):
+    """Interface comum: map() executa várias estratégias sobre a mesma janela"""
+
+    kind = "base"
+
+    def __init__(self):
+        self.stats = {"evaluations": 0, "runs": 0, "timeouts": 0, "errors": 0}
+
+    @abstractmethod
+    def _submit(self, jobs: Dict[str, Callable], df: pd.DataFrame, loop) -> Dict[str, asyncio.Future]:
+        """Agenda cada job sobre df e devolve {nome: future}"""
+        pass
+
+    async def map(self, jobs: Dict[str, Callable], df: pd.DataFrame, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Executa cada função de jobs sobre df
+
+        Args:
+            jobs: {nome_da_estratégia: função(df) -> Signal}
+            df: Janela OHLCV
+            timeout: Limite por estratégia (s)
+
+        Returns:
+            {nome: Signal ou exceção (asyncio.TimeoutError em caso de timeout)}
+        """
+        loop = asyncio.get_running_loop()
+        self.stats["evaluations"] += 1
+        futures = self._submit(jobs, df, loop)
+
+        async def wait_one(name: str, future: asyncio.Future):
+            try:
+                # shield: no timeout a execução continua e libera seus recursos ao terminar
+                return name, await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError as e:
+                self.stats["timeouts"] += 1
+                return name, e
+            except Exception as e:
+                self.stats["errors"] += 1
+                return name, e
+
+        results = await asyncio.gather(*(wait_one(name, future) for name, future in futures.items()))
+        self.stats["runs"] += len(results)
+        return dict(results)
+
+    def warm(self):
+        """Inicializa os workers antes do primeiro candle"""
+
+    def close(self):
+        """Libera os workers"""
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"executor": self.kind, **self.stats}
+
+
+def _completed_future(loop, func: Callable, df: pd.DataFrame) -> asyncio.Future:
+    future = loop.create_future()
+    try:
+        future.set_result(func(df))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+class InlineStrategyExecutor(StrategyExecutor):
+    """Executa no event loop: menor overhead, mas bloqueia o loop e não interrompe por timeout"""
+
+    kind = "inline"
+
+    def _submit(self, jobs, df, loop):
+        return {name: _completed_future(loop, func, df) for name, func in jobs.items()}
+
+
+class ThreadStrategyExecutor(StrategyExecutor):
+    """Pool de threads persistente (útil quando as estratégias liberam o GIL ou fazem I/O)"""
+
+    kind = "thread"
+
+    def __init__(self, max_workers: Optional[int] = None):
+        super().__init__()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="strategy")
+
+    def _submit(self, jobs, df, loop):
+        return {name: loop.run_in_executor(self.pool, func, df) for name, func in jobs.items()}
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ==================== WORKERS DO POOL DE PROCESSOS ====================
+
+def _attach_segment(name: str) -> SharedMemory:
+    """Anexa um segmento criado pelo processo pai sem assumir sua posse"""
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    segment = SharedMemory(name=name)
+    # Antes do 3.13 anexar registra o segmento no resource_tracker, que o
+    # removeria ao fim do worker; quem cria (o pai) é quem faz unlink
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def _read_window(name: str, columns: tuple, length: int) -> pd.DataFrame:
+    segment = _attach_segment(name)
+    try:
+        block = np.ndarray((len(columns), length), dtype=np.float64, buffer=segment.buf)
+        frame = pd.DataFrame({column: block[i].copy() for i, column in enumerate(columns)})
+        del block
+    finally:
+        segment.close()
+    if "timestamp" in frame:
+        frame["timestamp"] = frame["timestamp"].astype(np.int64)
+    return frame
+
+
+def _run_process_strategy(strategy_name: str, segment_name: str, columns: tuple, length: int):
+    """Executado no worker: lê a janela da memória compartilhada e aplica a estratégia"""
+    return PROCESS_STRATEGIES[strategy_name](_read_window(segment_name, columns, length))
+
+
+def _warm_worker(delay: float) -> int:
+    # A pausa distribui as tarefas de aquecimento entre todos os workers
+    time.sleep(delay)
+    return os.getpid()
+
+
+class ProcessStrategyExecutor(StrategyExecutor):
+    """
+    Pool de processos persistente com janela em memória compartilhada
+
+    A janela é copiada uma vez por avaliação para um bloco float64
+    (colunas x candles) lido por todos os workers; o bloco é liberado quando
+    a última estratégia que o usa termina (inclusive as que estouraram o
+    timeout). Os workers resolvem a estratégia pelo nome, então só vão para o
+    pool de processos os jobs cuja função é a registrada em PROCESS_STRATEGIES;
+    nomes desconhecidos ou registrados com outra função (ex.: estratégia
+    substituída no engine) rodam no pool de threads com a função recebida.
+    """
+
+    kind = "process"
+
+    def __init__(self, max_workers: Optional[int] = None):
+        super().__init__()
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        # spawn: fork de um processo com event loop e threads ativas não é seguro
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self.fallback = ThreadStrategyExecutor()
+        self.open_segments: Dict[str, SharedMemory] = {}
+        self.stats.update({"shared_bytes": 0, "fallback_runs": 0})
+
+    def warm(self):
+        """Sobe todos os workers (importação de pandas/estratégias fora do caminho crítico)"""
+        started = time.perf_counter()
+        pids = set(self.pool.map(_warm_worker, [0.05] * self.max_workers * 2))
+        self.stats["warm_seconds"] = time.perf_counter() - started
+        self.stats["workers"] = len(pids)
+
+    def _write_window(self, df: pd.DataFrame):
+        columns = tuple(name for name in CANDLE_FIELDS if name in df.columns)
+        length = len(df)
+        segment = SharedMemory(create=True, size=max(1, len(columns) * length * 8))
+        block = np.ndarray((len(columns), length), dtype=np.float64, buffer=segment.buf)
+        for i, column in enumerate(columns):
+            block[i] = df[column].to_numpy(dtype=np.float64)
+        del block
+        self.open_segments[segment.name] = segment
+        self.stats["shared_bytes"] += segment.size
+        return segment, columns, length
+
+    def _release(self, segment: SharedMemory):
+        if self.open_segments.pop(segment.name, None) is not None:
+            segment.close()
+            segment.unlink()
+
+    def _submit(self, jobs, df, loop):
+        process_jobs = {name: func for name, func in jobs.items() if PROCESS_STRATEGIES.get(name) is func}
+        futures = self.fallback._submit(
+            {name: func for name, func in jobs.items() if name not in process_jobs}, df, loop
+        )
+        self.stats["fallback_runs"] += len(futures)
+        if not process_jobs:
+            return futures
+
+        segment, columns, length = self._write_window(df)
+        pending = [len(process_jobs)]
+
+        def on_done(future: asyncio.Future):
+            if not future.cancelled():
+                future.exception()  # Marca a exceção como lida (timeouts não a consomem)
+            pending[0] -= 1
+            if pending[0] == 0:
+                self._release(segment)
+
+        for name in process_jobs:
+            future = loop.run_in_executor(self.pool, _run_process_strategy, name, segment.name, columns, length)
+            future.add_done_callback(on_done)
+            futures[name] = future
+        return futures
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.fallback.close()
+        for segment in list(self.open_segments.values()):
+            self._release(segment)
+
+
+EXECUTORS = {
+    "inline": InlineStrategyExecutor,
+    "thread": ThreadStrategyExecutor,
+    "process": ProcessStrategyExecutor,
+}
+
+
+def create_strategy_executor(kind: str = "thread", **kwargs) -> StrategyExecutor:
+    """
+    Cria um executor pelo nome
+
+    Args:
+        kind: "inline", "thread" ou "process"
+        **kwargs: max_workers (thread/process)
+    """
+    if kind not in EXECUTORS:
+        raise ValueError(f"Executor desconhecido: {kind} (use {', '.join(EXECUTORS)})")
+    return EXECUTORS[kind](**kwargs)
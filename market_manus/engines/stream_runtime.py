@@ -1,9 +1,16 @@
 import asyncio
-from collections import deque
+import time
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-import pandas as pd
+
+import numpy as np
+
+from market_manus.data_providers.historical_cache import INTERVAL_MS, klines_to_arrays
+from market_manus.data_providers.http_client import fetch_kline_async
+from market_manus.engines.candle_ring_buffer import CandleRingBuffer
+from market_manus.strategies.smc.structure_tracker import SMCStructureTracker
 
 
 @dataclass
@@ -54,6 +61,102 @@ class StreamState:
     paper_total_trades: int = 0
 
 
+class KlineMailbox:
+    """
+    Caixa de mensagens conflacionada por timestamp de candle
+
+    Cada atualização sobrescreve a pendente do mesmo candle (o candle em
+    formação fica só com o último estado); candles fechados nunca são
+    descartados nem sobrescritos por uma atualização em formação. Quando há
+    mais de max_pending candles pendentes, o candle em formação mais antigo
+    (exceto o recém-chegado) é descartado. O consumidor acorda assim que chega dado (sem sleep fixo).
+    """
+
+    def __init__(self, max_pending: int = 100):
+        self.max_pending = max(1, max_pending)
+        self._pending: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._event = asyncio.Event()
+        self._first_put_at: Optional[float] = None
+
+        self.received = 0
+        self.conflated = 0
+        self.dropped = 0
+        self.wakeups = 0
+        self.total_wake_latency_ms = 0.0
+        self.max_wake_latency_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, msg: Dict[str, Any]):
+        """Registra uma atualização de candle (não bloqueia)"""
+        self.received += 1
+        timestamp = msg["timestamp"]
+        current = self._pending.get(timestamp)
+        if current is not None:
+            self.conflated += 1
+            if current["is_closed"] and not msg["is_closed"]:
+                return
+            self._pending[timestamp] = msg
+        else:
+            self._pending[timestamp] = msg
+            if len(self._pending) > self.max_pending:
+                self._drop_oldest_open()
+
+        if self._first_put_at is None:
+            self._first_put_at = time.perf_counter()
+        self._event.set()
+
+    def _drop_oldest_open(self):
+        # O candle recém-chegado (último) é sempre mantido
+        newest = next(reversed(self._pending))
+        for timestamp, pending in self._pending.items():
+            if not pending["is_closed"] and timestamp != newest:
+                del self._pending[timestamp]
+                self.dropped += 1
+                return
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Remove e retorna as atualizações pendentes em ordem de timestamp"""
+        batch = [self._pending[timestamp] for timestamp in sorted(self._pending)]
+        self._pending.clear()
+        self._event.clear()
+        self._first_put_at = None
+        return batch
+
+    async def get_batch(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Aguarda dados e retorna o lote pendente
+
+        Args:
+            timeout: Espera máxima (s); lista vazia se nada chegou
+        """
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+
+        if self._first_put_at is not None:
+            latency_ms = (time.perf_counter() - self._first_put_at) * 1000
+            self.wakeups += 1
+            self.total_wake_latency_ms += latency_ms
+            self.max_wake_latency_ms = max(self.max_wake_latency_ms, latency_ms)
+        return self.drain()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Contadores de conflação, descarte e latência de despertar"""
+        return {
+            "received": self.received,
+            "conflated": self.conflated,
+            "dropped": self.dropped,
+            "pending": len(self._pending),
+            "wakeups": self.wakeups,
+            "avg_wake_latency_ms": self.total_wake_latency_ms / self.wakeups if self.wakeups else 0.0,
+            "max_wake_latency_ms": self.max_wake_latency_ms,
+        }
+
+
 class StreamRuntime:
     def __init__(
         self,
@@ -73,12 +176,21 @@ class StreamRuntime:
         self.debounce_sec = debounce_sec
         self.max_queue_size = max_queue_size
         
-        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self.mailbox = KlineMailbox(max_pending=max_queue_size)
         self.state = StreamState(symbol=symbol, interval=interval)
-        self.candles_deque = deque(maxlen=1000)
+        self.candles = CandleRingBuffer(capacity=1000)
         self.last_candle = None
         self.running = False
         
+        # Estrutura SMC incremental deste (symbol, interval): só candles fechados,
+        # semeada no bootstrap e limitada à mesma janela do DataFrame entregue ao
+        # engine; o engine consulta BOS/CHoCH/OB/FVG nela
+        if hasattr(engine, 'new_structure_tracker'):
+            self.structure = engine.new_structure_tracker(window=self.candles.capacity)
+        else:
+            self.structure = SMCStructureTracker(window=self.candles.capacity)
+        self.structure_timestamp = None  # Último candle incorporado ao rastreador
+        
     async def bootstrap_historical_data(self):
         try:
             interval_map = {
@@ -87,7 +199,9 @@ class StreamRuntime:
             }
             api_interval = interval_map.get(self.interval, '5')
             
-            klines = self.data_provider.get_kline(
+            # Assíncrono: não bloqueia o loop enquanto o histórico é baixado
+            klines = await fetch_kline_async(
+                self.data_provider,
                 category="spot",
                 symbol=self.symbol,
                 interval=api_interval,
@@ -96,57 +210,62 @@ class StreamRuntime:
             
             if not klines:
                 return False
-                
-            df = pd.DataFrame(
-                klines,
-                columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
-            )
-            for col in ['timestamp', 'open', 'high', 'low', 'close', 'volume']:
-                df[col] = pd.to_numeric(df[col])
-                
-            for _, row in df.iterrows():
-                self.candles_deque.append(row.to_dict())
-                
+            
+            arrays = klines_to_arrays(klines)
+            self.candles.extend_arrays(arrays)
+            self._seed_structure(arrays, INTERVAL_MS.get(api_interval, INTERVAL_MS["5"]))
             return True
         except Exception as e:
             print(f"⚠️  Erro no bootstrap: {e}. Tentando continuar com dados do WebSocket...")
             return True
     
+    def _seed_structure(self, arrays: Dict[str, np.ndarray], candle_duration: int):
+        """Alimenta o rastreador com os candles já fechados do histórico, em ordem"""
+        timestamps, first = np.unique(arrays["timestamp"], return_index=True)
+        closed = first[timestamps + candle_duration <= int(time.time() * 1000)]
+        if self.structure.window is not None:
+            closed = closed[-self.structure.window:]
+        for i in closed:
+            self.structure.update(arrays["open"][i], arrays["high"][i], arrays["low"][i], arrays["close"][i])
+        if len(closed):
+            self.structure_timestamp = int(arrays["timestamp"][closed[-1]])
+    
     async def collect_ws_messages(self):
         try:
             async for msg in self.ws_provider:
                 self.state.msgs_received += 1
-                
-                if self.queue.full():
-                    try:
-                        self.queue.get_nowait()
-                    except asyncio.QueueEmpty:
-                        pass
-                
-                await self.queue.put(msg)
+                self.mailbox.put(msg)
                 
         except Exception as e:
             print(f"⚠️  Erro na coleta WS: {e}")
             self.state.reconnections += 1
     
     async def process_micro_batches(self):
+        """
+        Processa o mailbox assim que chegam dados
+
+        Atualizações do candle em formação são conflacionadas enquanto o
+        processamento anterior roda; candles fechados são processados todos,
+        em ordem. debounce_sec limita apenas a espera por dados (para checar
+        self.running).
+        """
         while self.running:
             try:
-                await asyncio.sleep(self.debounce_sec)
-                
-                latest_msg = None
-                while not self.queue.empty():
-                    try:
-                        latest_msg = self.queue.get_nowait()
-                    except asyncio.QueueEmpty:
-                        break
-                
-                if latest_msg:
-                    await self.process_message(latest_msg)
+                batch = await self.mailbox.get_batch(timeout=self.debounce_sec)
+                for msg in batch:
+                    await self.process_message(msg)
                     
             except Exception as e:
                 print(f"⚠️  Erro no processamento: {e}")
     
+    def get_mailbox_metrics(self) -> Dict[str, Any]:
+        """Métricas do mailbox (conflação, descarte, latência de despertar)"""
+        return self.mailbox.get_metrics()
+    
+    def get_buffer_metrics(self) -> Dict[str, Any]:
+        """Ocupação e memória do buffer de candles deste símbolo"""
+        return self.candles.get_metrics()
+    
     async def process_message(self, msg: Dict[str, Any]):
         now = datetime.now()
         event_time = datetime.fromtimestamp(msg["event_time"] / 1000)
@@ -161,26 +280,27 @@ class StreamRuntime:
             "volume": msg["volume"]
         }
         
-        if self.last_candle and self.last_candle["timestamp"] == candle_dict["timestamp"]:
-            self.candles_deque[-1] = candle_dict
-        elif msg["is_closed"]:
-            self.candles_deque.append(candle_dict)
+        # Upsert por timestamp: atualiza o candle em formação sem sobrescrever
+        # o último candle fechado quando um novo candle começa
+        self.candles.upsert(candle_dict)
+        if msg["is_closed"]:
             self.last_candle = candle_dict
-        else:
-            if len(self.candles_deque) > 0:
-                self.candles_deque[-1] = candle_dict
+            if self.structure_timestamp is None or msg["timestamp"] > self.structure_timestamp:
+                self.structure.update(msg["open"], msg["high"], msg["low"], msg["close"])
+                self.structure_timestamp = msg["timestamp"]
         
         self.state.price = msg["close"]
         self.state.msgs_processed += 1
         
-        df = pd.DataFrame(list(self.candles_deque))
+        df = self.candles.to_frame()
         
         # Usar process_candle do RealTimeConfluenceEngine
         signal = self.engine.process_candle(
             candles=df,
             symbol=self.symbol,
             timeframe=self.interval,
-            callback=None
+            callback=None,
+            structure=self.structure
         )
         
         if signal is not None:
@@ -257,7 +377,7 @@ class StreamRuntime:
             print("❌ Falha ao carregar dados históricos")
             return False
         
-        print(f"✅ {len(self.candles_deque)} candles carregados")
+        print(f"✅ {len(self.candles)} candles carregados")
         
         collector_task = asyncio.create_task(self.collect_ws_messages())
         processor_task = asyncio.create_task(self.process_micro_batches())
@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 import os
+import threading
 
 @dataclass
 class BacktestResult:
@@ -53,84 +54,230 @@ class WeightRecommendation:
     confidence: float
 
 class PerformanceHistoryRepository:
-    """Repositório SQLite para histórico de performance"""
-    
-    def __init__(self, db_path: str = "data/performance_history.db"):
+    """
+    Repositório SQLite para histórico de performance
+
+    Cada thread reutiliza a própria conexão (modo WAL: leituras não bloqueiam a
+    escrita de outro processo/thread), e as consultas usam SQL fixo e
+    parametrizado, preparado uma vez pelo cache de statements do sqlite3.
+    A tabela combination_summary guarda os agregados por combinação/timeframe
+    e é atualizada na mesma transação de save_backtest_results, então o resumo
+    custa O(#combinações) independentemente do número de backtests.
+
+    O banco padrão (data/performance_history.db) não é versionado: na primeira
+    abertura ele é criado a partir de SEED_DB_PATH, o histórico distribuído com
+    o repositório, que nunca é aberto para escrita.
+    """
+
+    DEFAULT_DB_PATH = "data/performance_history.db"
+    SEED_DB_PATH = "data/performance_history.seed.db"
+
+    INSERT_BACKTEST_SQL = "INSERT INTO backtests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    INSERT_STRATEGY_STATS_SQL = """
+        INSERT INTO strategy_stats
+        (backtest_id, strategy_key, strategy_name, total_signals,
+         signals_after_volume_filter, winning_signals, losing_signals, win_rate, weight)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    UPSERT_SUMMARY_SQL = """
+        INSERT INTO combination_summary
+        (combination_id, timeframe, combination_name, test_count, win_rate_sum, total_trades, roi_sum)
+        VALUES (?, ?, ?, 1, ?, ?, ?)
+        ON CONFLICT (combination_id, timeframe) DO UPDATE SET
+            combination_name = excluded.combination_name,
+            test_count = test_count + 1,
+            win_rate_sum = win_rate_sum + excluded.win_rate_sum,
+            total_trades = total_trades + excluded.total_trades,
+            roi_sum = roi_sum + excluded.roi_sum
+    """
+    REBUILD_SUMMARY_SQL = """
+        INSERT INTO combination_summary
+        (combination_id, timeframe, combination_name, test_count, win_rate_sum, total_trades, roi_sum)
+        SELECT combination_id, timeframe, combination_name, COUNT(*), SUM(win_rate), SUM(total_trades), SUM(roi)
+        FROM backtests
+        WHERE combination_id IS NOT NULL
+        GROUP BY combination_id, timeframe
+    """
+    SELECT_BACKTESTS_SQL = "SELECT * FROM backtests ORDER BY timestamp DESC"
+    SELECT_BACKTESTS_LIMIT_SQL = "SELECT * FROM backtests ORDER BY timestamp DESC LIMIT ?"
+    SELECT_HISTORY_SQL = """
+        SELECT * FROM backtests
+        WHERE combination_id = ? AND timeframe = ?
+        ORDER BY timestamp DESC
+    """
+    SELECT_HISTORY_DAYS_SQL = """
+        SELECT * FROM backtests
+        WHERE combination_id = ? AND timeframe = ? AND timestamp >= datetime('now', '-' || ? || ' days')
+        ORDER BY timestamp DESC
+    """
+    SELECT_CONTRIBUTIONS_SQL = """
+        SELECT strategy_key, strategy_name, total_signals, signals_after_volume_filter,
+               winning_signals, losing_signals, win_rate, weight
+        FROM strategy_stats
+        WHERE backtest_id = ?
+    """
+    SELECT_SUMMARY_SQL = """
+        SELECT combination_id, combination_name, timeframe, test_count,
+               win_rate_sum / test_count, total_trades, roi_sum / test_count
+        FROM combination_summary
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, busy_timeout: float = 30.0, seed_path: Optional[str] = None):
+        """
+        Args:
+            db_path: Arquivo SQLite
+            busy_timeout: Espera (s) por locks de outros processos
+            seed_path: Banco copiado se db_path ainda não existir (padrão:
+                SEED_DB_PATH, apenas para o banco padrão)
+        """
         self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        if seed_path is None and db_path == self.DEFAULT_DB_PATH:
+            seed_path = self.SEED_DB_PATH
+        self._local = threading.local()
         self._ensure_data_dir()
+        self._copy_seed(seed_path)
         self._initialize_database()
     
+    def _copy_seed(self, seed_path: Optional[str]):
+        """Cria o banco a partir do seed (somente leitura) na primeira abertura"""
+        if not seed_path or os.path.exists(self.db_path) or not os.path.exists(seed_path):
+            return
+        # Cópia em arquivo temporário publicada com link (falha se outro processo já criou o banco)
+        tmp_path = f"{self.db_path}.{os.getpid()}.{threading.get_ident()}.seed"
+        seed = sqlite3.connect(f"file:{os.path.abspath(seed_path)}?mode=ro", uri=True)
+        target = sqlite3.connect(tmp_path)
+        try:
+            seed.backup(target)
+        finally:
+            target.close()
+            seed.close()
+        try:
+            os.link(tmp_path, self.db_path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+    
     def _ensure_data_dir(self):
         """Garante que diretório data/ existe"""
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual (aberta na primeira consulta da thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def close(self):
+        """Fecha a conexão da thread atual (reaberta sob demanda)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
     
     def _initialize_database(self):
         """Inicializa schema do banco de dados"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabela de backtests
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS backtests (
-                backtest_id TEXT PRIMARY KEY,
-                timestamp TEXT NOT NULL,
-                combination_id TEXT,
-                combination_name TEXT,
-                strategies TEXT NOT NULL,
-                timeframe TEXT NOT NULL,
-                asset TEXT NOT NULL,
-                start_date TEXT NOT NULL,
-                end_date TEXT NOT NULL,
-                confluence_mode TEXT NOT NULL,
-                win_rate REAL NOT NULL,
-                total_trades INTEGER NOT NULL,
-                winning_trades INTEGER NOT NULL,
-                losing_trades INTEGER NOT NULL,
-                initial_capital REAL NOT NULL,
-                final_capital REAL NOT NULL,
-                roi REAL NOT NULL,
-                total_signals INTEGER NOT NULL,
-                manus_ai_enabled INTEGER NOT NULL,
-                semantic_kernel_enabled INTEGER NOT NULL
-            )
-        """)
+        conn = self._connection()
         
-        # Tabela de estatísticas por estratégia
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS strategy_stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                backtest_id TEXT NOT NULL,
-                strategy_key TEXT NOT NULL,
-                strategy_name TEXT NOT NULL,
-                total_signals INTEGER NOT NULL,
-                signals_after_volume_filter INTEGER NOT NULL,
-                winning_signals INTEGER NOT NULL,
-                losing_signals INTEGER NOT NULL,
-                win_rate REAL NOT NULL,
-                weight REAL NOT NULL,
-                FOREIGN KEY (backtest_id) REFERENCES backtests (backtest_id)
-            )
-        """)
-        
-        # Índices para queries rápidas
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_backtests_timestamp ON backtests(timestamp)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_backtests_combination ON backtests(combination_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_backtests_timeframe ON backtests(timeframe)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_strategy_stats_backtest ON strategy_stats(backtest_id)")
-        
-        conn.commit()
-        conn.close()
+        with conn:
+            # Tabela de backtests
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS backtests (
+                    backtest_id TEXT PRIMARY KEY,
+                    timestamp TEXT NOT NULL,
+                    combination_id TEXT,
+                    combination_name TEXT,
+                    strategies TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    asset TEXT NOT NULL,
+                    start_date TEXT NOT NULL,
+                    end_date TEXT NOT NULL,
+                    confluence_mode TEXT NOT NULL,
+                    win_rate REAL NOT NULL,
+                    total_trades INTEGER NOT NULL,
+                    winning_trades INTEGER NOT NULL,
+                    losing_trades INTEGER NOT NULL,
+                    initial_capital REAL NOT NULL,
+                    final_capital REAL NOT NULL,
+                    roi REAL NOT NULL,
+                    total_signals INTEGER NOT NULL,
+                    manus_ai_enabled INTEGER NOT NULL,
+                    semantic_kernel_enabled INTEGER NOT NULL
+                )
+            """)
+            
+            # Tabela de estatísticas por estratégia
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS strategy_stats (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    backtest_id TEXT NOT NULL,
+                    strategy_key TEXT NOT NULL,
+                    strategy_name TEXT NOT NULL,
+                    total_signals INTEGER NOT NULL,
+                    signals_after_volume_filter INTEGER NOT NULL,
+                    winning_signals INTEGER NOT NULL,
+                    losing_signals INTEGER NOT NULL,
+                    win_rate REAL NOT NULL,
+                    weight REAL NOT NULL,
+                    FOREIGN KEY (backtest_id) REFERENCES backtests (backtest_id)
+                )
+            """)
+            
+            # Agregados por combinação/timeframe (somas; médias calculadas na leitura)
+            summary_exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'combination_summary'"
+            ).fetchone()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS combination_summary (
+                    combination_id TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    combination_name TEXT,
+                    test_count INTEGER NOT NULL,
+                    win_rate_sum REAL NOT NULL,
+                    total_trades INTEGER NOT NULL,
+                    roi_sum REAL NOT NULL,
+                    PRIMARY KEY (combination_id, timeframe)
+                )
+            """)
+            # Bancos anteriores à tabela: popular a partir dos backtests existentes
+            if not summary_exists:
+                conn.execute(self.REBUILD_SUMMARY_SQL)
+            
+            # Índices para queries rápidas
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_backtests_timestamp ON backtests(timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_backtests_combination ON backtests(combination_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_backtests_timeframe ON backtests(timeframe)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_strategy_stats_backtest ON strategy_stats(backtest_id)")
+    
+    def rebuild_combination_summary(self):
+        """Recalcula combination_summary a partir da tabela backtests"""
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM combination_summary")
+            conn.execute(self.REBUILD_SUMMARY_SQL)
     
     def save_backtest_result(self, result: BacktestResult, strategy_contributions: List[StrategyContribution]):
         """Salva resultado de backtest com contribuições das estratégias"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        self.save_backtest_results([(result, strategy_contributions)])
+    
+    def save_backtest_results(self, results: List[Tuple[BacktestResult, List[StrategyContribution]]]):
+        """
+        Salva vários backtests em uma única transação (tudo ou nada)
         
-        try:
-            # Salvar backtest
-            cursor.execute("""
-                INSERT INTO backtests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        Args:
+            results: Lista de (BacktestResult, contribuições das estratégias)
+        """
+        conn = self._connection()
+        
+        # Transação: commit ao final, rollback em qualquer erro
+        with conn:
+            # Salvar backtests
+            conn.executemany(self.INSERT_BACKTEST_SQL, [(
                 result.backtest_id,
                 result.timestamp,
                 result.combination_id,
@@ -151,164 +298,89 @@ class PerformanceHistoryRepository:
                 result.total_signals,
                 1 if result.manus_ai_enabled else 0,
                 1 if result.semantic_kernel_enabled else 0
-            ))
+            ) for result, _ in results])
             
             # Salvar contribuições das estratégias
-            for contrib in strategy_contributions:
-                cursor.execute("""
-                    INSERT INTO strategy_stats 
-                    (backtest_id, strategy_key, strategy_name, total_signals, 
-                     signals_after_volume_filter, winning_signals, losing_signals, win_rate, weight)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    contrib.backtest_id,
-                    contrib.strategy_key,
-                    contrib.strategy_name,
-                    contrib.total_signals,
-                    contrib.signals_after_volume_filter,
-                    contrib.winning_signals,
-                    contrib.losing_signals,
-                    contrib.win_rate,
-                    contrib.weight
-                ))
+            conn.executemany(self.INSERT_STRATEGY_STATS_SQL, [(
+                contrib.backtest_id,
+                contrib.strategy_key,
+                contrib.strategy_name,
+                contrib.total_signals,
+                contrib.signals_after_volume_filter,
+                contrib.winning_signals,
+                contrib.losing_signals,
+                contrib.win_rate,
+                contrib.weight
+            ) for _, contributions in results for contrib in contributions])
             
-            conn.commit()
-        finally:
-            conn.close()
+            # Atualizar agregados das combinações
+            conn.executemany(self.UPSERT_SUMMARY_SQL, [(
+                result.combination_id,
+                result.timeframe,
+                result.combination_name,
+                result.win_rate,
+                result.total_trades,
+                result.roi
+            ) for result, _ in results if result.combination_id is not None])
+    
+    @staticmethod
+    def _backtest_from_row(row: tuple) -> Dict:
+        return {
+            'backtest_id': row[0],
+            'timestamp': row[1],
+            'combination_id': row[2],
+            'combination_name': row[3],
+            'strategies': json.loads(row[4]),
+            'timeframe': row[5],
+            'asset': row[6],
+            'start_date': row[7],
+            'end_date': row[8],
+            'confluence_mode': row[9],
+            'win_rate': row[10],
+            'total_trades': row[11],
+            'winning_trades': row[12],
+            'losing_trades': row[13],
+            'initial_capital': row[14],
+            'final_capital': row[15],
+            'roi': row[16],
+            'total_signals': row[17],
+            'manus_ai_enabled': bool(row[18]),
+            'semantic_kernel_enabled': bool(row[19])
+        }
     
     def get_all_backtests(self, limit: Optional[int] = None) -> List[Dict]:
         """Busca todos os backtests ordenados por data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM backtests ORDER BY timestamp DESC"
         if limit:
-            query += f" LIMIT {limit}"
-        
-        cursor.execute(query)
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'backtest_id': row[0],
-                'timestamp': row[1],
-                'combination_id': row[2],
-                'combination_name': row[3],
-                'strategies': json.loads(row[4]),
-                'timeframe': row[5],
-                'asset': row[6],
-                'start_date': row[7],
-                'end_date': row[8],
-                'confluence_mode': row[9],
-                'win_rate': row[10],
-                'total_trades': row[11],
-                'winning_trades': row[12],
-                'losing_trades': row[13],
-                'initial_capital': row[14],
-                'final_capital': row[15],
-                'roi': row[16],
-                'total_signals': row[17],
-                'manus_ai_enabled': bool(row[18]),
-                'semantic_kernel_enabled': bool(row[19])
-            })
-        
-        conn.close()
-        return results
+            rows = self._connection().execute(self.SELECT_BACKTESTS_LIMIT_SQL, (int(limit),))
+        else:
+            rows = self._connection().execute(self.SELECT_BACKTESTS_SQL)
+        return [self._backtest_from_row(row) for row in rows]
     
     def get_combination_history(self, combination_id: str, timeframe: str, days: Optional[int] = None) -> List[Dict]:
         """Busca histórico de uma combinação específica"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT * FROM backtests 
-            WHERE combination_id = ? AND timeframe = ?
-        """
-        params = [combination_id, timeframe]
-        
         if days:
-            query += " AND timestamp >= datetime('now', '-' || ? || ' days')"
-            params.append(str(days))
-        
-        query += " ORDER BY timestamp DESC"
-        
-        cursor.execute(query, params)
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'backtest_id': row[0],
-                'timestamp': row[1],
-                'combination_id': row[2],
-                'combination_name': row[3],
-                'strategies': json.loads(row[4]),
-                'timeframe': row[5],
-                'asset': row[6],
-                'start_date': row[7],
-                'end_date': row[8],
-                'confluence_mode': row[9],
-                'win_rate': row[10],
-                'total_trades': row[11],
-                'winning_trades': row[12],
-                'losing_trades': row[13],
-                'initial_capital': row[14],
-                'final_capital': row[15],
-                'roi': row[16],
-                'total_signals': row[17],
-                'manus_ai_enabled': bool(row[18]),
-                'semantic_kernel_enabled': bool(row[19])
-            })
-        
-        conn.close()
-        return results
+            rows = self._connection().execute(self.SELECT_HISTORY_DAYS_SQL, (combination_id, timeframe, str(days)))
+        else:
+            rows = self._connection().execute(self.SELECT_HISTORY_SQL, (combination_id, timeframe))
+        return [self._backtest_from_row(row) for row in rows]
     
     def get_strategy_contribution_history(self, backtest_id: str) -> List[Dict]:
         """Busca contribuições das estratégias de um backtest"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT strategy_key, strategy_name, total_signals, signals_after_volume_filter,
-                   winning_signals, losing_signals, win_rate, weight
-            FROM strategy_stats
-            WHERE backtest_id = ?
-        """, (backtest_id,))
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'strategy_key': row[0],
-                'strategy_name': row[1],
-                'total_signals': row[2],
-                'signals_after_volume_filter': row[3],
-                'winning_signals': row[4],
-                'losing_signals': row[5],
-                'win_rate': row[6],
-                'weight': row[7]
-            })
-        
-        conn.close()
-        return results
+        return [{
+            'strategy_key': row[0],
+            'strategy_name': row[1],
+            'total_signals': row[2],
+            'signals_after_volume_filter': row[3],
+            'winning_signals': row[4],
+            'losing_signals': row[5],
+            'win_rate': row[6],
+            'weight': row[7]
+        } for row in self._connection().execute(self.SELECT_CONTRIBUTIONS_SQL, (backtest_id,))]
     
     def get_all_combinations_summary(self) -> Dict[str, Dict]:
-        """Retorna resumo de todas as combinações já testadas"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                combination_id,
-                combination_name,
-                timeframe,
-                COUNT(*) as test_count,
-                AVG(win_rate) as avg_win_rate,
-                SUM(total_trades) as total_trades,
-                AVG(roi) as avg_roi
-            FROM backtests
-            WHERE combination_id IS NOT NULL
-            GROUP BY combination_id, timeframe
-        """)
-        
+        """Retorna resumo de todas as combinações já testadas (lido de combination_summary)"""
         summary = {}
-        for row in cursor.fetchall():
+        for row in self._connection().execute(self.SELECT_SUMMARY_SQL):
             key = f"{row[0]}_{row[2]}"
             summary[key] = {
                 'combination_id': row[0],
@@ -319,6 +391,4 @@ class PerformanceHistoryRepository:
                 'total_trades': row[5],
                 'avg_roi': row[6]
             }
-        
-        conn.close()
         return summary
@@ -0,0 +1,124 @@
+"""
+Cache persistente (SQLite) dos resultados dos coletores de sentimento
+
+Substitui o TTLCache em memória: o último resultado de cada fonte fica em
+disco (modo WAL), compartilhado entre reinícios e entre processos (web
+workers e CLI). Cada entrada guarda o instante da coleta, e o chamador decide
+pelas idades:
+
+- idade < fresh_ttl: resultado fresco, usado sem chamar a API
+- fresh_ttl <= idade < stale_ttl: resultado velho, usado enquanto a fonte é
+  revalidada em segundo plano (stale-while-revalidate)
+- idade >= stale_ttl: precisa ser buscado de novo (o valor antigo ainda serve
+  de fallback se a fonte falhar)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class CachedEntry:
+    """Resultado armazenado de uma fonte"""
+    value: Dict[str, Any]
+    updated_at: float
+    age: float
+
+
+class SentimentStore:
+    """Resultados dos coletores por (fonte, símbolo, janela)"""
+
+    def __init__(
+        self,
+        db_path: str = "data/sentiment_cache.db",
+        fresh_ttl: float = 60.0,
+        stale_ttl: float = 3600.0,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            db_path: Arquivo SQLite
+            fresh_ttl: Idade (s) até a qual o resultado é usado sem revalidar
+            stale_ttl: Idade (s) até a qual o resultado é servido enquanto revalida
+            clock: Relógio (segundos, epoch)
+        """
+        self.db_path = db_path
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sentiment_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual (reutilizada entre chamadas)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(source: str, symbol: str, window: str) -> str:
+        return f"{source}|{symbol}|{window}"
+
+    def get(self, key: str) -> Optional[CachedEntry]:
+        """Último resultado da chave (qualquer idade) ou None"""
+        row = self._connection().execute(
+            "SELECT value, updated_at FROM sentiment_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return CachedEntry(value=json.loads(row[0]), updated_at=row[1], age=self._clock() - row[1])
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sentiment_cache (key, value, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=str), self._clock())
+            )
+
+    def is_fresh(self, entry: Optional[CachedEntry]) -> bool:
+        return entry is not None and entry.age < self.fresh_ttl
+
+    def is_stale(self, entry: Optional[CachedEntry]) -> bool:
+        """Velho, mas ainda servível enquanto revalida"""
+        return entry is not None and self.fresh_ttl <= entry.age < self.stale_ttl
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM sentiment_cache")
+
+    def close(self):
+        """Fecha a conexão da thread atual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> SentimentStore:
+    """Store padrão do processo (data/sentiment_cache.db)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SentimentStore()
+        return _store
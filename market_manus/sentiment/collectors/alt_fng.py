@@ -1,15 +1,16 @@
-import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from ..services.http import get_http_client
+
 API = "https://api.alternative.me/fng/"
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=8))
-async def fetch(symbol: str, window: str) -> dict:
+async def fetch(symbol: str, window: str, client=None) -> dict:
+    client = client or get_http_client()
     params = {"limit": 2, "format": "json"}
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(API, params=params)
-        r.raise_for_status()
-        data = r.json()
+    r = await client.aget(API, params=params)
+    r.raise_for_status()
+    data = r.json()
     latest = data["data"][0]
     return {
         "source": "alt_fng",
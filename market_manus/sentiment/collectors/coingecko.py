@@ -3,9 +3,13 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 from cachetools import TTLCache
 import re
 
+from ..services.http import get_http_client
+
+BASE_URL = "https://api.coingecko.com/api/v3"
+
 _coin_id_cache = TTLCache(maxsize=500, ttl=3600)
 
-async def _resolve_coin_id(symbol: str) -> str | None:
+async def _resolve_coin_id(symbol: str, client) -> str | None:
     """
     Resolve Binance symbol (e.g., BTCUSDT) to CoinGecko coin ID (e.g., bitcoin).
     Uses search API with in-memory caching.
@@ -17,11 +21,9 @@ async def _resolve_coin_id(symbol: str) -> str | None:
     
     base_symbol = re.sub(r'(USDT|USDC|USD|BUSD|TUSD)$', '', symbol_upper)
     
-    search_url = "https://api.coingecko.com/api/v3/search"
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(search_url, params={"query": base_symbol})
-        r.raise_for_status()
-        data = r.json()
+    r = await client.aget(f"{BASE_URL}/search", params={"query": base_symbol})
+    r.raise_for_status()
+    data = r.json()
     
     coins = data.get("coins", [])
     if not coins:
@@ -40,13 +42,14 @@ async def _resolve_coin_id(symbol: str) -> str | None:
     return first_coin_id
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=8))
-async def fetch(symbol: str, window: str) -> dict:
+async def fetch(symbol: str, window: str, client=None) -> dict:
     """
     Fetch spot market data from CoinGecko for any crypto asset.
     Automatically resolves Binance symbols to CoinGecko IDs via search API.
     """
+    client = client or get_http_client()
     try:
-        coin_id = await _resolve_coin_id(symbol)
+        coin_id = await _resolve_coin_id(symbol, client)
         
         if not coin_id:
             return {
@@ -55,11 +58,9 @@ async def fetch(symbol: str, window: str) -> dict:
                 "kind": "spot_market"
             }
         
-        url = f"https://api.coingecko.com/api/v3/coins/{coin_id}"
-        async with httpx.AsyncClient(timeout=10) as client:
-            r = await client.get(url, params={"localization":"false","tickers":"false","market_data":"true"})
-            r.raise_for_status()
-            d = r.json()
+        r = await client.aget(f"{BASE_URL}/coins/{coin_id}", params={"localization":"false","tickers":"false","market_data":"true"})
+        r.raise_for_status()
+        d = r.json()
         
         md = d["market_data"]
         return {
@@ -1,15 +1,17 @@
-import httpx
 import os
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from ..services.http import get_http_client
+
+BASE_URL = "https://open-api-v4.coinglass.com/api"
 KEY = os.getenv("COINGLASS_API_KEY")
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=8))
-async def fetch(symbol: str, window: str) -> dict:
+async def fetch(symbol: str, window: str, client=None) -> dict:
     if not KEY:
         return {"source":"coinglass","error":"no-key","kind":"derivatives"}
     headers = {"coinglassSecret": KEY}
-    async with httpx.AsyncClient(timeout=10, headers=headers) as client:
-        r = await client.get("https://open-api-v4.coinglass.com/api/futures/openInterest", params={"symbol":symbol})
-        data = r.json() if r.status_code==200 else {"status":r.status_code}
+    client = client or get_http_client()
+    r = await client.aget(f"{BASE_URL}/futures/openInterest", params={"symbol":symbol}, headers=headers)
+    data = r.json() if r.status_code==200 else {"status":r.status_code}
     return {"source":"coinglass","oi":data,"kind":"derivatives"}
@@ -1,17 +1,19 @@
-import httpx
 import os
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from ..services.http import get_http_client
+
+BASE_URL = "https://cryptopanic.com/api"
 TOKEN = os.getenv("CRYPTOPANIC_TOKEN")
 API_PLAN = os.getenv("CRYPTOPANIC_API_PLAN", "developer")
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=8))
-async def fetch(symbol: str, window: str) -> dict:
+async def fetch(symbol: str, window: str, client=None) -> dict:
     if not TOKEN:
         return {"source":"cryptopanic","error":"no-token","kind":"news"}
     
     currency = symbol.replace("USDT", "").replace("USDC", "").replace("USD", "")
-    url = f"https://cryptopanic.com/api/{API_PLAN}/v2/posts/"
+    url = f"{BASE_URL}/{API_PLAN}/v2/posts/"
     
     params = {
         "auth_token": TOKEN,
@@ -19,10 +21,10 @@ async def fetch(symbol: str, window: str) -> dict:
         "public": "true"
     }
     
-    async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
-        r = await client.get(url, params=params)
-        r.raise_for_status()
-        d = r.json()
+    client = client or get_http_client()
+    r = await client.aget(url, params=params, timeout=15, follow_redirects=True)
+    r.raise_for_status()
+    d = r.json()
     
     results = d.get("results", [])
     
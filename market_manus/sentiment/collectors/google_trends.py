@@ -1,2 +1,2 @@
-async def fetch(symbol: str, window: str) -> dict:
+async def fetch(symbol: str, window: str, client=None) -> dict:
     return {"source":"google_trends","note":"implement pytrends if enabled","kind":"interest"}
@@ -1,9 +1,11 @@
 import asyncio
+import threading
 import time
 from .collectors import alt_fng, bybit_derivs, coingecko, coinglass, cryptopanic, glassnode, santiment, google_trends
 from .services.normalizers import fng_to_score, pct_to_score, volume_to_score, clamp01
 from .services.weights import DEFAULT_WEIGHTS
-from .cache import memo
+from .services.http import get_http_client
+from .cache.store import get_store
 
 SOURCES = [
     ("alt_fng", alt_fng.fetch),
@@ -16,15 +18,121 @@ SOURCES = [
     ("google_trends", google_trends.fetch),
 ]
 
-async def gather_sentiment(symbol: str, window: str = "1d") -> dict:
+# Orçamento (s) de cada fonte; o prazo total de gather_sentiment limita todos
+SOURCE_TIMEOUTS = {
+    "alt_fng": 5.0,
+    "coingecko": 8.0,
+    "bybit": 5.0,
+    "coinglass": 5.0,
+    "cryptopanic": 8.0,
+    "santiment": 2.0,
+    "glassnode": 2.0,
+    "google_trends": 2.0,
+}
+DEFAULT_DEADLINE = 10.0
+
+
+class _SentimentLoop:
+    """
+    Event loop de vida longa da coleta de sentimento
+
+    Chamadores síncronos (web, CLI) rodam gather_sentiment aqui em vez de um
+    asyncio.run por chamada, então o AsyncClient do cliente compartilhado e suas
+    conexões keep-alive sobrevivem entre requisições. Fontes velhas também são
+    revalidadas aqui, sem bloquear quem pediu.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+        self._inflight = set()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="sentiment-loop", daemon=True).start()
+            return self._loop
+
+    def run(self, coro, timeout: float = None):
+        """Executa a corrotina no loop e espera o resultado (chamadores síncronos)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result(timeout)
+
+    def submit(self, name, fn, symbol, window, client, store, timeout):
+        """Agenda a revalidação (uma por chave em andamento); retorna o Future ou None"""
+        key = (store.db_path, store.key(name, symbol, window))
+        with self._lock:
+            if key in self._inflight:
+                return None
+            self._inflight.add(key)
+        future = asyncio.run_coroutine_threadsafe(
+            _wrap_fetch(name, fn, symbol, window, client, store, timeout), self._ensure_loop()
+        )
+        future.add_done_callback(lambda _: self._discard(key))
+        return future
+
+    def _discard(self, key):
+        with self._lock:
+            self._inflight.discard(key)
+
+
+_sentiment_loop = _SentimentLoop()
+
+
+def run_in_sentiment_loop(coro, timeout: float = None):
+    """Executa a corrotina no loop compartilhado do processo e espera o resultado"""
+    return _sentiment_loop.run(coro, timeout)
+
+
+def gather_sentiment_sync(symbol: str, window: str = "1d", **kwargs) -> dict:
+    """
+    gather_sentiment para código síncrono, no loop compartilhado do processo
+
+    Aceita os mesmos argumentos de gather_sentiment.
+    """
+    deadline = kwargs.get("deadline", DEFAULT_DEADLINE)
+    return run_in_sentiment_loop(gather_sentiment(symbol, window, **kwargs), timeout=deadline + 5)
+
+
+async def gather_sentiment(
+    symbol: str,
+    window: str = "1d",
+    deadline: float = DEFAULT_DEADLINE,
+    client=None,
+    store=None,
+    timeouts: dict = None
+) -> dict:
+    """
+    Coleta todas as fontes e calcula o score composto
+
+    Fontes frescas no store não chamam a API; velhas são servidas e revalidadas
+    em segundo plano; as demais são buscadas com o orçamento da fonte, limitado
+    pelo prazo total. Fontes que estouram o orçamento entram como erro "timeout"
+    (ou com o último valor conhecido, marcado stale), então o retorno chega
+    dentro do prazo com resultados parciais.
+
+    Args:
+        symbol: Ativo (ex.: BTCUSDT)
+        window: Janela de análise
+        deadline: Prazo total (s)
+        client: Cliente HTTP injetado nos coletores (padrão: compartilhado do processo)
+        store: SentimentStore (padrão: data/sentiment_cache.db)
+        timeouts: Orçamentos por fonte (padrão: SOURCE_TIMEOUTS)
+    """
+    client = client or get_http_client()
+    store = store or get_store()
+    timeouts = timeouts or SOURCE_TIMEOUTS
     tasks = []
     for name, fn in SOURCES:
-        key = (name, symbol, window)
-        cached = memo.get(key)
-        if cached is None:
-            tasks.append(_wrap_fetch(name, fn, symbol, window, key))
+        budget = min(timeouts.get(name, deadline), deadline)
+        entry = store.get(store.key(name, symbol, window))
+        if store.is_fresh(entry):
+            tasks.append(_return_cached(name, entry.value))
+        elif store.is_stale(entry):
+            tasks.append(_return_cached(name, dict(entry.value, stale=True)))
+            _sentiment_loop.submit(name, fn, symbol, window, client, store, timeouts.get(name, DEFAULT_DEADLINE))
         else:
-            tasks.append(asyncio.create_task(_return_cached(name, cached)))
+            tasks.append(_wrap_fetch(name, fn, symbol, window, client, store, budget, fallback=entry))
     results = await asyncio.gather(*tasks, return_exceptions=True)
     data = [r for r in results if isinstance(r, dict)]
     score = _composite_score(data)
@@ -33,14 +141,22 @@ async def gather_sentiment(symbol: str, window: str = "1d") -> dict:
 async def _return_cached(name, cached):
     return cached
 
-async def _wrap_fetch(name, fn, symbol, window, key):
+async def _wrap_fetch(name, fn, symbol, window, client, store, timeout, fallback=None):
     try:
-        out = await fn(symbol, window)
+        out = await asyncio.wait_for(fn(symbol, window, client=client), timeout)
+    except asyncio.TimeoutError:
+        error = "timeout"
+    except Exception as e:
+        error = str(e)
+    else:
         out["__name__"] = name
-        memo.put(key, out)
+        # Erros (sem chave, rate limit, ...) não substituem o último resultado válido
+        if not out.get("error"):
+            store.put(store.key(name, symbol, window), out)
         return out
-    except Exception as e:
-        return {"__name__":name, "error":str(e)}
+    if fallback is not None:
+        return dict(fallback.value, stale=True)
+    return {"__name__": name, "error": error}
 
 def _composite_score(items):
     w = DEFAULT_WEIGHTS
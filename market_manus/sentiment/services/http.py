@@ -0,0 +1,22 @@
+"""
+Cliente HTTP compartilhado pelos coletores de sentimento
+
+Um único PooledHTTPClient (httpx.AsyncClient com keep-alive por event loop)
+é injetado em todos os coletores, em vez de um AsyncClient por chamada.
+"""
+
+import threading
+
+from market_manus.data_providers.http_client import PooledHTTPClient
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_http_client() -> PooledHTTPClient:
+    """Cliente compartilhado do processo (criado na primeira chamada)"""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = PooledHTTPClient(timeout=10)
+        return _client
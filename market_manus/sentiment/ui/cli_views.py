@@ -1,9 +1,8 @@
-import asyncio
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
-from ..sentiment_service import gather_sentiment
+from ..sentiment_service import gather_sentiment, run_in_sentiment_loop
 
 console = Console()
 
@@ -182,4 +181,4 @@ async def render_sentiment(symbol: str):
     console.print()
 
 def run_blocking(symbol: str):
-    asyncio.run(render_sentiment(symbol))
+    run_in_sentiment_loop(render_sentiment(symbol))
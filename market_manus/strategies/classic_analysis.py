@@ -5,7 +5,9 @@ Converte EMA, MACD, RSI, Bollinger, ADX, Stochastic, Fibonacci para formato Sign
 
 import pandas as pd
 import numpy as np
+from typing import Iterator
 from market_manus.core.signal import Signal
+from market_manus.strategies import indicator_kernels as kernels
 
 # ==================== INDICADORES TÉCNICOS ====================
 
@@ -15,16 +17,11 @@ def calculate_ema(prices: pd.Series, period: int) -> pd.Series:
 
 def calculate_sma(prices: pd.Series, period: int) -> pd.Series:
     """Calcula SMA (Simple Moving Average)"""
-    return prices.rolling(window=period).mean()
+    return pd.Series(kernels.rolling_mean(prices, period), index=prices.index)
 
 def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
     """Calcula RSI (Relative Strength Index)"""
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    return pd.Series(kernels.rsi(prices, period, smoothing="sma"), index=prices.index)
 
 def calculate_macd(prices: pd.Series, fast=12, slow=26, signal=9):
     """Calcula MACD (Moving Average Convergence Divergence)"""
@@ -37,88 +34,73 @@ def calculate_macd(prices: pd.Series, fast=12, slow=26, signal=9):
 
 def calculate_bollinger_bands(prices: pd.Series, period=20, std_dev=2):
     """Calcula Bollinger Bands"""
-    sma = prices.rolling(window=period).mean()
-    std = prices.rolling(window=period).std()
+    sma = kernels.rolling_mean(prices, period)
+    std = kernels.rolling_std(prices, period, ddof=1)
     upper = sma + (std * std_dev)
     lower = sma - (std * std_dev)
-    return upper, sma, lower
+    return (
+        pd.Series(upper, index=prices.index),
+        pd.Series(sma, index=prices.index),
+        pd.Series(lower, index=prices.index),
+    )
 
 def calculate_adx(df: pd.DataFrame, period=14):
     """Calcula ADX (Average Directional Index)"""
-    high = df['high']
-    low = df['low']
-    close = df['close']
-    
-    plus_dm = high.diff()
-    minus_dm = -low.diff()
-    plus_dm[plus_dm < 0] = 0
-    minus_dm[minus_dm < 0] = 0
-    
-    tr1 = high - low
-    tr2 = abs(high - close.shift())
-    tr3 = abs(low - close.shift())
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(window=period).mean()
-    
-    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
-    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
-    
-    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-    adx = dx.rolling(window=period).mean()
-    
-    return adx, plus_di, minus_di
+    adx, plus_di, minus_di = kernels.adx(df['high'], df['low'], df['close'], period, smoothing="sma")
+    return (
+        pd.Series(adx, index=df.index),
+        pd.Series(plus_di, index=df.index),
+        pd.Series(minus_di, index=df.index),
+    )
 
 def calculate_stochastic(df: pd.DataFrame, period=14, smooth_k=3, smooth_d=3):
     """Calcula Stochastic Oscillator"""
-    high = df['high']
-    low = df['low']
-    close = df['close']
-    
-    lowest_low = low.rolling(window=period).min()
-    highest_high = high.rolling(window=period).max()
-    
-    k = 100 * ((close - lowest_low) / (highest_high - lowest_low))
-    k = k.rolling(window=smooth_k).mean()
-    d = k.rolling(window=smooth_d).mean()
-    
-    return k, d
+    k = kernels.rolling_mean(kernels.stochastic_k(df['high'], df['low'], df['close'], period), smooth_k)
+    d = kernels.rolling_mean(k, smooth_d)
+    return pd.Series(k, index=df.index), pd.Series(d, index=df.index)
 
 def calculate_atr(df: pd.DataFrame, period=14):
     """Calcula ATR (Average True Range)"""
-    high = df['high']
-    low = df['low']
-    close = df['close']
-    
-    tr1 = high - low
-    tr2 = abs(high - close.shift())
-    tr3 = abs(low - close.shift())
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(window=period).mean()
-    
-    return atr
+    atr = kernels.atr(df['high'], df['low'], df['close'], period, smoothing="sma")
+    return pd.Series(atr, index=df.index)
 
 # ==================== ESTRATÉGIAS RETORNANDO SIGNAL ====================
+# Cada estratégia é dividida em duas etapas:
+#   _<nome>_inputs(candles, params): indicadores da série inteira + parâmetros
+#   _<nome>_at(inputs, i): decisão no candle i (só lê posições <= i)
+# Os indicadores são causais, então avaliar o candle i sobre a série inteira é
+# idêntico a avaliar candles.iloc[:i+1]. O backtest usa isso em
+# iter_classic_signals() para calcular os indicadores uma única vez.
 
-def ema_crossover_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
-    """
-    EMA Crossover: cruzamento EMA rápida > lenta = BUY; lenta > rápida = SELL.
-    Confidence baseado em distância/ângulo entre EMAs.
-    """
+def _insufficient(tag: str) -> Signal:
+    return Signal(action="HOLD", confidence=0.0, tags=[tag], reasons=["Dados insuficientes"])
+
+
+def _ema_crossover_inputs(candles: pd.DataFrame, params: dict = None) -> dict:
     params = params or {}
     fast_period = params.get('fast_period', 9)
     slow_period = params.get('slow_period', 21)
-    
+
     closes = candles['close']
-    ema_fast = calculate_ema(closes, fast_period)
-    ema_slow = calculate_ema(closes, slow_period)
-    
-    if len(ema_fast) < 2 or len(ema_slow) < 2:
-        return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:EMA"], reasons=["Dados insuficientes"])
-    
+    return {
+        "fast_period": fast_period,
+        "slow_period": slow_period,
+        "ema_fast": calculate_ema(closes, fast_period).to_numpy(),
+        "ema_slow": calculate_ema(closes, slow_period).to_numpy(),
+    }
+
+
+def _ema_crossover_at(inputs: dict, i: int) -> Signal:
+    if i < 1:
+        return _insufficient("CLASSIC:EMA")
+
+    fast_period, slow_period = inputs["fast_period"], inputs["slow_period"]
+    ema_fast, ema_slow = inputs["ema_fast"], inputs["ema_slow"]
+
     # Verifica cruzamento
-    prev_fast, prev_slow = ema_fast.iloc[-2], ema_slow.iloc[-2]
-    curr_fast, curr_slow = ema_fast.iloc[-1], ema_slow.iloc[-1]
-    
+    prev_fast, prev_slow = ema_fast[i - 1], ema_slow[i - 1]
+    curr_fast, curr_slow = ema_fast[i], ema_slow[i]
+
     # Crossover bullish: fast cruza acima de slow
     if prev_fast <= prev_slow and curr_fast > curr_slow:
         distance_pct = abs(curr_fast - curr_slow) / curr_slow
@@ -130,7 +112,7 @@ def ema_crossover_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:EMA", "CLASSIC:EMA_CROSSUP"],
             meta={"ema_fast": curr_fast, "ema_slow": curr_slow, "distance_pct": distance_pct}
         )
-    
+
     # Crossover bearish: fast cruza abaixo de slow
     if prev_fast >= prev_slow and curr_fast < curr_slow:
         distance_pct = abs(curr_fast - curr_slow) / curr_slow
@@ -142,33 +124,46 @@ def ema_crossover_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:EMA", "CLASSIC:EMA_CROSSDOWN"],
             meta={"ema_fast": curr_fast, "ema_slow": curr_slow, "distance_pct": distance_pct}
         )
-    
+
     return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:EMA"], reasons=["Sem cruzamento"])
 
 
-def macd_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
+def ema_crossover_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
     """
-    MACD: linha MACD cruza acima/abaixo signal line.
-    Confidence aumenta com histograma expandindo.
+    EMA Crossover: cruzamento EMA rápida > lenta = BUY; lenta > rápida = SELL.
+    Confidence baseado em distância/ângulo entre EMAs.
     """
+    return _ema_crossover_at(_ema_crossover_inputs(candles, params), len(candles) - 1)
+
+
+def _macd_inputs(candles: pd.DataFrame, params: dict = None) -> dict:
     params = params or {}
     fast = params.get('fast', 12)
     slow = params.get('slow', 26)
     signal_period = params.get('signal', 9)
-    
+
     closes = candles['close']
     macd_line, signal_line, histogram = calculate_macd(closes, fast, slow, signal_period)
-    
-    if len(macd_line) < 2:
-        return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:MACD"], reasons=["Dados insuficientes"])
-    
-    prev_macd, prev_signal = macd_line.iloc[-2], signal_line.iloc[-2]
-    curr_macd, curr_signal = macd_line.iloc[-1], signal_line.iloc[-1]
-    curr_hist = histogram.iloc[-1]
-    
+    return {
+        "close": closes.to_numpy(),
+        "macd": macd_line.to_numpy(),
+        "signal": signal_line.to_numpy(),
+        "histogram": histogram.to_numpy(),
+    }
+
+
+def _macd_at(inputs: dict, i: int) -> Signal:
+    if i < 1:
+        return _insufficient("CLASSIC:MACD")
+
+    macd_line, signal_line = inputs["macd"], inputs["signal"]
+    prev_macd, prev_signal = macd_line[i - 1], signal_line[i - 1]
+    curr_macd, curr_signal = macd_line[i], signal_line[i]
+    curr_hist = inputs["histogram"][i]
+
     # Crossover bullish
     if prev_macd <= prev_signal and curr_macd > curr_signal:
-        hist_strength = abs(curr_hist) / closes.iloc[-1] * 100  # Histograma em % do preço
+        hist_strength = abs(curr_hist) / inputs["close"][i] * 100  # Histograma em % do preço
         confidence = min(0.5 + hist_strength * 5, 1.0)
         return Signal(
             action="BUY",
@@ -177,10 +172,10 @@ def macd_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:MACD", "CLASSIC:MACD_CROSSUP"],
             meta={"macd": curr_macd, "signal": curr_signal, "histogram": curr_hist}
         )
-    
+
     # Crossover bearish
     if prev_macd >= prev_signal and curr_macd < curr_signal:
-        hist_strength = abs(curr_hist) / closes.iloc[-1] * 100
+        hist_strength = abs(curr_hist) / inputs["close"][i] * 100
         confidence = min(0.5 + hist_strength * 5, 1.0)
         return Signal(
             action="SELL",
@@ -189,29 +184,36 @@ def macd_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:MACD", "CLASSIC:MACD_CROSSDOWN"],
             meta={"macd": curr_macd, "signal": curr_signal, "histogram": curr_hist}
         )
-    
+
     return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:MACD"], reasons=["Sem cruzamento"])
 
 
-def rsi_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
+def macd_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
     """
-    RSI: sobrecomprado/sobrevendido e saídas dessas zonas.
-    Confidence aumenta com distância dos extremos.
+    MACD: linha MACD cruza acima/abaixo signal line.
+    Confidence aumenta com histograma expandindo.
     """
+    return _macd_at(_macd_inputs(candles, params), len(candles) - 1)
+
+
+def _rsi_inputs(candles: pd.DataFrame, params: dict = None) -> dict:
     params = params or {}
     period = params.get('period', 14)
-    oversold = params.get('oversold', 30)
-    overbought = params.get('overbought', 70)
-    
-    closes = candles['close']
-    rsi = calculate_rsi(closes, period)
-    
-    if len(rsi) < 2:
-        return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:RSI"], reasons=["Dados insuficientes"])
-    
-    prev_rsi = rsi.iloc[-2]
-    curr_rsi = rsi.iloc[-1]
-    
+    return {
+        "oversold": params.get('oversold', 30),
+        "overbought": params.get('overbought', 70),
+        "rsi": calculate_rsi(candles['close'], period).to_numpy(),
+    }
+
+
+def _rsi_at(inputs: dict, i: int) -> Signal:
+    if i < 1:
+        return _insufficient("CLASSIC:RSI")
+
+    oversold, overbought = inputs["oversold"], inputs["overbought"]
+    prev_rsi = inputs["rsi"][i - 1]
+    curr_rsi = inputs["rsi"][i]
+
     # Saindo de oversold (reversão bullish)
     if prev_rsi <= oversold and curr_rsi > oversold:
         distance_from_extreme = (curr_rsi - oversold) / (50 - oversold)  # Normaliza 0-1
@@ -223,7 +225,7 @@ def rsi_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:RSI", "CLASSIC:RSI_OVERSOLD_EXIT"],
             meta={"rsi": curr_rsi, "oversold": oversold}
         )
-    
+
     # Saindo de overbought (reversão bearish)
     if prev_rsi >= overbought and curr_rsi < overbought:
         distance_from_extreme = (overbought - curr_rsi) / (overbought - 50)
@@ -235,31 +237,44 @@ def rsi_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:RSI", "CLASSIC:RSI_OVERBOUGHT_EXIT"],
             meta={"rsi": curr_rsi, "overbought": overbought}
         )
-    
+
     return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:RSI"], reasons=[f"RSI neutro: {curr_rsi:.1f}"])
 
 
-def bollinger_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
+def rsi_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
     """
-    Bollinger Bands: rompimentos + largura (volatilidade) + mean reversion.
+    RSI: sobrecomprado/sobrevendido e saídas dessas zonas.
+    Confidence aumenta com distância dos extremos.
     """
+    return _rsi_at(_rsi_inputs(candles, params), len(candles) - 1)
+
+
+def _bollinger_inputs(candles: pd.DataFrame, params: dict = None) -> dict:
     params = params or {}
     period = params.get('period', 20)
     std_dev = params.get('std_dev', 2)
-    
+
     closes = candles['close']
     upper, middle, lower = calculate_bollinger_bands(closes, period, std_dev)
-    
-    if len(upper) < 2:
-        return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:BB"], reasons=["Dados insuficientes"])
-    
-    curr_close = closes.iloc[-1]
-    curr_upper = upper.iloc[-1]
-    curr_lower = lower.iloc[-1]
-    curr_middle = middle.iloc[-1]
-    
+    return {
+        "close": closes.to_numpy(),
+        "upper": upper.to_numpy(),
+        "middle": middle.to_numpy(),
+        "lower": lower.to_numpy(),
+    }
+
+
+def _bollinger_at(inputs: dict, i: int) -> Signal:
+    if i < 1:
+        return _insufficient("CLASSIC:BB")
+
+    curr_close = inputs["close"][i]
+    curr_upper = inputs["upper"][i]
+    curr_lower = inputs["lower"][i]
+    curr_middle = inputs["middle"][i]
+
     width = (curr_upper - curr_lower) / curr_middle
-    
+
     # Breakout acima (bullish)
     if curr_close > curr_upper:
         confidence = min(0.5 + width * 2, 1.0)
@@ -270,7 +285,7 @@ def bollinger_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:BB", "CLASSIC:BB_BREAKOUT_UP"],
             meta={"close": curr_close, "upper": curr_upper, "middle": curr_middle, "lower": curr_lower, "width": width}
         )
-    
+
     # Breakout abaixo (bearish)
     if curr_close < curr_lower:
         confidence = min(0.5 + width * 2, 1.0)
@@ -281,27 +296,39 @@ def bollinger_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:BB", "CLASSIC:BB_BREAKOUT_DOWN"],
             meta={"close": curr_close, "upper": curr_upper, "middle": curr_middle, "lower": curr_lower, "width": width}
         )
-    
+
     return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:BB"], reasons=["Preço dentro das bandas"])
 
 
-def adx_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
+def bollinger_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
     """
-    ADX: filtro de tendência (força > limiar) e sinais com +DI/-DI.
+    Bollinger Bands: rompimentos + largura (volatilidade) + mean reversion.
     """
+    return _bollinger_at(_bollinger_inputs(candles, params), len(candles) - 1)
+
+
+def _adx_inputs(candles: pd.DataFrame, params: dict = None) -> dict:
     params = params or {}
     period = params.get('period', 14)
-    adx_threshold = params.get('adx_threshold', 25)
-    
+
     adx, plus_di, minus_di = calculate_adx(candles, period)
-    
-    if len(adx) < 2:
-        return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:ADX"], reasons=["Dados insuficientes"])
-    
-    curr_adx = adx.iloc[-1]
-    curr_plus_di = plus_di.iloc[-1]
-    curr_minus_di = minus_di.iloc[-1]
-    
+    return {
+        "adx_threshold": params.get('adx_threshold', 25),
+        "adx": adx.to_numpy(),
+        "plus_di": plus_di.to_numpy(),
+        "minus_di": minus_di.to_numpy(),
+    }
+
+
+def _adx_at(inputs: dict, i: int) -> Signal:
+    if i < 1:
+        return _insufficient("CLASSIC:ADX")
+
+    adx_threshold = inputs["adx_threshold"]
+    curr_adx = inputs["adx"][i]
+    curr_plus_di = inputs["plus_di"][i]
+    curr_minus_di = inputs["minus_di"][i]
+
     # ADX acima threshold indica tendência forte
     if curr_adx >= adx_threshold:
         if curr_plus_di > curr_minus_di:
@@ -322,27 +349,38 @@ def adx_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
                 tags=["CLASSIC:ADX", "CLASSIC:ADX_STRONG_DOWN"],
                 meta={"adx": curr_adx, "plus_di": curr_plus_di, "minus_di": curr_minus_di}
             )
-    
+
     return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:ADX"], reasons=[f"ADX fraco: {curr_adx:.1f} < {adx_threshold}"])
 
 
-def stochastic_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
+def adx_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
     """
-    Stochastic: %K cruza %D em extremos (oversold/overbought).
+    ADX: filtro de tendência (força > limiar) e sinais com +DI/-DI.
     """
+    return _adx_at(_adx_inputs(candles, params), len(candles) - 1)
+
+
+def _stochastic_inputs(candles: pd.DataFrame, params: dict = None) -> dict:
     params = params or {}
     period = params.get('period', 14)
-    oversold = params.get('oversold', 20)
-    overbought = params.get('overbought', 80)
-    
-    k, d = calculate_stochastic(candles, period)
-    
-    if len(k) < 2:
-        return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:STOCH"], reasons=["Dados insuficientes"])
-    
-    prev_k, prev_d = k.iloc[-2], d.iloc[-2]
-    curr_k, curr_d = k.iloc[-1], d.iloc[-1]
-    
+
+    k, d = calculate_stochastic(candles, period, smooth_d=params.get('smooth_d', 3))
+    return {
+        "oversold": params.get('oversold', 20),
+        "overbought": params.get('overbought', 80),
+        "k": k.to_numpy(),
+        "d": d.to_numpy(),
+    }
+
+
+def _stochastic_at(inputs: dict, i: int) -> Signal:
+    if i < 1:
+        return _insufficient("CLASSIC:STOCH")
+
+    oversold, overbought = inputs["oversold"], inputs["overbought"]
+    prev_k, prev_d = inputs["k"][i - 1], inputs["d"][i - 1]
+    curr_k, curr_d = inputs["k"][i], inputs["d"][i]
+
     # Crossover bullish em oversold
     if prev_k <= prev_d and curr_k > curr_d and curr_k < oversold:
         confidence = min(0.5 + (oversold - curr_k) / oversold * 0.3, 1.0)
@@ -353,7 +391,7 @@ def stochastic_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:STOCH", "CLASSIC:STOCH_CROSSUP"],
             meta={"k": curr_k, "d": curr_d, "oversold": oversold}
         )
-    
+
     # Crossover bearish em overbought
     if prev_k >= prev_d and curr_k < curr_d and curr_k > overbought:
         confidence = min(0.5 + (curr_k - overbought) / (100 - overbought) * 0.3, 1.0)
@@ -364,34 +402,47 @@ def stochastic_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:STOCH", "CLASSIC:STOCH_CROSSDOWN"],
             meta={"k": curr_k, "d": curr_d, "overbought": overbought}
         )
-    
+
     return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:STOCH"], reasons=["Sem crossover em extremos"])
 
 
-def fibonacci_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
+def stochastic_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
     """
-    Fibonacci: níveis de retração como suporte/resistência.
+    Stochastic: %K cruza %D em extremos (oversold/overbought).
     """
+    return _stochastic_at(_stochastic_inputs(candles, params), len(candles) - 1)
+
+
+def _fibonacci_inputs(candles: pd.DataFrame, params: dict = None) -> dict:
     params = params or {}
     lookback = params.get('lookback', 50)
-    
-    if len(candles) < lookback:
-        return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:FIB"], reasons=["Dados insuficientes"])
-    
-    recent = candles.tail(lookback)
-    swing_high = recent['high'].max()
-    swing_low = recent['low'].min()
-    curr_close = candles['close'].iloc[-1]
-    
+    return {
+        "lookback": lookback,
+        "tolerance": params.get('tolerance', 0.02),  # Fração da amplitude do swing
+        "close": candles['close'].to_numpy(),
+        # Máxima/mínima dos últimos `lookback` candles (equivale a candles.tail(lookback))
+        "swing_high": kernels.rolling_max(candles['high'], lookback),
+        "swing_low": kernels.rolling_min(candles['low'], lookback),
+    }
+
+
+def _fibonacci_at(inputs: dict, i: int) -> Signal:
+    if i + 1 < inputs["lookback"]:
+        return _insufficient("CLASSIC:FIB")
+
+    swing_high = inputs["swing_high"][i]
+    swing_low = inputs["swing_low"][i]
+    curr_close = inputs["close"][i]
+
     # Níveis Fibonacci
     diff = swing_high - swing_low
     fib_382 = swing_high - diff * 0.382
     fib_500 = swing_high - diff * 0.500
     fib_618 = swing_high - diff * 0.618
-    
+
     # Preço próximo de nível Fibonacci (suporte/resistência)
-    tolerance = diff * 0.02  # 2% de tolerância
-    
+    tolerance = diff * inputs["tolerance"]  # 2% de tolerância (padrão)
+
     # Próximo de 0.618 (forte suporte)
     if abs(curr_close - fib_618) < tolerance:
         confidence = 0.6
@@ -402,7 +453,7 @@ def fibonacci_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:FIB", "CLASSIC:FIB_618"],
             meta={"fib_618": fib_618, "fib_500": fib_500, "fib_382": fib_382, "close": curr_close}
         )
-    
+
     # Próximo de 0.382 (resistência)
     if abs(curr_close - fib_382) < tolerance:
         confidence = 0.5
@@ -413,50 +464,54 @@ def fibonacci_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:FIB", "CLASSIC:FIB_382"],
             meta={"fib_618": fib_618, "fib_500": fib_500, "fib_382": fib_382, "close": curr_close}
         )
-    
+
     return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:FIB"], reasons=["Preço longe de níveis Fib"])
 
 
-def ma_ribbon_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
+def fibonacci_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
     """
-    MA Ribbon (5-8-13 SMAs): Detecta alinhamento de ribbons para scalping.
-    Baseado em estratégia da Investopedia para scalping em timeframes curtos.
-    
-    - BUY: Quando SMA5 > SMA8 > SMA13 (ribbon alinhada para cima)
-    - SELL: Quando SMA5 < SMA8 < SMA13 (ribbon alinhada para baixo)
-    - HOLD: Quando ribbons achatadas (range, sem tendência)
+    Fibonacci: níveis de retração como suporte/resistência.
     """
+    return _fibonacci_at(_fibonacci_inputs(candles, params), len(candles) - 1)
+
+
+def _ma_ribbon_inputs(candles: pd.DataFrame, params: dict = None) -> dict:
     params = params or {}
     periods = params.get('periods', [5, 8, 13])
-    alignment_threshold = params.get('alignment_threshold', 0.002)  # 0.2% mínimo entre SMAs
-    
+
     closes = candles['close']
-    sma5 = calculate_sma(closes, periods[0])
-    sma8 = calculate_sma(closes, periods[1])
-    sma13 = calculate_sma(closes, periods[2])
-    
-    if len(sma5) < 2 or len(sma8) < 2 or len(sma13) < 2:
-        return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:RIBBON"], reasons=["Dados insuficientes"])
-    
-    curr_sma5 = sma5.iloc[-1]
-    curr_sma8 = sma8.iloc[-1]
-    curr_sma13 = sma13.iloc[-1]
-    
+    return {
+        "alignment_threshold": params.get('alignment_threshold', 0.002),  # 0.2% mínimo entre SMAs
+        "sma5": calculate_sma(closes, periods[0]).to_numpy(),
+        "sma8": calculate_sma(closes, periods[1]).to_numpy(),
+        "sma13": calculate_sma(closes, periods[2]).to_numpy(),
+    }
+
+
+def _ma_ribbon_at(inputs: dict, i: int) -> Signal:
+    if i < 1:
+        return _insufficient("CLASSIC:RIBBON")
+
+    alignment_threshold = inputs["alignment_threshold"]
+    curr_sma5 = inputs["sma5"][i]
+    curr_sma8 = inputs["sma8"][i]
+    curr_sma13 = inputs["sma13"][i]
+
     # Calcular distâncias relativas entre SMAs
     dist_5_8 = abs(curr_sma5 - curr_sma8) / curr_sma8
     dist_8_13 = abs(curr_sma8 - curr_sma13) / curr_sma13
     avg_distance = (dist_5_8 + dist_8_13) / 2
-    
+
     # Verificar se ribbons têm spread mínimo (filtro de range)
     if avg_distance < alignment_threshold:
         return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:RIBBON"], reasons=[f"Ribbons sem spread suficiente: {avg_distance:.3%} < {alignment_threshold:.3%} (mercado em range)"])
-    
+
     # Ribbon alinhada para CIMA (bullish)
     if curr_sma5 > curr_sma8 > curr_sma13:
         # Confidence aumenta com distância entre ribbons (quanto mais spread, mais forte a tendência)
         # Normaliza: 0.2% spread = 0.5 conf, 0.7% spread = 1.0 conf
         confidence = min(0.5 + (avg_distance - alignment_threshold) * 100, 1.0)
-        
+
         return Signal(
             action="BUY",
             confidence=confidence,
@@ -464,12 +519,12 @@ def ma_ribbon_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:RIBBON", "CLASSIC:RIBBON_BULLISH"],
             meta={"sma5": curr_sma5, "sma8": curr_sma8, "sma13": curr_sma13, "spread": avg_distance}
         )
-    
+
     # Ribbon alinhada para BAIXO (bearish)
     if curr_sma5 < curr_sma8 < curr_sma13:
         # Mesmo cálculo de confidence
         confidence = min(0.5 + (avg_distance - alignment_threshold) * 100, 1.0)
-        
+
         return Signal(
             action="SELL",
             confidence=confidence,
@@ -477,57 +532,66 @@ def ma_ribbon_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:RIBBON", "CLASSIC:RIBBON_BEARISH"],
             meta={"sma5": curr_sma5, "sma8": curr_sma8, "sma13": curr_sma13, "spread": avg_distance}
         )
-    
+
     # Ribbons achatadas ou entrelaçadas (range, sem tendência clara)
     return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:RIBBON"], reasons=["Ribbons achatadas ou entrelaçadas - mercado em range"])
 
 
-def momentum_combo_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
+def ma_ribbon_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
     """
-    Momentum Combo (RSI + MACD): Combina RSI e MACD para sinais de alta probabilidade.
-    Baseado em estratégia da Investopedia para scalping com momentum.
-    
-    BUY Signals:
-    - MACD cruza acima da signal line E RSI > 50, OU
-    - RSI sai de oversold E MACD já está acima da signal line
-    
-    SELL Signals:
-    - MACD cruza abaixo da signal line E RSI < 50, OU
-    - RSI entra em overbought E MACD já está abaixo da signal line
+    MA Ribbon (5-8-13 SMAs): Detecta alinhamento de ribbons para scalping.
+    Baseado em estratégia da Investopedia para scalping em timeframes curtos.
+
+    - BUY: Quando SMA5 > SMA8 > SMA13 (ribbon alinhada para cima)
+    - SELL: Quando SMA5 < SMA8 < SMA13 (ribbon alinhada para baixo)
+    - HOLD: Quando ribbons achatadas (range, sem tendência)
     """
+    return _ma_ribbon_at(_ma_ribbon_inputs(candles, params), len(candles) - 1)
+
+
+def _momentum_combo_inputs(candles: pd.DataFrame, params: dict = None) -> dict:
     params = params or {}
-    
+
     # Parâmetros RSI
     rsi_period = params.get('rsi_period', 14)
-    rsi_oversold = params.get('rsi_oversold', 30)
-    rsi_overbought = params.get('rsi_overbought', 70)
-    
+
     # Parâmetros MACD
     macd_fast = params.get('macd_fast', 12)
     macd_slow = params.get('macd_slow', 26)
     macd_signal = params.get('macd_signal', 9)
-    
+
     closes = candles['close']
-    rsi = calculate_rsi(closes, rsi_period)
     macd_line, signal_line, histogram = calculate_macd(closes, macd_fast, macd_slow, macd_signal)
-    
-    if len(rsi) < 2 or len(macd_line) < 2:
-        return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:MOMENTUM"], reasons=["Dados insuficientes"])
-    
-    prev_rsi = rsi.iloc[-2]
-    curr_rsi = rsi.iloc[-1]
-    prev_macd = macd_line.iloc[-2]
-    prev_signal = signal_line.iloc[-2]
-    curr_macd = macd_line.iloc[-1]
-    curr_signal = signal_line.iloc[-1]
-    curr_hist = histogram.iloc[-1]
-    
+    return {
+        "rsi_oversold": params.get('rsi_oversold', 30),
+        "rsi_overbought": params.get('rsi_overbought', 70),
+        "close": closes.to_numpy(),
+        "rsi": calculate_rsi(closes, rsi_period).to_numpy(),
+        "macd": macd_line.to_numpy(),
+        "signal": signal_line.to_numpy(),
+        "histogram": histogram.to_numpy(),
+    }
+
+
+def _momentum_combo_at(inputs: dict, i: int) -> Signal:
+    if i < 1:
+        return _insufficient("CLASSIC:MOMENTUM")
+
+    rsi_oversold, rsi_overbought = inputs["rsi_oversold"], inputs["rsi_overbought"]
+    prev_rsi = inputs["rsi"][i - 1]
+    curr_rsi = inputs["rsi"][i]
+    prev_macd = inputs["macd"][i - 1]
+    prev_signal = inputs["signal"][i - 1]
+    curr_macd = inputs["macd"][i]
+    curr_signal = inputs["signal"][i]
+    curr_hist = inputs["histogram"][i]
+
     # BUY Signal 1: MACD crossover bullish E RSI > 50
     if prev_macd <= prev_signal and curr_macd > curr_signal and curr_rsi > 50:
         rsi_strength = (curr_rsi - 50) / 50  # Normaliza 0-1
-        hist_strength = abs(curr_hist) / closes.iloc[-1] * 100
+        hist_strength = abs(curr_hist) / inputs["close"][i] * 100
         confidence = min(0.6 + rsi_strength * 0.2 + hist_strength * 2, 1.0)
-        
+
         return Signal(
             action="BUY",
             confidence=confidence,
@@ -535,12 +599,12 @@ def momentum_combo_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:MOMENTUM", "CLASSIC:MOMENTUM_BUY_CROSSOVER"],
             meta={"rsi": curr_rsi, "macd": curr_macd, "signal": curr_signal, "histogram": curr_hist}
         )
-    
+
     # BUY Signal 2: RSI sai de oversold E MACD acima da signal
     if prev_rsi <= rsi_oversold and curr_rsi > rsi_oversold and curr_macd > curr_signal:
         rsi_exit_strength = (curr_rsi - rsi_oversold) / (50 - rsi_oversold)
         confidence = min(0.6 + rsi_exit_strength * 0.3, 1.0)
-        
+
         return Signal(
             action="BUY",
             confidence=confidence,
@@ -548,13 +612,13 @@ def momentum_combo_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:MOMENTUM", "CLASSIC:MOMENTUM_BUY_RSI_EXIT"],
             meta={"rsi": curr_rsi, "macd": curr_macd, "signal": curr_signal, "histogram": curr_hist}
         )
-    
+
     # SELL Signal 1: MACD crossover bearish E RSI < 50
     if prev_macd >= prev_signal and curr_macd < curr_signal and curr_rsi < 50:
         rsi_strength = (50 - curr_rsi) / 50
-        hist_strength = abs(curr_hist) / closes.iloc[-1] * 100
+        hist_strength = abs(curr_hist) / inputs["close"][i] * 100
         confidence = min(0.6 + rsi_strength * 0.2 + hist_strength * 2, 1.0)
-        
+
         return Signal(
             action="SELL",
             confidence=confidence,
@@ -562,12 +626,12 @@ def momentum_combo_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:MOMENTUM", "CLASSIC:MOMENTUM_SELL_CROSSOVER"],
             meta={"rsi": curr_rsi, "macd": curr_macd, "signal": curr_signal, "histogram": curr_hist}
         )
-    
+
     # SELL Signal 2: RSI entra em overbought E MACD abaixo da signal
     if prev_rsi < rsi_overbought and curr_rsi >= rsi_overbought and curr_macd < curr_signal:
         rsi_entry_strength = (curr_rsi - rsi_overbought) / (100 - rsi_overbought)
         confidence = min(0.6 + rsi_entry_strength * 0.3, 1.0)
-        
+
         return Signal(
             action="SELL",
             confidence=confidence,
@@ -575,56 +639,66 @@ def momentum_combo_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:MOMENTUM", "CLASSIC:MOMENTUM_SELL_RSI_ENTRY"],
             meta={"rsi": curr_rsi, "macd": curr_macd, "signal": curr_signal, "histogram": curr_hist}
         )
-    
+
     return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:MOMENTUM"], reasons=["Sem confluência RSI + MACD"])
 
 
-def pivot_point_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
+def momentum_combo_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
     """
-    Pivot Points: Calcula níveis de suporte/resistência diários e gera sinais.
-    Baseado em estratégia da Investopedia para scalping com pivot points.
-    
-    Calcula:
-    - PP = (High + Low + Close) / 3
-    - R1 = 2*PP - Low, R2 = PP + (High - Low)
-    - S1 = 2*PP - High, S2 = PP - (High - Low)
-    
-    BUY: Preço toca S1/S2 e mostra reversão
-    SELL: Preço toca R1/R2 e mostra reversão
+    Momentum Combo (RSI + MACD): Combina RSI e MACD para sinais de alta probabilidade.
+    Baseado em estratégia da Investopedia para scalping com momentum.
+
+    BUY Signals:
+    - MACD cruza acima da signal line E RSI > 50, OU
+    - RSI sai de oversold E MACD já está acima da signal line
+
+    SELL Signals:
+    - MACD cruza abaixo da signal line E RSI < 50, OU
+    - RSI entra em overbought E MACD já está abaixo da signal line
     """
+    return _momentum_combo_at(_momentum_combo_inputs(candles, params), len(candles) - 1)
+
+
+def _pivot_point_inputs(candles: pd.DataFrame, params: dict = None) -> dict:
     params = params or {}
-    lookback = params.get('lookback', 1)  # Usa última vela para calcular pivots
-    tolerance_pct = params.get('tolerance_pct', 0.003)  # 0.3% de tolerância
-    
-    if len(candles) < lookback + 2:
-        return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:PIVOT"], reasons=["Dados insuficientes"])
-    
+    return {
+        "lookback": params.get('lookback', 1),  # Usa última vela para calcular pivots
+        "tolerance_pct": params.get('tolerance_pct', 0.003),  # 0.3% de tolerância
+        "high": candles['high'].to_numpy(),
+        "low": candles['low'].to_numpy(),
+        "close": candles['close'].to_numpy(),
+    }
+
+
+def _pivot_point_at(inputs: dict, i: int) -> Signal:
+    if i + 1 < inputs["lookback"] + 2:
+        return _insufficient("CLASSIC:PIVOT")
+
     # Usa dados da vela anterior para calcular pivots
-    prev_candle = candles.iloc[-2]
-    prev_high = prev_candle['high']
-    prev_low = prev_candle['low']
-    prev_close = prev_candle['close']
-    
+    prev_high = inputs["high"][i - 1]
+    prev_low = inputs["low"][i - 1]
+    prev_close = inputs["close"][i - 1]
+
     # Calcula Pivot Point e níveis
     pp = (prev_high + prev_low + prev_close) / 3
     r1 = 2 * pp - prev_low
     r2 = pp + (prev_high - prev_low)
     s1 = 2 * pp - prev_high
     s2 = pp - (prev_high - prev_low)
-    
+
     # Preço atual
-    curr_close = candles['close'].iloc[-1]
-    curr_high = candles['high'].iloc[-1]
-    curr_low = candles['low'].iloc[-1]
-    
+    curr_close = inputs["close"][i]
+    curr_high = inputs["high"][i]
+    curr_low = inputs["low"][i]
+
     # Tolerância para "tocar" o nível
-    tolerance = curr_close * tolerance_pct
-    
+    tolerance = curr_close * inputs["tolerance_pct"]
+
     # BUY em S1 (suporte forte)
     if abs(curr_low - s1) < tolerance and curr_close > curr_low:
         distance_from_s1 = abs(curr_close - s1) / s1
         confidence = min(0.7 - distance_from_s1 * 10, 1.0)  # Mais confiança quanto mais perto
-        
+
         return Signal(
             action="BUY",
             confidence=confidence,
@@ -632,12 +706,12 @@ def pivot_point_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:PIVOT", "CLASSIC:PIVOT_S1_BOUNCE"],
             meta={"pp": pp, "r1": r1, "r2": r2, "s1": s1, "s2": s2, "close": curr_close}
         )
-    
+
     # BUY em S2 (suporte muito forte)
     if abs(curr_low - s2) < tolerance and curr_close > curr_low:
         distance_from_s2 = abs(curr_close - s2) / s2
         confidence = min(0.85 - distance_from_s2 * 10, 1.0)  # S2 é mais forte que S1
-        
+
         return Signal(
             action="BUY",
             confidence=confidence,
@@ -645,12 +719,12 @@ def pivot_point_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:PIVOT", "CLASSIC:PIVOT_S2_BOUNCE"],
             meta={"pp": pp, "r1": r1, "r2": r2, "s1": s1, "s2": s2, "close": curr_close}
         )
-    
+
     # SELL em R1 (resistência forte)
     if abs(curr_high - r1) < tolerance and curr_close < curr_high:
         distance_from_r1 = abs(curr_close - r1) / r1
         confidence = min(0.7 - distance_from_r1 * 10, 1.0)
-        
+
         return Signal(
             action="SELL",
             confidence=confidence,
@@ -658,12 +732,12 @@ def pivot_point_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:PIVOT", "CLASSIC:PIVOT_R1_REJECT"],
             meta={"pp": pp, "r1": r1, "r2": r2, "s1": s1, "s2": s2, "close": curr_close}
         )
-    
+
     # SELL em R2 (resistência muito forte)
     if abs(curr_high - r2) < tolerance and curr_close < curr_high:
         distance_from_r2 = abs(curr_close - r2) / r2
         confidence = min(0.85 - distance_from_r2 * 10, 1.0)
-        
+
         return Signal(
             action="SELL",
             confidence=confidence,
@@ -671,10 +745,26 @@ def pivot_point_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
             tags=["CLASSIC:PIVOT", "CLASSIC:PIVOT_R2_REJECT"],
             meta={"pp": pp, "r1": r1, "r2": r2, "s1": s1, "s2": s2, "close": curr_close}
         )
-    
+
     return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:PIVOT"], reasons=[f"Preço {curr_close:.2f} longe de pivots (PP={pp:.2f}, S1={s1:.2f}, R1={r1:.2f})"])
 
 
+def pivot_point_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
+    """
+    Pivot Points: Calcula níveis de suporte/resistência diários e gera sinais.
+    Baseado em estratégia da Investopedia para scalping com pivot points.
+
+    Calcula:
+    - PP = (High + Low + Close) / 3
+    - R1 = 2*PP - Low, R2 = PP + (High - Low)
+    - S1 = 2*PP - High, S2 = PP - (High - Low)
+
+    BUY: Preço toca S1/S2 e mostra reversão
+    SELL: Preço toca R1/R2 e mostra reversão
+    """
+    return _pivot_point_at(_pivot_point_inputs(candles, params), len(candles) - 1)
+
+
 # ==================== REGISTRY DE ESTRATÉGIAS ====================
 
 CLASSIC_STRATEGIES = {
@@ -690,6 +780,20 @@ CLASSIC_STRATEGIES = {
     "PIVOT": pivot_point_signal
 }
 
+# (indicadores da série inteira, decisão no candle i) de cada estratégia
+CLASSIC_STRATEGY_STEPS = {
+    "EMA": (_ema_crossover_inputs, _ema_crossover_at),
+    "MACD": (_macd_inputs, _macd_at),
+    "RSI": (_rsi_inputs, _rsi_at),
+    "BB": (_bollinger_inputs, _bollinger_at),
+    "ADX": (_adx_inputs, _adx_at),
+    "STOCH": (_stochastic_inputs, _stochastic_at),
+    "FIB": (_fibonacci_inputs, _fibonacci_at),
+    "RIBBON": (_ma_ribbon_inputs, _ma_ribbon_at),
+    "MOMENTUM": (_momentum_combo_inputs, _momentum_combo_at),
+    "PIVOT": (_pivot_point_inputs, _pivot_point_at)
+}
+
 def get_classic_signal(strategy_name: str, candles: pd.DataFrame, params: dict = None) -> Signal:
     """
     Obtém signal de uma estratégia clássica pelo nome.
@@ -707,3 +811,128 @@ def get_classic_signal(strategy_name: str, candles: pd.DataFrame, params: dict =
     
     strategy_fn = CLASSIC_STRATEGIES[strategy_name]
     return strategy_fn(candles, params)
+
+
+def iter_classic_signals(strategy_name: str, candles: pd.DataFrame, params: dict = None,
+                         start: int = 0) -> Iterator[Signal]:
+    """
+    Signal de cada prefixo candles.iloc[:i+1], para i = start..len(candles)-1.
+
+    Equivale a chamar get_classic_signal() com a janela crescente de cada candle,
+    mas os indicadores são calculados uma única vez sobre a série inteira (O(n)
+    no total em vez de O(n²)). Os indicadores são calculados na chamada; os
+    Signals são gerados sob demanda.
+    """
+    if strategy_name not in CLASSIC_STRATEGY_STEPS:
+        raise ValueError(f"Estratégia {strategy_name} não encontrada. Disponíveis: {list(CLASSIC_STRATEGY_STEPS.keys())}")
+
+    prepare, signal_at = CLASSIC_STRATEGY_STEPS[strategy_name]
+    inputs = prepare(candles, params)
+    return (signal_at(inputs, i) for i in range(start, len(candles)))
+
+
+# ==================== DIREÇÕES VETORIZADAS ====================
+# Mesma decisão de _<nome>_at para todos os candles de uma vez: +1 (BUY),
+# -1 (SELL) ou 0 (HOLD/dados insuficientes). Usadas pelos backtests de
+# estratégia única, que só precisam da ação de cada candle.
+
+def _previous(values: np.ndarray) -> np.ndarray:
+    """values[i - 1] alinhado ao candle i (NaN no primeiro)"""
+    shifted = np.full(values.size, np.nan)
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def _cross_directions(fast: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    prev_fast, prev_slow = _previous(fast), _previous(slow)
+    cross_up = (prev_fast <= prev_slow) & (fast > slow)
+    cross_down = (prev_fast >= prev_slow) & (fast < slow)
+    return np.where(cross_up, 1, np.where(cross_down, -1, 0))
+
+
+def _ema_crossover_directions(inputs: dict) -> np.ndarray:
+    return _cross_directions(inputs["ema_fast"], inputs["ema_slow"])
+
+
+def _macd_directions(inputs: dict) -> np.ndarray:
+    return _cross_directions(inputs["macd"], inputs["signal"])
+
+
+def _rsi_directions(inputs: dict) -> np.ndarray:
+    oversold, overbought = inputs["oversold"], inputs["overbought"]
+    curr_rsi = inputs["rsi"]
+    prev_rsi = _previous(curr_rsi)
+    oversold_exit = (prev_rsi <= oversold) & (curr_rsi > oversold)
+    overbought_exit = (prev_rsi >= overbought) & (curr_rsi < overbought)
+    return np.where(oversold_exit, 1, np.where(overbought_exit, -1, 0))
+
+
+def _bollinger_directions(inputs: dict) -> np.ndarray:
+    closes = inputs["close"]
+    directions = np.where(closes > inputs["upper"], 1, np.where(closes < inputs["lower"], -1, 0))
+    directions[:1] = 0
+    return directions
+
+
+def _adx_directions(inputs: dict) -> np.ndarray:
+    strong = inputs["adx"] >= inputs["adx_threshold"]
+    directions = np.where(strong, np.where(inputs["plus_di"] > inputs["minus_di"], 1, -1), 0)
+    directions[:1] = 0
+    return directions
+
+
+def _stochastic_directions(inputs: dict) -> np.ndarray:
+    k, d = inputs["k"], inputs["d"]
+    prev_k, prev_d = _previous(k), _previous(d)
+    buy = (prev_k <= prev_d) & (k > d) & (k < inputs["oversold"])
+    sell = (prev_k >= prev_d) & (k < d) & (k > inputs["overbought"])
+    return np.where(buy, 1, np.where(sell, -1, 0))
+
+
+def _fibonacci_directions(inputs: dict) -> np.ndarray:
+    closes = inputs["close"]
+    swing_high, swing_low = inputs["swing_high"], inputs["swing_low"]
+    diff = swing_high - swing_low
+    tolerance = diff * inputs["tolerance"]
+    near_618 = np.abs(closes - (swing_high - diff * 0.618)) < tolerance
+    near_382 = np.abs(closes - (swing_high - diff * 0.382)) < tolerance
+    directions = np.where(near_618, 1, np.where(near_382, -1, 0))
+    directions[:inputs["lookback"] - 1] = 0
+    return directions
+
+
+CLASSIC_STRATEGY_DIRECTIONS = {
+    "EMA": _ema_crossover_directions,
+    "MACD": _macd_directions,
+    "RSI": _rsi_directions,
+    "BB": _bollinger_directions,
+    "ADX": _adx_directions,
+    "STOCH": _stochastic_directions,
+    "FIB": _fibonacci_directions,
+}
+
+
+def classic_directions(strategy_name: str, candles: pd.DataFrame, params: dict = None) -> np.ndarray:
+    """
+    Ação de cada candle (+1 BUY, -1 SELL, 0 HOLD) como em iter_classic_signals(start=0).
+
+    Estratégias com versão vetorizada decidem todos os candles com operações de
+    array; as demais caem no loop de iter_classic_signals.
+
+    Returns:
+        Array int8 do tamanho de candles
+    """
+    if strategy_name not in CLASSIC_STRATEGY_STEPS:
+        raise ValueError(f"Estratégia {strategy_name} não encontrada. Disponíveis: {list(CLASSIC_STRATEGY_STEPS.keys())}")
+
+    directions_fn = CLASSIC_STRATEGY_DIRECTIONS.get(strategy_name)
+    if directions_fn is None:
+        actions = {"BUY": 1, "SELL": -1}
+        return np.array(
+            [actions.get(signal.action, 0) for signal in iter_classic_signals(strategy_name, candles, params)],
+            dtype=np.int8
+        )
+
+    prepare, _ = CLASSIC_STRATEGY_STEPS[strategy_name]
+    with np.errstate(invalid="ignore"):
+        return directions_fn(prepare(candles, params)).astype(np.int8)
@@ -3,8 +3,17 @@ CPR (Central Pivot Range)
 Define zonas de suporte/resistência intraday
 Útil para scalping e confluência com BOS e Order Blocks
 """
+import numpy as np
 import pandas as pd
 from market_manus.core.signal import Signal
+from market_manus.strategies.signal_series import (
+    DEFAULT_LOOKBACK,
+    SignalSeries,
+    ohlcv_arrays,
+    series_or_empty,
+    window_column,
+    window_count,
+)
 
 
 def calculate_pivot_points(prev_high: float, prev_low: float, prev_close: float) -> dict:
@@ -163,3 +172,31 @@ def cpr_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
         tags=["CLASSIC:CPR"],
         reasons=["Preço próximo ao CPR, sem sinal claro"]
     )
+
+
+def cpr_series(candles: pd.DataFrame, params: dict = None,
+               lookback: int = DEFAULT_LOOKBACK) -> SignalSeries:
+    """
+    Versão vetorizada de cpr_signal aplicada em janelas deslizantes.
+    O CPR só depende do candle anterior e do atual, então é calculado direto na série.
+    """
+    params = params or {}
+    sensitivity = params.get('sensitivity', 0.002)
+
+    if lookback + 1 < 2 or window_count(len(candles), lookback) == 0:
+        return SignalSeries.empty()
+
+    arrays = ohlcv_arrays(candles)
+    prev_high = window_column(arrays['high'], lookback - 1, lookback)
+    prev_low = window_column(arrays['low'], lookback - 1, lookback)
+    prev_close = window_column(arrays['close'], lookback - 1, lookback)
+    current_price = window_column(arrays['close'], lookback, lookback)
+
+    pivot = (prev_high + prev_low + prev_close) / 3
+    bc = (prev_high + prev_low) / 2
+    tc = (pivot - (prev_high + prev_low) / 2) + pivot
+    tolerance = current_price * sensitivity
+
+    directions = np.where(current_price > tc + tolerance, 1,
+                          np.where(current_price < bc - tolerance, -1, 0))
+    return series_or_empty(directions, lookback)
@@ -0,0 +1,357 @@
+"""
+Indicator Kernels - Núcleos O(n) compartilhados para indicadores técnicos.
+
+Todos os indicadores do projeto (Confluence Mode, classic_analysis, smc/context,
+RealtimeStrategyEngine) calculam SMA/desvio padrão, RSI, ATR, ADX e máximas/mínimas
+móveis a partir destes kernels, garantindo os mesmos números no backtest e no live.
+
+Convenções:
+- Entrada e saída são arrays float64 do mesmo tamanho da série (alinhados ao candle).
+- Posições sem janela completa (warm-up) ou com NaN na janela retornam NaN,
+  igual a pandas .rolling(window) com min_periods=window.
+- smoothing="sma" reproduz as médias simples usadas historicamente no projeto;
+  smoothing="wilder" aplica a suavização de Wilder (RMA) clássica.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+# Tamanho mínimo de bloco das somas acumuladas: blocos curtos mantêm a referência
+# próxima dos preços da janela e limitam o erro de arredondamento do cumsum
+_BLOCK_SIZE = 64
+
+_SMOOTHING_METHODS = ("sma", "wilder")
+
+
+def as_float_array(values) -> np.ndarray:
+    """Converte listas/Series/arrays em array float64 contíguo"""
+    if hasattr(values, "to_numpy"):
+        values = values.to_numpy(dtype=np.float64)
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _check_window(window: int):
+    if window < 1:
+        raise ValueError(f"window deve ser >= 1: {window}")
+
+
+def _check_smoothing(smoothing: str):
+    if smoothing not in _SMOOTHING_METHODS:
+        raise ValueError(f"smoothing inválido: {smoothing} (use {', '.join(_SMOOTHING_METHODS)})")
+
+
+# ==================== SOMAS MÓVEIS ====================
+
+def _rolling_moments(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Somas móveis de (x - ref) e (x - ref)² em O(n).
+
+    A série é dividida em blocos curtos (>= _BLOCK_SIZE candles); cada bloco recebe as
+    window-1 posições anteriores (halo) e uma referência própria (primeiro valor
+    finito do bloco). As somas acumuladas ficam pequenas e centradas, evitando o
+    cancelamento catastrófico de sum(x²) - sum(x)²/n em preços altos (ex.: BTC).
+
+    Returns:
+        (ref, soma, soma_quadrados) alinhados ao último candle de cada janela;
+        janelas incompletas ou com NaN retornam NaN.
+    """
+    n = values.size
+    block = max(_BLOCK_SIZE, 2 * window)
+    n_blocks = -(-n // block)
+    halo = window - 1
+
+    padded = np.full(halo + n_blocks * block, np.nan)
+    padded[halo:halo + n] = values
+    positions = np.arange(n_blocks)[:, None] * block + np.arange(block + halo)[None, :]
+    segments = padded[positions]
+
+    missing = np.isnan(segments)
+    body = segments[:, halo:]
+    finite_body = np.where(missing[:, halo:], np.inf, np.arange(block)[None, :])
+    first_finite = np.minimum(finite_body.min(axis=1), block - 1).astype(np.int64)
+    ref = body[np.arange(n_blocks), first_finite]
+    ref = np.where(np.isnan(ref), 0.0, ref)
+
+    centered = np.where(missing, 0.0, segments - ref[:, None])
+    zeros = np.zeros((n_blocks, 1))
+    cum = np.concatenate([zeros, np.cumsum(centered, axis=1)], axis=1)
+    cum_sq = np.concatenate([zeros, np.cumsum(centered * centered, axis=1)], axis=1)
+    cum_missing = np.concatenate([zeros, np.cumsum(missing, axis=1)], axis=1)
+
+    total = (cum[:, window:] - cum[:, :-window]).ravel()[:n]
+    total_sq = (cum_sq[:, window:] - cum_sq[:, :-window]).ravel()[:n]
+    has_missing = (cum_missing[:, window:] - cum_missing[:, :-window]).ravel()[:n] > 0
+
+    total[has_missing] = np.nan
+    total_sq[has_missing] = np.nan
+    return np.repeat(ref, block)[:n], total, total_sq
+
+
+def rolling_sum(values, window: int) -> np.ndarray:
+    """Soma móvel de `window` candles"""
+    _check_window(window)
+    values = as_float_array(values)
+    if values.size == 0:
+        return values.copy()
+    ref, total, _ = _rolling_moments(values, window)
+    return total + ref * window
+
+
+def rolling_mean(values, window: int) -> np.ndarray:
+    """Média móvel simples (SMA) de `window` candles"""
+    _check_window(window)
+    values = as_float_array(values)
+    if values.size == 0:
+        return values.copy()
+    ref, total, _ = _rolling_moments(values, window)
+    return ref + total / window
+
+
+def rolling_std(values, window: int, ddof: int = 0) -> np.ndarray:
+    """
+    Desvio padrão móvel.
+
+    Args:
+        ddof: 0 = populacional (np.std), 1 = amostral (pandas .rolling().std())
+    """
+    _check_window(window)
+    values = as_float_array(values)
+    if values.size == 0:
+        return values.copy()
+    if window - ddof <= 0:
+        return np.full(values.size, np.nan)
+    _, total, total_sq = _rolling_moments(values, window)
+    variance = (total_sq - total * total / window) / (window - ddof)
+    # Janelas constantes têm desvio exatamente 0 (sem resíduo de arredondamento)
+    constant = rolling_max(values, window) == rolling_min(values, window)
+    variance[constant] = 0.0
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+# ==================== MÁXIMA / MÍNIMA MÓVEIS ====================
+
+def _rolling_extreme(values, window: int, ufunc: np.ufunc) -> np.ndarray:
+    """
+    Máxima/mínima móvel em O(n) pelo algoritmo de van Herk/Gil-Werman.
+
+    Versão em lote do deque monotônico: blocos de `window` candles com acumulado
+    para frente (prefixo) e para trás (sufixo); cada janela é ufunc(sufixo[início],
+    prefixo[fim]). NaN na janela propaga NaN, como no pandas.
+    """
+    _check_window(window)
+    values = as_float_array(values)
+    n = values.size
+    result = np.full(n, np.nan)
+    if n < window:
+        return result
+
+    n_blocks = -(-n // window)
+    padded = np.full(n_blocks * window, np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(n_blocks, window)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    result[window - 1:] = ufunc(suffix[:n - window + 1], prefix[window - 1:n])
+    return result
+
+
+def rolling_max(values, window: int) -> np.ndarray:
+    """Máxima móvel de `window` candles"""
+    return _rolling_extreme(values, window, np.maximum)
+
+
+def rolling_min(values, window: int) -> np.ndarray:
+    """Mínima móvel de `window` candles"""
+    return _rolling_extreme(values, window, np.minimum)
+
+
+# ==================== SUAVIZAÇÕES RECURSIVAS ====================
+
+def _first_full_window(values: np.ndarray, period: int) -> int:
+    """Início do primeiro bloco de `period` valores finitos consecutivos (-1 se não houver)"""
+    if values.size < period:
+        return -1
+    finite = np.concatenate([[0], np.cumsum(np.isfinite(values))])
+    counts = finite[period:] - finite[:-period]
+    starts = np.flatnonzero(counts == period)
+    return int(starts[0]) if starts.size else -1
+
+
+def ema(values, period: int, seed: str = "sma") -> np.ndarray:
+    """
+    Média móvel exponencial: ema = (preço - ema) * 2/(period+1) + ema.
+
+    Args:
+        seed: "sma" = semente é a média dos primeiros `period` valores (primeiro
+              valor no candle period-1); "first" = semente é o primeiro valor.
+    """
+    _check_window(period)
+    values = as_float_array(values)
+    result = np.full(values.size, np.nan)
+    if seed == "first":
+        start = 0 if values.size else -1
+        seed_end = start
+    elif seed == "sma":
+        start = _first_full_window(values, period)
+        seed_end = start + period - 1
+    else:
+        raise ValueError(f"seed inválida: {seed} (use sma, first)")
+    if start < 0:
+        return result
+
+    multiplier = 2 / (period + 1)
+    current = values[start] if seed == "first" else np.mean(values[start:start + period])
+    result[seed_end] = current
+    out = result.tolist()
+    for i, price in enumerate(values[seed_end + 1:].tolist(), start=seed_end + 1):
+        current = (price - current) * multiplier + current
+        out[i] = current
+    return np.asarray(out, dtype=np.float64)
+
+
+def wilder_smooth(values, period: int) -> np.ndarray:
+    """
+    Suavização de Wilder (RMA): semente = SMA dos primeiros `period` valores finitos,
+    depois media = media + (valor - media) / period.
+    """
+    _check_window(period)
+    values = as_float_array(values)
+    result = np.full(values.size, np.nan)
+    start = _first_full_window(values, period)
+    if start < 0:
+        return result
+
+    seed_end = start + period - 1
+    current = float(np.mean(values[start:start + period]))
+    out = result.tolist()
+    out[seed_end] = current
+    for i, value in enumerate(values[seed_end + 1:].tolist(), start=seed_end + 1):
+        current = current + (value - current) / period
+        out[i] = current
+    return np.asarray(out, dtype=np.float64)
+
+
+def smooth(values, period: int, smoothing: str = "wilder") -> np.ndarray:
+    """Aplica a suavização escolhida ("sma" ou "wilder")"""
+    _check_smoothing(smoothing)
+    if smoothing == "sma":
+        return rolling_mean(values, period)
+    return wilder_smooth(values, period)
+
+
+# ==================== INDICADORES ====================
+
+def rsi(closes, period: int = 14, smoothing: str = "wilder", flat_value: float = np.nan) -> np.ndarray:
+    """
+    RSI (Relative Strength Index).
+
+    A variação do primeiro candle é tratada como 0 (mesmo comportamento de
+    delta.where(delta > 0, 0) no pandas), portanto com smoothing="sma" o primeiro
+    valor aparece no candle period-1.
+
+    Args:
+        flat_value: Valor quando ganhos e perdas médios são ambos 0 (série parada)
+    """
+    closes = as_float_array(closes)
+    delta = np.zeros(closes.size)
+    if closes.size > 1:
+        delta[1:] = np.diff(closes)
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+    if smoothing == "wilder":
+        # Semente de Wilder usa as `period` primeiras variações reais
+        gains[0] = losses[0] = np.nan
+    avg_gain = smooth(gains, period, smoothing)
+    avg_loss = smooth(losses, period, smoothing)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        values = 100 - (100 / (1 + rs))
+    flat = (avg_gain == 0) & (avg_loss == 0)
+    values[flat] = flat_value
+    return values
+
+
+def true_range(highs, lows, closes) -> np.ndarray:
+    """True Range; o primeiro candle usa apenas high - low"""
+    highs = as_float_array(highs)
+    lows = as_float_array(lows)
+    closes = as_float_array(closes)
+    tr = highs - lows
+    if closes.size > 1:
+        prev_close = closes[:-1]
+        tr[1:] = np.fmax(np.fmax(tr[1:], np.abs(highs[1:] - prev_close)), np.abs(lows[1:] - prev_close))
+    return tr
+
+
+def atr(highs, lows, closes, period: int = 14, smoothing: str = "wilder") -> np.ndarray:
+    """ATR (Average True Range)"""
+    return smooth(true_range(highs, lows, closes), period, smoothing)
+
+
+def directional_movement(highs, lows) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    +DM / -DM como definidos no projeto: variação positiva da máxima e variação
+    negativa da mínima, cada uma truncada em 0 (primeiro candle = NaN).
+    """
+    highs = as_float_array(highs)
+    lows = as_float_array(lows)
+    plus_dm = np.full(highs.size, np.nan)
+    minus_dm = np.full(lows.size, np.nan)
+    if highs.size > 1:
+        plus_dm[1:] = np.maximum(np.diff(highs), 0.0)
+        minus_dm[1:] = np.maximum(-np.diff(lows), 0.0)
+    return plus_dm, minus_dm
+
+
+def adx(highs, lows, closes, period: int = 14,
+        smoothing: str = "wilder") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    ADX (Average Directional Index).
+
+    Returns:
+        (adx, plus_di, minus_di)
+    """
+    atr_values = atr(highs, lows, closes, period, smoothing)
+    plus_dm, minus_dm = directional_movement(highs, lows)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = 100 * (smooth(plus_dm, period, smoothing) / atr_values)
+        minus_di = 100 * (smooth(minus_dm, period, smoothing) / atr_values)
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    return smooth(dx, period, smoothing), plus_di, minus_di
+
+
+def stochastic_k(highs, lows, closes, period: int = 14, flat_value: float = np.nan) -> np.ndarray:
+    """
+    %K bruto do Estocástico: (close - menor mínima) / (maior máxima - menor mínima) * 100.
+
+    Args:
+        flat_value: Valor quando a máxima e a mínima da janela coincidem
+    """
+    closes = as_float_array(closes)
+    highest_high = rolling_max(highs, period)
+    lowest_low = rolling_min(lows, period)
+    value_range = highest_high - lowest_low
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = ((closes - lowest_low) / value_range) * 100
+    values[value_range == 0] = flat_value
+    return values
+
+
+def williams_r(highs, lows, closes, period: int = 14, flat_value: float = np.nan) -> np.ndarray:
+    """
+    Williams %R: (maior máxima - close) / (maior máxima - menor mínima) * -100.
+
+    Args:
+        flat_value: Valor quando a máxima e a mínima da janela coincidem
+    """
+    closes = as_float_array(closes)
+    highest_high = rolling_max(highs, period)
+    lowest_low = rolling_min(lows, period)
+    value_range = highest_high - lowest_low
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = ((highest_high - closes) / value_range) * -100
+    values[value_range == 0] = flat_value
+    return values
@@ -2,8 +2,17 @@
 Parabolic SAR (Stop and Reverse)
 Seguidor de tendência baseado em aceleração e reversão
 """
+import numpy as np
 import pandas as pd
 from market_manus.core.signal import Signal
+from market_manus.strategies.signal_series import (
+    DEFAULT_LOOKBACK,
+    SignalSeries,
+    ohlcv_arrays,
+    series_or_empty,
+    window_column,
+    window_count,
+)
 
 
 def parabolic_sar_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
@@ -123,3 +132,66 @@ def parabolic_sar_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
         )
     
     return Signal(action="HOLD", confidence=0.0, tags=["CLASSIC:PSAR"], reasons=["Preço em cima do PSAR"])
+
+
+def parabolic_sar_series(candles: pd.DataFrame, params: dict = None,
+                         lookback: int = DEFAULT_LOOKBACK) -> SignalSeries:
+    """
+    Versão vetorizada de parabolic_sar_signal aplicada em janelas deslizantes.
+
+    O PSAR depende do caminho desde o início de cada janela, então a recursão é
+    executada em lockstep: cada passo avança a mesma posição de TODAS as janelas
+    com operações NumPy. Resultado idêntico a run_windowed(parabolic_sar_signal, ...).
+    """
+    params = params or {}
+    af_start = params.get('af_start', 0.02)
+    af_step = params.get('af_step', 0.02)
+    af_max = params.get('af_max', 0.2)
+
+    if lookback + 1 < 5 or window_count(len(candles), lookback) == 0:
+        return SignalSeries.empty()
+
+    arrays = ohlcv_arrays(candles)
+    high, low, close = arrays['high'], arrays['low'], arrays['close']
+
+    def col(values, position):
+        return window_column(values, position, lookback)
+
+    psar = col(low, 0).copy()
+    bull = np.ones(psar.size, dtype=bool)
+    af = np.full(psar.size, af_start, dtype=np.float64)
+    ep = col(high, 0).copy()
+    hp = col(high, 0).copy()
+    lp = col(low, 0).copy()
+
+    for j in range(1, lookback + 1):
+        h = col(high, j)
+        l = col(low, j)
+        psar_value = psar + af * (ep - psar)
+
+        bull_value = np.minimum(psar_value, col(low, j - 1))
+        bear_value = np.maximum(psar_value, col(high, j - 1))
+        if j > 1:
+            bull_value = np.minimum(bull_value, col(low, j - 2))
+            bear_value = np.maximum(bear_value, col(high, j - 2))
+
+        to_bear = bull & (l < bull_value)
+        to_bull = ~bull & (h > bear_value)
+
+        psar = np.where(bull, bull_value, bear_value)
+        psar = np.where(to_bear, hp, np.where(to_bull, lp, psar))
+        ep = np.where(to_bear, lp, np.where(to_bull, hp, ep))
+        af = np.where(to_bear | to_bull, af_start, af)
+        bull = (bull & ~to_bear) | to_bull
+
+        # Atualizar extreme point e acceleration factor
+        new_high = bull & (h > ep)
+        new_low = ~bull & (l < ep)
+        ep = np.where(new_high, h, np.where(new_low, l, ep))
+        af = np.where(new_high | new_low, np.minimum(af + af_step, af_max), af)
+        hp = np.where(bull, np.maximum(hp, h), hp)
+        lp = np.where(bull, lp, np.minimum(lp, l))
+
+    current_price = col(close, lookback)
+    directions = np.where(psar < current_price, 1, np.where(psar > current_price, -1, 0))
+    return series_or_empty(directions, lookback)
@@ -0,0 +1,145 @@
+"""
+Signal Series - Contrato vetorizado para sinais calculados sobre a série inteira.
+
+Os detectores clássicos e SMC (detect_bos, vwap_signal, cpr_signal, ...) avaliam
+UMA janela e retornam um Signal. Para backtests, cada estratégia também expõe um
+caminho "*_series" que avalia todas as janelas de uma vez e retorna arrays NumPy
+de (índice, direção). O caminho por janela continua sendo a referência:
+run_windowed() reproduz exatamente o loop antigo e é usado nos testes de paridade.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_manus.core.signal import Signal
+
+# Janela padrão usada pelo Confluence Mode: candles [i-50, i] (51 linhas)
+DEFAULT_LOOKBACK = 50
+
+_ACTION_TO_DIRECTION = {"BUY": 1, "SELL": -1}
+_DIRECTION_TO_ACTION = {1: "BUY", -1: "SELL"}
+
+
+@dataclass
+class SignalSeries:
+    """
+    Sinais de uma estratégia sobre uma série completa.
+
+    Attributes:
+        index: Índices dos candles com sinal (int64, ordenados, sem repetição)
+        direction: Direção de cada sinal (int8): +1 = BUY, -1 = SELL
+    """
+    index: np.ndarray
+    direction: np.ndarray
+
+    def __post_init__(self):
+        self.index = np.asarray(self.index, dtype=np.int64)
+        self.direction = np.asarray(self.direction, dtype=np.int8)
+        if self.index.shape != self.direction.shape:
+            raise ValueError(
+                f"index e direction devem ter o mesmo tamanho: {self.index.shape} != {self.direction.shape}"
+            )
+
+    def __len__(self) -> int:
+        return int(self.index.size)
+
+    @classmethod
+    def empty(cls) -> 'SignalSeries':
+        """Série sem sinais"""
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8))
+
+    @classmethod
+    def from_directions(cls, directions: np.ndarray, offset: int = 0) -> 'SignalSeries':
+        """
+        Cria a série a partir de um array denso de direções (0 = HOLD).
+
+        Args:
+            directions: Array com +1/-1/0 por posição
+            offset: Índice do candle correspondente à posição 0 do array
+        """
+        directions = np.asarray(directions)
+        positions = np.flatnonzero(directions)
+        return cls(positions + offset, directions[positions])
+
+    @classmethod
+    def from_tuples(cls, signals: List[Tuple[int, str]]) -> 'SignalSeries':
+        """Converte o formato legado List[(índice, "BUY"/"SELL")] (ordena por índice)"""
+        if not signals:
+            return cls.empty()
+        ordered = sorted(signals, key=lambda s: s[0])
+        index = np.fromiter((idx for idx, _ in ordered), dtype=np.int64, count=len(ordered))
+        direction = np.fromiter((_ACTION_TO_DIRECTION[d] for _, d in ordered), dtype=np.int8, count=len(ordered))
+        return cls(index, direction)
+
+    def to_tuples(self) -> List[Tuple[int, str]]:
+        """Converte para o formato legado List[(índice, "BUY"/"SELL")]"""
+        return [
+            (idx, _DIRECTION_TO_ACTION[d])
+            for idx, d in zip(self.index.tolist(), self.direction.tolist())
+        ]
+
+    def to_dense(self, length: int) -> np.ndarray:
+        """Array denso int8 de tamanho `length` com a direção em cada candle (0 = HOLD)"""
+        dense = np.zeros(length, dtype=np.int8)
+        dense[self.index] = self.direction
+        return dense
+
+
+def ohlcv_arrays(candles: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Extrai colunas OHLCV como arrays float64 contíguos.
+    Volume ausente é preenchido com 1.0 (mesmo default usado no Confluence Mode).
+    """
+    arrays = {}
+    for column in ("open", "high", "low", "close"):
+        arrays[column] = np.ascontiguousarray(candles[column].to_numpy(dtype=np.float64))
+    if "volume" in candles.columns:
+        arrays["volume"] = np.ascontiguousarray(candles["volume"].to_numpy(dtype=np.float64))
+    else:
+        arrays["volume"] = np.ones(len(candles), dtype=np.float64)
+    return arrays
+
+
+def run_windowed(detector: Callable[..., Signal], candles: pd.DataFrame,
+                 lookback: int = DEFAULT_LOOKBACK, **kwargs) -> SignalSeries:
+    """
+    Caminho de REFERÊNCIA: aplica um detector de janela única em janelas deslizantes.
+
+    Para cada i em [lookback, len(candles)) avalia detector(candles[i-lookback:i+1])
+    exatamente como o loop original do Confluence Mode. É O(n * lookback) e aloca
+    um DataFrame por candle - use apenas para validar os caminhos *_series.
+    """
+    directions = np.zeros(len(candles), dtype=np.int8)
+    for i in range(lookback, len(candles)):
+        window_df = candles.iloc[max(0, i - lookback):i + 1].reset_index(drop=True)
+        signal = detector(window_df, **kwargs)
+        if signal.action != "HOLD":
+            directions[i] = _ACTION_TO_DIRECTION[signal.action]
+    return SignalSeries.from_directions(directions)
+
+
+def window_count(n: int, lookback: int) -> int:
+    """Número de janelas completas [i-lookback, i] avaliadas em uma série de n candles"""
+    return max(n - lookback, 0)
+
+
+def window_column(values: np.ndarray, position: int, lookback: int) -> np.ndarray:
+    """
+    Coluna `position` de todas as janelas [i-lookback, i], i = lookback..n-1.
+
+    Equivale a sliding_window_view(values, lookback + 1)[:, position], mas é uma
+    fatia contígua - permite percorrer as janelas "em lockstep" (uma posição por
+    vez para todas as janelas) com o mesmo encadeamento de operações do loop original.
+    """
+    count = window_count(len(values), lookback)
+    return values[position:position + count]
+
+
+def series_or_empty(directions: Optional[np.ndarray], lookback: int) -> SignalSeries:
+    """Converte direções por janela (posição 0 = candle `lookback`) em SignalSeries"""
+    if directions is None or directions.size == 0:
+        return SignalSeries.empty()
+    return SignalSeries.from_directions(directions, offset=lookback)
@@ -15,9 +15,12 @@ from .patterns import (
     detect_liquidity_sweep,
     detect_liquidity_zones,
     ConfluenceEngine,
-    confluence_decision
+    confluence_decision,
+    iter_confluence_decisions
 )
 
+from .structure_tracker import SMCStructureTracker
+
 from .ict_framework import (
     ICTFramework,
     detect_ict_signal,
@@ -57,6 +60,8 @@ __all__ = [
     'detect_liquidity_zones',
     'ConfluenceEngine',
     'confluence_decision',
+    'iter_confluence_decisions',
+    'SMCStructureTracker',
     'ICTFramework',
     'detect_ict_signal',
     'validate_ict_setup_components',
@@ -10,9 +10,11 @@ Classifica o contexto de mercado para filtrar setups:
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from dataclasses import dataclass, field
 from market_manus.core.signal import Signal
+from market_manus.strategies import indicator_kernels as kernels
+from market_manus.strategies.smc.market_structure import ohlcv_arrays
 
 
 @dataclass
@@ -28,7 +30,8 @@ class MarketContext:
 
 
 def detect_consolidation(df: pd.DataFrame, adx_threshold: float = 20, 
-                         atr_threshold: float = 0.5) -> MarketContext:
+                         atr_threshold: float = 0.5,
+                         indicators: Optional[Dict[str, np.ndarray]] = None) -> MarketContext:
     """
     Detecta consolidação:
     - ADX < 20 (sem tendência definida)
@@ -38,12 +41,13 @@ def detect_consolidation(df: pd.DataFrame, adx_threshold: float = 20,
     if df is None or len(df) < 14:
         return MarketContext(regime="UNKNOWN", strength=0.0, adx=0.0, atr=0.0)
     
-    adx = calculate_adx(df, period=14)
-    atr = calculate_atr(df, period=14)
-    atr_ma = atr.mean()
+    indicators = indicators or calculate_context_indicators(df)
+    adx = indicators["adx"]
+    atr = indicators["atr"]
+    atr_ma = np.nanmean(atr)
     
-    current_adx = adx.iat[-1] if not pd.isna(adx.iat[-1]) else 0
-    current_atr = atr.iat[-1] if not pd.isna(atr.iat[-1]) else 0
+    current_adx = adx[-1] if not np.isnan(adx[-1]) else 0
+    current_atr = atr[-1] if not np.isnan(atr[-1]) else 0
     
     is_consolidating = current_adx < adx_threshold and current_atr < atr_ma * atr_threshold
     
@@ -66,7 +70,9 @@ def detect_consolidation(df: pd.DataFrame, adx_threshold: float = 20,
 
 
 def detect_impulse(df: pd.DataFrame, adx_threshold: float = 25, 
-                   displacement_threshold: float = 0.015) -> MarketContext:
+                   displacement_threshold: float = 0.015,
+                   indicators: Optional[Dict[str, np.ndarray]] = None,
+                   arrays: Optional[Tuple[np.ndarray, ...]] = None) -> MarketContext:
     """
     Detecta movimento impulsivo:
     - ADX > 25 (tendência forte)
@@ -76,20 +82,18 @@ def detect_impulse(df: pd.DataFrame, adx_threshold: float = 25,
     if df is None or len(df) < 14:
         return MarketContext(regime="UNKNOWN", strength=0.0, adx=0.0, atr=0.0)
     
-    adx = calculate_adx(df, period=14)
-    current_adx = adx.iat[-1] if not pd.isna(adx.iat[-1]) else 0
+    indicators = indicators or calculate_context_indicators(df)
+    adx = indicators["adx"]
+    current_adx = adx[-1] if not np.isnan(adx[-1]) else 0
     
-    highs = df['high']
-    lows = df['low']
-    closes = df['close']
-    volumes = df['volume'] if 'volume' in df.columns else pd.Series([1.0] * len(df))
+    _, highs, lows, closes, volumes = ohlcv_arrays(df) if arrays is None else arrays
     
-    recent_high = highs.iloc[-5:].max()
-    recent_low = lows.iloc[-5:].min()
+    recent_high = highs[-5:].max()
+    recent_low = lows[-5:].min()
     displacement = (recent_high - recent_low) / recent_low if recent_low > 0 else 0
     
-    avg_volume = volumes.iloc[-20:].mean()
-    recent_volume = volumes.iloc[-5:].mean()
+    avg_volume = volumes[-20:].mean()
+    recent_volume = volumes[-5:].mean()
     volume_surge = recent_volume / avg_volume if avg_volume > 0 else 1.0
     
     is_impulse = (current_adx > adx_threshold and 
@@ -97,8 +101,8 @@ def detect_impulse(df: pd.DataFrame, adx_threshold: float = 25,
                   volume_surge > 1.1)
     
     if is_impulse:
-        last_close = closes.iat[-1]
-        ma_20 = closes.iloc[-20:].mean()
+        last_close = closes[-1]
+        ma_20 = closes[-20:].mean()
         trend_direction = "BULLISH" if last_close > ma_20 else "BEARISH"
         
         adx_strength = min((current_adx - adx_threshold) / 30, 1.0)
@@ -109,7 +113,7 @@ def detect_impulse(df: pd.DataFrame, adx_threshold: float = 25,
             regime="IMPULSE",
             strength=min(strength, 1.0),
             adx=current_adx,
-            atr=calculate_atr(df, period=14).iat[-1],
+            atr=indicators["atr"][-1],
             trend_direction=trend_direction,
             meta={
                 "displacement": displacement,
@@ -122,7 +126,9 @@ def detect_impulse(df: pd.DataFrame, adx_threshold: float = 25,
     return MarketContext(regime="NOT_IMPULSE", strength=0.0, adx=current_adx, atr=0.0)
 
 
-def detect_reversal(df: pd.DataFrame, rsi_divergence: bool = True) -> MarketContext:
+def detect_reversal(df: pd.DataFrame, rsi_divergence: bool = True,
+                    indicators: Optional[Dict[str, np.ndarray]] = None,
+                    arrays: Optional[Tuple[np.ndarray, ...]] = None) -> MarketContext:
     """
     Detecta reversão:
     - Divergência RSI (opcional)
@@ -132,42 +138,41 @@ def detect_reversal(df: pd.DataFrame, rsi_divergence: bool = True) -> MarketCont
     if df is None or len(df) < 20:
         return MarketContext(regime="UNKNOWN", strength=0.0, adx=0.0, atr=0.0)
     
-    closes = df['close']
-    highs = df['high']
-    lows = df['low']
-    volumes = df['volume'] if 'volume' in df.columns else pd.Series([1.0] * len(df))
+    indicators = indicators or calculate_context_indicators(df)
+    _, highs, lows, closes, volumes = ohlcv_arrays(df) if arrays is None else arrays
+    rsi = indicators["rsi"]
     
-    rsi = calculate_rsi(closes, period=14)
-    
-    recent_price_high_idx = highs.iloc[-10:].idxmax()
-    recent_price_low_idx = lows.iloc[-10:].idxmin()
+    # Posições (não rótulos do índice) dos extremos nas últimas 10 / 10 anteriores
+    n = len(df)
+    recent_price_high_idx = n - 10 + int(np.argmax(highs[-10:]))
+    recent_price_low_idx = n - 10 + int(np.argmin(lows[-10:]))
     
     has_bearish_divergence = False
     has_bullish_divergence = False
     
-    if rsi_divergence and not rsi.empty:
-        if recent_price_high_idx == highs.iloc[-10:].index[-1]:
-            prev_high_idx = highs.iloc[-20:-10].idxmax()
-            if highs.loc[recent_price_high_idx] > highs.loc[prev_high_idx]:
-                if rsi.loc[recent_price_high_idx] < rsi.loc[prev_high_idx]:
+    if rsi_divergence and rsi.size:
+        if recent_price_high_idx == n - 1:
+            prev_high_idx = n - 20 + int(np.argmax(highs[-20:-10]))
+            if highs[recent_price_high_idx] > highs[prev_high_idx]:
+                if rsi[recent_price_high_idx] < rsi[prev_high_idx]:
                     has_bearish_divergence = True
         
-        if recent_price_low_idx == lows.iloc[-10:].index[-1]:
-            prev_low_idx = lows.iloc[-20:-10].idxmin()
-            if lows.loc[recent_price_low_idx] < lows.loc[prev_low_idx]:
-                if rsi.loc[recent_price_low_idx] > rsi.loc[prev_low_idx]:
+        if recent_price_low_idx == n - 1:
+            prev_low_idx = n - 20 + int(np.argmin(lows[-20:-10]))
+            if lows[recent_price_low_idx] < lows[prev_low_idx]:
+                if rsi[recent_price_low_idx] > rsi[prev_low_idx]:
                     has_bullish_divergence = True
     
-    avg_volume = volumes.iloc[-30:].mean()
-    current_volume = volumes.iat[-1]
+    avg_volume = volumes[-30:].mean()
+    current_volume = volumes[-1]
     is_climax = current_volume > avg_volume * 2.0
     
-    ma_short = closes.iloc[-10:].mean()
-    ma_long = closes.iloc[-20:].mean()
-    structure_change = (closes.iat[-1] < ma_short < ma_long) or (closes.iat[-1] > ma_short > ma_long)
+    ma_short = closes[-10:].mean()
+    ma_long = closes[-20:].mean()
+    structure_change = (closes[-1] < ma_short < ma_long) or (closes[-1] > ma_short > ma_long)
     
     if has_bearish_divergence or has_bullish_divergence or (is_climax and structure_change):
-        reversal_type = "BEARISH" if has_bearish_divergence or (structure_change and closes.iat[-1] < ma_short) else "BULLISH"
+        reversal_type = "BEARISH" if has_bearish_divergence or (structure_change and closes[-1] < ma_short) else "BULLISH"
         
         strength = 0.5
         if has_bearish_divergence or has_bullish_divergence:
@@ -178,8 +183,8 @@ def detect_reversal(df: pd.DataFrame, rsi_divergence: bool = True) -> MarketCont
         return MarketContext(
             regime="REVERSAL",
             strength=min(strength, 1.0),
-            adx=calculate_adx(df, period=14).iat[-1],
-            atr=calculate_atr(df, period=14).iat[-1],
+            adx=indicators["adx"][-1],
+            atr=indicators["atr"][-1],
             trend_direction=reversal_type,
             meta={
                 "divergence": "BEARISH" if has_bearish_divergence else ("BULLISH" if has_bullish_divergence else "NONE"),
@@ -191,7 +196,7 @@ def detect_reversal(df: pd.DataFrame, rsi_divergence: bool = True) -> MarketCont
     return MarketContext(regime="NOT_REVERSAL", strength=0.0, adx=0.0, atr=0.0)
 
 
-def detect_fvg_context(df: pd.DataFrame) -> MarketContext:
+def detect_fvg_context(df: pd.DataFrame, arrays: Optional[Tuple[np.ndarray, ...]] = None) -> MarketContext:
     """
     Fair Value Gap como contexto (não sinal):
     - FVG 3-candle (candle 1 e 3, não 2 consecutivos)
@@ -201,46 +206,28 @@ def detect_fvg_context(df: pd.DataFrame) -> MarketContext:
     if df is None or len(df) < 3:
         return MarketContext(regime="NO_FVG", strength=0.0, adx=0.0, atr=0.0, fvg_present=False)
     
-    gaps = []
+    _, highs, lows, _, _ = ohlcv_arrays(df) if arrays is None else arrays
     
-    for i in range(2, len(df)):
-        candle_1_high = df['high'].iat[i-2]
-        candle_1_low = df['low'].iat[i-2]
-        candle_3_high = df['high'].iat[i]
-        candle_3_low = df['low'].iat[i]
-        
-        if candle_3_low > candle_1_high:
-            gap_size = candle_3_low - candle_1_high
-            gaps.append({
-                "type": "bullish",
-                "gap": (candle_1_high, candle_3_low),
-                "size": gap_size,
-                "index": i,
-                "retested": False
-            })
-        
-        elif candle_3_high < candle_1_low:
-            gap_size = candle_1_low - candle_3_high
-            gaps.append({
-                "type": "bearish",
-                "gap": (candle_3_high, candle_1_low),
-                "size": gap_size,
-                "index": i,
-                "retested": False
-            })
+    # gap entre candle 1 (i-2) e candle 3 (i); bullish tem precedência
+    bullish = lows[2:] > highs[:-2]
+    bearish = ~bullish & (highs[2:] < lows[:-2])
     
-    for gap in gaps:
+    gaps = []
+    for i in np.flatnonzero(bullish | bearish) + 2:
+        if bullish[i - 2]:
+            gap = {"type": "bullish", "gap": (highs[i-2], lows[i]), "size": lows[i] - highs[i-2]}
+        else:
+            gap = {"type": "bearish", "gap": (highs[i], lows[i-2]), "size": lows[i-2] - highs[i]}
         gap_low, gap_high = gap['gap']
-        for i in range(gap['index'] + 1, len(df)):
-            if df['low'].iat[i] <= gap_high and df['high'].iat[i] >= gap_low:
-                gap['retested'] = True
-                break
+        gap["index"] = int(i)
+        gap["retested"] = bool(np.any((lows[i+1:] <= gap_high) & (highs[i+1:] >= gap_low)))
+        gaps.append(gap)
     
     fresh_gaps = [g for g in gaps if not g['retested']]
     
     if fresh_gaps:
         last_gap = fresh_gaps[-1]
-        avg_range = df['high'].sub(df['low']).mean()
+        avg_range = (highs - lows).mean()
         strength = min(last_gap['size'] / avg_range, 1.0) if avg_range > 0 else 0.5
         
         return MarketContext(
@@ -261,87 +248,72 @@ def detect_fvg_context(df: pd.DataFrame) -> MarketContext:
     return MarketContext(regime="NO_FVG", strength=0.0, adx=0.0, atr=0.0, fvg_present=False)
 
 
-def get_market_context(df: pd.DataFrame) -> MarketContext:
+def get_market_context(df: pd.DataFrame,
+                       indicators: Optional[Dict[str, np.ndarray]] = None,
+                       arrays: Optional[Tuple[np.ndarray, ...]] = None) -> MarketContext:
     """
     Retorna o contexto dominante de mercado priorizando:
     1. Reversal (mais crítico)
     2. Impulse (oportunidade)
     3. Consolidation (evitar)
+    
+    Args:
+        df: DataFrame OHLCV
+        indicators: ADX/ATR/RSI já calculados e alinhados com df
+            (ver calculate_context_indicators); calculados uma vez se None
+        arrays: ohlcv_arrays(df); extraído uma vez se None
     """
-    reversal_ctx = detect_reversal(df)
+    if df is not None and len(df) >= 14:
+        indicators = indicators or calculate_context_indicators(df)
+        if arrays is None:
+            arrays = ohlcv_arrays(df)
+    
+    reversal_ctx = detect_reversal(df, indicators=indicators, arrays=arrays)
     if reversal_ctx.regime == "REVERSAL":
-        fvg_ctx = detect_fvg_context(df)
+        fvg_ctx = detect_fvg_context(df, arrays=arrays)
         reversal_ctx.fvg_present = fvg_ctx.fvg_present
         if fvg_ctx.fvg_present:
             reversal_ctx.meta.update(fvg_ctx.meta)
         return reversal_ctx
     
-    impulse_ctx = detect_impulse(df)
+    impulse_ctx = detect_impulse(df, indicators=indicators, arrays=arrays)
     if impulse_ctx.regime == "IMPULSE":
-        fvg_ctx = detect_fvg_context(df)
+        fvg_ctx = detect_fvg_context(df, arrays=arrays)
         impulse_ctx.fvg_present = fvg_ctx.fvg_present
         if fvg_ctx.fvg_present:
             impulse_ctx.meta.update(fvg_ctx.meta)
         return impulse_ctx
     
-    consolidation_ctx = detect_consolidation(df)
+    consolidation_ctx = detect_consolidation(df, indicators=indicators)
     if consolidation_ctx.regime == "CONSOLIDATION":
         return consolidation_ctx
     
     return MarketContext(regime="UNDEFINED", strength=0.0, adx=0.0, atr=0.0)
 
 
+def calculate_context_indicators(df: pd.DataFrame, period: int = 14) -> Dict[str, np.ndarray]:
+    """ADX, ATR e RSI (médias simples) da janela, na forma usada pelos detectores de contexto"""
+    highs, lows, closes = df['high'], df['low'], df['close']
+    adx, _, _ = kernels.adx(highs, lows, closes, period, smoothing="sma")
+    return {
+        "adx": adx,
+        "atr": kernels.atr(highs, lows, closes, period, smoothing="sma"),
+        "rsi": kernels.rsi(closes, period, smoothing="sma")
+    }
+
+
 def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """Calcula ADX (Average Directional Index)"""
-    high = df['high']
-    low = df['low']
-    close = df['close']
-    
-    plus_dm = high.diff()
-    minus_dm = -low.diff()
-    
-    plus_dm[plus_dm < 0] = 0
-    minus_dm[minus_dm < 0] = 0
-    
-    tr1 = high - low
-    tr2 = abs(high - close.shift())
-    tr3 = abs(low - close.shift())
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    
-    atr = tr.rolling(window=period).mean()
-    
-    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
-    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
-    
-    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-    adx = dx.rolling(window=period).mean()
-    
-    return adx
+    adx, _, _ = kernels.adx(df['high'], df['low'], df['close'], period, smoothing="sma")
+    return pd.Series(adx, index=df.index)
 
 
 def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """Calcula ATR (Average True Range)"""
-    high = df['high']
-    low = df['low']
-    close = df['close']
-    
-    tr1 = high - low
-    tr2 = abs(high - close.shift())
-    tr3 = abs(low - close.shift())
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    
-    atr = tr.rolling(window=period).mean()
-    
-    return atr
+    atr = kernels.atr(df['high'], df['low'], df['close'], period, smoothing="sma")
+    return pd.Series(atr, index=df.index)
 
 
 def calculate_rsi(series: pd.Series, period: int = 14) -> pd.Series:
     """Calcula RSI (Relative Strength Index)"""
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    
-    return rsi
+    return pd.Series(kernels.rsi(series, period, smoothing="sma"), index=series.index)
@@ -10,13 +10,17 @@ Orquestra a análise completa ICT combinando:
 Retorna setups de alta probabilidade seguindo metodologia ICT profissional.
 """
 
+import numpy as np
 import pandas as pd
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from datetime import datetime
 from market_manus.core.signal import Signal
+from market_manus.strategies import indicator_kernels as kernels
 
 from market_manus.strategies.smc.market_structure import (
     MarketStructureState,
+    OrderBlockSeries,
+    ohlcv_arrays,
     detect_bos_advanced,
     detect_choch_advanced,
     detect_order_blocks_advanced,
@@ -30,6 +34,7 @@ from market_manus.strategies.smc.context import (
 
 from market_manus.strategies.smc.narrative import (
     MarketNarrative,
+    detect_killzone,
     get_market_narrative,
     enrich_narrative_with_ote_ce
 )
@@ -68,6 +73,17 @@ class ICTFramework:
         Returns:
             Signal com setup completo ou HOLD
         """
+        return self._analyze_window(df, df_htf=df_htf, timestamp=timestamp)
+    
+    def _analyze_window(self, df: pd.DataFrame, df_htf: Optional[pd.DataFrame] = None,
+                        timestamp: Optional[datetime] = None, killzone: Optional[Dict] = None,
+                        indicators: Optional[Dict[str, np.ndarray]] = None,
+                        arrays: Optional[Tuple[np.ndarray, ...]] = None,
+                        order_blocks: Optional[Tuple[OrderBlockSeries, int]] = None) -> Signal:
+        """
+        analyze() com killzone, ADX/ATR/RSI e colunas OHLCV opcionalmente já
+        calculados; order_blocks = (OrderBlockSeries da série, início da janela) (replay)
+        """
         if df is None or len(df) < 50:
             return Signal(
                 action="HOLD",
@@ -76,17 +92,21 @@ class ICTFramework:
                 reasons=["Dados insuficientes para análise ICT"]
             )
         
-        bos_signal, self.structure_state = detect_bos_advanced(df, self.structure_state)
+        bos_signal, self.structure_state = detect_bos_advanced(df, self.structure_state, arrays=arrays)
         
-        choch_signal, self.structure_state = detect_choch_advanced(df, self.structure_state)
+        choch_signal, self.structure_state = detect_choch_advanced(df, self.structure_state, arrays=arrays)
         
-        ob_signal, self.structure_state = detect_order_blocks_advanced(df, self.structure_state)
+        if order_blocks is None:
+            ob_signal, self.structure_state = detect_order_blocks_advanced(df, self.structure_state)
+        else:
+            series, start = order_blocks
+            ob_signal, self.structure_state = series.detect(start, start + len(df) - 1, self.structure_state)
         
-        sweep_signal, self.structure_state = detect_liquidity_sweep_advanced(df, self.structure_state)
+        sweep_signal, self.structure_state = detect_liquidity_sweep_advanced(df, self.structure_state, arrays=arrays)
         
-        context = get_market_context(df)
+        context = get_market_context(df, indicators=indicators, arrays=arrays)
         
-        narrative = get_market_narrative(df, timestamp=timestamp, df_htf=df_htf)
+        narrative = get_market_narrative(df, timestamp=timestamp, df_htf=df_htf, killzone=killzone)
         
         # FASE 2: Enriquece narrativa com OTE, CE e Premium/Discount zones
         narrative = enrich_narrative_with_ote_ce(narrative, df, lookback=20)
@@ -172,6 +192,87 @@ class ICTFramework:
             }
         )
     
+    def analyze_series(self, df: pd.DataFrame, df_htf: Optional[pd.DataFrame] = None,
+                       window: int = 200, period: int = 14) -> List[Signal]:
+        """
+        Replay da análise ICT candle a candle sobre todo o histórico
+        
+        Cada candle recebe o mesmo Signal que analyze() daria com os últimos
+        `window` candles, o horário do candle como timestamp e apenas os
+        candles HTF já fechados, reposicionando o estado com
+        MarketStructureState.shift a cada avanço da janela. A diferença está no
+        custo: o histórico é percorrido uma vez com
+        - MarketStructureState persistente de um candle para o outro
+        - colunas OHLCV extraídas uma vez; os detectores recebem fatias (views)
+        - BOS/CHoCH olhando só os últimos candles e Order Blocks incrementais
+          (OrderBlockSeries), sem percorrer a janela
+        - ADX/ATR/RSI calculados uma vez sobre a série inteira e fatiados por janela
+        - killzone classificada de uma vez pelo horário (UTC) dos candles
+        
+        O sweep continua vetorizado sobre a janela: a tolerância dos níveis
+        iguais é relativa ao range da janela, então os níveis (e
+        state.liquidity_zones) mudam a cada candle. Narrativa e setup recebem o
+        DataFrame da janela, mas só leem os últimos candles.
+        
+        O estado começa vazio e ao final fica em self.structure_state
+        (get_analysis_report reflete o último candle).
+        
+        Args:
+            df: Histórico OHLCV com coluna 'timestamp' (ms) ou DatetimeIndex;
+                sem horários a killzone é a do momento atual, como em analyze()
+            df_htf: Timeframe superior opcional (exige horários nos dois DataFrames)
+            window: Candles por análise (mínimo 50, o mínimo de analyze())
+            period: Período de ADX/ATR/RSI
+        
+        Returns:
+            Lista com um Signal por candle de df
+        """
+        if window < 50:
+            raise ValueError(f"window deve ser >= 50 (recebido {window})")
+        
+        n = len(df)
+        hours = _bar_hours(df)
+        if hours is None:
+            killzones = [detect_killzone()] * n
+        else:
+            by_hour = [detect_killzone(datetime(2000, 1, 1, hour)) for hour in range(24)]
+            killzones = [by_hour[hour] for hour in hours]
+        
+        htf_end = None if df_htf is None else _closed_htf_rows(df, df_htf)
+        
+        highs, lows, closes = df['high'], df['low'], df['close']
+        adx, _, _ = kernels.adx(highs, lows, closes, period, smoothing="sma")
+        atr = kernels.atr(highs, lows, closes, period, smoothing="sma")
+        rsi = kernels.rsi(closes, period, smoothing="sma")
+        
+        columns = ohlcv_arrays(df)
+        order_blocks = OrderBlockSeries(df, arrays=columns)
+        
+        self.structure_state = MarketStructureState()
+        signals = []
+        prev_start = 0
+        for t in range(n):
+            start = max(0, t + 1 - window)
+            self.structure_state.shift(start - prev_start)
+            prev_start = start
+            
+            frame = df.iloc[start:t + 1]
+            frame_atr = atr[start:t + 1].copy()
+            # mesmo aquecimento que o ATR calculado só sobre a janela
+            frame_atr[:period - 1] = np.nan
+            indicators = {"adx": adx[start:t + 1], "atr": frame_atr, "rsi": rsi[start:t + 1]}
+            
+            frame_htf = None
+            if htf_end is not None:
+                end = htf_end[t]
+                frame_htf = df_htf.iloc[max(0, end - 20):end]
+            
+            arrays = tuple(column[start:t + 1] for column in columns)
+            signals.append(self._analyze_window(frame, df_htf=frame_htf, killzone=dict(killzones[t]),
+                                                indicators=indicators, arrays=arrays,
+                                                order_blocks=(order_blocks, start)))
+        return signals
+    
     def get_analysis_report(self) -> Dict:
         """
         Retorna relatório detalhado da análise ICT
@@ -189,6 +290,40 @@ class ICTFramework:
         }
 
 
+def _bar_times_ms(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """Horário de abertura dos candles em ms (coluna 'timestamp' ou DatetimeIndex)"""
+    if 'timestamp' in df.columns:
+        times = df['timestamp']
+        if pd.api.types.is_numeric_dtype(times):
+            return times.to_numpy(dtype=np.int64)
+        return pd.to_datetime(times, utc=True).to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df.index.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    return None
+
+
+def _bar_hours(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """Hora (UTC) de cada candle, usada na classificação de killzone"""
+    times = _bar_times_ms(df)
+    if times is None:
+        return None
+    return (times // 3_600_000) % 24
+
+
+def _closed_htf_rows(df: pd.DataFrame, df_htf: pd.DataFrame) -> np.ndarray:
+    """
+    Para cada candle de df, quantos candles de df_htf já estavam fechados no
+    fechamento dele (evita lookahead do candle HTF em formação)
+    """
+    ltf_times = _bar_times_ms(df)
+    htf_times = _bar_times_ms(df_htf)
+    if ltf_times is None or htf_times is None:
+        raise ValueError("df e df_htf precisam de horários ('timestamp' ou DatetimeIndex) para o replay")
+    ltf_step = np.median(np.diff(ltf_times)) if len(ltf_times) > 1 else 0
+    htf_step = np.median(np.diff(htf_times)) if len(htf_times) > 1 else 0
+    return np.searchsorted(htf_times + htf_step, ltf_times + ltf_step, side="right")
+
+
 def detect_ict_signal(df: pd.DataFrame, df_htf: Optional[pd.DataFrame] = None, 
                       min_rr: float = 2.0, use_killzones: bool = True) -> Signal:
     """
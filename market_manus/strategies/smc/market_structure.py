@@ -8,6 +8,8 @@ Implementa detectores aprimorados de estrutura de mercado seguindo metodologia I
 - Liquidity Sweep com zonas premium/discount
 """
 
+import heapq
+
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
@@ -24,9 +26,34 @@ class MarketStructureState:
     liquidity_zones: List[Dict] = field(default_factory=list)
     trend_direction: str = "NEUTRAL"
 
+    def shift(self, offset: int):
+        """
+        Reposiciona os índices guardados quando a janela de análise avança
+        `offset` candles (BOS/CHoCH/OB continuam apontando para o mesmo candle).
+
+        Os dicts são substituídos, não alterados, porque também aparecem no
+        meta de sinais já emitidos. Eventos que saíram da janela ficam no
+        índice 0 (candle mais antigo visível).
+        """
+        if offset == 0:
+            return
+        if self.last_bos is not None:
+            self.last_bos = {**self.last_bos, "index": max(self.last_bos.get("index", 0) - offset, 0)}
+        if self.last_choch is not None:
+            self.last_choch = {**self.last_choch, "index": max(self.last_choch.get("index", 0) - offset, 0)}
+        self.order_blocks = [{**ob, "index": max(ob["index"] - offset, 0)} for ob in self.order_blocks]
+
+
+def ohlcv_arrays(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Colunas OHLCV como arrays float (volume = 1.0 quando ausente)"""
+    volumes = df['volume'].to_numpy(dtype=float) if 'volume' in df.columns else np.ones(len(df))
+    return (df['open'].to_numpy(dtype=float), df['high'].to_numpy(dtype=float),
+            df['low'].to_numpy(dtype=float), df['close'].to_numpy(dtype=float), volumes)
+
 
 def detect_bos_advanced(df: pd.DataFrame, state: MarketStructureState, 
-                        min_displacement: float = 0.001, volume_threshold: float = 1.2) -> Tuple[Signal, MarketStructureState]:
+                        min_displacement: float = 0.001, volume_threshold: float = 1.2,
+                        arrays: Optional[Tuple[np.ndarray, ...]] = None) -> Tuple[Signal, MarketStructureState]:
     """
     BOS Aprimorado com:
     - Validação de volume relativo (>1.2x média)
@@ -34,20 +61,19 @@ def detect_bos_advanced(df: pd.DataFrame, state: MarketStructureState,
     - Estado persistente para CHoCH validation
     
     Melhoria conforme análise: adiciona volume como parte da confiança
+    
+    arrays: ohlcv_arrays(df) já extraído (replay), evita reconverter as colunas
     """
     if df is None or len(df) < 10:
         return Signal(action="HOLD", confidence=0.0, tags=["SMC:BOS"], reasons=["Dados insuficientes"]), state
     
-    highs = df['high']
-    lows = df['low']
-    closes = df['close']
-    volumes = df['volume'] if 'volume' in df.columns else pd.Series([1.0] * len(df))
+    _, highs, lows, closes, volumes = ohlcv_arrays(df) if arrays is None else arrays
     
-    last_swing_high = highs.iloc[-10:-1].max()
-    last_swing_low = lows.iloc[-10:-1].min()
-    current_close = closes.iat[-1]
-    current_volume = volumes.iat[-1]
-    avg_volume = volumes.iloc[-20:].mean() if len(volumes) >= 20 else volumes.mean()
+    last_swing_high = highs[-10:-1].max()
+    last_swing_low = lows[-10:-1].min()
+    current_close = closes[-1]
+    current_volume = volumes[-1]
+    avg_volume = volumes[-20:].mean()
     
     price_range = last_swing_high - last_swing_low
     if price_range == 0:
@@ -128,7 +154,8 @@ def detect_bos_advanced(df: pd.DataFrame, state: MarketStructureState,
     return Signal(action="HOLD", confidence=0.0, tags=["SMC:BOS"], reasons=["Sem BOS detectado"]), state
 
 
-def detect_choch_advanced(df: pd.DataFrame, state: MarketStructureState) -> Tuple[Signal, MarketStructureState]:
+def detect_choch_advanced(df: pd.DataFrame, state: MarketStructureState,
+                          arrays: Optional[Tuple[np.ndarray, ...]] = None) -> Tuple[Signal, MarketStructureState]:
     """
     CHoCH Aprimorado com:
     - Validação de BOS prévia (evita falsos positivos)
@@ -136,14 +163,14 @@ def detect_choch_advanced(df: pd.DataFrame, state: MarketStructureState) -> Tupl
     - Contexto de tendência anterior
     
     Melhoria conforme análise: CHoCH requer estrutura BOS prévia
+    
+    arrays: ohlcv_arrays(df) já extraído (replay), evita reconverter as colunas
     """
     if df is None or len(df) < 5 or state.last_bos is None:
         return Signal(action="HOLD", confidence=0.0, tags=["SMC:CHOCH"], 
                      reasons=["Sem BOS prévio" if state.last_bos is None else "Dados insuficientes"]), state
     
-    highs = df['high']
-    lows = df['low']
-    closes = df['close']
+    _, highs, lows, closes, _ = ohlcv_arrays(df) if arrays is None else arrays
     
     bos_index = state.last_bos.get('index', 0)
     recent_candles = min(len(df) - bos_index - 1, 10)
@@ -151,17 +178,17 @@ def detect_choch_advanced(df: pd.DataFrame, state: MarketStructureState) -> Tupl
     if recent_candles < 2:
         return Signal(action="HOLD", confidence=0.0, tags=["SMC:CHOCH"], reasons=["Aguardando confirmação"]), state
     
-    recent_highs = highs.iloc[bos_index:].tolist()
-    recent_lows = lows.iloc[bos_index:].tolist()
+    recent_highs = highs[bos_index:]
+    recent_lows = lows[bos_index:]
     
     was_bullish = state.last_bos['type'] == "BULLISH"
     was_bearish = state.last_bos['type'] == "BEARISH"
     
     if was_bullish:
-        swing_high_before_choch = max(recent_highs[:-1]) if len(recent_highs) > 1 else recent_highs[0]
-        current_close = closes.iat[-1]
+        swing_high_before_choch = recent_highs[:-1].max() if len(recent_highs) > 1 else recent_highs[0]
+        current_close = closes[-1]
         
-        if current_close < min(recent_lows[-3:-1]) if len(recent_lows) >= 3 else recent_lows[0]:
+        if current_close < recent_lows[-3:-1].min() if len(recent_lows) >= 3 else recent_lows[0]:
             confidence = 0.65 + (recent_candles * 0.05)
             
             choch_data = {
@@ -187,10 +214,10 @@ def detect_choch_advanced(df: pd.DataFrame, state: MarketStructureState) -> Tupl
             ), state
     
     if was_bearish:
-        swing_low_before_choch = min(recent_lows[:-1]) if len(recent_lows) > 1 else recent_lows[0]
-        current_close = closes.iat[-1]
+        swing_low_before_choch = recent_lows[:-1].min() if len(recent_lows) > 1 else recent_lows[0]
+        current_close = closes[-1]
         
-        if current_close > max(recent_highs[-3:-1]) if len(recent_highs) >= 3 else recent_highs[0]:
+        if current_close > recent_highs[-3:-1].max() if len(recent_highs) >= 3 else recent_highs[0]:
             confidence = 0.65 + (recent_candles * 0.05)
             
             choch_data = {
@@ -231,20 +258,23 @@ def detect_order_blocks_advanced(df: pd.DataFrame, state: MarketStructureState,
     if df is None or len(df) < 5:
         return Signal(action="HOLD", confidence=0.0, tags=["SMC:OB"], reasons=["Dados insuficientes"]), state
     
-    obs = []
-    curr_max = df['high'].iat[0]
-    curr_min = df['low'].iat[0]
-    volumes = df['volume'] if 'volume' in df.columns else pd.Series([1.0] * len(df))
+    opens, highs, lows, closes, volumes = ohlcv_arrays(df)
     avg_volume = volumes.mean()
     
+    obs = []
+    curr_max = highs[0]
+    curr_min = lows[0]
+    # máxima/mínima de todos os candles anteriores (antes era highs[:i].max() a cada candle)
+    prior_max = highs[0]
+    prior_min = lows[0]
+    
     for i in range(1, len(df)):
-        h, l, o, c = df['high'].iat[i], df['low'].iat[i], df['open'].iat[i], df['close'].iat[i]
-        prev_h, prev_l, prev_o, prev_c = df['high'].iat[i-1], df['low'].iat[i-1], df['open'].iat[i-1], df['close'].iat[i-1]
-        prev_vol = volumes.iat[i-1]
-        curr_vol = volumes.iat[i]
+        h, l, o, c = highs[i], lows[i], opens[i], closes[i]
+        prev_h, prev_l, prev_o, prev_c = highs[i-1], lows[i-1], opens[i-1], closes[i-1]
+        prev_vol = volumes[i-1]
         
         if c > curr_max:
-            caused_bos = c > df['high'].iloc[:i].max()
+            caused_bos = c > prior_max
             
             if prev_c < prev_o and abs(prev_h - prev_l) >= min_range:
                 volume_factor = prev_vol / avg_volume if avg_volume > 0 else 1.0
@@ -263,7 +293,7 @@ def detect_order_blocks_advanced(df: pd.DataFrame, state: MarketStructureState,
             curr_max = h
         
         if c < curr_min:
-            caused_bos = c < df['low'].iloc[:i].min()
+            caused_bos = c < prior_min
             
             if prev_c > prev_o and abs(prev_h - prev_l) >= min_range:
                 volume_factor = prev_vol / avg_volume if avg_volume > 0 else 1.0
@@ -280,13 +310,15 @@ def detect_order_blocks_advanced(df: pd.DataFrame, state: MarketStructureState,
                     "status": "FRESH"
                 })
             curr_min = l
+        
+        prior_max = max(prior_max, h)
+        prior_min = min(prior_min, l)
     
     for ob in obs:
         ob_zone_low, ob_zone_high = ob['zone']
-        for i in range(ob['index'] + 1, len(df)):
-            if df['low'].iat[i] <= ob_zone_high and df['high'].iat[i] >= ob_zone_low:
-                ob['status'] = "MITIGATED"
-                break
+        later = slice(ob['index'] + 1, None)
+        if np.any((lows[later] <= ob_zone_high) & (highs[later] >= ob_zone_low)):
+            ob['status'] = "MITIGATED"
     
     fresh_obs = [ob for ob in obs if ob['status'] == "FRESH"]
     
@@ -294,7 +326,12 @@ def detect_order_blocks_advanced(df: pd.DataFrame, state: MarketStructureState,
         return Signal(action="HOLD", confidence=0.0, tags=["SMC:OB"], 
                      reasons=["Nenhum OB FRESH detectado"]), state
     
-    last_ob = fresh_obs[-1]
+    return _order_block_signal(fresh_obs[-1], (highs - lows).mean(), state)
+
+
+def _order_block_signal(last_ob: Dict, avg_range: float,
+                        state: MarketStructureState) -> Tuple[Signal, MarketStructureState]:
+    """Signal do último Order Block FRESH da janela (registrado em state.order_blocks)"""
     ob_type = last_ob["type"]
     zone = last_ob["zone"]
     strength = last_ob["strength"]
@@ -302,7 +339,6 @@ def detect_order_blocks_advanced(df: pd.DataFrame, state: MarketStructureState,
     volume_factor = last_ob["volume_factor"]
     is_engulfing = last_ob["is_engulfing"]
     
-    avg_range = df['high'].sub(df['low']).mean()
     base_confidence = min(0.4 + (strength / avg_range) * 0.2, 0.7) if avg_range > 0 else 0.4
     
     bos_boost = 0.15 if caused_bos else 0.0
@@ -337,8 +373,136 @@ def detect_order_blocks_advanced(df: pd.DataFrame, state: MarketStructureState,
     ), state
 
 
+def _break_chains(levels: np.ndarray, closes: np.ndarray, above: bool) -> Tuple[List[int], List[int]]:
+    """
+    Floresta dos rompimentos de curr_max (above) ou curr_min de detect_order_blocks_advanced
+    
+    Numa janela que começa em s, curr_max parte de highs[s] e só muda no
+    primeiro candle que fecha acima dele, passando à máxima desse candle. O
+    pai de u é esse próximo candle (primeiro fechamento acima de highs[u]), o
+    que não depende da janela: os rompimentos da janela iniciada em s são os
+    ancestrais de s. Devolve (posição em pré-ordem, tamanho da subárvore) por
+    candle; i é ancestral de s quando pos[i] <= pos[s] < pos[i] + size[i].
+    """
+    n = len(closes)
+    sign = 1.0 if above else -1.0
+    parent = [-1] * n
+    pending = []  # (nível, candle) ainda sem rompimento; heap pelo nível mais fácil de romper
+    for i in range(n):
+        close = sign * closes[i]
+        while pending and pending[0][0] < close:
+            parent[heapq.heappop(pending)[1]] = i
+        level = sign * levels[i]
+        if not np.isnan(level):
+            heapq.heappush(pending, (level, i))
+    
+    # O pai vem sempre depois do filho: tamanhos em ordem crescente, posições em ordem decrescente
+    size = [1] * n
+    for u in range(n):
+        if parent[u] >= 0:
+            size[parent[u]] += size[u]
+    pos = [0] * n
+    next_child = [0] * n
+    free = 0
+    for u in range(n - 1, -1, -1):
+        p = parent[u]
+        if p < 0:
+            pos[u] = free
+            free += size[u]
+        else:
+            pos[u] = next_child[p]
+            next_child[p] += size[u]
+        next_child[u] = pos[u] + 1
+    return pos, size
+
+
+class OrderBlockSeries:
+    """
+    detect_order_blocks_advanced sobre as janelas móveis de uma série, sem reprocessá-las
+    
+    Da janela só dependem os rompimentos de curr_max/curr_min (floresta de
+    _break_chains, montada uma vez) e as médias de volume/range. As zonas
+    ainda não tocadas por nenhum candle posterior (candidatas a FRESH) são
+    mantidas candle a candle, então cada detect custa O(zonas intactas) em vez
+    de percorrer a janela inteira.
+    """
+    
+    def __init__(self, df: pd.DataFrame, min_range: float = 0,
+                 arrays: Optional[Tuple[np.ndarray, ...]] = None):
+        self.opens, self.highs, self.lows, self.closes, self.volumes = \
+            ohlcv_arrays(df) if arrays is None else arrays
+        self.min_range = min_range
+        self._up_pos, self._up_size = _break_chains(self.highs, self.closes, above=True)
+        self._down_pos, self._down_size = _break_chains(self.lows, self.closes, above=False)
+        self._fresh = np.empty(0, dtype=np.int64)
+        self._next = 0
+    
+    def _advance(self, end: int):
+        """Descarta as zonas tocadas pelos candles até end e inclui as novas"""
+        opens, highs, lows, closes = self.opens, self.highs, self.lows, self.closes
+        while self._next <= end:
+            t = self._next
+            fresh = self._fresh
+            if fresh.size:
+                fresh = fresh[~((lows[t] <= highs[fresh]) & (highs[t] >= lows[fresh]))]
+            if closes[t] != opens[t] and abs(highs[t] - lows[t]) >= self.min_range:
+                fresh = np.append(fresh, t)
+            self._fresh = fresh
+            self._next += 1
+    
+    def detect(self, start: int, end: int, state: MarketStructureState) -> Tuple[Signal, MarketStructureState]:
+        """
+        Mesmo resultado de detect_order_blocks_advanced(df.iloc[start:end + 1], state)
+        
+        start e end não podem recuar entre chamadas.
+        """
+        if end - start + 1 < 5:
+            return Signal(action="HOLD", confidence=0.0, tags=["SMC:OB"], reasons=["Dados insuficientes"]), state
+        
+        self._advance(end)
+        fresh = self._fresh = self._fresh[self._fresh >= start]
+        
+        opens, highs, lows, closes = self.opens, self.highs, self.lows, self.closes
+        for j in reversed(fresh.tolist()):
+            i = j + 1
+            if i > end:
+                continue
+            if closes[j] < opens[j]:
+                pos, size, ob_type = self._up_pos, self._up_size, "bullish"
+            elif closes[j] > opens[j]:
+                pos, size, ob_type = self._down_pos, self._down_size, "bearish"
+            else:
+                continue
+            if not pos[i] <= pos[start] < pos[i] + size[i]:
+                continue
+            
+            avg_volume = self.volumes[start:end + 1].mean()
+            if ob_type == "bullish":
+                caused_bos = closes[i] > highs[start:i].max()
+                is_engulfing = (closes[i] > highs[j] and opens[i] < lows[j])
+            else:
+                caused_bos = closes[i] < lows[start:i].min()
+                is_engulfing = (closes[i] < lows[j] and opens[i] > highs[j])
+            last_ob = {
+                "index": j - start,
+                "type": ob_type,
+                "zone": (lows[j], highs[j]),
+                "strength": abs(highs[j] - lows[j]),
+                "caused_bos": caused_bos,
+                "volume_factor": self.volumes[j] / avg_volume if avg_volume > 0 else 1.0,
+                "is_engulfing": is_engulfing,
+                "status": "FRESH"
+            }
+            avg_range = (highs[start:end + 1] - lows[start:end + 1]).mean()
+            return _order_block_signal(last_ob, avg_range, state)
+        
+        return Signal(action="HOLD", confidence=0.0, tags=["SMC:OB"],
+                     reasons=["Nenhum OB FRESH detectado"]), state
+
+
 def detect_liquidity_sweep_advanced(df: pd.DataFrame, state: MarketStructureState,
-                                     body_ratio: float = 0.5) -> Tuple[Signal, MarketStructureState]:
+                                     body_ratio: float = 0.5,
+                                     arrays: Optional[Tuple[np.ndarray, ...]] = None) -> Tuple[Signal, MarketStructureState]:
     """
     Liquidity Sweep Aprimorado com:
     - Detecção de igualdades (equal highs/lows)
@@ -346,83 +510,84 @@ def detect_liquidity_sweep_advanced(df: pd.DataFrame, state: MarketStructureStat
     - Draw on liquidity
     
     Melhoria conforme análise: considera localização premium/discount
+    
+    arrays: ohlcv_arrays(df) já extraído (replay), evita reconverter as colunas
     """
     if df is None or len(df) < 10:
         return Signal(action="HOLD", confidence=0.0, tags=["SMC:SWEEP"], reasons=["Dados insuficientes"]), state
     
-    highs = df['high']
-    lows = df['low']
-    closes = df['close']
-    opens = df['open']
+    opens, highs, lows, closes, _ = ohlcv_arrays(df) if arrays is None else arrays
     
     range_high = highs.max()
     range_low = lows.min()
     midpoint = (range_high + range_low) / 2
     
-    equal_highs = []
-    equal_lows = []
     tolerance = (range_high - range_low) * 0.002
-    
-    for i in range(len(df) - 1):
-        if abs(highs.iat[i] - highs.iat[i+1]) <= tolerance:
-            equal_highs.append(highs.iat[i])
-        if abs(lows.iat[i] - lows.iat[i+1]) <= tolerance:
-            equal_lows.append(lows.iat[i])
+    equal_highs = highs[:-1][np.abs(highs[:-1] - highs[1:]) <= tolerance].tolist()
+    equal_lows = lows[:-1][np.abs(lows[:-1] - lows[1:]) <= tolerance].tolist()
+    equal_high_levels = set(equal_highs)
+    equal_low_levels = set(equal_lows)
     
     liquidity_zones = list(set(equal_highs + equal_lows))
-    state.liquidity_zones = [{"level": lz, "type": "equal_high" if lz in equal_highs else "equal_low"} 
+    state.liquidity_zones = [{"level": lz, "type": "equal_high" if lz in equal_high_levels else "equal_low"} 
                              for lz in liquidity_zones]
     
-    sweeps = []
-    
-    for i in range(1, len(df)):
-        h, l, o, c = highs.iat[i], lows.iat[i], opens.iat[i], closes.iat[i]
-        rng = h - l
-        body = abs(c - o)
-        
-        if rng == 0 or body / rng > body_ratio:
-            continue
-        
-        for lz in liquidity_zones:
-            if h > lz and c < lz:
-                wick_size = h - max(o, c)
-                is_premium = lz > midpoint
-                
-                sweeps.append({
-                    "index": i,
-                    "level": lz,
-                    "direction": "up",
-                    "type": "bearish",
-                    "wick_size": wick_size,
-                    "zone": "PREMIUM" if is_premium else "DISCOUNT",
-                    "is_equal_high": lz in equal_highs
-                })
-            
-            if l < lz and c > lz:
-                wick_size = min(o, c) - l
-                is_discount = lz < midpoint
-                
-                sweeps.append({
-                    "index": i,
-                    "level": lz,
-                    "direction": "down",
-                    "type": "bullish",
-                    "wick_size": wick_size,
-                    "zone": "DISCOUNT" if is_discount else "PREMIUM",
-                    "is_equal_low": lz in equal_lows
-                })
-    
-    if not sweeps:
+    # Só o último sweep (maior índice e, dentro dele, a última zona na ordem
+    # de liquidity_zones) é usado. Um candle varre algum nível quando há nível
+    # estritamente entre o fechamento e a máxima (ou a mínima): contagem por
+    # busca binária nos níveis ordenados, sem a matriz candle × zona
+    ranges = highs - lows
+    bodies = np.abs(closes - opens)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        candidates = (ranges != 0) & ~(bodies / ranges > body_ratio) & ~np.isnan(ranges + closes)
+    candidates[0] = False
+    
+    levels = np.asarray(liquidity_zones, dtype=float)
+    ordered = np.sort(levels)
+    above_close = np.searchsorted(ordered, closes, side="right")
+    below_close = np.searchsorted(ordered, closes, side="left")
+    hits = ((np.searchsorted(ordered, highs, side="left") > above_close) |
+            (below_close > np.searchsorted(ordered, lows, side="right"))) & candidates
+    
+    swept_rows = np.flatnonzero(hits)
+    if swept_rows.size == 0:
         return Signal(action="HOLD", confidence=0.0, tags=["SMC:SWEEP"], reasons=["Nenhum sweep detectado"]), state
     
-    last_sweep = sweeps[-1]
+    i = int(swept_rows[-1])
+    h, l, o, c = highs[i], lows[i], opens[i], closes[i]
+    swept_up = (h > levels) & (c < levels)
+    swept_down = (l < levels) & (c > levels)
+    z = int(np.flatnonzero(swept_up | swept_down)[-1])
+    lz = liquidity_zones[z]
+    
+    if swept_down[z]:
+        last_sweep = {
+            "index": i,
+            "level": lz,
+            "direction": "down",
+            "type": "bullish",
+            "wick_size": min(o, c) - l,
+            "zone": "DISCOUNT" if lz < midpoint else "PREMIUM",
+            "is_equal_low": lz in equal_low_levels
+        }
+    else:
+        last_sweep = {
+            "index": i,
+            "level": lz,
+            "direction": "up",
+            "type": "bearish",
+            "wick_size": h - max(o, c),
+            "zone": "PREMIUM" if lz > midpoint else "DISCOUNT",
+            "is_equal_high": lz in equal_high_levels
+        }
+    
     sweep_type = last_sweep["type"]
     level = last_sweep["level"]
     wick_size = last_sweep["wick_size"]
     zone = last_sweep["zone"]
     is_equal = last_sweep.get("is_equal_high", False) or last_sweep.get("is_equal_low", False)
     
-    avg_range = df['high'].sub(df['low']).mean()
+    avg_range = ranges.mean()
     base_confidence = min(0.45 + (wick_size / avg_range) * 0.25, 0.75) if avg_range > 0 else 0.45
     
     zone_boost = 0.0
@@ -39,8 +39,8 @@ def detect_internal_range_liquidity(df: pd.DataFrame, lookback: int = 20) -> Dic
     if df is None or len(df) < lookback:
         return {"type": "NONE", "zones": [], "strength": 0.0}
     
-    highs = df['high'].iloc[-lookback:]
-    lows = df['low'].iloc[-lookback:]
+    highs = df['high'].to_numpy(dtype=float)[-lookback:]
+    lows = df['low'].to_numpy(dtype=float)[-lookback:]
     
     range_high = highs.max()
     range_low = lows.min()
@@ -52,17 +52,14 @@ def detect_internal_range_liquidity(df: pd.DataFrame, lookback: int = 20) -> Dic
     internal_zones = []
     tolerance = range_size * 0.005
     
-    swing_highs = []
-    swing_lows = []
-    
-    for i in range(2, len(highs) - 2):
-        if (highs.iloc[i] > highs.iloc[i-1] and highs.iloc[i] > highs.iloc[i-2] and
-            highs.iloc[i] > highs.iloc[i+1] and highs.iloc[i] > highs.iloc[i+2]):
-            swing_highs.append(highs.iloc[i])
-        
-        if (lows.iloc[i] < lows.iloc[i-1] and lows.iloc[i] < lows.iloc[i-2] and
-            lows.iloc[i] < lows.iloc[i+1] and lows.iloc[i] < lows.iloc[i+2]):
-            swing_lows.append(lows.iloc[i])
+    # fractal de 5 candles: maior/menor que os 2 vizinhos de cada lado
+    mid_highs, mid_lows = highs[2:-2], lows[2:-2]
+    is_swing_high = ((mid_highs > highs[1:-3]) & (mid_highs > highs[:-4]) &
+                     (mid_highs > highs[3:-1]) & (mid_highs > highs[4:]))
+    is_swing_low = ((mid_lows < lows[1:-3]) & (mid_lows < lows[:-4]) &
+                    (mid_lows < lows[3:-1]) & (mid_lows < lows[4:]))
+    swing_highs = mid_highs[is_swing_high].tolist()
+    swing_lows = mid_lows[is_swing_low].tolist()
     
     for sh in swing_highs:
         if range_low + range_size * 0.2 < sh < range_high - range_size * 0.2:
@@ -107,8 +104,8 @@ def detect_external_range_liquidity(df: pd.DataFrame, lookback: int = 20) -> Dic
     if df is None or len(df) < lookback:
         return {"type": "NONE", "zones": [], "strength": 0.0}
     
-    highs = df['high'].iloc[-lookback:]
-    lows = df['low'].iloc[-lookback:]
+    highs = df['high'].to_numpy(dtype=float)[-lookback:]
+    lows = df['low'].to_numpy(dtype=float)[-lookback:]
     
     range_high = highs.max()
     range_low = lows.min()
@@ -120,8 +117,8 @@ def detect_external_range_liquidity(df: pd.DataFrame, lookback: int = 20) -> Dic
     external_zones = []
     tolerance = range_size * 0.003
     
-    high_indices = [i for i, h in enumerate(highs) if abs(h - range_high) <= tolerance]
-    low_indices = [i for i, l in enumerate(lows) if abs(l - range_low) <= tolerance]
+    high_indices = np.flatnonzero(np.abs(highs - range_high) <= tolerance)
+    low_indices = np.flatnonzero(np.abs(lows - range_low) <= tolerance)
     
     if len(high_indices) >= 2:
         external_zones.append({
@@ -244,33 +241,35 @@ def detect_htf_context(df_ltf: pd.DataFrame, df_htf: Optional[pd.DataFrame] = No
     if df_ltf is None or len(df_ltf) < 50:
         return {"bias": "UNKNOWN", "alignment": False, "strength": 0.0}
     
+    ltf_closes = df_ltf['close'].to_numpy(dtype=float)
+    
     if df_htf is None:
-        htf_closes = df_ltf['close'].iloc[::4]
-        htf_highs = df_ltf['high'].iloc[::4]
-        htf_lows = df_ltf['low'].iloc[::4]
+        htf_closes = ltf_closes[::4]
+        htf_highs = df_ltf['high'].to_numpy(dtype=float)[::4]
+        htf_lows = df_ltf['low'].to_numpy(dtype=float)[::4]
     else:
         if len(df_htf) < 20:
             return {"bias": "UNKNOWN", "alignment": False, "strength": 0.0}
-        htf_closes = df_htf['close']
-        htf_highs = df_htf['high']
-        htf_lows = df_htf['low']
+        htf_closes = df_htf['close'].to_numpy(dtype=float)
+        htf_highs = df_htf['high'].to_numpy(dtype=float)
+        htf_lows = df_htf['low'].to_numpy(dtype=float)
     
-    htf_ma_fast = htf_closes.iloc[-10:].mean()
-    htf_ma_slow = htf_closes.iloc[-20:].mean()
+    htf_ma_fast = htf_closes[-10:].mean()
+    htf_ma_slow = htf_closes[-20:].mean()
     
     htf_bias = "BULLISH" if htf_ma_fast > htf_ma_slow else "BEARISH"
     
-    htf_range_high = htf_highs.iloc[-20:].max()
-    htf_range_low = htf_lows.iloc[-20:].min()
+    htf_range_high = htf_highs[-20:].max()
+    htf_range_low = htf_lows[-20:].min()
     htf_midpoint = (htf_range_high + htf_range_low) / 2
     
-    ltf_current = df_ltf['close'].iat[-1]
+    ltf_current = ltf_closes[-1]
     
     is_premium = ltf_current > htf_midpoint
     is_discount = ltf_current < htf_midpoint
     
-    ltf_ma_fast = df_ltf['close'].iloc[-10:].mean()
-    ltf_ma_slow = df_ltf['close'].iloc[-20:].mean()
+    ltf_ma_fast = ltf_closes[-10:].mean()
+    ltf_ma_slow = ltf_closes[-20:].mean()
     ltf_bias = "BULLISH" if ltf_ma_fast > ltf_ma_slow else "BEARISH"
     
     alignment = (htf_bias == ltf_bias)
@@ -298,16 +297,18 @@ def detect_htf_context(df_ltf: pd.DataFrame, df_htf: Optional[pd.DataFrame] = No
 
 
 def get_market_narrative(df: pd.DataFrame, timestamp: Optional[datetime] = None, 
-                         df_htf: Optional[pd.DataFrame] = None) -> MarketNarrative:
+                         df_htf: Optional[pd.DataFrame] = None,
+                         killzone: Optional[Dict] = None) -> MarketNarrative:
     """
     Retorna narrativa completa de mercado combinando:
     - Liquidez (internal vs external)
-    - Killzone ativa
+    - Killzone ativa (killzone já classificada tem precedência sobre timestamp)
     - HTF bias
     """
     internal_liq = detect_internal_range_liquidity(df)
     external_liq = detect_external_range_liquidity(df)
-    killzone = detect_killzone(timestamp)
+    if killzone is None:
+        killzone = detect_killzone(timestamp)
     htf_context = detect_htf_context(df, df_htf)
     
     if external_liq['strength'] > internal_liq['strength']:
@@ -633,9 +634,9 @@ def enrich_narrative_with_ote_ce(narrative: MarketNarrative, df: pd.DataFrame,
         return narrative
     
     # Calcula range recente
-    recent_high = df['high'].iloc[-lookback:].max()
-    recent_low = df['low'].iloc[-lookback:].min()
-    current_price = df['close'].iloc[-1]
+    recent_high = df['high'].to_numpy(dtype=float)[-lookback:].max()
+    recent_low = df['low'].to_numpy(dtype=float)[-lookback:].min()
+    current_price = df['close'].to_numpy(dtype=float)[-1]
     
     # Calcula OTE zones
     ote = calculate_ote_zones(recent_high, recent_low)
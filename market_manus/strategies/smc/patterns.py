@@ -5,8 +5,20 @@ Detectores: BOS, CHoCH, Order Blocks, FVG, Liquidity Sweep, Inducement, Premium/
 
 import numpy as np
 import pandas as pd
-from typing import Optional
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from typing import Iterator, Optional
+from numpy.lib.stride_tricks import sliding_window_view
 from market_manus.core.signal import Signal
+from market_manus.strategies.smc.structure_tracker import SMCStructureTracker
+from market_manus.strategies.signal_series import (
+    DEFAULT_LOOKBACK,
+    SignalSeries,
+    ohlcv_arrays,
+    series_or_empty,
+    window_column,
+    window_count,
+)
 
 # ==================== DETECTORES SMC (retornam Signal) ====================
 
@@ -69,42 +81,7 @@ def detect_choch(df: pd.DataFrame) -> Signal:
     """
     if df is None or len(df) < 3:
         return Signal(action="HOLD", confidence=0.0, tags=["SMC:CHOCH"], reasons=["Dados insuficientes"])
-
-    highs = df['high']
-    lows = df['low']
-    closes = df['close']
-    
-    # Identifica higher highs e lower lows
-    highs_idx = [i for i in range(1, len(df)) if closes.iat[i] > highs.iloc[:i].max()]
-    lows_idx = [i for i in range(1, len(df)) if closes.iat[i] < lows.iloc[:i].min()]
-    
-    had_uptrend = len(highs_idx) >= 2  # Pelo menos 2 higher highs
-    had_downtrend = len(lows_idx) >= 2  # Pelo menos 2 lower lows
-    
-    # CHoCH requer inversão: uptrend → downtrend ou downtrend → uptrend
-    if had_uptrend and lows_idx and lows_idx[-1] > (highs_idx[-1] if highs_idx else 0):
-        # Estava em uptrend, agora fez lower low
-        confidence = 0.6 + (len(highs_idx) * 0.1)  # Mais confiança com mais confirmações
-        return Signal(
-            action="SELL",
-            confidence=min(confidence, 1.0),
-            reasons=[f"CHoCH: uptrend inverteu para downtrend após {len(highs_idx)} higher highs"],
-            tags=["SMC:CHOCH", "SMC:CHOCH_BEARISH"],
-            meta={"previous_trend": "UP", "highs_count": len(highs_idx), "lows_count": len(lows_idx)}
-        )
-    
-    if had_downtrend and highs_idx and highs_idx[-1] > (lows_idx[-1] if lows_idx else 0):
-        # Estava em downtrend, agora fez higher high
-        confidence = 0.6 + (len(lows_idx) * 0.1)
-        return Signal(
-            action="BUY",
-            confidence=min(confidence, 1.0),
-            reasons=[f"CHoCH: downtrend inverteu para uptrend após {len(lows_idx)} lower lows"],
-            tags=["SMC:CHOCH", "SMC:CHOCH_BULLISH"],
-            meta={"previous_trend": "DOWN", "highs_count": len(highs_idx), "lows_count": len(lows_idx)}
-        )
-    
-    return Signal(action="HOLD", confidence=0.0, tags=["SMC:CHOCH"], reasons=["Sem CHoCH detectado"])
+    return SMCStructureTracker.from_frame(df).choch_signal()
 
 
 def detect_order_blocks(df: pd.DataFrame, min_range: float = 0) -> Signal:
@@ -112,47 +89,8 @@ def detect_order_blocks(df: pd.DataFrame, min_range: float = 0) -> Signal:
     Order Block: última vela de acumulação/distribuição antes do rompimento.
     Zona preferencial de entrada/stop loss.
     """
-    obs = []
-    curr_max = df['high'].iat[0]
-    curr_min = df['low'].iat[0]
-
-    for i in range(1, len(df)):
-        h, l, o, c = df['high'].iat[i], df['low'].iat[i], df['open'].iat[i], df['close'].iat[i]
-        prev_h, prev_l, prev_o, prev_c = df['high'].iat[i-1], df['low'].iat[i-1], df['open'].iat[i-1], df['close'].iat[i-1]
-
-        # Bullish OB: BOS confirmado + candle anterior bearish
-        if c > curr_max and df['close'].iat[i] > curr_max:
-            if prev_c < prev_o and abs(prev_h - prev_l) >= min_range:
-                obs.append({"index": i-1, "type": "bullish", "zone": (prev_l, prev_h), "strength": abs(prev_h - prev_l)})
-            curr_max = h
-
-        # Bearish OB: BOS confirmado + candle anterior bullish
-        if c < curr_min and df['close'].iat[i] < curr_min:
-            if prev_c > prev_o and abs(prev_h - prev_l) >= min_range:
-                obs.append({"index": i-1, "type": "bearish", "zone": (prev_l, prev_h), "strength": abs(prev_h - prev_l)})
-            curr_min = l
-
-    if not obs:
-        return Signal(action="HOLD", confidence=0.0, tags=["SMC:OB"], reasons=["Nenhum Order Block detectado"])
-    
-    # Pega o OB mais recente
-    last_ob = obs[-1]
-    ob_type = last_ob["type"]
-    zone = last_ob["zone"]
-    strength = last_ob["strength"]
-    
-    # Confidence baseado na força (tamanho) do OB
-    avg_range = df['high'].sub(df['low']).mean()
-    confidence = min(0.5 + (strength / avg_range) * 0.3, 1.0) if avg_range > 0 else 0.5
-    
-    action = "BUY" if ob_type == "bullish" else "SELL"
-    return Signal(
-        action=action,
-        confidence=confidence,
-        reasons=[f"Order Block {ob_type} detectado na zona {zone[0]:.2f}-{zone[1]:.2f}, strength {strength:.4f}"],
-        tags=["SMC:OB", f"SMC:OB_{ob_type.upper()}"],
-        meta={"ob_type": ob_type, "zone_low": zone[0], "zone_high": zone[1], "strength": strength, "index": last_ob["index"]}
-    )
+    tracker = SMCStructureTracker.from_frame(df, min_range=min_range)
+    return tracker.order_block_signal(avg_range=df['high'].sub(df['low']).mean())
 
 
 def detect_fvg(df: pd.DataFrame) -> Signal:
@@ -160,50 +98,9 @@ def detect_fvg(df: pd.DataFrame) -> Signal:
     Fair Value Gap: gap entre corpos/sombras de 3 velas consecutivas.
     Zona de reprecificação (imbalance).
     """
-    gaps = []
     if df is None or len(df) < 3:
         return Signal(action="HOLD", confidence=0.0, tags=["SMC:FVG"], reasons=["Dados insuficientes"])
-
-    highs = df['high']
-    lows = df['low']
-
-    for i in range(1, len(df)):
-        prev_h = highs.iat[i-1]
-        prev_l = lows.iat[i-1]
-        curr_h = highs.iat[i]
-        curr_l = lows.iat[i]
-
-        # Gap de alta: mínima atual > máxima anterior
-        if curr_l > prev_h:
-            gap_size = curr_l - prev_h
-            gaps.append({"type": "bullish", "gap": (prev_h, curr_l), "size": gap_size, "index": i})
-
-        # Gap de baixa: máxima atual < mínima anterior
-        elif curr_h < prev_l:
-            gap_size = prev_l - curr_h
-            gaps.append({"type": "bearish", "gap": (curr_h, prev_l), "size": gap_size, "index": i})
-
-    if not gaps:
-        return Signal(action="HOLD", confidence=0.0, tags=["SMC:FVG"], reasons=["Nenhum FVG detectado"])
-    
-    # Pega o FVG mais recente
-    last_fvg = gaps[-1]
-    fvg_type = last_fvg["type"]
-    gap = last_fvg["gap"]
-    size = last_fvg["size"]
-    
-    # Confidence baseado no tamanho do gap
-    avg_range = df['high'].sub(df['low']).mean()
-    confidence = min(0.4 + (size / avg_range) * 0.4, 1.0) if avg_range > 0 else 0.4
-    
-    action = "BUY" if fvg_type == "bullish" else "SELL"
-    return Signal(
-        action=action,
-        confidence=confidence,
-        reasons=[f"FVG {fvg_type} detectado: gap {gap[0]:.2f}-{gap[1]:.2f}, tamanho {size:.4f}"],
-        tags=["SMC:FVG", f"SMC:FVG_{fvg_type.upper()}"],
-        meta={"fvg_type": fvg_type, "gap_low": gap[0], "gap_high": gap[1], "size": size, "index": last_fvg["index"]}
-    )
+    return SMCStructureTracker.from_frame(df).fvg_signal(avg_range=df['high'].sub(df['low']).mean())
 
 
 def detect_liquidity_zones(df: pd.DataFrame, min_touches: int = 2, tol: float = 1e-5) -> dict:
@@ -282,6 +179,474 @@ def detect_liquidity_sweep(df: pd.DataFrame, body_ratio: float = 0.5, tol: float
     )
 
 
+# ==================== SÉRIES VETORIZADAS (backtest) ====================
+# Cada detect_*_series reproduz run_windowed(detect_*, df, lookback) sem alocar
+# um DataFrame por candle. As janelas são [i-lookback, i], i = lookback..n-1.
+
+def detect_bos_series(df: pd.DataFrame, min_displacement: float = 0.001,
+                      lookback: int = DEFAULT_LOOKBACK) -> SignalSeries:
+    """BOS sobre a série inteira: swing high/low = máx/mín dos candles anteriores da janela."""
+    if lookback + 1 < 2 or window_count(len(df), lookback) == 0:
+        return SignalSeries.empty()
+
+    arrays = ohlcv_arrays(df)
+    last_swing_high = sliding_window_view(arrays['high'][:-1], lookback).max(axis=1)
+    last_swing_low = sliding_window_view(arrays['low'][:-1], lookback).min(axis=1)
+    current_close = window_column(arrays['close'], lookback, lookback)
+
+    price_range = last_swing_high - last_swing_low
+    valid = price_range != 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bull = valid & (current_close > last_swing_high) & \
+            ((current_close - last_swing_high) / price_range >= min_displacement)
+        bear = valid & ~bull & (current_close < last_swing_low) & \
+            ((last_swing_low - current_close) / price_range >= min_displacement)
+
+    return series_or_empty(np.where(bull, 1, np.where(bear, -1, 0)), lookback)
+
+
+def detect_choch_series(df: pd.DataFrame, lookback: int = DEFAULT_LOOKBACK) -> SignalSeries:
+    """CHoCH sobre a série inteira: contagem de higher highs/lower lows em lockstep por janela."""
+    if lookback + 1 < 3 or window_count(len(df), lookback) == 0:
+        return SignalSeries.empty()
+
+    arrays = ohlcv_arrays(df)
+    highs, lows, closes = arrays['high'], arrays['low'], arrays['close']
+
+    running_max = window_column(highs, 0, lookback).copy()
+    running_min = window_column(lows, 0, lookback).copy()
+    highs_count = np.zeros(running_max.size, dtype=np.int64)
+    lows_count = np.zeros(running_max.size, dtype=np.int64)
+    last_high = np.zeros(running_max.size, dtype=np.int64)
+    last_low = np.zeros(running_max.size, dtype=np.int64)
+
+    for j in range(1, lookback + 1):
+        if j > 1:
+            np.maximum(running_max, window_column(highs, j - 1, lookback), out=running_max)
+            np.minimum(running_min, window_column(lows, j - 1, lookback), out=running_min)
+        close_j = window_column(closes, j, lookback)
+        higher_high = close_j > running_max
+        lower_low = close_j < running_min
+        highs_count += higher_high
+        lows_count += lower_low
+        last_high[higher_high] = j
+        last_low[lower_low] = j
+
+    bear = (highs_count >= 2) & (lows_count > 0) & (last_low > last_high)
+    bull = ~bear & (lows_count >= 2) & (highs_count > 0) & (last_high > last_low)
+    return series_or_empty(np.where(bull, 1, np.where(bear, -1, 0)), lookback)
+
+
+def detect_order_blocks_series(df: pd.DataFrame, min_range: float = 0,
+                               lookback: int = DEFAULT_LOOKBACK) -> SignalSeries:
+    """Order Blocks sobre a série inteira: último OB de cada janela, rastreado em lockstep."""
+    if window_count(len(df), lookback) == 0:
+        return SignalSeries.empty()
+
+    arrays = ohlcv_arrays(df)
+    highs, lows, opens, closes = arrays['high'], arrays['low'], arrays['open'], arrays['close']
+    candle_range = np.abs(highs - lows)
+
+    curr_max = window_column(highs, 0, lookback).copy()
+    curr_min = window_column(lows, 0, lookback).copy()
+    last_ob = np.zeros(curr_max.size, dtype=np.int8)
+
+    for j in range(1, lookback + 1):
+        c = window_column(closes, j, lookback)
+        prev_o = window_column(opens, j - 1, lookback)
+        prev_c = window_column(closes, j - 1, lookback)
+        prev_range_ok = window_column(candle_range, j - 1, lookback) >= min_range
+
+        bull_break = c > curr_max
+        last_ob[bull_break & (prev_c < prev_o) & prev_range_ok] = 1
+        curr_max = np.where(bull_break, window_column(highs, j, lookback), curr_max)
+
+        bear_break = c < curr_min
+        last_ob[bear_break & (prev_c > prev_o) & prev_range_ok] = -1
+        curr_min = np.where(bear_break, window_column(lows, j, lookback), curr_min)
+
+    return series_or_empty(last_ob, lookback)
+
+
+def detect_fvg_series(df: pd.DataFrame, lookback: int = DEFAULT_LOOKBACK) -> SignalSeries:
+    """FVG sobre a série inteira: FVG mais recente dentro de cada janela, em O(n)."""
+    n = len(df)
+    if lookback + 1 < 3 or window_count(n, lookback) == 0:
+        return SignalSeries.empty()
+
+    arrays = ohlcv_arrays(df)
+    highs, lows = arrays['high'], arrays['low']
+
+    gap = np.zeros(n, dtype=np.int8)
+    bullish = lows[1:] > highs[:-1]
+    bearish = ~bullish & (highs[1:] < lows[:-1])
+    gap[1:][bullish] = 1
+    gap[1:][bearish] = -1
+
+    positions = np.arange(n)
+    last_gap = np.maximum.accumulate(np.where(gap != 0, positions, -1))
+
+    window_end = positions[lookback:]
+    last_in_window = last_gap[lookback:]
+    # O primeiro par avaliado na janela é (i-lookback, i-lookback+1)
+    valid = last_in_window >= window_end - lookback + 1
+    directions = np.where(valid, gap[np.maximum(last_in_window, 0)], 0)
+    return series_or_empty(directions, lookback)
+
+
+def detect_liquidity_sweep_series(df: pd.DataFrame, body_ratio: float = 0.5, tol: float = 1e-5,
+                                  lookback: int = DEFAULT_LOOKBACK) -> SignalSeries:
+    """
+    Liquidity Sweep sobre a série inteira.
+
+    As zonas de liquidez de cada janela (preços tocados >= 2 vezes) são mantidas
+    por um contador deslizante em vez de reconstruídas por janela. Janelas que
+    contêm preços distintos a menos de `tol` um do outro (onde detect_liquidity_zones
+    funde zonas) caem no detector de referência para manter paridade exata.
+    """
+    n = len(df)
+    if window_count(n, lookback) == 0:
+        return SignalSeries.empty()
+
+    arrays = ohlcv_arrays(df)
+    highs, lows, opens, closes = arrays['high'], arrays['low'], arrays['open'], arrays['close']
+
+    rng = highs - lows
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wick_ok = (rng != 0) & ~(np.abs(closes - opens) / rng > body_ratio)
+
+    # Linhas com algum preço a <= tol de outro preço distinto (fusão de zonas possível)
+    values = np.concatenate([highs, lows])
+    unique_values = np.unique(values)
+    near = np.zeros(unique_values.size, dtype=bool)
+    step = 1
+    while step < unique_values.size:
+        close_pair = (unique_values[step:] - unique_values[:-step]) <= tol
+        if not close_pair.any():
+            break
+        near[step:] |= close_pair
+        near[:-step] |= close_pair
+        step += 1
+    flagged = np.isin(highs, unique_values[near]).astype(np.int64) + np.isin(lows, unique_values[near])
+    flagged_cumsum = np.concatenate([[0], np.cumsum(flagged)])
+
+    high_list = highs.tolist()
+    low_list = lows.tolist()
+    close_list = closes.tolist()
+    wick_list = wick_ok.tolist()
+
+    counts = {}
+    # Linhas (em ordem) onde cada preço aparece como high / low dentro da janela
+    high_rows = {}
+    low_rows = {}
+    # Zonas ativas -> (última linha com sweep, direção) dentro da janela atual
+    active = {}
+    activated = []
+
+    def add(price, row, rows_by_price):
+        counts[price] = counts.get(price, 0) + 1
+        rows_by_price.setdefault(price, deque()).append(row)
+        if counts[price] == 2:
+            activated.append(price)
+
+    def remove(price, rows_by_price):
+        rows = rows_by_price[price]
+        rows.popleft()
+        if not rows:
+            del rows_by_price[price]
+        counts[price] -= 1
+        if counts[price] == 1:
+            active.pop(price, None)
+        elif counts[price] == 0:
+            del counts[price]
+
+    def scan_segment(z, first, last):
+        """Último sweep da zona z nas linhas [first, last] (vetorizado)"""
+        upper = z + tol
+        lower = z - tol
+        segment = slice(first, last + 1)
+        seg_ok = wick_ok[segment]
+        bearish = seg_ok & (highs[segment] > upper) & (closes[segment] < lower)
+        bullish = seg_ok & (lows[segment] < lower) & (closes[segment] > upper)
+        hits = np.flatnonzero(bearish | bullish)
+        if hits.size == 0:
+            return (-1, 0)
+        row = int(hits[-1])
+        return (first + row, -1 if bearish[row] else 1)
+
+    def zone_order(z):
+        """Posição da primeira aparição de z em highs + lows da janela"""
+        if z in high_rows:
+            return high_rows[z][0]
+        return n + low_rows[z][0]
+
+    for row in range(lookback + 1):
+        add(high_list[row], row, high_rows)
+        add(low_list[row], row, low_rows)
+
+    directions = np.zeros(n - lookback, dtype=np.int8)
+    for i in range(lookback, n):
+        start = i - lookback
+        if i > lookback:
+            remove(high_list[start - 1], high_rows)
+            remove(low_list[start - 1], low_rows)
+            h, l, c = high_list[i], low_list[i], close_list[i]
+            if wick_list[i]:
+                # Zonas que já estavam ativas: basta testar o novo candle
+                for z, state in active.items():
+                    upper = z + tol
+                    lower = z - tol
+                    if h > upper and c < lower:
+                        active[z] = (i, -1)
+                    elif l < lower and c > upper:
+                        active[z] = (i, 1)
+            add(h, i, high_rows)
+            add(l, i, low_rows)
+
+        for z in activated:
+            if counts.get(z, 0) >= 2:
+                active[z] = scan_segment(z, start + 1, i)
+        activated.clear()
+
+        if flagged_cumsum[i + 1] - flagged_cumsum[start] >= 2:
+            window_df = df.iloc[start:i + 1].reset_index(drop=True)
+            signal = detect_liquidity_sweep(window_df, body_ratio, tol)
+            directions[i - lookback] = signal.get_direction()
+            continue
+
+        best_row = start
+        best = []
+        for z, (row, direction) in active.items():
+            if row > best_row:
+                best_row = row
+                best = [(z, direction)]
+            elif row == best_row and best:
+                best.append((z, direction))
+
+        if len(best) == 1:
+            directions[i - lookback] = best[0][1]
+        elif best:
+            # Mesmo candle varreu várias zonas: vale a última na ordem das zonas
+            directions[i - lookback] = max(best, key=lambda zd: zone_order(zd[0]))[1]
+
+    return series_or_empty(directions, lookback)
+
+
+# ==================== SINAIS POR PREFIXO (backtest de confluência) ====================
+# Cada iter_*_signals gera, para i = start..n-1, o mesmo Signal que detect_*(df.iloc[:i+1]),
+# com o estado da janela crescente mantido de forma incremental (O(n) no total):
+# BOS, OB e FVG consultam o SMCStructureTracker alimentado candle a candle.
+# A média de range (avg_range) usa soma acumulada: pode diferir da média pandas
+# na última casa decimal, o que afeta apenas confidence em ~1e-15.
+
+def _iter_tracker(df: pd.DataFrame, **kwargs) -> Iterator[tuple]:
+    """(i, rastreador após o candle i) para cada candle de df"""
+    arrays = ohlcv_arrays(df)
+    tracker = SMCStructureTracker(**kwargs)
+    columns = (arrays['open'].tolist(), arrays['high'].tolist(), arrays['low'].tolist(), arrays['close'].tolist())
+    for i, (o, h, l, c) in enumerate(zip(*columns)):
+        tracker.update(o, h, l, c)
+        yield i, tracker
+
+
+def _prefix_mean_range(arrays: dict) -> np.ndarray:
+    """Média de (high - low) de cada prefixo [0, i], ignorando NaN como pandas"""
+    candle_range = arrays['high'] - arrays['low']
+    valid = ~np.isnan(candle_range)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.cumsum(np.where(valid, candle_range, 0.0)) / np.cumsum(valid)
+
+
+def iter_bos_signals(df: pd.DataFrame, min_displacement: float = 0.001, start: int = 0) -> Iterator[Signal]:
+    """detect_bos de cada prefixo: swing high/low = máx/mín acumulados dos candles anteriores."""
+    for i, tracker in _iter_tracker(df):
+        if i >= start:
+            yield tracker.bos_signal(min_displacement)
+
+
+def iter_choch_signals(df: pd.DataFrame, start: int = 0) -> Iterator[Signal]:
+    """detect_choch de cada prefixo: higher highs/lower lows acumulados candle a candle."""
+    n = len(df)
+    arrays = ohlcv_arrays(df)
+    closes = arrays['close']
+
+    # Candle j é higher high se fecha acima da máxima de [0, j) (idem lower low)
+    higher_high = np.zeros(n, dtype=bool)
+    lower_low = np.zeros(n, dtype=bool)
+    if n > 1:
+        higher_high[1:] = closes[1:] > np.fmax.accumulate(arrays['high'])[:-1]
+        lower_low[1:] = closes[1:] < np.fmin.accumulate(arrays['low'])[:-1]
+
+    positions = np.arange(n)
+    highs_count = np.cumsum(higher_high)
+    lows_count = np.cumsum(lower_low)
+    last_high = np.maximum.accumulate(np.where(higher_high, positions, 0))
+    last_low = np.maximum.accumulate(np.where(lower_low, positions, 0))
+
+    for i in range(start, n):
+        if i < 2:
+            yield Signal(action="HOLD", confidence=0.0, tags=["SMC:CHOCH"], reasons=["Dados insuficientes"])
+            continue
+
+        count_h, count_l = int(highs_count[i]), int(lows_count[i])
+
+        if count_h >= 2 and count_l and last_low[i] > last_high[i]:
+            yield Signal(
+                action="SELL",
+                confidence=min(0.6 + (count_h * 0.1), 1.0),
+                reasons=[f"CHoCH: uptrend inverteu para downtrend após {count_h} higher highs"],
+                tags=["SMC:CHOCH", "SMC:CHOCH_BEARISH"],
+                meta={"previous_trend": "UP", "highs_count": count_h, "lows_count": count_l}
+            )
+        elif count_l >= 2 and count_h and last_high[i] > last_low[i]:
+            yield Signal(
+                action="BUY",
+                confidence=min(0.6 + (count_l * 0.1), 1.0),
+                reasons=[f"CHoCH: downtrend inverteu para uptrend após {count_l} lower lows"],
+                tags=["SMC:CHOCH", "SMC:CHOCH_BULLISH"],
+                meta={"previous_trend": "DOWN", "highs_count": count_h, "lows_count": count_l}
+            )
+        else:
+            yield Signal(action="HOLD", confidence=0.0, tags=["SMC:CHOCH"], reasons=["Sem CHoCH detectado"])
+
+
+def iter_order_block_signals(df: pd.DataFrame, min_range: float = 0, start: int = 0) -> Iterator[Signal]:
+    """detect_order_blocks de cada prefixo: o OB de cada candle não depende dos candles seguintes."""
+    for i, tracker in _iter_tracker(df, min_range=min_range):
+        if i >= start:
+            yield tracker.order_block_signal()
+
+
+def iter_fvg_signals(df: pd.DataFrame, start: int = 0) -> Iterator[Signal]:
+    """detect_fvg de cada prefixo: FVG mais recente formado até o candle."""
+    for i, tracker in _iter_tracker(df):
+        if i >= start:
+            yield tracker.fvg_signal()
+
+
+def iter_liquidity_sweep_signals(df: pd.DataFrame, body_ratio: float = 0.5, tol: float = 1e-5,
+                                 start: int = 0) -> Iterator[Signal]:
+    """
+    detect_liquidity_sweep de cada prefixo.
+
+    As zonas (preços tocados >= 2 vezes) só crescem numa janela crescente, então o
+    último candle com sweep também só avança: cada candle novo é testado contra as
+    zonas existentes e cada zona nova contra os candles após o último sweep.
+    Prefixos com preços distintos a menos de `tol` um do outro (fusão de zonas)
+    usam o detector de referência.
+    """
+    n = len(df)
+    arrays = ohlcv_arrays(df)
+    highs, lows, opens, closes = arrays['high'], arrays['low'], arrays['open'], arrays['close']
+    avg_range = _prefix_mean_range(arrays)
+
+    rng = highs - lows
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wick_ok = (rng != 0) & ~(np.abs(closes - opens) / rng > body_ratio)
+
+    unique_values = np.unique(np.concatenate([highs, lows]))
+    near = np.zeros(unique_values.size, dtype=bool)
+    close_pair = np.diff(unique_values) <= tol
+    near[1:] |= close_pair
+    near[:-1] |= close_pair
+    flagged = np.isin(highs, unique_values[near]).astype(np.int64) + np.isin(lows, unique_values[near])
+    flagged_cumsum = np.cumsum(flagged)
+
+    high_list, low_list = highs.tolist(), lows.tolist()
+    open_list, close_list = opens.tolist(), closes.tolist()
+    wick_list = wick_ok.tolist()
+
+    # Ordem das zonas em detect_liquidity_zones: primeira aparição em highs + lows
+    first_high = {}
+    first_low = {}
+    for row, price in enumerate(high_list):
+        first_high.setdefault(price, row)
+    for row, price in enumerate(low_list):
+        first_low.setdefault(price, row)
+
+    def zone_order(z, i):
+        row = first_high.get(z, n)
+        return (0, row) if row <= i else (1, first_low[z])
+
+    def swept_zones(j, zones):
+        """Zonas varridas pelo candle j: (zona, direção do sweep)"""
+        h, l, c = high_list[j], low_list[j], close_list[j]
+        hits = []
+        for z in zones[bisect_right(zones, l):bisect_left(zones, h)]:
+            if h > z + tol and c < z - tol:
+                hits.append((z, "up"))
+            elif l < z - tol and c > z + tol:
+                hits.append((z, "down"))
+        return hits
+
+    def last_sweep_of_zone(z, first, last):
+        """Último candle em [first, last] que varre a zona z (vetorizado)"""
+        if first > last:
+            return -1
+        segment = slice(first, last + 1)
+        swept = wick_ok[segment] & (
+            ((highs[segment] > z + tol) & (closes[segment] < z - tol)) |
+            ((lows[segment] < z - tol) & (closes[segment] > z + tol))
+        )
+        hits = np.flatnonzero(swept)
+        return first + int(hits[-1]) if hits.size else -1
+
+    counts = {}
+    zones = []
+    last_sweep = 0
+    # (nível, direção) do último sweep; refeito só quando zonas, candle ou ordem mudam
+    best = None
+    for i in range(n):
+        new_zones = []
+        for price in (high_list[i], low_list[i]):
+            counts[price] = counts.get(price, 0) + 1
+            if counts[price] == 2:
+                new_zones.append(price)
+
+        previous_sweep = last_sweep
+        # O candle i não varre as próprias máxima/mínima: zonas novas só com candles anteriores
+        for z in new_zones:
+            insort(zones, z)
+            last_sweep = max(last_sweep, last_sweep_of_zone(z, max(last_sweep + 1, 1), i - 1))
+        if i >= 1 and wick_list[i] and swept_zones(i, zones):
+            last_sweep = i
+        if new_zones or last_sweep != previous_sweep or first_high[high_list[i]] == i:
+            best = None
+
+        if i < start:
+            continue
+
+        if flagged_cumsum[i] >= 2:
+            yield detect_liquidity_sweep(df.iloc[:i + 1], body_ratio, tol)
+            continue
+
+        if not zones:
+            yield Signal(action="HOLD", confidence=0.0, tags=["SMC:SWEEP"], reasons=["Sem zonas de liquidez"])
+            continue
+        if last_sweep < 1:
+            yield Signal(action="HOLD", confidence=0.0, tags=["SMC:SWEEP"], reasons=["Nenhum sweep detectado"])
+            continue
+
+        # Mesmo candle pode varrer várias zonas: vale a última na ordem das zonas
+        if best is None:
+            best = max(swept_zones(last_sweep, zones), key=lambda zd: zone_order(zd[0], i))
+        level, direction = best
+        o, c = open_list[last_sweep], close_list[last_sweep]
+        if direction == "up":
+            sweep_type, wick_size = "bearish", highs[last_sweep] - max(o, c)
+        else:
+            sweep_type, wick_size = "bullish", min(o, c) - lows[last_sweep]
+
+        confidence = min(0.5 + (wick_size / avg_range[i]) * 0.3, 1.0) if avg_range[i] > 0 else 0.5
+        yield Signal(
+            action="BUY" if sweep_type == "bullish" else "SELL",
+            confidence=confidence,
+            reasons=[f"Liquidity sweep {sweep_type}: varreu nível {level:.2f}, pavio {wick_size:.4f}"],
+            tags=["SMC:SWEEP", f"SMC:SWEEP_{sweep_type.upper()}"],
+            meta={"sweep_type": sweep_type, "level": level, "wick_size": wick_size, "direction": direction}
+        )
+
+
 # ==================== SMCDetector CLASS ====================
 
 class SMCDetector:
@@ -359,46 +724,62 @@ class ConfluenceEngine:
         self.sell_threshold = regime_cfg.get('sell_threshold', -0.5)
         self.conflict_penalty = regime_cfg.get('conflict_penalty', 0.3)
     
-    def _calculate_regime_filters(self, candles: pd.DataFrame) -> dict:
-        """Calcula indicadores de regime: ADX, ATR, BB width"""
+    @staticmethod
+    def _regime_indicators(candles: pd.DataFrame) -> dict:
+        """Séries (arrays) de ADX, +DI, -DI, ATR e Bollinger usadas pelos filtros de regime"""
         from market_manus.strategies.classic_analysis import calculate_adx, calculate_atr, calculate_bollinger_bands
-        
+
+        adx, plus_di, minus_di = calculate_adx(candles, period=14)
+        upper, middle, lower = calculate_bollinger_bands(candles['close'], period=20, std_dev=2)
+        return {
+            'adx': adx.to_numpy(),
+            'plus_di': plus_di.to_numpy(),
+            'minus_di': minus_di.to_numpy(),
+            'atr': calculate_atr(candles, period=14).to_numpy(),
+            'upper': upper.to_numpy(),
+            'middle': middle.to_numpy(),
+            'lower': lower.to_numpy(),
+        }
+
+    @staticmethod
+    def _regime_at(indicators: dict, i: int) -> dict:
+        """Filtros de regime no candle i (i < 0 = série vazia)"""
         regime = {}
-        
+        regime['adx'] = indicators['adx'][i] if i >= 0 else 0
+        regime['plus_di'] = indicators['plus_di'][i] if i >= 0 else 0
+        regime['minus_di'] = indicators['minus_di'][i] if i >= 0 else 0
+        regime['atr'] = indicators['atr'][i] if i >= 0 else 0
+
+        if i >= 0 and indicators['middle'][i] > 0:
+            regime['bb_width'] = (indicators['upper'][i] - indicators['lower'][i]) / indicators['middle'][i]
+        else:
+            regime['bb_width'] = 0
+        return regime
+
+    def _calculate_regime_filters(self, candles: pd.DataFrame) -> dict:
+        """Calcula indicadores de regime: ADX, ATR, BB width"""
         try:
-            # ADX
-            adx, plus_di, minus_di = calculate_adx(candles, period=14)
-            regime['adx'] = adx.iloc[-1] if len(adx) > 0 else 0
-            regime['plus_di'] = plus_di.iloc[-1] if len(plus_di) > 0 else 0
-            regime['minus_di'] = minus_di.iloc[-1] if len(minus_di) > 0 else 0
-            
-            # ATR
-            atr = calculate_atr(candles, period=14)
-            regime['atr'] = atr.iloc[-1] if len(atr) > 0 else 0
-            
-            # Bollinger width
-            upper, middle, lower = calculate_bollinger_bands(candles['close'], period=20, std_dev=2)
-            if len(middle) > 0 and middle.iloc[-1] > 0:
-                regime['bb_width'] = (upper.iloc[-1] - lower.iloc[-1]) / middle.iloc[-1]
-            else:
-                regime['bb_width'] = 0
+            return self._regime_at(self._regime_indicators(candles), len(candles) - 1)
         except Exception as e:
             print(f"Erro ao calcular filtros de regime: {e}")
-            regime = {'adx': 0, 'atr': 0, 'bb_width': 0, 'plus_di': 0, 'minus_di': 0}
-        
-        return regime
-    
-    def evaluate(self, candles: pd.DataFrame, ctx: dict) -> Signal:
-        """
-        Avalia todos os detectores e retorna decisão final de confluência.
-        Aplica filtros de regime (ADX, ATR, BB width) para validar sinais.
-        
-        Returns:
-            Signal final com score agregado e razões de suporte
-        """
-        # Calcula filtros de regime
-        regime = self._calculate_regime_filters(candles)
-        
+            return {'adx': 0, 'atr': 0, 'bb_width': 0, 'plus_di': 0, 'minus_di': 0}
+
+    def iter_regime_filters(self, candles: pd.DataFrame, start: int = 0) -> Iterator[dict]:
+        """Filtros de regime de cada prefixo candles.iloc[:i+1], com os indicadores calculados uma vez"""
+        try:
+            indicators = self._regime_indicators(candles)
+        except Exception as e:
+            print(f"Erro ao calcular filtros de regime: {e}")
+            indicators = None
+
+        for i in range(start, len(candles)):
+            if indicators is None:
+                yield {'adx': 0, 'atr': 0, 'bb_width': 0, 'plus_di': 0, 'minus_di': 0}
+            else:
+                yield self._regime_at(indicators, i)
+
+    def _regime_rejection(self, regime: dict) -> Optional[Signal]:
+        """HOLD de regime desfavorável, ou None se o regime permite operar"""
         # Extrai thresholds de regime
         adx_min = self.regime_cfg.get('adx_min', 0)
         adx_max = self.regime_cfg.get('adx_max', 100)
@@ -424,14 +805,29 @@ class ConfluenceEngine:
             regime_valid = False
             regime_reasons.append(f"BB width muito baixo: {regime['bb_width']:.4f} < {bb_width_min} (mercado travado)")
         
-        if not regime_valid:
-            return Signal(
-                action="HOLD",
-                confidence=0.0,
-                reasons=["Regime desfavorável"] + regime_reasons,
-                tags=["CONFLUENCE:REGIME_FILTER"],
-                meta={"regime": regime}
-            )
+        if regime_valid:
+            return None
+        return Signal(
+            action="HOLD",
+            confidence=0.0,
+            reasons=["Regime desfavorável"] + regime_reasons,
+            tags=["CONFLUENCE:REGIME_FILTER"],
+            meta={"regime": regime}
+        )
+    
+    def evaluate(self, candles: pd.DataFrame, ctx: dict) -> Signal:
+        """
+        Avalia todos os detectores e retorna decisão final de confluência.
+        Aplica filtros de regime (ADX, ATR, BB width) para validar sinais.
+        
+        Returns:
+            Signal final com score agregado e razões de suporte
+        """
+        # Calcula filtros de regime
+        regime = self._calculate_regime_filters(candles)
+        rejection = self._regime_rejection(regime)
+        if rejection is not None:
+            return rejection
         
         all_signals = []
         
@@ -444,6 +840,27 @@ class ConfluenceEngine:
             except Exception as e:
                 print(f"Erro em detector {name}: {e}")
         
+        return self._combine(all_signals, ctx)
+    
+    def evaluate_precomputed(self, regime: dict, signals: dict, ctx: dict) -> Signal:
+        """
+        Mesma decisão de evaluate() a partir de regime e sinais já calculados.
+        
+        Args:
+            regime: Filtros de regime do candle (ver iter_regime_filters)
+            signals: Dict {nome: Signal} com o sinal de cada detector no candle
+            ctx: Contexto (símbolo, timeframe)
+        """
+        rejection = self._regime_rejection(regime)
+        if rejection is not None:
+            return rejection
+        
+        all_signals = [(name, signal) for name, signal in signals.items()
+                       if signal and signal.action != "HOLD"]
+        return self._combine(all_signals, ctx)
+    
+    def _combine(self, all_signals: list, ctx: dict) -> Signal:
+        """Score ponderado, penalidade de conflito e decisão final"""
         if not all_signals:
             return Signal(
                 action="HOLD",
@@ -508,7 +925,75 @@ class ConfluenceEngine:
 
 # ==================== FUNÇÃO PÚBLICA DE CONFLUÊNCIA ====================
 
-def confluence_decision(candles: pd.DataFrame, symbol: str, timeframe: str, config: dict) -> Signal:
+def structure_tracker_for(config: dict, window: Optional[int] = None) -> SMCStructureTracker:
+    """Rastreador SMC vazio com os parâmetros de Order Block da config de confluência (window: ver SMCStructureTracker)"""
+    return SMCStructureTracker(min_range=SMCDetector(config.get("smc", {})).min_ob_range, window=window)
+
+
+def _confluence_detectors(config: dict, structure: Optional[SMCStructureTracker] = None) -> list:
+    """
+    Detectores habilitados na config, na ordem avaliada pelo ConfluenceEngine.
+
+    Args:
+        config: Configuração de confluência
+        structure: Rastreador persistente do stream; se informado, BOS/CHoCH/OB/FVG
+            consultam o seu estado em vez de recalcular sobre os candles
+
+    Returns:
+        Lista de (nome, detector(candles) -> Signal, iter(candles, start) -> Iterator[Signal])
+    """
+    smc = SMCDetector(config.get("smc", {}))
+    detectors = []
+    
+    if config.get("use_smc", True):
+        if structure is not None:
+            # Stream ao vivo: consultas ao estado do rastreador (candles fechados)
+            bos = lambda candles: structure.bos_signal(smc.min_displacement)
+            choch = lambda candles: structure.choch_signal()
+            order_blocks = lambda candles: structure.order_block_signal()
+            fvg = lambda candles: structure.fvg_signal()
+        else:
+            bos = lambda candles: detect_bos(candles, smc.min_displacement)
+            choch = lambda candles: detect_choch(candles)
+            order_blocks = lambda candles: detect_order_blocks(candles, smc.min_ob_range)
+            fvg = lambda candles: detect_fvg(candles)
+        
+        # Detectores SMC individuais (SMC primeiro)
+        detectors += [
+            ("SMC:BOS", bos,
+             lambda candles, start: iter_bos_signals(candles, smc.min_displacement, start=start)),
+            ("SMC:CHoCH", choch,
+             lambda candles, start: iter_choch_signals(candles, start=start)),
+            ("SMC:OB", order_blocks,
+             lambda candles, start: iter_order_block_signals(candles, smc.min_ob_range, start=start)),
+            ("SMC:FVG", fvg,
+             lambda candles, start: iter_fvg_signals(candles, start=start)),
+            ("SMC:SWEEP",
+             lambda candles: detect_liquidity_sweep(candles, smc.body_ratio),
+             lambda candles, start: iter_liquidity_sweep_signals(candles, smc.body_ratio, start=start)),
+        ]
+    
+    if config.get("use_classic", True):
+        from market_manus.strategies.classic_analysis import CLASSIC_STRATEGIES, iter_classic_signals
+        
+        # Estratégia clássica -> seção de parâmetros na config
+        # (RIBBON, MOMENTUM e PIVOT são os detectores de scalping - Investopedia)
+        classic = [("EMA", "ema"), ("MACD", "macd"), ("RSI", "rsi"), ("BB", "bb"), ("ADX", "adx"),
+                   ("STOCH", "stoch"), ("FIB", "fib"), ("RIBBON", "ribbon"), ("MOMENTUM", "momentum"),
+                   ("PIVOT", "pivot")]
+        for strategy, section in classic:
+            detectors.append((
+                f"CLASSIC:{strategy}",
+                lambda candles, fn=CLASSIC_STRATEGIES[strategy], section=section: fn(candles, config.get(section, {})),
+                lambda candles, start, strategy=strategy, section=section: iter_classic_signals(
+                    strategy, candles, config.get(section, {}), start=start),
+            ))
+    
+    return detectors
+
+
+def confluence_decision(candles: pd.DataFrame, symbol: str, timeframe: str, config: dict,
+                        structure: Optional[SMCStructureTracker] = None) -> Signal:
     """
     Função principal de decisão de confluência.
     Orquestra SMCDetector + detectores clássicos via ConfluenceEngine.
@@ -518,47 +1003,19 @@ def confluence_decision(candles: pd.DataFrame, symbol: str, timeframe: str, conf
         symbol: Símbolo (ex: "BTCUSDT")
         timeframe: Timeframe (ex: "5m")
         config: Configuração completa (pesos, regime, toggles)
+        structure: Rastreador SMC persistente do stream (ver structure_tracker_for);
+            sem ele, BOS/CHoCH/OB/FVG são calculados sobre candles
     
     Returns:
         Signal final de confluência
     """
     ctx = {"symbol": symbol, "timeframe": timeframe}
     
-    # Inicializa SMC
-    smc_config = config.get("smc", {})
-    smc = SMCDetector(smc_config)
-    
-    # Monta dict de detectores (SMC primeiro)
-    detectors = {}
-    
-    if config.get("use_smc", True):
-        # Adiciona detectores SMC individuais
-        detectors["SMC:BOS"] = lambda: detect_bos(candles, smc.min_displacement)
-        detectors["SMC:CHoCH"] = lambda: detect_choch(candles)
-        detectors["SMC:OB"] = lambda: detect_order_blocks(candles, smc.min_ob_range)
-        detectors["SMC:FVG"] = lambda: detect_fvg(candles)
-        detectors["SMC:SWEEP"] = lambda: detect_liquidity_sweep(candles, smc.body_ratio)
-    
-    # Adiciona detectores clássicos
-    if config.get("use_classic", True):
-        from market_manus.strategies.classic_analysis import (
-            ema_crossover_signal, macd_signal, rsi_signal, bollinger_signal,
-            adx_signal, stochastic_signal, fibonacci_signal,
-            ma_ribbon_signal, momentum_combo_signal, pivot_point_signal
-        )
-        
-        detectors["CLASSIC:EMA"] = lambda: ema_crossover_signal(candles, config.get("ema", {}))
-        detectors["CLASSIC:MACD"] = lambda: macd_signal(candles, config.get("macd", {}))
-        detectors["CLASSIC:RSI"] = lambda: rsi_signal(candles, config.get("rsi", {}))
-        detectors["CLASSIC:BB"] = lambda: bollinger_signal(candles, config.get("bb", {}))
-        detectors["CLASSIC:ADX"] = lambda: adx_signal(candles, config.get("adx", {}))
-        detectors["CLASSIC:STOCH"] = lambda: stochastic_signal(candles, config.get("stoch", {}))
-        detectors["CLASSIC:FIB"] = lambda: fibonacci_signal(candles, config.get("fib", {}))
-        
-        # Detectores de Scalping (NEW - Investopedia)
-        detectors["CLASSIC:RIBBON"] = lambda: ma_ribbon_signal(candles, config.get("ribbon", {}))
-        detectors["CLASSIC:MOMENTUM"] = lambda: momentum_combo_signal(candles, config.get("momentum", {}))
-        detectors["CLASSIC:PIVOT"] = lambda: pivot_point_signal(candles, config.get("pivot", {}))
+    # Monta dict de detectores
+    detectors = {
+        name: (lambda detect=detect: detect(candles))
+        for name, detect, _ in _confluence_detectors(config, structure)
+    }
     
     # Monta ConfluenceEngine
     weights = config.get("weights", {})
@@ -568,3 +1025,56 @@ def confluence_decision(candles: pd.DataFrame, symbol: str, timeframe: str, conf
     
     # Avalia e retorna decisão final
     return engine.evaluate(candles, ctx)
+
+
+def iter_confluence_decisions(candles: pd.DataFrame, symbol: str, timeframe: str, config: dict,
+                              start: int = 0) -> Iterator[Signal]:
+    """
+    Decisão de confluência de cada prefixo candles.iloc[:i+1], i = start..n-1.
+    
+    Equivale a chamar confluence_decision() com a janela crescente de cada candle
+    (como no backtest), mas cada detector e os filtros de regime são calculados
+    uma única vez sobre a série inteira e o score do ConfluenceEngine é
+    reproduzido candle a candle.
+    
+    Erros são isolados por detector, como em ConfluenceEngine.evaluate: se o
+    histórico de um detector falha (na criação ou em algum candle), aquele
+    detector passa a ser avaliado pela janela crescente nos candles seguintes,
+    e um erro nessa avaliação só o exclui do candle em questão.
+    
+    Returns:
+        Iterador com um Signal por candle a partir de `start`
+    """
+    detectors = _confluence_detectors(config)
+    histories = {}
+    for name, _, history in detectors:
+        try:
+            histories[name] = history(candles, start)
+        except Exception as e:
+            print(f"Erro em detector {name}: {e}")
+            histories[name] = None
+    engine = ConfluenceEngine({}, config.get("weights", {}), config.get("regime", {}))
+    regimes = engine.iter_regime_filters(candles, start)
+    
+    def replay() -> Iterator[Signal]:
+        for i, regime in enumerate(regimes, start=start):
+            rejected = engine._regime_rejection(regime) is not None
+            signals = {}
+            for name, detect, _ in detectors:
+                if histories[name] is not None:
+                    try:
+                        signals[name] = next(histories[name])
+                        continue
+                    except Exception as e:
+                        print(f"Erro em detector {name}: {e!r}; usando janela crescente a partir do candle {i}")
+                        histories[name] = None
+                if rejected:
+                    continue  # evaluate() não chama os detectores com regime desfavorável
+                try:
+                    signals[name] = detect(candles.iloc[:i + 1])
+                except Exception as e:
+                    print(f"Erro em detector {name}: {e}")
+            ctx = {"symbol": symbol, "timeframe": timeframe}
+            yield engine.evaluate_precomputed(regime, signals, ctx)
+    
+    return replay()
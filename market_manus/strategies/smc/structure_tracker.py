@@ -0,0 +1,355 @@
+"""
+Rastreador incremental de estrutura SMC (um candle por vez)
+
+Mantém, para os candles já recebidos:
+- swing high/low acumulados (máx/mín ignorando NaN, como pandas)
+- contagem de higher highs / lower lows (base do CHoCH)
+- eventos de estrutura BOS/CHoCH e tendência atual
+- Order Blocks (o mais recente, os FRESH e quantos foram mitigados)
+- FVGs (o mais recente e os ainda abertos, não preenchidos)
+
+Sem janela, cada update é O(1) amortizado mais a mitigação dos OBs FRESH. No
+caminho em tempo real (RealtimeStrategyEngine, StreamRuntime) um rastreador por
+(símbolo, intervalo) com window igual à janela de avaliação é semeado com o
+histórico do bootstrap e recebe cada candle fechado; quando a janela está cheia
+o estado é refeito sobre os últimos window candles (O(window) por candle
+fechado), o que mantém swings, CHoCH, OBs e FVGs limitados à mesma janela que
+detect_* veria, sem montar DataFrame. detect_bos/choch/order_blocks/fvg usam from_frame apenas para
+avaliar um DataFrame avulso, e os backtests de prefixo percorrem a série uma vez.
+"""
+
+import heapq
+import math
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from market_manus.core.signal import Signal
+
+
+def _fmax(current: float, value: float) -> float:
+    if math.isnan(current):
+        return value
+    return current if math.isnan(value) or current >= value else value
+
+
+def _fmin(current: float, value: float) -> float:
+    if math.isnan(current):
+        return value
+    return current if math.isnan(value) or current <= value else value
+
+
+class SMCStructureTracker:
+    """Estado de estrutura de mercado SMC atualizado candle a candle"""
+
+    def __init__(self, min_range: float = 0, min_displacement: float = 0.001, max_events: int = 500,
+                 window: Optional[int] = None):
+        """
+        Args:
+            min_range: Range mínimo do candle para virar Order Block
+            min_displacement: Deslocamento mínimo dos eventos BOS/CHoCH registrados
+            max_events: Eventos de estrutura mantidos (os mais recentes)
+            window: Se informado, o estado cobre só os últimos `window` candles
+                (mesma janela que detect_* receberia); None acumula a série inteira
+        """
+        self.min_range = min_range
+        self.min_displacement = min_displacement
+        self.max_events = max_events
+        self.window = window
+        self._window_candles = deque(maxlen=window) if window is not None else None
+        self._reset()
+
+    def _reset(self):
+        self.count = 0
+        self.last_candle = None  # (open, high, low, close)
+
+        # Swing high/low incluindo o último candle e excluindo-o (referência do BOS)
+        self.swing_high = math.nan
+        self.swing_low = math.nan
+        self.prior_swing_high = math.nan
+        self.prior_swing_low = math.nan
+
+        # CHoCH: higher highs / lower lows e o índice do último de cada
+        self.highs_count = 0
+        self.lows_count = 0
+        self.last_high_index = 0
+        self.last_low_index = 0
+
+        # Eventos de estrutura (BOS a favor da tendência, CHoCH contra)
+        self.trend = "NEUTRAL"
+        self.events = deque(maxlen=self.max_events)
+
+        # Order Blocks: extremos rompidos (valores brutos, como detect_order_blocks)
+        self._ob_max = math.nan
+        self._ob_min = math.nan
+        self.last_order_block: Optional[Dict] = None
+        self.fresh_order_blocks: List[Dict] = []
+        self.mitigated_order_blocks = 0
+
+        # FVGs: o mais recente e os abertos (heaps pela borda que os preenche)
+        self.last_fvg: Optional[Dict] = None
+        self._open_bullish_fvgs = []  # (-gap_low, index, fvg)
+        self._open_bearish_fvgs = []  # (gap_high, index, fvg)
+
+        self._range_sum = 0.0
+        self._range_count = 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **kwargs) -> 'SMCStructureTracker':
+        """Rastreador alimentado com todos os candles de df"""
+        tracker = cls(**kwargs)
+        if tracker.window is not None:
+            df = df.iloc[-tracker.window:]
+        closes = df['close'].to_numpy(dtype=float).tolist()
+        opens = df['open'].to_numpy(dtype=float).tolist() if 'open' in df.columns else closes
+        highs = df['high'].to_numpy(dtype=float).tolist()
+        lows = df['low'].to_numpy(dtype=float).tolist()
+        for o, h, l, c in zip(opens, highs, lows, closes):
+            tracker.update(o, h, l, c)
+        return tracker
+
+    def seed(self, candles: Iterable[Dict]):
+        """Inicializa o estado com candles históricos fechados (dicts OHLC em ordem)"""
+        if self.window is not None:
+            candles = list(candles)[-self.window:]
+        for candle in candles:
+            self.update(candle['open'], candle['high'], candle['low'], candle['close'])
+
+    @property
+    def avg_range(self) -> float:
+        """Média de (high - low) dos candles recebidos (NaN ignorado)"""
+        return self._range_sum / self._range_count if self._range_count else math.nan
+
+    @property
+    def open_fvgs(self) -> List[Dict]:
+        """FVGs ainda não preenchidos, em ordem de formação"""
+        gaps = [item[2] for item in self._open_bullish_fvgs + self._open_bearish_fvgs]
+        return sorted(gaps, key=lambda gap: gap["index"])
+
+    def update(self, open_: float, high: float, low: float, close: float):
+        """Incorpora o próximo candle fechado"""
+        if self._window_candles is not None:
+            full = len(self._window_candles) == self.window
+            self._window_candles.append((open_, high, low, close))
+            if full:
+                # O candle mais antigo saiu da janela: swings, contagens do CHoCH,
+                # OBs e FVGs passam a valer só para os candles restantes
+                self._reset()
+                for candle in self._window_candles:
+                    self._advance(*candle)
+                return
+        self._advance(open_, high, low, close)
+
+    def _advance(self, open_: float, high: float, low: float, close: float):
+        i = self.count
+        prior_high, prior_low = self.swing_high, self.swing_low
+
+        if i == 0:
+            self._ob_max, self._ob_min = high, low
+        else:
+            if close > prior_high:
+                self.highs_count += 1
+                self.last_high_index = i
+            if close < prior_low:
+                self.lows_count += 1
+                self.last_low_index = i
+            self._update_structure(i, close, prior_high, prior_low)
+            self._update_order_blocks(i, high, low, close)
+            self._fill_fvgs(high, low)
+            self._update_fvgs(i, high, low)
+
+        self._mitigate_order_blocks(high, low)
+
+        self.prior_swing_high, self.prior_swing_low = prior_high, prior_low
+        self.swing_high = _fmax(prior_high, high)
+        self.swing_low = _fmin(prior_low, low)
+        candle_range = high - low
+        if not math.isnan(candle_range):
+            self._range_sum += candle_range
+            self._range_count += 1
+        self.last_candle = (open_, high, low, close)
+        self.count += 1
+
+    def _update_structure(self, i: int, close: float, prior_high: float, prior_low: float):
+        price_range = prior_high - prior_low
+        if not price_range:
+            return
+        if close > prior_high and (close - prior_high) / price_range >= self.min_displacement:
+            direction, level = "BULLISH", prior_high
+        elif close < prior_low and (prior_low - close) / price_range >= self.min_displacement:
+            direction, level = "BEARISH", prior_low
+        else:
+            return
+        kind = "CHOCH" if self.trend not in ("NEUTRAL", direction) else "BOS"
+        self.events.append({"index": i, "type": kind, "direction": direction, "level": level, "close": close})
+        self.trend = direction
+
+    def _update_order_blocks(self, i: int, high: float, low: float, close: float):
+        prev_o, prev_h, prev_l, prev_c = self.last_candle
+        strength = abs(prev_h - prev_l)
+
+        # Bullish OB: rompimento da máxima + candle anterior bearish
+        if close > self._ob_max:
+            if prev_c < prev_o and strength >= self.min_range:
+                self._add_order_block({"index": i - 1, "type": "bullish", "zone": (prev_l, prev_h), "strength": strength})
+            self._ob_max = high
+
+        # Bearish OB: rompimento da mínima + candle anterior bullish
+        if close < self._ob_min:
+            if prev_c > prev_o and strength >= self.min_range:
+                self._add_order_block({"index": i - 1, "type": "bearish", "zone": (prev_l, prev_h), "strength": strength})
+            self._ob_min = low
+
+    def _add_order_block(self, ob: Dict):
+        ob["status"] = "FRESH"
+        self.last_order_block = ob
+        self.fresh_order_blocks.append(ob)
+
+    def _mitigate_order_blocks(self, high: float, low: float):
+        """OB tocado por um candle após sua formação deixa de ser FRESH"""
+        if not self.fresh_order_blocks:
+            return
+        still_fresh = []
+        for ob in self.fresh_order_blocks:
+            zone_low, zone_high = ob["zone"]
+            if low <= zone_high and high >= zone_low:
+                ob["status"] = "MITIGATED"
+                self.mitigated_order_blocks += 1
+            else:
+                still_fresh.append(ob)
+        self.fresh_order_blocks = still_fresh
+
+    def _update_fvgs(self, i: int, high: float, low: float):
+        prev_h, prev_l = self.last_candle[1], self.last_candle[2]
+        # Gap de alta: mínima atual > máxima anterior
+        if low > prev_h:
+            gap = {"type": "bullish", "gap": (prev_h, low), "size": low - prev_h, "index": i}
+            heapq.heappush(self._open_bullish_fvgs, (-prev_h, i, gap))
+        # Gap de baixa: máxima atual < mínima anterior
+        elif high < prev_l:
+            gap = {"type": "bearish", "gap": (high, prev_l), "size": prev_l - high, "index": i}
+            heapq.heappush(self._open_bearish_fvgs, (prev_l, i, gap))
+        else:
+            return
+        self.last_fvg = gap
+
+    def _fill_fvgs(self, high: float, low: float):
+        """Remove FVGs preenchidos por completo pelo candle"""
+        while self._open_bullish_fvgs and -self._open_bullish_fvgs[0][0] >= low:
+            heapq.heappop(self._open_bullish_fvgs)
+        while self._open_bearish_fvgs and self._open_bearish_fvgs[0][0] <= high:
+            heapq.heappop(self._open_bearish_fvgs)
+
+    # ==================== CONSULTAS (Signal do último candle) ====================
+
+    def bos_signal(self, min_displacement: float = 0.001) -> Signal:
+        """detect_bos: fechamento atual contra swing high/low dos candles anteriores"""
+        if self.count < 2:
+            return Signal(action="HOLD", confidence=0.0, tags=["SMC:BOS"], reasons=["Dados insuficientes"])
+
+        last_swing_high = self.prior_swing_high
+        last_swing_low = self.prior_swing_low
+        current_close = self.last_candle[3]
+
+        price_range = last_swing_high - last_swing_low
+        if price_range == 0:
+            return Signal(action="HOLD", confidence=0.0, tags=["SMC:BOS"], reasons=["Range zero"])
+
+        if current_close > last_swing_high:
+            displacement = (current_close - last_swing_high) / price_range
+            if displacement >= min_displacement:
+                return Signal(
+                    action="BUY",
+                    confidence=min(0.5 + displacement * 10, 1.0),
+                    reasons=[f"BOS de alta: rompeu swing high {last_swing_high:.2f}, displacement {displacement:.3f}"],
+                    tags=["SMC:BOS", "SMC:BOS_BULL"],
+                    meta={"swing_high": last_swing_high, "displacement": displacement, "close": current_close}
+                )
+
+        if current_close < last_swing_low:
+            displacement = (last_swing_low - current_close) / price_range
+            if displacement >= min_displacement:
+                return Signal(
+                    action="SELL",
+                    confidence=min(0.5 + displacement * 10, 1.0),
+                    reasons=[f"BOS de baixa: rompeu swing low {last_swing_low:.2f}, displacement {displacement:.3f}"],
+                    tags=["SMC:BOS", "SMC:BOS_BEAR"],
+                    meta={"swing_low": last_swing_low, "displacement": displacement, "close": current_close}
+                )
+
+        return Signal(action="HOLD", confidence=0.0, tags=["SMC:BOS"], reasons=["Sem BOS detectado"])
+
+    def choch_signal(self) -> Signal:
+        """detect_choch: inversão da sequência de higher highs / lower lows"""
+        if self.count < 3:
+            return Signal(action="HOLD", confidence=0.0, tags=["SMC:CHOCH"], reasons=["Dados insuficientes"])
+
+        count_h, count_l = self.highs_count, self.lows_count
+        if count_h >= 2 and count_l and self.last_low_index > self.last_high_index:
+            return Signal(
+                action="SELL",
+                confidence=min(0.6 + (count_h * 0.1), 1.0),
+                reasons=[f"CHoCH: uptrend inverteu para downtrend após {count_h} higher highs"],
+                tags=["SMC:CHOCH", "SMC:CHOCH_BEARISH"],
+                meta={"previous_trend": "UP", "highs_count": count_h, "lows_count": count_l}
+            )
+        if count_l >= 2 and count_h and self.last_high_index > self.last_low_index:
+            return Signal(
+                action="BUY",
+                confidence=min(0.6 + (count_l * 0.1), 1.0),
+                reasons=[f"CHoCH: downtrend inverteu para uptrend após {count_l} lower lows"],
+                tags=["SMC:CHOCH", "SMC:CHOCH_BULLISH"],
+                meta={"previous_trend": "DOWN", "highs_count": count_h, "lows_count": count_l}
+            )
+        return Signal(action="HOLD", confidence=0.0, tags=["SMC:CHOCH"], reasons=["Sem CHoCH detectado"])
+
+    def order_block_signal(self, avg_range: Optional[float] = None) -> Signal:
+        """detect_order_blocks: Order Block mais recente (confidence pela força relativa ao range médio)"""
+        ob = self.last_order_block
+        if ob is None:
+            return Signal(action="HOLD", confidence=0.0, tags=["SMC:OB"], reasons=["Nenhum Order Block detectado"])
+
+        avg_range = self.avg_range if avg_range is None else avg_range
+        ob_type, zone, strength = ob["type"], ob["zone"], ob["strength"]
+        confidence = min(0.5 + (strength / avg_range) * 0.3, 1.0) if avg_range > 0 else 0.5
+        return Signal(
+            action="BUY" if ob_type == "bullish" else "SELL",
+            confidence=confidence,
+            reasons=[f"Order Block {ob_type} detectado na zona {zone[0]:.2f}-{zone[1]:.2f}, strength {strength:.4f}"],
+            tags=["SMC:OB", f"SMC:OB_{ob_type.upper()}"],
+            meta={"ob_type": ob_type, "zone_low": zone[0], "zone_high": zone[1], "strength": strength, "index": ob["index"]}
+        )
+
+    def fvg_signal(self, avg_range: Optional[float] = None) -> Signal:
+        """detect_fvg: FVG mais recente (confidence pelo tamanho relativo ao range médio)"""
+        if self.count < 3:
+            return Signal(action="HOLD", confidence=0.0, tags=["SMC:FVG"], reasons=["Dados insuficientes"])
+
+        fvg = self.last_fvg
+        if fvg is None:
+            return Signal(action="HOLD", confidence=0.0, tags=["SMC:FVG"], reasons=["Nenhum FVG detectado"])
+
+        avg_range = self.avg_range if avg_range is None else avg_range
+        fvg_type, gap, size = fvg["type"], fvg["gap"], fvg["size"]
+        confidence = min(0.4 + (size / avg_range) * 0.4, 1.0) if avg_range > 0 else 0.4
+        return Signal(
+            action="BUY" if fvg_type == "bullish" else "SELL",
+            confidence=confidence,
+            reasons=[f"FVG {fvg_type} detectado: gap {gap[0]:.2f}-{gap[1]:.2f}, tamanho {size:.4f}"],
+            tags=["SMC:FVG", f"SMC:FVG_{fvg_type.upper()}"],
+            meta={"fvg_type": fvg_type, "gap_low": gap[0], "gap_high": gap[1], "size": size, "index": fvg["index"]}
+        )
+
+    def get_state(self) -> Dict:
+        """Resumo do estado atual da estrutura"""
+        return {
+            "candles": self.count,
+            "swing_high": self.swing_high,
+            "swing_low": self.swing_low,
+            "trend": self.trend,
+            "last_event": self.events[-1] if self.events else None,
+            "fresh_order_blocks": len(self.fresh_order_blocks),
+            "mitigated_order_blocks": self.mitigated_order_blocks,
+            "open_fvgs": len(self._open_bullish_fvgs) + len(self._open_bearish_fvgs),
+        }
@@ -0,0 +1,401 @@
+"""
+Streaming Indicators - Estado incremental de indicadores para execução em tempo real.
+
+Cada indicador recebe um candle por vez em O(1) (amortizado) e suporta dois tipos
+de atualização:
+- closed=True: candle fechado, incorporado ao estado permanente;
+- closed=False: candle ainda em formação (kline não fechada). O valor é calculado
+  sobre o estado permanente + o candle em formação, sem alterá-lo; cada nova
+  mensagem do mesmo candle substitui a anterior.
+
+As definições são as mesmas de indicator_kernels (e portanto de classic_analysis),
+então o valor streaming do último candle coincide com o cálculo em lote sobre a
+série inteira. Valores indisponíveis (warm-up) são NaN.
+"""
+
+import math
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+NAN = float("nan")
+
+
+class RollingWindowStats:
+    """
+    Soma, média e desvio padrão móveis por somas acumuladas centradas.
+
+    As somas são recalculadas a partir da janela a cada `window` inserções
+    (custo amortizado O(1)), o que limita o erro de arredondamento acumulado.
+    NaN na janela torna a média/desvio NaN, como no pandas.
+    """
+
+    def __init__(self, window: int, ddof: int = 0):
+        if window < 1:
+            raise ValueError(f"window deve ser >= 1: {window}")
+        self.window = window
+        self.ddof = ddof
+        self._values = deque(maxlen=window)
+        self._ref = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._nans = 0
+        self._pushes = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def push(self, value: float):
+        """Incorpora um valor fechado à janela"""
+        if len(self._values) == self.window:
+            self._remove(self._values[0])
+        self._values.append(value)
+        self._add(value)
+        self._pushes += 1
+        if self._pushes % self.window == 0:
+            self._reanchor()
+
+    def _add(self, value: float):
+        if math.isnan(value):
+            self._nans += 1
+            return
+        delta = value - self._ref
+        self._sum += delta
+        self._sumsq += delta * delta
+
+    def _remove(self, value: float):
+        if math.isnan(value):
+            self._nans -= 1
+            return
+        delta = value - self._ref
+        self._sum -= delta
+        self._sumsq -= delta * delta
+
+    def _reanchor(self):
+        """Recalcula as somas centradas no valor mais recente"""
+        finite = [v for v in self._values if not math.isnan(v)]
+        self._ref = finite[-1] if finite else 0.0
+        self._sum = sum(v - self._ref for v in finite)
+        self._sumsq = sum((v - self._ref) ** 2 for v in finite)
+        self._nans = len(self._values) - len(finite)
+
+    def _moments(self, forming: Optional[float]) -> Tuple[int, int, float, float]:
+        """(tamanho, NaNs, soma, soma_quadrados) da janela, opcionalmente com o valor em formação"""
+        count, nans, total, total_sq = len(self._values), self._nans, self._sum, self._sumsq
+        if forming is None:
+            return count, nans, total, total_sq
+        if count == self.window:
+            oldest = self._values[0]
+            if math.isnan(oldest):
+                nans -= 1
+            else:
+                delta = oldest - self._ref
+                total -= delta
+                total_sq -= delta * delta
+        else:
+            count += 1
+        if math.isnan(forming):
+            nans += 1
+        else:
+            delta = forming - self._ref
+            total += delta
+            total_sq += delta * delta
+        return count, nans, total, total_sq
+
+    def mean(self, forming: Optional[float] = None) -> float:
+        """Média da janela completa (NaN se incompleta)"""
+        count, nans, total, _ = self._moments(forming)
+        if count < self.window or nans:
+            return NAN
+        return self._ref + total / self.window
+
+    def std(self, forming: Optional[float] = None) -> float:
+        """Desvio padrão da janela completa (NaN se incompleta)"""
+        count, nans, total, total_sq = self._moments(forming)
+        if count < self.window or nans or self.window - self.ddof <= 0:
+            return NAN
+        variance = (total_sq - total * total / self.window) / (self.window - self.ddof)
+        return math.sqrt(max(variance, 0.0))
+
+
+class RollingExtremes:
+    """
+    Máxima das máximas e mínima das mínimas móveis por deques monotônicos.
+
+    Cada deque guarda (índice, valor) em ordem monotônica; a frente é o extremo da
+    janela. Inserção O(1) amortizada; consulta com candle em formação O(1).
+    """
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError(f"window deve ser >= 1: {window}")
+        self.window = window
+        self._highs = deque()
+        self._lows = deque()
+        self._count = 0
+
+    def push(self, high: float, low: float):
+        """Incorpora um candle fechado"""
+        index = self._count
+        while self._highs and self._highs[-1][1] <= high:
+            self._highs.pop()
+        self._highs.append((index, high))
+        while self._lows and self._lows[-1][1] >= low:
+            self._lows.pop()
+        self._lows.append((index, low))
+        self._count += 1
+
+        oldest = self._count - self.window
+        while self._highs[0][0] < oldest:
+            self._highs.popleft()
+        while self._lows[0][0] < oldest:
+            self._lows.popleft()
+
+    @staticmethod
+    def _front(values: deque, oldest: int) -> Optional[float]:
+        """Extremo da janela ignorando índices anteriores a `oldest`"""
+        for index, value in values:
+            if index >= oldest:
+                return value
+        return None
+
+    def extremes(self, forming: Optional[Tuple[float, float]] = None) -> Tuple[float, float]:
+        """(maior máxima, menor mínima) da janela completa (NaN se incompleta)"""
+        if forming is None:
+            if self._count < self.window:
+                return NAN, NAN
+            return self._highs[0][1], self._lows[0][1]
+
+        if self._count + 1 < self.window:
+            return NAN, NAN
+        forming_high, forming_low = forming
+        oldest = self._count + 1 - self.window
+        committed_high = self._front(self._highs, oldest)
+        committed_low = self._front(self._lows, oldest)
+        highest = forming_high if committed_high is None else max(committed_high, forming_high)
+        lowest = forming_low if committed_low is None else min(committed_low, forming_low)
+        return highest, lowest
+
+
+class StreamingEMA:
+    """EMA incremental com semente no primeiro valor (mesmo de pandas ewm(adjust=False))"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.multiplier = 2 / (period + 1)
+        self._ema: Optional[float] = None
+        self.value = NAN
+
+    def update(self, price: float, closed: bool = True) -> float:
+        if self._ema is None:
+            current = price
+        else:
+            current = (price - self._ema) * self.multiplier + self._ema
+        if closed:
+            self._ema = current
+        self.value = current
+        return current
+
+
+class StreamingRSI:
+    """RSI incremental com médias simples de ganhos/perdas (smoothing="sma" dos kernels)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._gains = RollingWindowStats(period)
+        self._losses = RollingWindowStats(period)
+        self._prev_close: Optional[float] = None
+        self.value = NAN
+
+    def update(self, close: float, closed: bool = True) -> float:
+        # Primeira variação é 0, como delta.where(delta > 0, 0) no pandas
+        change = 0.0 if self._prev_close is None else close - self._prev_close
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        if closed:
+            self._gains.push(gain)
+            self._losses.push(loss)
+            self._prev_close = close
+            avg_gain, avg_loss = self._gains.mean(), self._losses.mean()
+        else:
+            avg_gain, avg_loss = self._gains.mean(gain), self._losses.mean(loss)
+
+        if math.isnan(avg_gain) or math.isnan(avg_loss) or (avg_gain == 0 and avg_loss == 0):
+            self.value = NAN
+        elif avg_loss == 0:
+            self.value = 100.0
+        else:
+            self.value = 100 - (100 / (1 + avg_gain / avg_loss))
+        return self.value
+
+
+class StreamingMACD:
+    """MACD incremental: EMA rápida - EMA lenta e linha de sinal (EMA do MACD)"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast = StreamingEMA(fast)
+        self._slow = StreamingEMA(slow)
+        self._signal = StreamingEMA(signal)
+        self.macd = NAN
+        self.signal = NAN
+
+    def update(self, close: float, closed: bool = True) -> Tuple[float, float]:
+        self.macd = self._fast.update(close, closed) - self._slow.update(close, closed)
+        self.signal = self._signal.update(self.macd, closed)
+        return self.macd, self.signal
+
+
+class StreamingBollinger:
+    """Bandas de Bollinger incrementais (desvio amostral, como classic_analysis)"""
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        self.std_dev = std_dev
+        self._stats = RollingWindowStats(period, ddof=1)
+        self.upper = self.middle = self.lower = NAN
+
+    def update(self, close: float, closed: bool = True) -> Tuple[float, float, float]:
+        if closed:
+            self._stats.push(close)
+            middle, std = self._stats.mean(), self._stats.std()
+        else:
+            middle, std = self._stats.mean(close), self._stats.std(close)
+        self.middle = middle
+        self.upper = middle + std * self.std_dev
+        self.lower = middle - std * self.std_dev
+        return self.upper, self.middle, self.lower
+
+
+class StreamingRange:
+    """
+    Posição do close na amplitude (maior máxima, menor mínima) dos últimos `period`
+    candles: base de Stochastic %K e Williams %R.
+
+    Args:
+        stochastic_flat / williams_flat: Valores quando máxima e mínima coincidem
+    """
+
+    def __init__(self, period: int = 14, stochastic_flat: float = NAN, williams_flat: float = NAN):
+        self._extremes = RollingExtremes(period)
+        self.stochastic_flat = stochastic_flat
+        self.williams_flat = williams_flat
+        self.stochastic_k = NAN
+        self.williams_r = NAN
+
+    def update(self, high: float, low: float, close: float, closed: bool = True) -> Tuple[float, float]:
+        if closed:
+            self._extremes.push(high, low)
+            highest_high, lowest_low = self._extremes.extremes()
+        else:
+            highest_high, lowest_low = self._extremes.extremes((high, low))
+
+        value_range = highest_high - lowest_low
+        if math.isnan(value_range):
+            self.stochastic_k = NAN
+            self.williams_r = NAN
+        elif value_range == 0:
+            self.stochastic_k = self.stochastic_flat
+            self.williams_r = self.williams_flat
+        else:
+            self.stochastic_k = ((close - lowest_low) / value_range) * 100
+            self.williams_r = ((highest_high - close) / value_range) * -100
+        return self.stochastic_k, self.williams_r
+
+
+class StreamingADX:
+    """ADX incremental com médias simples (smoothing="sma" dos kernels)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._tr = RollingWindowStats(period)
+        self._plus_dm = RollingWindowStats(period)
+        self._minus_dm = RollingWindowStats(period)
+        self._dx = RollingWindowStats(period)
+        self._prev: Optional[Tuple[float, float, float]] = None
+        self.adx = self.plus_di = self.minus_di = NAN
+
+    def update(self, high: float, low: float, close: float, closed: bool = True) -> Tuple[float, float, float]:
+        tr = high - low
+        plus_dm = minus_dm = None
+        if self._prev is not None:
+            prev_high, prev_low, prev_close = self._prev
+            tr = max(tr, abs(high - prev_close), abs(low - prev_close))
+            plus_dm = max(high - prev_high, 0.0)
+            minus_dm = max(prev_low - low, 0.0)
+
+        if closed:
+            self._tr.push(tr)
+            if plus_dm is not None:
+                self._plus_dm.push(plus_dm)
+                self._minus_dm.push(minus_dm)
+            self._prev = (high, low, close)
+            atr, plus_mean, minus_mean = self._tr.mean(), self._plus_dm.mean(), self._minus_dm.mean()
+        else:
+            atr = self._tr.mean(tr)
+            plus_mean = self._plus_dm.mean(plus_dm) if plus_dm is not None else NAN
+            minus_mean = self._minus_dm.mean(minus_dm) if minus_dm is not None else NAN
+
+        self.plus_di = _safe_ratio(100 * plus_mean, atr)
+        self.minus_di = _safe_ratio(100 * minus_mean, atr)
+        dx = _safe_ratio(100 * abs(self.plus_di - self.minus_di), self.plus_di + self.minus_di)
+        ready = not math.isnan(plus_mean) and not math.isnan(atr)
+
+        if closed:
+            if ready:
+                self._dx.push(dx)
+            self.adx = self._dx.mean()
+        else:
+            self.adx = self._dx.mean(dx) if ready else NAN
+        return self.adx, self.plus_di, self.minus_di
+
+
+def _safe_ratio(numerator: float, denominator: float) -> float:
+    """Divisão com a semântica do NumPy (x/0 = ±inf, 0/0 = NaN)"""
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return NAN
+        return math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+class StreamingIndicators:
+    """
+    Conjunto de indicadores usado pelas estratégias clássicas do RealtimeStrategyEngine.
+
+    Uso:
+        indicators = StreamingIndicators()
+        indicators.seed(candles_historicos)
+        indicators.update(candle, closed=False)  # kline em formação
+        indicators.update(candle, closed=True)   # kline fechada
+    """
+
+    def __init__(self, rsi_period: int = 14, ema_fast: int = 12, ema_slow: int = 26,
+                 bollinger_period: int = 20, bollinger_std: float = 2.0,
+                 range_period: int = 14, adx_period: int = 14):
+        self.rsi = StreamingRSI(rsi_period)
+        self.ema_fast = StreamingEMA(ema_fast)
+        self.ema_slow = StreamingEMA(ema_slow)
+        self.macd = StreamingMACD(ema_fast, ema_slow, 9)
+        self.bollinger = StreamingBollinger(bollinger_period, bollinger_std)
+        # Williams %R sem amplitude = -50 (mesma regra de _apply_williams_r_strategy)
+        self.range = StreamingRange(range_period, williams_flat=-50.0)
+        self.adx = StreamingADX(adx_period)
+        self.closed_candles = 0
+        self.close = NAN
+
+    def update(self, candle: Dict, closed: bool = True):
+        """Atualiza todos os indicadores com um candle (fechado ou em formação)"""
+        high, low, close = float(candle['high']), float(candle['low']), float(candle['close'])
+        self.rsi.update(close, closed)
+        self.ema_fast.update(close, closed)
+        self.ema_slow.update(close, closed)
+        self.macd.update(close, closed)
+        self.bollinger.update(close, closed)
+        self.range.update(high, low, close, closed)
+        self.adx.update(high, low, close, closed)
+        self.close = close
+        if closed:
+            self.closed_candles += 1
+
+    def seed(self, candles: Iterable[Dict]):
+        """Inicializa o estado com candles históricos fechados"""
+        for candle in candles:
+            self.update(candle, closed=True)
@@ -5,6 +5,14 @@ Preço médio ponderado pelo volume - identifica valor justo e compra institucio
 import pandas as pd
 import numpy as np
 from market_manus.core.signal import Signal
+from market_manus.strategies.signal_series import (
+    DEFAULT_LOOKBACK,
+    SignalSeries,
+    ohlcv_arrays,
+    series_or_empty,
+    window_column,
+    window_count,
+)
 
 
 def vwap_signal(candles: pd.DataFrame, params: dict = None) -> Signal:
@@ -171,3 +179,48 @@ def vwap_volume_combo_signal(candles: pd.DataFrame, params: dict = None) -> Sign
             )
     
     return vwap_sig
+
+
+def vwap_series(candles: pd.DataFrame, params: dict = None,
+                lookback: int = DEFAULT_LOOKBACK) -> SignalSeries:
+    """
+    Versão vetorizada de vwap_signal aplicada em janelas deslizantes.
+
+    O VWAP de cada janela é acumulado desde o primeiro candle da janela; as somas
+    são feitas em lockstep (mesma ordem sequencial do cumsum original), então as
+    direções são idênticas a run_windowed(vwap_signal, ...).
+    """
+    params = params or {}
+    deviation_threshold = params.get('deviation_threshold', 0.005)
+
+    if lookback + 1 < 20 or window_count(len(candles), lookback) == 0:
+        return SignalSeries.empty()
+
+    arrays = ohlcv_arrays(candles)
+    typical_price = (arrays['high'] + arrays['low'] + arrays['close']) / 3
+    weighted_price = typical_price * arrays['volume']
+    volume = arrays['volume']
+
+    weighted_sum = window_column(weighted_price, 0, lookback).copy()
+    volume_sum = window_column(volume, 0, lookback).copy()
+    for j in range(1, lookback + 1):
+        weighted_sum += window_column(weighted_price, j, lookback)
+        volume_sum += window_column(volume, j, lookback)
+
+    current_price = window_column(arrays['close'], lookback, lookback)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_vwap = weighted_sum / volume_sum
+        distance_pct = (current_price - current_vwap) / current_vwap
+
+    directions = np.where(distance_pct < -deviation_threshold, 1,
+                          np.where(distance_pct > deviation_threshold, -1, 0))
+    return series_or_empty(directions, lookback)
+
+
+def vwap_volume_combo_series(candles: pd.DataFrame, params: dict = None,
+                             lookback: int = DEFAULT_LOOKBACK) -> SignalSeries:
+    """
+    Versão vetorizada de vwap_volume_combo_signal.
+    O combo só ajusta a confiança do sinal VWAP base, então a direção é a mesma.
+    """
+    return vwap_series(candles, params, lookback)
@@ -17,7 +17,12 @@ from pathlib import Path
 from rich.table import Table
 from rich.console import Console
 
-from market_manus.data_providers.historical_cache import HistoricalDataCache
+from market_manus.backtest.strategy_backtest import run_strategy_backtest, strategy_directions
+from market_manus.core.capital_manager import FeeModel
+from market_manus.data_providers.historical_cache import (
+    INTERVAL_MS, HistoricalDataCache, arrays_to_klines, date_to_ms, klines_to_arrays
+)
+from market_manus.data_providers.kline_paginator import KlineFetchResult, get_paginator
 
 class StrategyLabProfessionalV6:
     """Strategy Lab Professional V6 - Versão completa com todas as estratégias"""
@@ -36,6 +41,9 @@ class StrategyLabProfessionalV6:
             "api_calls_saved": 0
         }
         
+        # Custos de trading aplicados nos backtests (fees + slippage)
+        self.fee_model = FeeModel()
+        
         # Estratégias disponíveis (8 estratégias completas)
         self.strategies = {
             "rsi_mean_reversion": {
@@ -443,6 +451,12 @@ class StrategyLabProfessionalV6:
         
         return True
     
+    def _selected_strategy_params(self) -> Dict[str, Any]:
+        """Parâmetros da estratégia selecionada (configurados ou padrão)"""
+        params = {name: info['default'] for name, info in self.strategies[self.selected_strategy]['params'].items()}
+        params.update(self.strategy_params.get(self.selected_strategy, {}))
+        return params
+    
     def _run_historical_backtest(self):
         """Executa teste histórico (backtest)"""
         if not self._validate_configuration():
@@ -461,37 +475,59 @@ class StrategyLabProfessionalV6:
         else:
             print(f"   📅 Período: Últimos 30 dias")
         
-        print(f"\n🔄 Simulando backtest...")
+        print(f"\n🔄 Carregando candles...")
+        arrays, metrics = self._fetch_historical_arrays(
+            self.selected_asset, self.selected_timeframe, self.custom_start_date, self.custom_end_date
+        )
         
-        # Simular resultados para demonstração
-        import random
-        
-        total_trades = random.randint(15, 50)
-        winning_trades = random.randint(int(total_trades * 0.4), int(total_trades * 0.8))
-        losing_trades = total_trades - winning_trades
+        if arrays is None:
+            print("❌ Nenhum dado histórico disponível para o período")
+            input("\n📖 Pressione ENTER para continuar...")
+            return
         
+        params = self._selected_strategy_params()
         initial_capital = self.capital_manager.current_capital if self.capital_manager else 10000
-        final_capital = initial_capital * random.uniform(0.85, 1.25)
-        pnl = final_capital - initial_capital
-        roi = (pnl / initial_capital) * 100
         
-        win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
+        print(f"🔄 Executando backtest sobre {len(arrays['close'])} candles...")
+        result = run_strategy_backtest(
+            self.selected_strategy, arrays, params, initial_capital, fee_model=self.fee_model
+        )
+        summary = result.summary()
         
         print(f"\n📊 RESULTADOS DO BACKTEST:")
         print(f"   💰 Capital inicial: ${initial_capital:.2f}")
-        print(f"   💵 Capital final: ${final_capital:.2f}")
-        print(f"   📈 P&L: ${pnl:+.2f}")
-        print(f"   📊 ROI: {roi:+.2f}%")
-        print(f"   🎯 Total de trades: {total_trades}")
-        print(f"   ✅ Trades vencedores: {winning_trades}")
-        print(f"   ❌ Trades perdedores: {losing_trades}")
-        print(f"   📊 Win Rate: {win_rate:.1f}%")
+        print(f"   💵 Capital final: ${result.final_capital:.2f}")
+        print(f"   📈 P&L: ${result.pnl:+.2f}")
+        print(f"   📊 ROI: {result.roi:+.2f}%")
+        print(f"   🎯 Total de trades: {result.trades.total_trades}")
+        print(f"   ✅ Trades vencedores: {result.trades.winning_trades}")
+        print(f"   ❌ Trades perdedores: {result.trades.losing_trades}")
+        print(f"   📊 Win Rate: {result.win_rate:.1f}%")
+        print(f"   📉 Drawdown máximo: {result.max_drawdown:.2f}%")
+        print(f"   💸 Custos (fees + slippage): ${summary['total_costs']:.2f}")
+        print(f"\n⚡ Desempenho: {result.candles} candles em {result.elapsed_seconds:.3f}s "
+              f"({result.candles_per_second:,.0f} candles/s)")
         
         # Atualizar capital se disponível
         if self.capital_manager:
-            self.capital_manager.update_capital(pnl)
+            self.capital_manager.update_capital(result.pnl)
             print(f"\n💰 Capital atualizado para: ${self.capital_manager.current_capital:.2f}")
         
+        self.test_history.append({
+            "type": "Backtest",
+            "asset": self.selected_asset,
+            "strategy": self.selected_strategy,
+            "timeframe": self.selected_timeframe,
+            "params": params,
+            "period": {
+                "start": metrics["first_candle_time"].isoformat() if metrics.get("first_candle_time") else None,
+                "end": metrics["last_candle_time"].isoformat() if metrics.get("last_candle_time") else None
+            },
+            "data_source": metrics.get("data_source"),
+            "results": summary,
+            "timestamp": datetime.now().isoformat()
+        })
+        
         input("\n📖 Pressione ENTER para continuar...")
     
     def _run_realtime_test(self):
@@ -507,36 +543,92 @@ class StrategyLabProfessionalV6:
         print(f"   📈 Estratégia: {self.strategies[self.selected_strategy]['name']}")
         print(f"   ⏰ Timeframe: {self.timeframes[self.selected_timeframe]['name']}")
         
+        if not self.data_provider:
+            print("❌ Data Provider não disponível!")
+            input("\n📖 Pressione ENTER para continuar...")
+            return
+        
         duration = input("\n⏰ Duração do teste em minutos (padrão: 5): ").strip()
         try:
             duration_minutes = int(duration) if duration else 5
         except ValueError:
             duration_minutes = 5
         
-        print(f"\n🔄 Simulando teste em tempo real por {duration_minutes} minutos...")
-        print("⚠️ (Simulação para demonstração)")
+        print(f"\n🔄 Monitorando {self.selected_asset} por {duration_minutes} minutos (Ctrl+C para encerrar)...")
         
-        # Simular monitoramento
-        for i in range(min(duration_minutes, 10)):  # Máximo 10 iterações para demonstração
-            print(f"   📊 Minuto {i+1}: Monitorando {self.selected_asset}...")
-            time.sleep(0.5)  # Simular delay
-        
-        # Simular resultados
-        import random
-        signals_generated = random.randint(0, 5)
+        signals = self._monitor_closed_candles(duration_minutes * 60)
         
         print(f"\n📊 RESULTADOS DO TESTE EM TEMPO REAL:")
         print(f"   ⏰ Duração: {duration_minutes} minutos")
-        print(f"   📡 Sinais gerados: {signals_generated}")
+        print(f"   📡 Sinais gerados: {len(signals)}")
         print(f"   📊 Status: Monitoramento concluído")
         
-        if signals_generated > 0:
-            print(f"   🎯 Últimos sinais detectados com sucesso")
+        if signals:
+            for signal in signals[-5:]:
+                print(f"   🎯 {signal['time']}: {signal['action']} @ {signal['price']:.4f}")
         else:
             print(f"   ⚠️ Nenhum sinal gerado no período")
         
+        self.test_history.append({
+            "type": "Tempo real",
+            "asset": self.selected_asset,
+            "strategy": self.selected_strategy,
+            "timeframe": self.selected_timeframe,
+            "params": self._selected_strategy_params(),
+            "duration_minutes": duration_minutes,
+            "signals": signals,
+            "timestamp": datetime.now().isoformat()
+        })
+        
         input("\n📖 Pressione ENTER para continuar...")
     
+    def _monitor_closed_candles(self, duration_seconds: float, warmup_candles: int = 200) -> List[Dict]:
+        """
+        Avalia a estratégia a cada candle fechado durante `duration_seconds`
+        
+        A cada fechamento busca os últimos `warmup_candles` candles (uma chamada),
+        calcula as direções da série e registra a do último candle.
+        
+        Returns:
+            Lista de sinais {time, action, price}
+        """
+        symbol, interval = self.selected_asset, self.selected_timeframe
+        candle_duration = INTERVAL_MS.get(interval, 60 * 1000)
+        params = self._selected_strategy_params()
+        deadline = time.time() + duration_seconds
+        last_seen = None
+        signals = []
+        
+        try:
+            while True:
+                closed_until = (int(time.time() * 1000) // candle_duration) * candle_duration
+                if last_seen is None or last_seen < closed_until - candle_duration:
+                    fetched = self._fetch_klines_from_api(
+                        symbol, interval, closed_until - warmup_candles * candle_duration, closed_until
+                    )
+                    arrays = klines_to_arrays(fetched.klines)
+                    if len(arrays["timestamp"]) and arrays["timestamp"][-1] != last_seen:
+                        last_seen = int(arrays["timestamp"][-1])
+                        direction = int(strategy_directions(self.selected_strategy, arrays, params)[-1])
+                        action = {1: "BUY", -1: "SELL"}.get(direction, "HOLD")
+                        candle_time = datetime.fromtimestamp(last_seen / 1000).strftime("%H:%M")
+                        price = float(arrays["close"][-1])
+                        print(f"   📊 {candle_time}: {symbol} {price:.4f} → {action}")
+                        if direction:
+                            signals.append({"time": candle_time, "action": action, "price": price})
+                
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                # Próximo fechamento (ou nova tentativa se a exchange ainda não publicou o candle)
+                waiting = last_seen is not None and last_seen >= closed_until - candle_duration
+                next_check = (closed_until + candle_duration) / 1000 - time.time() if waiting else 2.0
+                time.sleep(min(remaining, max(1.0, next_check)))
+        except KeyboardInterrupt:
+            print("\n⏹️ Monitoramento interrompido")
+        
+        return signals
+    
     def _view_test_results(self):
         """Visualiza resultados dos testes"""
         print("\n📊 VISUALIZAR RESULTADOS")
@@ -824,10 +916,28 @@ class StrategyLabProfessionalV6:
         
         input("\n📖 Pressione ENTER para continuar...")
     
-    def _fetch_historical_klines(self, symbol: str, interval: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Tuple[List, Dict]:
+    def _resolve_fetch_period(self, start_date: Optional[str], end_date: Optional[str]) -> Tuple[int, int]:
+        """
+        Converte o período pedido em timestamps (ms), sem data = últimos 30 dias
+        
+        Returns:
+            Tuple[start_ts, end_ts]
+        """
+        if start_date and end_date:
+            return date_to_ms(start_date), date_to_ms(end_date)
+        
+        # Período padrão: últimos 30 dias
+        end_ts = int(datetime.now().timestamp() * 1000)
+        start_ts = end_ts - (30 * 24 * 60 * 60 * 1000)
+        return start_ts, end_ts
+    
+    def _fetch_historical_arrays(self, symbol: str, interval: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Tuple[Optional[Dict[str, np.ndarray]], Dict]:
         """
-        Busca TODOS os candles do período especificado, fazendo múltiplas chamadas se necessário.
-        Utiliza cache para evitar chamadas desnecessárias à API.
+        Busca TODOS os candles do período em colunas tipadas (timestamp int64, OHLCV float64).
+        
+        O cache é particionado por (symbol, interval): só as lacunas ainda não cobertas
+        são buscadas na API e mescladas às partições; o período inteiro é então servido
+        dos dados locais. Candles ainda em formação não são buscados nem armazenados.
         
         Args:
             symbol: Par de trading (ex: BTCUSDT)
@@ -836,149 +946,108 @@ class StrategyLabProfessionalV6:
             end_date: Data final no formato YYYY-MM-DD (opcional)
         
         Returns:
-            Tuple[List, Dict]: (Lista com todos os candles, Dicionário com métricas da API)
+            Tuple[Dict, Dict]: ({coluna: np.ndarray} ou None, Dicionário com métricas da API)
         """
-        # Calcular timestamps
-        if start_date and end_date:
-            start_ts = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp() * 1000)
-            end_ts = int(datetime.strptime(end_date, "%Y-%m-%d").timestamp() * 1000)
-            cache_start_date = start_date
-            cache_end_date = end_date
-        else:
-            # Período padrão: últimos 30 dias
-            end_ts = int(datetime.now().timestamp() * 1000)
-            start_ts = end_ts - (30 * 24 * 60 * 60 * 1000)
-            # Converter timestamps para formato YYYY-MM-DD para cache
-            cache_start_date = datetime.fromtimestamp(start_ts / 1000).strftime("%Y-%m-%d")
-            cache_end_date = datetime.fromtimestamp(end_ts / 1000).strftime("%Y-%m-%d")
-        
-        # Calcular duração de um candle em milissegundos
-        timeframe_ms = {
-            "1": 60 * 1000,
-            "5": 5 * 60 * 1000,
-            "15": 15 * 60 * 1000,
-            "60": 60 * 60 * 1000,
-            "240": 4 * 60 * 60 * 1000,
-            "D": 24 * 60 * 60 * 1000
-        }
+        start_ts, end_ts = self._resolve_fetch_period(start_date, end_date)
+        candle_duration = INTERVAL_MS.get(interval, 60 * 1000)
         
-        candle_duration = timeframe_ms.get(interval, 60 * 1000)
+        # Apenas candles já fechados
+        closed_until = (int(time.time() * 1000) // candle_duration) * candle_duration
+        end_ts = min(end_ts, closed_until)
         
         # Calcular quantos candles são necessários
         total_candles_needed = int((end_ts - start_ts) / candle_duration)
         
         print(f"   📊 Período requer ~{total_candles_needed} candles")
         
-        # TENTAR BUSCAR DO CACHE PRIMEIRO
-        cache_key = self.cache._generate_cache_key(symbol, interval, cache_start_date, cache_end_date)
-        cached_data = self.cache.get(symbol, interval, cache_start_date, cache_end_date)
+        # TENTAR SERVIR DO CACHE: lacunas ainda não cobertas
+        gaps = self.cache.missing_ranges(symbol, interval, start_ts, end_ts)
         
-        if cached_data:
+        if not gaps:
             # CACHE HIT
+            arrays = self.cache.get_range_arrays(symbol, interval, start_ts, end_ts)
+            timestamps = arrays["timestamp"]
             self.cache_stats["hits"] += 1
             self.cache_stats["api_calls_saved"] += 1
-            print(f"   ✅ Cache HIT: {cache_key} ({len(cached_data)} candles)")
-            
-            # Determinar período exato dos dados
-            first_candle_time = datetime.fromtimestamp(int(cached_data[0][0]) / 1000)
-            last_candle_time = datetime.fromtimestamp(int(cached_data[-1][0]) / 1000)
+            print(f"   ✅ Cache HIT: {symbol} {interval} ({len(timestamps)} candles)")
             
             metrics = {
-                "total_candles": len(cached_data),
+                "total_candles": len(timestamps),
                 "successful_batches": 0,
                 "failed_batches": 0,
                 "total_batches": 0,
                 "success_rate": 100.0,
-                "first_candle_time": first_candle_time,
-                "last_candle_time": last_candle_time,
+                "first_candle_time": datetime.fromtimestamp(timestamps[0] / 1000) if len(timestamps) else None,
+                "last_candle_time": datetime.fromtimestamp(timestamps[-1] / 1000) if len(timestamps) else None,
                 "data_source": "Cache (dados reais armazenados)",
                 "cache_hit": True
             }
             
-            return cached_data, metrics
+            return (arrays if len(timestamps) else None), metrics
         
-        # CACHE MISS - Buscar da API
+        # CACHE MISS (total ou parcial) - buscar apenas as lacunas
         self.cache_stats["misses"] += 1
-        print(f"   📥 Cache MISS: buscando API...")
+        missing_candles = sum(int((gap_end - gap_start) / candle_duration) for gap_start, gap_end in gaps)
+        print(f"   📥 Cache MISS: {len(gaps)} lacuna(s), ~{missing_candles} candles a buscar na API...")
         
-        # Buscar dados em lotes de 500 (limite da API)
-        all_klines = []
-        current_start = start_ts
-        batch_num = 1
-        
-        # Métricas da API
         successful_batches = 0
         failed_batches = 0
         
-        while current_start < end_ts:
-            # Calcular quantos candles faltam
-            remaining_ms = end_ts - current_start
-            remaining_candles = int(remaining_ms / candle_duration)
-            limit = min(500, remaining_candles)
-            
-            if limit <= 0:
+        for gap_start, gap_end in gaps:
+            if not self.data_provider:
+                print("   ❌ Data Provider não disponível!")
                 break
             
-            print(f"   📡 Batch {batch_num}: Buscando {limit} candles a partir de {datetime.fromtimestamp(current_start/1000).strftime('%Y-%m-%d %H:%M')}...")
+            fetched = self._fetch_klines_from_api(symbol, interval, gap_start, gap_end)
+            successful_batches += fetched.successful_batches
+            failed_batches += fetched.failed_batches
             
-            # Buscar dados com startTime
-            try:
-                klines = self.data_provider.get_kline(
-                    category='spot',
-                    symbol=symbol,
-                    interval=interval,
-                    limit=limit,
-                    start=current_start,
-                    end=end_ts
-                )
-                
-                if not klines:
-                    print(f"   ⚠️  Nenhum dado retornado para este batch")
-                    failed_batches += 1
-                    break
-                
-                all_klines.extend(klines)
-                successful_batches += 1
-                print(f"   ✅ Recebidos {len(klines)} candles (total acumulado: {len(all_klines)})")
-                
-                # Próximo batch começa após o último candle recebido
-                last_candle_time = int(klines[-1][0])
-                current_start = last_candle_time + candle_duration
-                batch_num += 1
-                
-                # Evitar rate limit
-                time.sleep(0.1)
-            except Exception as e:
-                print(f"   ❌ Erro no batch {batch_num}: {str(e)}")
-                failed_batches += 1
-                break
+            # Salvar no cache só as fatias concluídas (fatias com falha continuam como lacunas)
+            if fetched.covered_ranges:
+                print(f"   💾 Salvando dados no cache...")
+            for covered_start, covered_end in fetched.covered_ranges:
+                self.cache.save_range(symbol, interval, covered_start, covered_end, fetched.klines)
         
-        # Salvar dados no cache para futuros usos
-        if all_klines:
-            print(f"   💾 Salvando dados no cache...")
-            self.cache.save(symbol, interval, cache_start_date, cache_end_date, all_klines)
+        arrays = self.cache.get_range_arrays(symbol, interval, start_ts, end_ts)
+        timestamps = arrays["timestamp"]
         
         # Calcular métricas
         total_batches = successful_batches + failed_batches
         success_rate = (successful_batches / total_batches * 100) if total_batches > 0 else 0
         
-        # Determinar período exato dos dados
-        first_candle_time = None
-        last_candle_time = None
-        if all_klines:
-            first_candle_time = datetime.fromtimestamp(int(all_klines[0][0]) / 1000)
-            last_candle_time = datetime.fromtimestamp(int(all_klines[-1][0]) / 1000)
-        
         metrics = {
-            "total_candles": len(all_klines),
+            "total_candles": len(timestamps),
             "successful_batches": successful_batches,
             "failed_batches": failed_batches,
             "total_batches": total_batches,
             "success_rate": success_rate,
-            "first_candle_time": first_candle_time,
-            "last_candle_time": last_candle_time,
+            "first_candle_time": datetime.fromtimestamp(timestamps[0] / 1000) if len(timestamps) else None,
+            "last_candle_time": datetime.fromtimestamp(timestamps[-1] / 1000) if len(timestamps) else None,
             "data_source": self.data_provider.__class__.__name__ if self.data_provider else "Unknown",
-            "cache_hit": False
+            "cache_hit": False,
+            "gaps_fetched": len(gaps)
         }
         
-        return all_klines, metrics
+        return (arrays if len(timestamps) else None), metrics
+    
+    def _fetch_historical_klines(self, symbol: str, interval: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Tuple[List, Dict]:
+        """
+        Mesmo que _fetch_historical_arrays, no formato de klines da Binance (strings).
+        
+        Returns:
+            Tuple[List, Dict]: (Lista com todos os candles, Dicionário com métricas da API)
+        """
+        arrays, metrics = self._fetch_historical_arrays(symbol, interval, start_date, end_date)
+        return (arrays_to_klines(arrays) if arrays is not None else []), metrics
+    
+    def _fetch_klines_from_api(self, symbol: str, interval: str, start_ts: int, end_ts: int) -> KlineFetchResult:
+        """
+        Busca na API os candles de [start_ts, end_ts)
+        
+        Fatias de até 500 candles buscadas em paralelo dentro do orçamento de peso
+        da exchange; fatias com falha são repetidas antes de serem reportadas.
+        
+        Returns:
+            KlineFetchResult com klines em ordem e fatias concluídas/falhas
+        """
+        return get_paginator(self.data_provider).fetch(self.data_provider, symbol, interval, start_ts, end_ts)
@@ -470,7 +470,7 @@ class MarketManusMain:
         
         try:
             import asyncio
-            from market_manus.data_providers.market_data_ws import BinanceUSWebSocket
+            from market_manus.data_providers.market_data_ws import get_shared_multiplexer
             from market_manus.engines.stream_runtime import StreamRuntime
             from market_manus.cli.live_view import run_live_view
             
@@ -484,25 +484,28 @@ class MarketManusMain:
             }
             ws_interval = interval_map.get(timeframe, '5m')
             
-            # Inicializar WebSocket provider
-            ws_provider = BinanceUSWebSocket(symbol=symbol, interval=ws_interval)
-            
             # Criar engine simplificado que funciona com streaming
             from market_manus.backtest.confluence_realtime import RealTimeConfluenceEngine
             engine = RealTimeConfluenceEngine(config_path="config/confluence.yaml")
             
-            # Criar stream runtime
-            runtime = StreamRuntime(
-                ws_provider=ws_provider,
-                data_provider=self.data_provider,
-                symbol=symbol,
-                interval=timeframe,
-                engine=engine,
-                debounce_sec=1.0
-            )
+            async def stream_live():
+                # Canal do (symbol, interval) na conexão compartilhada do processo
+                subscription = await get_shared_multiplexer().subscribe(symbol, ws_interval)
+                try:
+                    runtime = StreamRuntime(
+                        ws_provider=subscription,
+                        data_provider=self.data_provider,
+                        symbol=symbol,
+                        interval=timeframe,
+                        engine=engine,
+                        debounce_sec=1.0
+                    )
+                    await run_live_view(runtime)
+                finally:
+                    await subscription.close()
             
             # Executar UI live
-            asyncio.run(run_live_view(runtime))
+            asyncio.run(stream_live())
             
         except KeyboardInterrupt:
             print("\n\n⏹️  Streaming interrompido pelo usuário")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Testes do agendador em processo do OrchestratorAgent
+
+Os agentes são instanciados uma vez e reutilizados entre ciclos; dependentes
+só começam depois das dependências do ciclo, independentes rodam em paralelo;
+timeouts e falhas atualizam os contadores, e cada execução registra tempo de
+parede e de CPU.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(ROOT)
+
+# Os agentes importam como pacote "agents" (market_manus/ no path). O path e
+# os módulos são restaurados após o import para não afetar a coleta dos
+# demais testes deste diretório.
+_saved_path = list(sys.path)
+sys.path.append(os.path.join(ROOT, "market_manus"))
+from agents.agent_scheduler import AgentScheduler, dependency_order
+from agents.orchestrator_agent import OrchestratorAgent
+sys.path[:] = _saved_path
+for _name in [m for m in sys.modules if m == "agents" or m.startswith("agents.")]:
+    del sys.modules[_name]
+
+
+class FakeAgent:
+    """Agente com trabalho configurável (CPU, espera ou erro)"""
+
+    created = []
+
+    def __init__(self, name: str, events: list, cpu_seconds: float = 0.0, sleep: float = 0.0, error: str = None):
+        self.name = name
+        self.events = events
+        self.cpu_seconds = cpu_seconds
+        self.sleep = sleep
+        self.error = error
+        self.runs = 0
+        FakeAgent.created.append(name)
+
+    def run_with_error_handling(self):
+        self.events.append(("start", self.name, time.perf_counter()))
+        deadline = time.thread_time() + self.cpu_seconds
+        while time.thread_time() < deadline:
+            pass
+        time.sleep(self.sleep)
+        self.runs += 1
+        self.events.append(("end", self.name, time.perf_counter()))
+        if self.error:
+            raise RuntimeError(self.error)
+
+
+def agent_config(dependencies=(), timeout=5, priority=1):
+    return {"module": "fake", "class": "FakeAgent", "schedule": "*/1 * * * *", "priority": priority,
+            "dependencies": list(dependencies), "timeout": timeout, "retry_count": 1, "enabled": True}
+
+
+class TestAgentScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        FakeAgent.created = []
+        self.events = []
+        self.agents = {
+            "market_analysis": dict(cpu_seconds=0.05),
+            "risk_management": dict(sleep=0.05),
+            "notification": dict(sleep=0.3),
+            "performance": dict(),
+        }
+        self.orchestrator = OrchestratorAgent()
+        self.orchestrator.agents_config = {
+            "agents": {
+                "market_analysis": agent_config(priority=1),
+                "risk_management": agent_config(["market_analysis"], priority=2),
+                "notification": agent_config(priority=3),
+                "performance": agent_config(["market_analysis", "risk_management"], priority=4),
+            },
+            "system": {"max_concurrent_agents": 3, "emergency_shutdown_threshold": 2},
+        }
+        self.orchestrator.initialize_agents_status()
+        self.orchestrator.scheduler = AgentScheduler(
+            self.orchestrator, max_concurrent=3,
+            agent_factory=lambda name, config: FakeAgent(name, self.events, **self.agents[name])
+        )
+
+    def tearDown(self):
+        self.orchestrator.scheduler.shutdown(wait=True)
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def times(self, kind: str) -> dict:
+        return {name: ts for k, name, ts in self.events if k == kind}
+
+    def test_dependency_order(self):
+        config = self.orchestrator.agents_config["agents"]
+        self.assertEqual(
+            dependency_order(config, ["performance", "notification", "risk_management", "market_analysis"]),
+            ["market_analysis", "risk_management", "performance", "notification"]
+        )
+        config["market_analysis"]["dependencies"] = ["performance"]
+        with self.assertRaises(ValueError):
+            dependency_order(config, ["market_analysis", "performance"])
+
+    def test_cycle_honors_dependencies_and_keeps_agents_warm(self):
+        started = time.perf_counter()
+        results = self.orchestrator.run_orchestration_cycle()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual({name: r["status"] for name, r in results.items()}, dict.fromkeys(self.agents, "success"))
+        starts, ends = self.times("start"), self.times("end")
+        self.assertGreaterEqual(starts["risk_management"], ends["market_analysis"])
+        self.assertGreaterEqual(starts["performance"], ends["risk_management"])
+        # notification (independente) roda em paralelo com a cadeia
+        self.assertLess(starts["notification"], ends["market_analysis"])
+        self.assertLess(elapsed, 0.3 + 0.05 + 0.05 + 0.25)
+
+        status = self.orchestrator.agents_status["market_analysis"]
+        self.assertGreaterEqual(results["market_analysis"]["cpu_time"], 0.04)
+        self.assertGreaterEqual(results["market_analysis"]["execution_time"], results["market_analysis"]["cpu_time"] - 0.01)
+        self.assertLess(results["notification"]["cpu_time"], 0.1)
+        self.assertGreaterEqual(results["notification"]["execution_time"], 0.3)
+        self.assertEqual(status["last_cpu_time"], results["market_analysis"]["cpu_time"])
+        self.assertEqual(len(self.orchestrator.execution_history), 4)
+
+        # Segundo ciclo: mesmas instâncias
+        self.orchestrator.execute_agent("market_analysis")
+        self.assertEqual(self.orchestrator.scheduler.instances["market_analysis"].runs, 2)
+        self.assertEqual(sorted(FakeAgent.created), sorted(self.agents))
+        self.assertEqual(self.orchestrator.agents_status["market_analysis"]["total_successes"], 2)
+
+    def test_timeouts_and_failures_update_counters(self):
+        config = self.orchestrator.agents_config["agents"]
+        config["notification"]["timeout"] = 0.1
+        self.agents["market_analysis"] = dict(error="sem dados")
+
+        results = asyncio.run(self.orchestrator.scheduler.run_cycle(["market_analysis", "risk_management", "notification"]))
+        self.assertEqual(results["notification"]["status"], "timeout")
+        self.assertIsNone(results["notification"]["cpu_time"])
+        self.assertEqual(results["market_analysis"]["status"], "failed")
+        self.assertIn("sem dados", results["market_analysis"]["error"])
+        # Dependência falhou: risk_management não executa
+        self.assertEqual(results["risk_management"]["status"], "dependencies_not_met")
+
+        status = self.orchestrator.agents_status
+        self.assertEqual((status["notification"]["status"], status["notification"]["consecutive_failures"]), ("timeout", 1))
+        self.assertEqual(status["market_analysis"]["total_failures"], 1)
+        self.assertEqual(status["risk_management"]["total_runs"], 0)
+
+        # Execução que estourou o timeout continua ocupando o agente até terminar
+        self.assertTrue(self.orchestrator.scheduler.is_busy("notification"))
+        self.assertEqual(self.orchestrator.execute_agent("notification")["status"], "busy")
+        self.assertNotIn("notification", self.orchestrator.get_due_agents())
+        deadline = time.time() + 5
+        while self.orchestrator.scheduler.is_busy("notification") and time.time() < deadline:
+            time.sleep(0.01)
+
+        # Acima do limite de falhas consecutivas o agente sai da fila
+        self.orchestrator.execute_agent("market_analysis")
+        self.assertEqual(status["market_analysis"]["consecutive_failures"], 2)
+        self.assertNotIn("market_analysis", self.orchestrator.get_due_agents())
+
+
+if __name__ == "__main__":
+    unittest.main()
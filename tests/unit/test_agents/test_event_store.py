@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Testes do event store entre agentes
+
+Publicar é um append; cada consumidor lê apenas os eventos após o próprio
+cursor, que persiste entre instâncias (processos). Alertas de save_alert e
+sinais chegam ao NotificationAgent uma única vez, sem arquivos JSON.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(ROOT)
+
+from market_manus.agents.event_store import EventStore
+
+# Os agentes importam como pacote "agents" (market_manus/ no path). O path e
+# os módulos são restaurados após o import para não afetar a coleta dos
+# demais testes deste diretório.
+_saved_path = list(sys.path)
+sys.path.append(os.path.join(ROOT, "market_manus"))
+from agents.notification_agent import NotificationAgent
+from agents.orchestrator_agent import OrchestratorAgent
+sys.path[:] = _saved_path
+for _name in [m for m in sys.modules if m == "agents" or m.startswith("agents.")]:
+    del sys.modules[_name]
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestEventStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        self.db_path = os.path.join(self.tmp.name, "events.db")
+        self.store = EventStore(self.db_path, clock=self.clock)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_consumers_read_only_new_events(self):
+        ids = [self.store.append("alerts", {"n": n}, agent="risk") for n in range(3)]
+        self.store.append("signals", {"symbol": "BTCUSDT"})
+        self.assertEqual(ids, sorted(ids))
+
+        events = self.store.read_new("notification", "alerts")
+        self.assertEqual([e.payload["n"] for e in events], [0, 1, 2])
+        self.assertEqual(events[0].agent, "risk")
+
+        # Sem ack, os mesmos eventos são entregues de novo
+        self.assertEqual(len(self.store.read_new("notification", "alerts", limit=2)), 2)
+        self.store.ack("notification", "alerts", events[-1].id)
+        self.assertEqual(self.store.read_new("notification", "alerts"), [])
+        self.assertFalse(self.store.has_new("notification", "alerts"))
+
+        # Cursores independentes por consumidor e por tipo
+        self.assertEqual(len(self.store.read_new("performance", "alerts")), 3)
+        self.assertTrue(self.store.has_new("notification", "signals"))
+
+        self.store.append("alerts", {"n": 3})
+        self.assertEqual([e.payload["n"] for e in self.store.read_new("notification", "alerts")], [3])
+        # O cursor nunca retrocede
+        self.store.ack("notification", "alerts", ids[0])
+        self.assertEqual(self.store.get_cursor("notification", "alerts"), ids[-1])
+
+        # Cursor persistido: outra instância continua de onde parou
+        other = EventStore(self.db_path)
+        self.assertEqual([e.payload["n"] for e in other.read_new("notification", "alerts")], [3])
+        other.close()
+
+    def test_recent_window_and_since(self):
+        for n in range(5):
+            self.store.append("signals", {"n": n})
+            self.clock.now += 60
+
+        self.assertEqual([e.payload["n"] for e in self.store.recent("signals", 3)], [2, 3, 4])
+        since = 1_000_000.0 + 120
+        self.assertEqual([e.payload["n"] for e in self.store.recent("signals", None, since=since)], [2, 3, 4])
+        self.assertTrue(self.store.has_new("notification", "signals", since=since))
+        self.assertFalse(self.store.has_new("notification", "signals", since=self.clock.now))
+        self.assertEqual(self.store.recent("alerts"), [])
+
+
+class TestAgentEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_alerts_and_signals_reach_notification_once(self):
+        orchestrator = OrchestratorAgent()
+        notifier = NotificationAgent()
+        self.assertIs(orchestrator.events, notifier.events)
+        self.assertFalse(orchestrator.has_pending_events("notification"))
+
+        orchestrator.save_alert({"type": "risk_drawdown", "message": "Drawdown alto"})
+        orchestrator.events.append("signals", {"symbol": "BTCUSDT", "signal": "BUY", "confidence": 0.8})
+        self.assertTrue(orchestrator.has_pending_events("notification"))
+        self.assertFalse(os.path.exists(os.path.join("data", "alerts")))
+
+        with mock.patch.object(notifier, "process_risk_alert") as risk_alert, \
+                mock.patch.object(notifier, "process_signal_alert") as signal_alert:
+            notifier.process_pending_alerts()
+            notifier.process_new_signals()
+            notifier.process_pending_alerts()
+            notifier.process_new_signals()
+
+        self.assertEqual(risk_alert.call_count, 1)
+        self.assertEqual(risk_alert.call_args[0][0]["agent"], orchestrator.name)
+        self.assertEqual(signal_alert.call_args_list, [mock.call({"symbol": "BTCUSDT", "signal": "BUY", "confidence": 0.8})])
+        self.assertFalse(orchestrator.has_pending_events("notification"))
+
+        # Janela de sinais do BaseAgent vem do event store
+        self.assertEqual(notifier.get_performance_window_data("signals", 10)[0]["symbol"], "BTCUSDT")
+
+
+if __name__ == "__main__":
+    unittest.main()
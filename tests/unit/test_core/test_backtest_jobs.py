@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Testes da fila de jobs de backtest da interface web
+
+submit() retorna na hora; configurações idênticas em andamento compartilham
+o job, resultados concluídos saem do cache, acima do limite a fila recusa o
+job, e o cancelamento interrompe jobs na fila ou em execução. O progresso de
+cada job (inclusive de um worker em outro processo) chega a on_progress.
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import unittest
+from datetime import datetime
+from queue import Queue
+
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.backtest.backtest_jobs import (
+    BacktestJobQueue,
+    BacktestQueueFull,
+    _JobControl,
+    config_hash,
+    normalize_backtest_config,
+)
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "BTCUSDT_5_090925_until_091025.parquet"
+
+# Libera os jobs de gated_runner (modo thread)
+RELEASE = threading.Event()
+RUNS = []
+# Libera as etapas após a gravação de saving_runner
+AFTER_SAVE = threading.Event()
+SAVED = []
+# Sinalizado por saving_runner logo após o commit (antes de o progresso ser repassado)
+COMMITTED = threading.Event()
+
+
+def gated_runner(config, progress):
+    RUNS.append(config["asset"])
+    progress(10, "Iniciando")
+    while not RELEASE.wait(0.01):
+        progress(50, "Aguardando")
+    progress(100, "Concluído")
+    return {"status": "success", "asset": config["asset"]}
+
+
+def saving_runner(config, progress):
+    """Simula run_confluence_backtest: commit, gravação e etapas após a gravação"""
+    progress(10, "Iniciando")
+    while not RELEASE.wait(0.01):
+        progress(50, "Aguardando")
+    progress(92, "Salvando", commit=True)
+    COMMITTED.set()
+    SAVED.append(config["asset"])
+    while not AFTER_SAVE.wait(0.01):
+        progress(95, "Recomendações")
+    return {"status": "success", "asset": config["asset"]}
+
+
+def fixture_runner(config, progress):
+    """Roda no processo worker: lê a fixture e reporta progresso"""
+    progress(20, "Carregando dados históricos")
+    closes = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE))["close"]
+    progress(100, f"Concluído: {len(closes)} candles")
+    return {"status": "success", "candles": len(closes), "last_close": float(closes.iloc[-1])}
+
+
+def failing_runner(config, progress):
+    raise ValueError("Dados insuficientes: 0 candles recebidos")
+
+
+def config(asset="BTCUSDT", **overrides):
+    data = {"asset": asset, "timeframe": "15m", "strategies": ["rsi_mean_reversion"],
+            "start_date": "2025-09-01", "end_date": "2025-09-10"}
+    data.update(overrides)
+    return normalize_backtest_config(data)
+
+
+class TestBacktestConfig(unittest.TestCase):
+
+    def test_equivalent_requests_share_hash(self):
+        self.assertEqual(config(timeframe="15m"), config(timeframe="15"))
+        self.assertEqual(config_hash(config(timeframe="15m")), config_hash(config(timeframe="15")))
+        self.assertNotEqual(config_hash(config()), config_hash(config(capital=5000)))
+        self.assertFalse(config()["trading_costs"])
+        self.assertNotEqual(config_hash(config()), config_hash(config(trading_costs=True)))
+        # Datas inválidas caem na janela padrão de 30 dias
+        self.assertEqual(config(start_date="2025-09-10")["start_date"], "2025-08-11")
+        with self.assertRaises(ValueError):
+            config(strategies=[])
+
+
+class TestBacktestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        RELEASE.clear()
+        RUNS.clear()
+        AFTER_SAVE.clear()
+        SAVED.clear()
+        COMMITTED.clear()
+        self.events = []
+        self.finished = threading.Event()
+        self.queue = BacktestJobQueue(
+            max_workers=1, max_queue=1, executor="thread", runner=gated_runner,
+            on_progress=lambda job_id, payload: self.events.append(payload),
+            on_finished=lambda job: self.finished.set()
+        )
+
+    def tearDown(self):
+        RELEASE.set()
+        AFTER_SAVE.set()
+        self.queue.shutdown()
+
+    def wait_for(self, job, status="done", timeout=10.0):
+        deadline = time.time() + timeout
+        while job.status != status and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(job.status, status)
+
+    def test_dedup_cache_and_progress(self):
+        job = self.queue.submit(config())
+        self.assertEqual(self.queue.submit(config()), job)
+        self.assertEqual(job.submissions, 2)
+        self.wait_for(job, "running")
+
+        RELEASE.set()
+        self.wait_for(job)
+        self.assertEqual(job.result, {"status": "success", "asset": "BTCUSDT"})
+        self.assertEqual(RUNS, ["BTCUSDT"])
+        self.assertTrue(self.finished.wait(5))
+        self.assertEqual([e["percent"] for e in self.events][0], 10)
+        self.assertEqual(self.events[-1], {"job_id": job.job_id, "percent": 100, "message": "Concluído"})
+
+        cached = self.queue.submit(config())
+        self.assertNotEqual(cached.job_id, job.job_id)
+        self.assertTrue(cached.cached)
+        self.assertEqual((cached.status, cached.result), ("done", job.result))
+        self.assertEqual(RUNS, ["BTCUSDT"])
+        self.assertEqual(self.queue.get(cached.job_id), cached)
+        metrics = self.queue.get_metrics()
+        self.assertEqual((metrics["deduplicated"], metrics["cache_hits"], metrics["completed"]), (1, 1, 1))
+
+    def test_queue_limit_and_cancel(self):
+        running = self.queue.submit(config("BTCUSDT"))
+        queued = self.queue.submit(config("ETHUSDT"))
+        self.wait_for(running, "running")
+        with self.assertRaises(BacktestQueueFull):
+            self.queue.submit(config("ADAUSDT"))
+        self.assertEqual(self.queue.queue_depth(), {"running": 1, "queued": 1, "limit": 2})
+
+        # Na fila: descartado sem rodar; em execução: para no próximo progresso
+        self.assertTrue(self.queue.cancel(queued.job_id))
+        self.wait_for(queued, "cancelled")
+        self.assertTrue(self.queue.cancel(running.job_id))
+        self.wait_for(running, "cancelled")
+        self.assertEqual(RUNS, ["BTCUSDT"])
+        self.assertFalse(self.queue.cancel(running.job_id))
+
+        # Cancelados liberam a vaga e não entram no cache
+        RELEASE.set()
+        retry = self.queue.submit(config("BTCUSDT"))
+        self.wait_for(retry)
+        self.assertFalse(retry.cached)
+        self.assertEqual(self.queue.stats["cancelled"], 2)
+
+    def test_deduplicated_job_is_cancelled_by_last_submitter(self):
+        job = self.queue.submit(config(), submitter="alice")
+        self.assertIs(self.queue.submit(config(), submitter="bob"), job)
+        self.wait_for(job, "running")
+
+        self.assertFalse(self.queue.cancel(job.job_id, submitter="mallory"))
+        self.assertTrue(self.queue.cancel(job.job_id, submitter="alice"))
+        self.assertFalse(self.queue.cancel(job.job_id, submitter="alice"))
+        time.sleep(0.05)
+        self.assertEqual(job.status, "running")
+
+        self.assertTrue(self.queue.cancel(job.job_id, submitter="bob"))
+        self.wait_for(job, "cancelled")
+        self.assertEqual(self.queue.stats["cancelled"], 1)
+
+    def test_open_ended_results_are_not_cached(self):
+        RELEASE.set()
+        open_ended = config(end_date=None)
+        self.assertEqual(open_ended["end_date"], datetime.now().strftime("%Y-%m-%d"))
+        first = self.queue.submit(open_ended)
+        self.wait_for(first)
+        second = self.queue.submit(open_ended)
+        self.assertFalse(second.cached)
+        self.wait_for(second)
+        self.assertEqual(RUNS, ["BTCUSDT", "BTCUSDT"])
+
+        closed = self.queue.submit(config())
+        self.wait_for(closed)
+        self.assertTrue(self.queue.submit(config()).cached)
+
+    def test_cancel_is_ignored_once_result_is_saved(self):
+        self.queue.runner = saving_runner
+        job = self.queue.submit(config())
+        self.wait_for(job, "running")
+        RELEASE.set()
+        deadline = time.time() + 10
+        while not job.committed and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(job.committed)
+        self.assertNotIn("committed", job.progress)
+
+        self.assertFalse(self.queue.cancel(job.job_id))
+        AFTER_SAVE.set()
+        self.wait_for(job)
+        self.assertEqual(SAVED, ["BTCUSDT"])
+
+        # Cancelado antes do commit: nada é gravado
+        RELEASE.clear()
+        pending = self.queue.submit(config("ETHUSDT"))
+        self.wait_for(pending, "running")
+        self.assertTrue(self.queue.cancel(pending.job_id))
+        RELEASE.set()
+        self.wait_for(pending, "cancelled")
+        self.assertEqual(SAVED, ["BTCUSDT"])
+
+    def test_cancel_is_refused_before_commit_progress_is_relayed(self):
+        self.queue.runner = saving_runner
+        # Progresso em uma fila que o listener não lê: o processo principal
+        # não fica sabendo do commit antes de cancel()
+        self.queue._progress = Queue()
+        job = self.queue.submit(config())
+        RELEASE.set()
+        self.assertTrue(COMMITTED.wait(10))
+        self.assertFalse(job.committed)
+
+        self.assertFalse(self.queue.cancel(job.job_id))
+        self.assertTrue(job.committed)
+        AFTER_SAVE.set()
+        self.wait_for(job)
+        self.assertEqual(SAVED, ["BTCUSDT"])
+        self.assertEqual(self.queue.stats["cancelled"], 0)
+
+    def test_errors_are_reported(self):
+        self.queue.runner = failing_runner
+        job = self.queue.submit(config())
+        self.wait_for(job, "error")
+        self.assertIn("Dados insuficientes", job.error)
+        self.assertEqual(job.to_dict()["result"], None)
+        self.assertEqual(self.queue.pending_jobs(), [])
+
+
+class TestProcessBacktestJobQueue(unittest.TestCase):
+
+    def test_manager_control_is_first_come(self):
+        manager = multiprocessing.get_context("spawn").Manager()
+        try:
+            control = _JobControl(manager)
+            self.assertTrue(control.commit())
+            self.assertFalse(control.cancel())
+            self.assertFalse(control.cancelled)
+
+            control = _JobControl(manager)
+            self.assertTrue(control.cancel())
+            self.assertFalse(control.commit())
+            self.assertTrue(control.cancelled)
+        finally:
+            manager.shutdown()
+
+    def test_process_worker_progress(self):
+        events = []
+        queue = BacktestJobQueue(max_workers=1, max_queue=2, executor="process", runner=fixture_runner,
+                                 on_progress=lambda job_id, payload: events.append(payload))
+        try:
+            job = queue.submit(config())
+            deadline = time.time() + 60
+            while not job.finished and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(job.status, "done")
+
+            closes = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE))["close"]
+            self.assertEqual(job.result, {"status": "success", "candles": len(closes), "last_close": float(closes.iloc[-1])})
+            deadline = time.time() + 5
+            while len(events) < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual([e["percent"] for e in events], [20, 100])
+            self.assertTrue(all(e["job_id"] == job.job_id for e in events))
+        finally:
+            queue.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
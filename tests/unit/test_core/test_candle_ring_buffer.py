@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Testes do CandleRingBuffer
+
+Comparado a um deque(maxlen) de dicts com candles reais do parquet: mesmo
+conteúdo após dar a volta no buffer, views contíguas sem cópia e
+atualização do candle em formação no lugar.
+"""
+
+import os
+import sys
+import unittest
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.engines.candle_ring_buffer import CANDLE_FIELDS, CandleRingBuffer
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "BTCUSDT_5_090925_until_091025.parquet"
+
+
+def fixture_candles(candles: int = 700) -> list:
+    df = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE)).iloc[:candles]
+    return df[list(CANDLE_FIELDS)].astype({"timestamp": "int64"}).to_dict("records")
+
+
+class TestCandleRingBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.candles = fixture_candles()
+
+    def assert_matches(self, buffer: CandleRingBuffer, expected: list, n: int = None):
+        expected = expected if n is None else expected[-n:]
+        frame = buffer.to_frame(n)
+        self.assertEqual(frame["timestamp"].dtype, np.int64)
+        self.assertEqual(frame.to_dict("records"), expected)
+
+    def test_wraparound_matches_deque(self):
+        buffer = CandleRingBuffer(capacity=256)
+        reference = deque(maxlen=256)
+        for i, candle in enumerate(self.candles):
+            buffer.append(candle)
+            reference.append(candle)
+            if i % 97 == 0:
+                self.assert_matches(buffer, list(reference))
+
+        self.assertEqual(len(buffer), 256)
+        self.assert_matches(buffer, list(reference))
+        self.assert_matches(buffer, list(reference), n=50)
+        self.assertEqual(list(buffer), list(reference))
+        self.assertEqual(buffer.last(), reference[-1])
+
+    def test_views_are_contiguous_and_zero_copy(self):
+        buffer = CandleRingBuffer(capacity=100)
+        buffer.extend(self.candles[:250])
+        closes = buffer.view(30)["close"]
+
+        self.assertTrue(closes.flags["C_CONTIGUOUS"])
+        self.assertFalse(closes.flags.writeable)
+        self.assertTrue(np.shares_memory(closes, buffer._data["close"]))
+
+        # O candle em formação atualiza a view sem realocar
+        buffer.update_last(dict(self.candles[249], close=1.5))
+        self.assertEqual(closes[-1], 1.5)
+
+    def test_upsert_forming_bar(self):
+        buffer = CandleRingBuffer(capacity=10)
+        first, second = self.candles[0], self.candles[1]
+        self.assertTrue(buffer.upsert(first))
+        self.assertFalse(buffer.upsert(dict(first, close=2.0)))
+        self.assertTrue(buffer.upsert(second))
+        self.assertFalse(buffer.upsert(dict(first, close=3.0)))  # Atrasado: ignorado
+
+        self.assertEqual(buffer.view()["close"].tolist(), [2.0, second["close"]])
+
+    def test_extend_arrays_wraps(self):
+        arrays = {name: np.array([c[name] for c in self.candles]) for name in CANDLE_FIELDS}
+        for prefill in (0, 30, 130):
+            with self.subTest(prefill=prefill):
+                buffer = CandleRingBuffer(capacity=128)
+                buffer.extend(self.candles[:prefill])
+                buffer.extend_arrays({name: values[prefill:prefill + 200] for name, values in arrays.items()})
+                self.assert_matches(buffer, self.candles[:prefill + 200][-128:])
+
+    def test_memory_is_fixed(self):
+        buffer = CandleRingBuffer(capacity=1000)
+        before = buffer.get_metrics()
+        buffer.extend(self.candles)
+        after = buffer.get_metrics()
+
+        self.assertEqual(before["memory_bytes"], 2 * 1000 * 6 * 8)
+        self.assertEqual(after["memory_bytes"], before["memory_bytes"])
+        self.assertEqual(after["candles"], len(self.candles))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Testes do HistoricalDataCache: caminho colunar e armazenamento particionado
+
+get_arrays/get_frame devem devolver exatamente os mesmos valores que get()
+convertido com float(), já tipados (timestamp int64, OHLCV float64). As
+partições mensais servem qualquer período coberto e só as lacunas são
+buscadas no provider.
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.confluence_mode.confluence_mode_module import ConfluenceModeModule
+from market_manus.data_providers.historical_cache import (
+    INTERVAL_MS,
+    OHLCV_COLUMNS,
+    HistoricalDataCache,
+    arrays_to_klines,
+    date_to_ms,
+    klines_to_arrays,
+)
+from market_manus.performance.history_repository import PerformanceHistoryRepository
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "ADAUSDT_15_090725_until_091025.parquet"
+PERIOD = ("ADAUSDT", "15", "2025-07-09", "2025-10-09")
+
+
+def fixture_klines(candles: int = 500) -> list:
+    """Klines no formato Binance (strings), como retornados pela API"""
+    df = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE))
+    rows = df[list(OHLCV_COLUMNS)].iloc[:candles].values.tolist()
+    return [[str(int(row[0]))] + [str(value) for value in row[1:]] for row in rows]
+
+
+class TestColumnarCache(unittest.TestCase):
+    """get_arrays/get_frame vs. get()"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = HistoricalDataCache(cache_dir=self.tmp.name)
+        self.klines = fixture_klines()
+        self.cache.save(*PERIOD, self.klines)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_arrays_match_string_path(self):
+        arrays = self.cache.get_arrays(*PERIOD)
+        legacy = self.cache.get(*PERIOD)
+
+        self.assertEqual(arrays["timestamp"].dtype, np.int64)
+        self.assertEqual([int(row[0]) for row in legacy], arrays["timestamp"].tolist())
+        for position, name in enumerate(OHLCV_COLUMNS[1:], start=1):
+            with self.subTest(column=name):
+                self.assertEqual(arrays[name].dtype, np.float64)
+                self.assertEqual([float(row[position]) for row in legacy], arrays[name].tolist())
+
+    def test_api_klines_convert_to_same_arrays(self):
+        cached = self.cache.get_arrays(*PERIOD)
+        converted = klines_to_arrays(self.klines)
+        for name in OHLCV_COLUMNS:
+            with self.subTest(column=name):
+                np.testing.assert_array_equal(cached[name], converted[name])
+                self.assertEqual(cached[name].dtype, converted[name].dtype)
+
+    def test_frame_and_column_selection(self):
+        frame = self.cache.get_frame(*PERIOD)
+        self.assertEqual(list(frame.columns), list(OHLCV_COLUMNS))
+        self.assertEqual(len(frame), len(self.klines))
+        self.assertEqual(frame["timestamp"].dtype, np.int64)
+
+        closes = self.cache.get_arrays(*PERIOD, columns=("close",))
+        self.assertEqual(list(closes), ["close"])
+        self.assertIsNone(self.cache.get_arrays("ADAUSDT", "5", "2025-07-09", "2025-10-09"))
+
+    def test_missing_volume_becomes_zero(self):
+        arrays = klines_to_arrays([["1", "1.5", "2", "1", "1.8"], ["2", "1.8", "2.1", "1.7", "2", ""]])
+        self.assertEqual(arrays["volume"].tolist(), [0.0, 0.0])
+        self.assertEqual(arrays["close"].tolist(), [1.8, 2.0])
+
+
+class TestPartitionedRangeStore(unittest.TestCase):
+    """Partições mensais: cobertura, lacunas e importação de arquivos legados"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = HistoricalDataCache(cache_dir=self.tmp.name)
+        self.klines = fixture_klines(6000)
+        self.timestamps = np.array([int(k[0]) for k in self.klines])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_missing_ranges_and_merge(self):
+        start, end = int(self.timestamps[0]), int(self.timestamps[-1]) + INTERVAL_MS["15"]
+        middle = int(self.timestamps[3000])
+        self.assertEqual(self.cache.missing_ranges("ADAUSDT", "15", start, end), [(start, end)])
+
+        self.cache.save_range("ADAUSDT", "15", start, middle, self.klines)
+        self.assertEqual(self.cache.missing_ranges("ADAUSDT", "15", start, end), [(middle, end)])
+        self.assertEqual(self.cache.missing_ranges("ADAUSDT", "15", start + 1, middle), [])
+
+        # Candles fora do intervalo salvo não são gravados
+        self.assertEqual(len(self.cache.get_range_arrays("ADAUSDT", "15", start, end)["close"]), 3000)
+
+        self.cache.save_range("ADAUSDT", "15", middle, end, self.klines)
+        self.assertEqual(self.cache.missing_ranges("ADAUSDT", "15", start, end), [])
+
+        arrays = self.cache.get_range_arrays("ADAUSDT", "15", start, end)
+        np.testing.assert_array_equal(arrays["timestamp"], self.timestamps)
+        np.testing.assert_array_equal(arrays["close"], klines_to_arrays(self.klines)["close"])
+        self.assertGreater(len(list((self.cache.series_dir / "ADAUSDT" / "15").glob("*.parquet"))), 1)
+
+    def test_legacy_files_are_imported(self):
+        self.cache.save(*PERIOD, self.klines)
+        reopened = HistoricalDataCache(cache_dir=self.tmp.name)
+
+        start, end = int(self.timestamps[100]), int(self.timestamps[2100])
+        self.assertEqual(reopened.missing_ranges("ADAUSDT", "15", start, end), [])
+        arrays = reopened.get_range_arrays("ADAUSDT", "15", start, end)
+        np.testing.assert_array_equal(arrays["timestamp"], self.timestamps[100:2100])
+
+        # Período com chave diferente, mas coberto: servido pelas partições
+        os.remove(reopened._get_cache_path(reopened._generate_cache_key(*PERIOD)))
+        self.assertIsNone(reopened.get("ADAUSDT", "15", "2025-01-01", "2025-07-20"))
+        legacy = reopened.get("ADAUSDT", "15", "2025-07-10", "2025-07-20")
+        self.assertEqual(legacy, arrays_to_klines(reopened.get_arrays("ADAUSDT", "15", "2025-07-10", "2025-07-20")))
+        self.assertEqual(len(legacy), 10 * 96)
+
+    def test_concurrent_processes_keep_rows_and_coverage(self):
+        # 4 processos gravam fatias intercaladas das mesmas partições mensais
+        step = INTERVAL_MS["15"]
+        bounds = [(int(self.timestamps[i]), int(self.timestamps[i]) + 50 * step) for i in range(0, 2000, 50)]
+        jobs = [(self.tmp.name, bounds[w::4], self.klines[:2000]) for w in range(4)]
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            pool.starmap(save_ranges, jobs)
+
+        start, end = bounds[0][0], bounds[-1][1]
+        reopened = HistoricalDataCache(cache_dir=self.tmp.name)
+        self.assertEqual(reopened.missing_ranges("ADAUSDT", "15", start, end), [])
+        arrays = reopened.get_range_arrays("ADAUSDT", "15", start, end)
+        np.testing.assert_array_equal(arrays["timestamp"], self.timestamps[:2000])
+        self.assertEqual(list((reopened.series_dir / "ADAUSDT" / "15").glob("*.tmp")), [])
+
+
+def save_ranges(cache_dir: str, bounds: list, klines: list):
+    """Worker: grava cada (início, fim) com uma instância própria do cache"""
+    cache = HistoricalDataCache(cache_dir=cache_dir)
+    for start, end in bounds:
+        cache.save_range("ADAUSDT", "15", start, end, klines)
+
+
+class FakeKlineProvider:
+    """Provider em memória que registra as janelas pedidas"""
+
+    def __init__(self, klines: list):
+        self.klines = klines
+        self.calls = []
+
+    def get_kline(self, category, symbol, interval, limit, start, end):
+        self.calls.append((start, end, limit))
+        return [k for k in self.klines if start <= int(k[0]) <= end][:limit]
+
+
+class TestConfluenceGapFilling(unittest.TestCase):
+    """ConfluenceModeModule._fetch_historical_arrays busca só as lacunas"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.klines = fixture_klines(3000)
+        self.provider = FakeKlineProvider(self.klines)
+        self.module = ConfluenceModeModule(
+            data_provider=self.provider, capital_manager=None,
+            performance_repo=PerformanceHistoryRepository(os.path.join(self.tmp.name, "perf.db"))
+        )
+        self.module.cache = HistoricalDataCache(cache_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def expected_closes(self, start_date: str, end_date: str) -> list:
+        start, end = date_to_ms(start_date), date_to_ms(end_date)
+        return [float(k[4]) for k in self.klines if start <= int(k[0]) < end]
+
+    def test_sub_range_and_shifted_range(self):
+        ohlcv, metrics = self.module._fetch_historical_arrays("ADAUSDT", "15", "2025-07-10", "2025-07-20")
+        self.assertFalse(metrics["cache_hit"])
+        self.assertEqual(ohlcv["close"].tolist(), self.expected_closes("2025-07-10", "2025-07-20"))
+        first_calls = len(self.provider.calls)
+
+        ohlcv, metrics = self.module._fetch_historical_arrays("ADAUSDT", "15", "2025-07-12", "2025-07-15")
+        self.assertTrue(metrics["cache_hit"])
+        self.assertEqual(len(self.provider.calls), first_calls)
+        self.assertEqual(ohlcv["timestamp"].dtype, np.int64)
+        self.assertEqual(ohlcv["close"].tolist(), self.expected_closes("2025-07-12", "2025-07-15"))
+
+        ohlcv, metrics = self.module._fetch_historical_arrays("ADAUSDT", "15", "2025-07-12", "2025-07-22")
+        self.assertEqual(metrics["gaps_fetched"], 1)
+        self.assertTrue(all(start >= date_to_ms("2025-07-20") for start, _, _ in self.provider.calls[first_calls:]))
+        self.assertEqual(ohlcv["close"].tolist(), self.expected_closes("2025-07-12", "2025-07-22"))
+
+        klines, _ = self.module._fetch_historical_klines("ADAUSDT", "15", "2025-07-12", "2025-07-13")
+        self.assertEqual([float(k[4]) for k in klines], self.expected_closes("2025-07-12", "2025-07-13"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Testes do PerformanceHistoryRepository
+
+O resumo por combinação vem da tabela combination_summary, atualizada na
+transação de save_backtest_results, e deve coincidir com o GROUP BY original
+sobre a tabela backtests (inclusive em bancos criados antes da tabela). Cada
+thread reutiliza a própria conexão, em modo WAL.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.performance.history_repository import (
+    BacktestResult,
+    PerformanceHistoryRepository,
+    StrategyContribution,
+)
+
+SEED_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data", "performance_history.seed.db",
+)
+REFERENCE_SUMMARY_SQL = """
+    SELECT combination_id, timeframe, COUNT(*), AVG(win_rate), SUM(total_trades), AVG(roi)
+    FROM backtests
+    WHERE combination_id IS NOT NULL
+    GROUP BY combination_id, timeframe
+"""
+
+
+def make_backtest(i: int, rng: np.random.Generator, combination_id=None) -> tuple:
+    if combination_id is None:
+        combination_id = f"combo_{i % 4}" if i % 5 else None
+    result = BacktestResult(
+        backtest_id=f"bt{i:05d}",
+        timestamp=f"2025-09-{1 + i % 28:02d}T12:00:{i % 60:02d}",
+        combination_id=combination_id,
+        combination_name=f"Combo {combination_id}" if combination_id else None,
+        strategies=["rsi_mean_reversion", "ema_crossover"],
+        timeframe=("5", "15")[i % 2],
+        asset="BTCUSDT",
+        start_date="2025-09-01",
+        end_date="2025-09-10",
+        confluence_mode="weighted",
+        win_rate=float(rng.uniform(20, 80)),
+        total_trades=int(rng.integers(0, 200)),
+        winning_trades=0,
+        losing_trades=0,
+        initial_capital=10000.0,
+        final_capital=float(rng.uniform(9000, 11000)),
+        roi=float(rng.normal(0, 5)),
+        total_signals=int(rng.integers(0, 500)),
+        manus_ai_enabled=False,
+        semantic_kernel_enabled=bool(i % 2),
+    )
+    contributions = [
+        StrategyContribution(result.backtest_id, key, key.upper(), 10, 8, 5, 3, 62.5, 1.0)
+        for key in result.strategies
+    ]
+    return result, contributions
+
+
+class TestPerformanceHistoryRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "perf", "history.db")
+        self.repo = PerformanceHistoryRepository(self.db_path)
+        self.rng = np.random.default_rng(5)
+
+    def tearDown(self):
+        self.repo.close()
+        self.tmp.cleanup()
+
+    def assert_summary_matches_group_by(self, repo):
+        with sqlite3.connect(self.db_path) as conn:
+            reference = {f"{row[0]}_{row[1]}": row for row in conn.execute(REFERENCE_SUMMARY_SQL)}
+        summary = repo.get_all_combinations_summary()
+        self.assertEqual(set(summary), set(reference))
+        for key, (combination_id, timeframe, count, win_rate, trades, roi) in reference.items():
+            item = summary[key]
+            self.assertEqual((item["combination_id"], item["timeframe"]), (combination_id, timeframe))
+            self.assertEqual((item["test_count"], item["total_trades"]), (count, trades))
+            self.assertAlmostEqual(item["avg_win_rate"], win_rate, places=9)
+            self.assertAlmostEqual(item["avg_roi"], roi, places=9)
+            self.assertEqual(item["combination_name"], f"Combo {combination_id}")
+
+    def test_incremental_summary_matches_group_by(self):
+        for i in range(30):
+            self.repo.save_backtest_result(*make_backtest(i, self.rng))
+        self.repo.save_backtest_results([make_backtest(i, self.rng) for i in range(30, 200)])
+        self.assert_summary_matches_group_by(self.repo)
+
+        backtests = self.repo.get_all_backtests()
+        self.assertEqual(len(backtests), 200)
+        self.assertEqual(len(self.repo.get_all_backtests(limit=7)), 7)
+        self.assertEqual(self.repo.get_all_backtests(limit=7), backtests[:7])
+        history = self.repo.get_combination_history("combo_1", "15")
+        self.assertEqual(len(history), self.repo.get_all_combinations_summary()["combo_1_15"]["test_count"])
+        self.assertEqual(len(self.repo.get_strategy_contribution_history("bt00003")), 2)
+
+    def test_failed_batch_leaves_summary_untouched(self):
+        self.repo.save_backtest_results([make_backtest(i, self.rng) for i in range(10)])
+        before = self.repo.get_all_combinations_summary()
+        with self.assertRaises(sqlite3.IntegrityError):
+            # bt00009 já existe: nada do lote deve ser gravado
+            self.repo.save_backtest_results([make_backtest(i, self.rng) for i in range(9, 20)])
+        self.assertEqual(self.repo.get_all_combinations_summary(), before)
+        self.assertEqual(len(self.repo.get_all_backtests()), 10)
+
+    def test_legacy_database_is_backfilled(self):
+        self.repo.save_backtest_results([make_backtest(i, self.rng) for i in range(50)])
+        self.repo.close()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DROP TABLE combination_summary")
+
+        reopened = PerformanceHistoryRepository(self.db_path)
+        self.assert_summary_matches_group_by(reopened)
+        reopened.save_backtest_result(*make_backtest(50, self.rng, combination_id="combo_1"))
+        self.assert_summary_matches_group_by(reopened)
+        reopened.close()
+
+    def test_default_database_is_created_from_read_only_seed(self):
+        with open(SEED_DB, "rb") as f:
+            seed_bytes = f.read()
+        cwd = os.getcwd()
+        os.makedirs(os.path.join(self.tmp.name, "data"))
+        with open(os.path.join(self.tmp.name, PerformanceHistoryRepository.SEED_DB_PATH), "wb") as f:
+            f.write(seed_bytes)
+        os.chdir(self.tmp.name)
+        try:
+            repo = PerformanceHistoryRepository()
+            self.assertEqual(len(repo.get_all_backtests()), 41)
+            with sqlite3.connect(PerformanceHistoryRepository.DEFAULT_DB_PATH) as conn:
+                reference = {f"{row[0]}_{row[1]}": row[2] for row in conn.execute(REFERENCE_SUMMARY_SQL)}
+            summary = repo.get_all_combinations_summary()
+            self.assertEqual({key: item["test_count"] for key, item in summary.items()}, reference)
+            repo.save_backtest_result(*make_backtest(0, self.rng, combination_id="combo_1"))
+            self.assertEqual(len(repo.get_all_backtests()), 42)
+            repo.close()
+
+            # Reaberto: usa o banco existente, sem copiar o seed de novo
+            repo = PerformanceHistoryRepository()
+            self.assertEqual(len(repo.get_all_backtests()), 42)
+            repo.close()
+            with open(PerformanceHistoryRepository.SEED_DB_PATH, "rb") as f:
+                self.assertEqual(f.read(), seed_bytes)
+        finally:
+            os.chdir(cwd)
+        # O seed versionado também não foi tocado
+        with open(SEED_DB, "rb") as f:
+            self.assertEqual(f.read(), seed_bytes)
+
+    def test_connection_per_thread_in_wal_mode(self):
+        conn = self.repo._connection()
+        self.assertIs(self.repo._connection(), conn)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+        connections, errors = [], []
+
+        def worker(offset):
+            try:
+                connections.append(self.repo._connection())
+                for i in range(offset, offset + 20):
+                    self.repo.save_backtest_result(*make_backtest(i, np.random.default_rng(i)))
+                self.repo.get_all_combinations_summary()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(offset,)) for offset in (0, 100, 200)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len({id(c) for c in connections + [conn]}), 4)
+        self.assertEqual(len(self.repo.get_all_backtests()), 60)
+        self.assert_summary_matches_group_by(self.repo)
+
+
+if __name__ == "__main__":
+    unittest.main()
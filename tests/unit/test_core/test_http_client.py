@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Testes do pool HTTP dos providers REST (http_client)
+
+Servidor local HTTP/1.1 (keep-alive) imitando /api/v3/klines (Binance) e
+/v5/market/kline (Bybit): as chamadas devem reaproveitar a mesma conexão e
+get_kline_async deve devolver o mesmo resultado que get_kline.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.data_providers.binance_data_provider import BinanceDataProvider
+from market_manus.data_providers.bybit_real_data_provider import BybitRealDataProvider
+from market_manus.data_providers.http_client import fetch_kline_async
+from market_manus.engines.stream_runtime import StreamRuntime
+
+STEP = 5 * 60 * 1000
+ROWS = [[ts, "100.5", "101", "99.5", "100.25", "12.5"] for ts in range(0, 600 * STEP, STEP)]
+
+
+class KeepAliveKlineServer:
+    """Servidor HTTP/1.1 que conta conexões TCP aceitas"""
+
+    def __init__(self):
+        self.connections = 0
+        self.closed = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+
+            def finish(self):
+                super().finish()
+                server.closed += 1
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                start = int(query.get("startTime", query.get("start", 0)))
+                end = int(query.get("endTime", query.get("end", ROWS[-1][0])))
+                rows = [row for row in ROWS if start <= row[0] <= end][:int(query["limit"])]
+                if url.path.startswith("/v5/"):
+                    payload = {"retCode": 0, "retMsg": "OK", "result": {"list": [[str(v) for v in row] for row in rows[::-1]]}}
+                else:
+                    payload = rows
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+
+class TestPooledProviders(unittest.TestCase):
+
+    def test_binance_sync_and_async_reuse_connections(self):
+        with KeepAliveKlineServer() as server:
+            provider = BinanceDataProvider(api_key="test", api_secret="test")
+            provider.base_url = server.url + "/api"
+
+            sync = [provider.get_kline("spot", "BTCUSDT", "5", limit=100, start=i * 100 * STEP) for i in range(5)]
+
+            async def fetch_all():
+                results = [await provider.get_kline_async("spot", "BTCUSDT", "5", limit=100, start=i * 100 * STEP) for i in range(5)]
+                await provider.http.aclose()
+                return results
+
+            async_results = asyncio.run(fetch_all())
+            provider.close()
+
+        self.assertEqual(sync, async_results)
+        self.assertEqual(sync[1][0], [str(100 * STEP), "100.5", "101", "99.5", "100.25", "12.5"])
+
+        metrics = provider.get_metrics()
+        self.assertEqual(metrics["requests"], 5)
+        self.assertEqual(metrics["new_connections"], 1)
+        self.assertEqual(metrics["reused_connections"], 4)
+        self.assertEqual(metrics["async_new_connections"], 1)
+        self.assertEqual(metrics["async_reused_connections"], 4)
+        self.assertEqual(server.connections, 2)
+
+    def test_bybit_kline_accepts_time_range(self):
+        with KeepAliveKlineServer() as server:
+            provider = BybitRealDataProvider(api_key="test", api_secret="test")
+            provider.base_url = server.url
+            klines = provider.get_kline("spot", "BTCUSDT", "5", limit=10, start=20 * STEP, end=24 * STEP)
+            again = asyncio.run(provider.get_kline_async("spot", "BTCUSDT", "5", limit=10, start=20 * STEP, end=24 * STEP))
+            provider.get_kline("spot", "BTCUSDT", "5", limit=10)
+
+        self.assertEqual([int(k[0]) for k in klines], [24 * STEP, 23 * STEP, 22 * STEP, 21 * STEP, 20 * STEP])
+        self.assertEqual(klines, again)
+        self.assertEqual(provider.get_metrics()["reused_connections"], 1)
+
+    def test_closed_loop_clients_are_released(self):
+        with KeepAliveKlineServer() as server:
+            provider = BinanceDataProvider(api_key="test", api_secret="test")
+            provider.base_url = server.url + "/api"
+
+            # asyncio.run por chamada: o client do primeiro loop não pode mais ser fechado nele
+            asyncio.run(provider.get_kline_async("spot", "BTCUSDT", "5", limit=10))
+            asyncio.run(provider.get_kline_async("spot", "BTCUSDT", "5", limit=10))
+            self.assertEqual(len(provider.http._async_clients), 1)
+
+            deadline = time.time() + 5
+            while server.closed < 1 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual((server.connections, server.closed), (2, 1))
+
+            # Loops de vida longa em threads diferentes não substituem o client um do outro
+            loops = [asyncio.new_event_loop() for _ in range(2)]
+            for loop in loops:
+                threading.Thread(target=loop.run_forever, daemon=True).start()
+            for _ in range(2):
+                for loop in loops:
+                    asyncio.run_coroutine_threadsafe(
+                        provider.get_kline_async("spot", "BTCUSDT", "5", limit=10), loop
+                    ).result(5)
+            for loop in loops:
+                asyncio.run_coroutine_threadsafe(provider.http.aclose(), loop).result(5)
+                loop.call_soon_threadsafe(loop.stop)
+
+        self.assertEqual(server.connections, 4)
+        self.assertEqual(provider.get_metrics()["async_reused_connections"], 2)
+
+
+class TestNonBlockingBootstrap(unittest.TestCase):
+
+    def test_stream_runtime_bootstrap_uses_async_provider(self):
+        with KeepAliveKlineServer() as server:
+            provider = BinanceDataProvider(api_key="test", api_secret="test")
+            provider.base_url = server.url + "/api"
+            runtime = StreamRuntime(ws_provider=None, data_provider=provider, symbol="BTCUSDT", interval="5m", engine=None)
+            self.assertTrue(asyncio.run(runtime.bootstrap_historical_data()))
+
+        self.assertEqual(len(runtime.candles), 500)
+        self.assertEqual(provider.get_metrics()["async_requests"], 1)
+        self.assertEqual(provider.get_metrics()["requests"], 0)
+
+    def test_sync_only_provider_runs_in_thread(self):
+        threads = []
+
+        class SyncProvider:
+            def get_kline(self, category, symbol, interval, limit):
+                threads.append(threading.current_thread())
+                return [["0", "1", "1", "1", "1", "1"]]
+
+        result = asyncio.run(fetch_kline_async(SyncProvider(), category="spot", symbol="X", interval="5", limit=1))
+        self.assertEqual(result, [["0", "1", "1", "1", "1", "1"]])
+        self.assertIsNot(threads[0], threading.main_thread())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Testes do paginador concorrente de klines (kline_paginator)
+
+Usa um servidor HTTP local que imita /api/v3/klines da Binance, com falhas
+injetadas, e o BinanceDataProvider real apontado para ele.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.data_providers.binance_data_provider import BinanceDataProvider
+from market_manus.data_providers.historical_cache import INTERVAL_MS
+from market_manus.data_providers.kline_paginator import (
+    KlinePaginator,
+    RateLimitPolicy,
+    WeightBudget,
+)
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "BTCUSDT_5_090925_until_091025.parquet"
+STEP = INTERVAL_MS["5"]
+POLICY = RateLimitPolicy(weight_per_minute=100000, request_weight=2, max_concurrency=4, max_batch=1000)
+
+
+class FakeKlineServer:
+    """Servidor /api/v3/klines em memória com falhas programáveis por startTime"""
+
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.fail_once = set()
+        self.fail_always = set()
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                start, end, limit = int(query["startTime"]), int(query["endTime"]), int(query["limit"])
+                with server.lock:
+                    server.requests.append((start, end, limit))
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    failed = start in server.fail_always or start in server.fail_once
+                    server.fail_once.discard(start)
+                time.sleep(0.02)
+                with server.lock:
+                    server.in_flight -= 1
+
+                if failed:
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                body = json.dumps([row for row in server.rows if start <= row[0] <= end][:limit]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/api"
+
+
+def fixture_rows(candles: int = 2300) -> list:
+    """Linhas no formato bruto da Binance (timestamp int, preços como string)"""
+    df = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE)).iloc[:candles]
+    return [
+        [int(row.timestamp), str(row.open), str(row.high), str(row.low), str(row.close), str(row.volume), int(row.timestamp) + STEP - 1]
+        for row in df.itertuples()
+    ]
+
+
+class TestKlinePaginatorAgainstFakeServer(unittest.TestCase):
+    """BinanceDataProvider + KlinePaginator contra o servidor local"""
+
+    def setUp(self):
+        self.rows = fixture_rows()
+        self.start = self.rows[0][0]
+        self.end = self.rows[-1][0] + STEP
+        self.provider = BinanceDataProvider(api_key="test", api_secret="test")
+        self.paginator = KlinePaginator(POLICY, batch_size=500, backoff=0.0)
+
+    def expected(self) -> list:
+        return [[str(value) for value in row[:6]] for row in self.rows]
+
+    def test_concurrent_slices_reassembled_in_order(self):
+        with FakeKlineServer(self.rows) as server:
+            self.provider.base_url = server.base_url
+            server.fail_once = {self.start + 500 * STEP, self.start + 1500 * STEP}
+            result = self.paginator.fetch(self.provider, "BTCUSDT", "5", self.start, self.end)
+
+        self.assertEqual(result.klines, self.expected())
+        self.assertEqual(result.successful_batches, 5)
+        self.assertEqual(result.failed_batches, 0)
+        self.assertEqual(result.retries, 2)
+        self.assertEqual(result.covered_ranges, [(self.start, self.end)])
+        self.assertGreater(server.max_in_flight, 1)
+        self.assertLessEqual(server.max_in_flight, POLICY.max_concurrency)
+        # Fatias não se sobrepõem (endTime inclusivo = fim da fatia - 1)
+        self.assertTrue(all(limit <= 500 and end < start + 500 * STEP for start, end, limit in server.requests))
+
+    def test_failed_slice_does_not_abort_others(self):
+        failing = self.start + 1000 * STEP
+        with FakeKlineServer(self.rows) as server:
+            self.provider.base_url = server.base_url
+            server.fail_always = {failing}
+            result = self.paginator.fetch(self.provider, "BTCUSDT", "5", self.start, self.end)
+
+        self.assertEqual(result.failed_batches, 1)
+        self.assertEqual(result.failed_ranges, [(failing, failing + 500 * STEP)])
+        self.assertEqual(result.covered_ranges, [(self.start, failing), (failing + 500 * STEP, self.end)])
+        expected = [row for row in self.expected() if not failing <= int(row[0]) < failing + 500 * STEP]
+        self.assertEqual(result.klines, expected)
+
+    def test_empty_slices_are_covered_without_retries(self):
+        # Período anterior à listagem: a exchange responde com lista vazia
+        before = self.start - 1000 * STEP
+        paginator = KlinePaginator(POLICY, batch_size=500, backoff=1.0)
+        with FakeKlineServer(self.rows) as server:
+            self.provider.base_url = server.base_url
+            started = time.monotonic()
+            result = paginator.fetch(self.provider, "BTCUSDT", "5", before, self.start + 500 * STEP)
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual((result.failed_batches, result.retries), (0, 0))
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(result.covered_ranges, [(before, self.start + 500 * STEP)])
+        self.assertEqual(result.klines, self.expected()[:500])
+
+
+class TestKlinePaginatorUnits(unittest.TestCase):
+
+    def test_reverse_ordered_provider(self):
+        """Bybit devolve do mais recente para o mais antigo"""
+        rows = [[str(ts), "1", "2", "0.5", "1.5", "10"] for ts in range(0, 1200 * STEP, STEP)]
+
+        class ReversedProvider:
+            def get_kline(self, category, symbol, interval, limit, start, end):
+                return [row for row in rows if start <= int(row[0]) <= end][:limit][::-1]
+
+        result = KlinePaginator(POLICY, backoff=0.0).fetch(ReversedProvider(), "X", "5", 0, 1200 * STEP)
+        self.assertEqual(result.klines, rows)
+
+    def test_plan_slices_skips_slices_without_candle_open(self):
+        paginator = KlinePaginator(POLICY, batch_size=2)
+        self.assertEqual(
+            paginator.plan_slices("5", 0, 5 * STEP + 60_000),
+            [(0, 2 * STEP, 2), (2 * STEP, 4 * STEP, 2), (4 * STEP, 5 * STEP + 60_000, 2)],
+        )
+        self.assertEqual(paginator.plan_slices("5", 60_000, 120_000), [(60_000, 120_000, 0)])
+
+    def test_weight_budget_blocks_until_refilled(self):
+        now = [0.0]
+        budget = WeightBudget(60, clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+        self.assertEqual(budget.acquire(60), 0.0)
+        self.assertAlmostEqual(budget.acquire(2), 2.0)
+        self.assertAlmostEqual(now[0], 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
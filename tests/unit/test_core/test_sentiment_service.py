@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Testes da coleta de sentimento contra um servidor HTTP local
+
+Os coletores (alternative.me, CoinGecko, Bybit) usam o cliente injetado;
+gather_sentiment respeita o prazo total com resultados parciais, serve
+resultados velhos enquanto revalida em segundo plano (com o mesmo cliente) e
+compartilha o último resultado pelo SQLite entre instâncias do store; chamadas
+síncronas reaproveitam o loop e as conexões.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import urlparse
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.data_providers.http_client import PooledHTTPClient
+from market_manus.sentiment import sentiment_service
+from market_manus.sentiment.cache.store import SentimentStore
+from market_manus.sentiment.collectors import alt_fng, bybit_derivs, coingecko, cryptopanic
+
+
+class FakeSentimentServer:
+    """Imita alternative.me, CoinGecko e Bybit; conta requisições por caminho"""
+
+    def __init__(self):
+        self.hits = {}
+        self.connections = 0
+        self.fng_value = 72
+        self.delays = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                server.hits[path] = server.hits.get(path, 0) + 1
+                time.sleep(server.delays.get(path, 0))
+                if path == "/fng/":
+                    payload = {"data": [{"value": str(server.fng_value), "value_classification": "Greed", "timestamp": "1"}]}
+                elif path == "/cg/search":
+                    payload = {"coins": [{"id": "bitcoin", "symbol": "BTC"}]}
+                elif path == "/cg/coins/bitcoin":
+                    payload = {"market_data": {"current_price": {"usd": 65000.0},
+                                               "price_change_percentage_24h": 2.5,
+                                               "total_volume": {"usd": 3.2e10}}}
+                elif path == "/v5/market/funding/history":
+                    payload = {"result": {"list": [{"fundingRate": "0.0001"}]}}
+                else:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.patches = [
+            mock.patch.object(alt_fng, "API", url + "/fng/"),
+            mock.patch.object(coingecko, "BASE_URL", url + "/cg"),
+            mock.patch.object(bybit_derivs, "BASE_URL", url),
+            mock.patch.object(cryptopanic, "TOKEN", None),
+        ]
+        for patch in self.patches:
+            patch.start()
+        coingecko._coin_id_cache.clear()
+        return self
+
+    def __exit__(self, *exc):
+        for patch in self.patches:
+            patch.stop()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def by_name(result: dict) -> dict:
+    return {source["__name__"]: source for source in result["sources"]}
+
+
+class TestGatherSentiment(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        self.store = self.make_store()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_store(self) -> SentimentStore:
+        return SentimentStore(os.path.join(self.tmp.name, "sentiment.db"), fresh_ttl=60, stale_ttl=3600, clock=self.clock)
+
+    def gather(self, client: PooledHTTPClient, **kwargs) -> dict:
+        async def run():
+            try:
+                return await sentiment_service.gather_sentiment("BTCUSDT", client=client, store=self.store, **kwargs)
+            finally:
+                await client.aclose()
+        return asyncio.run(run())
+
+    def test_collectors_share_injected_client(self):
+        client = PooledHTTPClient(timeout=5)
+        with FakeSentimentServer() as server:
+            result = self.gather(client)
+
+        sources = by_name(result)
+        self.assertEqual(sources["alt_fng"]["score"], 72.0)
+        self.assertEqual(sources["coingecko"]["price"], 65000.0)
+        self.assertEqual(sources["bybit"]["funding_rate"], 0.0001)
+        self.assertEqual(sources["cryptopanic"]["error"], "no-token")
+        self.assertIsNotNone(result["score"])
+        self.assertEqual(client.stats["async_requests"], 4)
+        self.assertEqual(sum(server.hits.values()), 4)
+
+    def test_deadline_returns_partial_results(self):
+        client = PooledHTTPClient(timeout=5)
+        with FakeSentimentServer() as server:
+            server.delays["/cg/search"] = 2.0
+            started = time.monotonic()
+            result = self.gather(client, deadline=0.5)
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 1.5)
+        sources = by_name(result)
+        self.assertEqual(sources["coingecko"]["error"], "timeout")
+        self.assertEqual(sources["alt_fng"]["score"], 72.0)
+        self.assertIsNone(self.store.get(self.store.key("coingecko", "BTCUSDT", "1d")))
+
+    def test_stale_while_revalidate_and_persistence(self):
+        with FakeSentimentServer() as server:
+            self.gather(PooledHTTPClient(timeout=5))
+            key = self.store.key("alt_fng", "BTCUSDT", "1d")
+            self.assertEqual(self.store.get(key).value["score"], 72.0)
+
+            # Fresco: nenhuma chamada à API
+            hits = dict(server.hits)
+            self.clock.now += 30
+            fresh = self.gather(PooledHTTPClient(timeout=5))
+            self.assertEqual(server.hits, hits)
+            self.assertNotIn("stale", by_name(fresh)["alt_fng"])
+
+            # Velho: servido na hora e revalidado em segundo plano (pelo cliente injetado)
+            server.fng_value = 20
+            self.clock.now += 120
+            stale_client = PooledHTTPClient(timeout=5)
+            stale = self.gather(stale_client)
+            self.assertEqual(by_name(stale)["alt_fng"]["score"], 72.0)
+            self.assertTrue(by_name(stale)["alt_fng"]["stale"])
+            deadline = time.time() + 10
+            while self.store.get(key).value["score"] != 20.0 and time.time() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(self.store.get(key).value["score"], 20.0)
+            self.assertEqual(self.store.get(key).age, 0)
+            self.assertGreaterEqual(stale_client.stats["async_requests"], 1)
+
+        # Outra instância (outro processo) lê o mesmo snapshot sem chamar a API
+        self.store = self.make_store()
+        client = PooledHTTPClient(timeout=5)
+        offline = self.gather(client)
+        self.assertEqual(by_name(offline)["alt_fng"]["score"], 20.0)
+        self.assertEqual(client.stats["async_requests"], 0)
+
+    def test_sync_calls_share_one_loop_and_connections(self):
+        client = PooledHTTPClient(timeout=5)
+        with FakeSentimentServer() as server:
+            for _ in range(3):
+                result = sentiment_service.gather_sentiment_sync("BTCUSDT", client=client, store=self.store)
+                self.clock.now += 7200
+            connections = server.connections
+
+        self.assertEqual(by_name(result)["alt_fng"]["score"], 72.0)
+        self.assertEqual(len(client._async_clients), 1)
+        metrics = client.connection_metrics()
+        # 4 na primeira chamada; depois o id do CoinGecko vem do cache (sem /search)
+        self.assertEqual(metrics["async_requests"], 10)
+        # Conexões por host abertas uma vez e reaproveitadas nas chamadas seguintes
+        self.assertLessEqual(metrics["async_new_connections"], 4)
+        self.assertEqual(connections, metrics["async_new_connections"])
+
+    def test_expired_source_falls_back_to_last_value(self):
+        with FakeSentimentServer():
+            self.gather(PooledHTTPClient(timeout=5))
+        self.clock.now += 7200
+
+        with FakeSentimentServer() as server:
+            server.delays["/fng/"] = 2.0
+            result = self.gather(PooledHTTPClient(timeout=5), deadline=0.5)
+        fallback = by_name(result)["alt_fng"]
+        self.assertEqual((fallback["score"], fallback["stale"]), (72.0, True))
+
+
+if __name__ == "__main__":
+    unittest.main()
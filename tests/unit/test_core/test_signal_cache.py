@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Testes do cache persistente de sinais (SignalCache)
+
+Memo em disco por (conteúdo dos candles, estratégia, parâmetros, versão do
+código) com descarte LRU; a segunda execução do backtest de confluência sobre
+os mesmos candles não recalcula nenhuma estratégia.
+"""
+
+import contextlib
+import inspect
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.confluence_mode.confluence_mode_module import ConfluenceModeModule
+from market_manus.data_providers.historical_cache import OHLCV_COLUMNS, HistoricalDataCache, klines_to_arrays
+from market_manus.data_providers.signal_cache import SignalCache, module_dependencies
+from market_manus.performance.history_repository import PerformanceHistoryRepository
+from market_manus.strategies.signal_series import SignalSeries
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "ADAUSDT_15_090725_until_091025.parquet"
+
+
+def fixture_klines(candles: int = 1500) -> list:
+    df = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE))
+    rows = df[list(OHLCV_COLUMNS)].iloc[:candles].values.tolist()
+    return [[str(int(row[0]))] + [str(value) for value in row[1:]] for row in rows]
+
+
+def series(count: int, seed: int) -> SignalSeries:
+    rng = np.random.default_rng(seed)
+    return SignalSeries(np.sort(rng.choice(10_000, size=count, replace=False)), rng.choice([-1, 1], size=count))
+
+
+class TestSignalCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_and_persistence(self):
+        cache = SignalCache(cache_dir=self.tmp.name)
+        original = series(500, 1)
+        key = SignalCache.make_key("abc", "ema_crossover", {"fast": 12}, "v1")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, original, data_hash="abc", strategy_key="ema_crossover")
+
+        reopened = SignalCache(cache_dir=self.tmp.name)
+        loaded = reopened.get(key)
+        np.testing.assert_array_equal(loaded.index, original.index)
+        np.testing.assert_array_equal(loaded.direction, original.direction)
+        self.assertEqual(loaded.direction.dtype, np.int8)
+        self.assertEqual(reopened.get_metrics()["hits"], 1)
+
+    def test_key_components(self):
+        base = SignalCache.make_key("abc", "macd", {"a": 1, "b": 2}, "v1")
+        self.assertEqual(base, SignalCache.make_key("abc", "macd", {"b": 2, "a": 1}, "v1"))
+        for other in (("abd", "macd", {"a": 1, "b": 2}, "v1"), ("abc", "adx", {"a": 1, "b": 2}, "v1"),
+                      ("abc", "macd", {"a": 1, "b": 3}, "v1"), ("abc", "macd", {"a": 1, "b": 2}, "v2")):
+            self.assertNotEqual(base, SignalCache.make_key(*other))
+
+        arrays = klines_to_arrays(fixture_klines(200))
+        changed = {name: values.copy() for name, values in arrays.items()}
+        changed["close"][-1] += 1e-9
+        self.assertEqual(SignalCache.fingerprint(arrays), SignalCache.fingerprint(klines_to_arrays(fixture_klines(200))))
+        self.assertNotEqual(SignalCache.fingerprint(arrays), SignalCache.fingerprint(changed))
+
+    def test_lru_eviction(self):
+        probe = SignalCache(cache_dir=self.tmp.name)
+        probe.put("probe", series(1000, 0))
+        entry_size = probe.index["probe"]["size"]
+        probe.clear()
+
+        cache = SignalCache(cache_dir=self.tmp.name, max_bytes=int(entry_size * 2.5))
+        for name in ("a", "b"):
+            cache.put(name, series(1000, 1))
+        self.assertIsNotNone(cache.get("a"))  # "b" passa a ser o menos usado
+        cache.put("c", series(1000, 2))
+
+        self.assertEqual(set(cache.index), {"a", "c"})
+        self.assertFalse(os.path.exists(cache._path("b")))
+        self.assertLessEqual(cache.size_bytes(), cache.max_bytes)
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_dataset_invalidation(self):
+        cache = SignalCache(cache_dir=self.tmp.name)
+        cache.put("old_rsi", series(10, 1), data_hash="h1", dataset="ADAUSDT_15")
+        cache.put("old_ema", series(10, 2), data_hash="h1", dataset="ADAUSDT_15")
+        cache.put("other", series(10, 3), data_hash="h9", dataset="BTCUSDT_15")
+        cache.put("new_rsi", series(10, 4), data_hash="h2", dataset="ADAUSDT_15")
+
+        self.assertEqual(set(cache.index), {"other", "new_rsi"})
+        self.assertEqual(cache.stats["invalidations"], 2)
+
+    def test_hits_batch_access_time_writes(self):
+        clock = FakeClock()
+        cache = SignalCache(cache_dir=self.tmp.name, access_flush_interval=60, clock=clock)
+        cache.put("a", series(10, 1))
+        with mock.patch.object(cache, "_save_index", wraps=cache._save_index) as save:
+            for _ in range(100):
+                clock.now += 0.1
+                self.assertIsNotNone(cache.get("a"))
+            self.assertEqual(save.call_count, 0)
+            self.assertEqual(SignalCache(cache_dir=self.tmp.name).index["a"]["last_access"], 1_000_000.0)
+
+            clock.now += 60
+            cache.get("a")
+            self.assertEqual(save.call_count, 1)
+        self.assertEqual(SignalCache(cache_dir=self.tmp.name).index["a"]["last_access"], clock.now)
+
+        # Pendentes também vão junto com a próxima alteração do índice
+        clock.now += 1
+        cache.get("a")
+        cache.put("b", series(10, 2))
+        self.assertEqual(SignalCache(cache_dir=self.tmp.name).index["a"]["last_access"], clock.now)
+
+    def test_instances_merge_index_instead_of_overwriting(self):
+        first = SignalCache(cache_dir=self.tmp.name)
+        second = SignalCache(cache_dir=self.tmp.name)
+        first.put("a", series(10, 1))
+        second.put("b", series(10, 2))
+        first.put("c", series(10, 3))
+        self.assertEqual(set(SignalCache(cache_dir=self.tmp.name).index), {"a", "b", "c"})
+        # Entrada gravada por outra instância depois da leitura do índice
+        self.assertIsNotNone(second.get("c"))
+
+    def test_concurrent_processes_keep_every_entry(self):
+        jobs = [(self.tmp.name, [f"w{w}_{n}" for n in range(25)]) for w in range(4)]
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            pool.starmap(put_keys, jobs)
+
+        reopened = SignalCache(cache_dir=self.tmp.name)
+        self.assertEqual(set(reopened.index), {key for _, keys in jobs for key in keys})
+        self.assertEqual(list(reopened.signals_dir.glob("*.tmp")), [])
+        for key in reopened.index:
+            self.assertIsNotNone(reopened.get(key))
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def put_keys(cache_dir: str, keys: list):
+    """Worker: grava e relê cada chave com uma instância própria do cache"""
+    cache = SignalCache(cache_dir=cache_dir)
+    for n, key in enumerate(keys):
+        cache.put(key, series(50, n))
+        cache.get(key)
+    cache.flush()
+
+
+class FakeKlineProvider:
+    api_key = "key"
+    api_secret = "secret"
+
+    def __init__(self, klines: list):
+        self.klines = klines
+
+    def get_kline(self, category, symbol, interval, limit, start, end):
+        return [k for k in self.klines if start <= int(k[0]) <= end][:limit]
+
+
+class TestConfluenceBacktestSignalCache(unittest.TestCase):
+    """Segunda execução de _run_confluence_backtest não recalcula sinais"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.provider = FakeKlineProvider(fixture_klines())
+        self.module = ConfluenceModeModule(
+            data_provider=self.provider, capital_manager=None,
+            performance_repo=PerformanceHistoryRepository(os.path.join(self.tmp.name, "perf.db"))
+        )
+        self.module.cache = HistoricalDataCache(cache_dir=os.path.join(self.tmp.name, "klines_a"))
+        self.module.signal_cache = SignalCache(cache_dir=self.tmp.name)
+        self.module.selected_asset = "ADAUSDT"
+        self.module.selected_timeframe = "15"
+        self.module.selected_strategies = ["rsi_mean_reversion", "ema_crossover", "smc_fvg"]
+        self.module.selected_confluence_mode = "ANY"
+        self.module.custom_start_date = "2025-07-10"
+        self.module.custom_end_date = "2025-07-20"
+
+        self.computed = []
+        execute = self.module._execute_strategy_series
+
+        def counting(strategy_key, *args):
+            self.computed.append(strategy_key)
+            return execute(strategy_key, *args)
+
+        self.module._execute_strategy_series = counting
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_backtest(self) -> dict:
+        self.computed.clear()
+        with mock.patch("builtins.input", return_value=""), contextlib.redirect_stdout(io.StringIO()):
+            self.module._run_confluence_backtest()
+        return self.module.test_history[-1]["results"]
+
+    def test_warm_run_skips_signal_generation(self):
+        cold = self.run_backtest()
+        self.assertEqual(sorted(self.computed), sorted(self.module.selected_strategies))
+
+        warm = self.run_backtest()
+        self.assertEqual(self.computed, [])
+        self.assertEqual(warm, cold)
+
+        self.module.selected_confluence_mode = "MAJORITY"
+        self.run_backtest()
+        self.assertEqual(self.computed, [])
+
+    def test_changed_candles_invalidate(self):
+        self.run_backtest()
+        for kline in self.provider.klines[::7]:
+            kline[4] = str(float(kline[4]) * 1.001)
+        self.module.cache = HistoricalDataCache(cache_dir=os.path.join(self.tmp.name, "klines_b"))
+
+        self.run_backtest()
+        self.assertEqual(len(self.computed), 3)
+        self.assertEqual(self.module.signal_cache.stats["invalidations"], 3)
+        self.assertEqual(len(self.module.signal_cache.index), 3)
+
+    def test_code_version_covers_imported_detector_modules(self):
+        version = self.module._strategy_code_version()
+        modules = {m.__name__ for m in module_dependencies([sys.modules[ConfluenceModeModule.__module__]])}
+        # smc/patterns.py delega o tracker incremental para structure_tracker.py
+        self.assertTrue({
+            "market_manus.strategies.smc.patterns", "market_manus.strategies.smc.structure_tracker",
+            "market_manus.strategies.indicator_kernels", "market_manus.strategies.signal_series",
+        } <= modules)
+
+        tracker_source = inspect.getsourcefile(sys.modules["market_manus.strategies.smc.structure_tracker"])
+        real_open = open
+
+        def patched_open(path, *args, **kwargs):
+            f = real_open(path, *args, **kwargs)
+            if path == tracker_source:
+                return io.BytesIO(f.read() + b"# alterado")
+            return f
+
+        self.module._signal_code_version = None
+        with mock.patch("builtins.open", patched_open):
+            self.assertNotEqual(self.module._strategy_code_version(), version)
+
+
+if __name__ == "__main__":
+    unittest.main()
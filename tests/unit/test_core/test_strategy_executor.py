@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Testes dos executores de estratégias do engine em tempo real
+
+Inline, threads e processos (memória compartilhada) devem produzir os mesmos
+sinais para as estratégias de janela com candles reais; uma estratégia lenta
+estoura o timeout sem atrasar as demais.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.engines.realtime_strategy_engine import RealtimeStrategyEngine
+from market_manus.engines.strategy_executor import (
+    PROCESS_STRATEGIES,
+    InlineStrategyExecutor,
+    ProcessStrategyExecutor,
+    ThreadStrategyExecutor,
+    create_strategy_executor,
+)
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "BTCUSDT_5_090925_until_091025.parquet"
+
+
+def load_window(candles: int = 200) -> pd.DataFrame:
+    df = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE)).iloc[1000:1000 + candles]
+    return df[["timestamp", "open", "high", "low", "close", "volume"]].astype({"timestamp": "int64"}).reset_index(drop=True)
+
+
+def signal_tuple(signal):
+    return signal.action, round(signal.confidence, 12), signal.reasons, signal.tags
+
+
+def slow_strategy(df):
+    time.sleep(1.0)
+    return PROCESS_STRATEGIES["liquidity_sweep"](df)
+
+
+class TestExecutorParity(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = load_window()
+        cls.expected = {name: signal_tuple(func(cls.df)) for name, func in PROCESS_STRATEGIES.items()}
+
+    def run_map(self, executor, jobs=None, timeout=30.0):
+        try:
+            return asyncio.run(executor.map(jobs or dict(PROCESS_STRATEGIES), self.df, timeout=timeout))
+        finally:
+            executor.close()
+
+    def test_inline_and_thread_match_direct_calls(self):
+        for executor in (InlineStrategyExecutor(), ThreadStrategyExecutor(max_workers=2)):
+            with self.subTest(executor=executor.kind):
+                results = self.run_map(executor)
+                self.assertEqual({name: signal_tuple(s) for name, s in results.items()}, self.expected)
+
+    def test_process_pool_reads_shared_memory(self):
+        executor = ProcessStrategyExecutor(max_workers=2)
+        executor.warm()
+        self.assertEqual(executor.stats["workers"], 2)
+
+        jobs = dict(PROCESS_STRATEGIES)
+        jobs["local_only"] = lambda df: PROCESS_STRATEGIES["fibonacci"](df)
+        results = self.run_map(executor, jobs)
+
+        local = results.pop("local_only")
+        self.assertEqual({name: signal_tuple(s) for name, s in results.items()}, self.expected)
+        self.assertEqual(signal_tuple(local), self.expected["fibonacci"])
+        self.assertEqual(executor.stats["fallback_runs"], 1)
+        self.assertEqual(executor.stats["shared_bytes"], 6 * len(self.df) * 8)
+        self.assertEqual(executor.open_segments, {})
+
+    def test_process_pool_runs_only_registered_callables(self):
+        executor = ProcessStrategyExecutor(max_workers=1)
+        # Mesmo nome de uma estratégia registrada, outra função: não pode ser trocada pela registrada
+        jobs = {"liquidity_sweep": lambda df: PROCESS_STRATEGIES["fibonacci"](df), "fibonacci": PROCESS_STRATEGIES["fibonacci"]}
+        results = self.run_map(executor, jobs)
+
+        self.assertEqual(signal_tuple(results["liquidity_sweep"]), self.expected["fibonacci"])
+        self.assertEqual(signal_tuple(results["fibonacci"]), self.expected["fibonacci"])
+        self.assertEqual(executor.stats["fallback_runs"], 1)
+
+    def test_timeout_does_not_stall_other_strategies(self):
+        executor = ThreadStrategyExecutor(max_workers=4)
+        started = time.perf_counter()
+        results = self.run_map(executor, {"slow": slow_strategy, "liquidity_sweep": PROCESS_STRATEGIES["liquidity_sweep"]}, timeout=0.2)
+        elapsed = time.perf_counter() - started
+
+        self.assertIsInstance(results["slow"], asyncio.TimeoutError)
+        self.assertEqual(signal_tuple(results["liquidity_sweep"]), self.expected["liquidity_sweep"])
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual(executor.get_metrics()["timeouts"], 1)
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            create_strategy_executor("gpu")
+
+
+class TestEngineExecutor(unittest.TestCase):
+
+    def test_timed_out_strategy_becomes_hold(self):
+        engine = RealtimeStrategyEngine(
+            symbol="BTCUSDT",
+            interval="5m",
+            strategies=["smc_liquidity_sweep", "fibonacci"],
+            data_provider=None,
+            executor="thread",
+            strategy_timeout=0.2,
+        )
+        engine.strategy_functions["liquidity_sweep"] = slow_strategy
+        df = load_window()
+        signals = asyncio.run(engine.apply_strategies_parallel(df))
+        engine.stop()
+
+        self.assertEqual(signals["liquidity_sweep"].tags, ["TIMEOUT"])
+        self.assertEqual(signals["liquidity_sweep"].action, "HOLD")
+        self.assertEqual(signal_tuple(signals["fibonacci"]), signal_tuple(PROCESS_STRATEGIES["fibonacci"](df)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Testes do mailbox conflacionado do StreamRuntime (KlineMailbox)
+
+Atualizações do mesmo candle devem ser conflacionadas, candles fechados
+nunca descartados e o processador deve acordar com a chegada de dados, não
+após um sleep fixo. Só candles fechados alimentam o rastreador SMC do stream.
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.engines.stream_runtime import KlineMailbox, StreamRuntime
+
+STEP = 60_000
+
+
+def kline(timestamp: int, close: float, closed: bool = False) -> dict:
+    return {
+        "event_time": timestamp + 1, "symbol": "BTCUSDT", "interval": "1m",
+        "open": 1.0, "high": 2.0, "low": 0.5, "close": close, "volume": 10.0,
+        "is_closed": closed, "timestamp": timestamp,
+    }
+
+
+class RecordingEngine:
+    """Engine mínimo: registra o último candle visto em cada avaliação"""
+
+    def __init__(self):
+        self.seen = []
+        self.structure_counts = []
+
+    def process_candle(self, candles, symbol, timeframe, callback=None, structure=None):
+        self.seen.append((int(candles["timestamp"].iloc[-1]), float(candles["close"].iloc[-1])))
+        self.structure_counts.append(structure.count)
+        return None
+
+
+class TestKlineMailbox(unittest.TestCase):
+
+    def test_conflates_open_bar_and_keeps_closed_bars(self):
+        mailbox = KlineMailbox(max_pending=2)
+        for i in range(5):
+            mailbox.put(kline(0, 10.0 + i))
+        mailbox.put(kline(0, 20.0, closed=True))
+        mailbox.put(kline(0, 99.0))  # Atualização atrasada não sobrescreve o fechamento
+        mailbox.put(kline(STEP, 21.0, closed=True))
+        mailbox.put(kline(2 * STEP, 22.0))
+        mailbox.put(kline(3 * STEP, 23.0))
+
+        batch = mailbox.drain()
+        metrics = mailbox.get_metrics()
+
+        self.assertEqual([(m["timestamp"], m["close"], m["is_closed"]) for m in batch],
+                         [(0, 20.0, True), (STEP, 21.0, True), (3 * STEP, 23.0, False)])
+        self.assertEqual(metrics["received"], 10)
+        self.assertEqual(metrics["conflated"], 6)
+        self.assertEqual(metrics["dropped"], 1)
+        self.assertEqual(metrics["pending"], 0)
+
+    def test_get_batch_wakes_on_data(self):
+        async def scenario():
+            mailbox = KlineMailbox()
+            waiter = asyncio.create_task(mailbox.get_batch(timeout=5.0))
+            await asyncio.sleep(0.01)
+            mailbox.put(kline(0, 10.0))
+            batch = await asyncio.wait_for(waiter, 1.0)
+            empty = await mailbox.get_batch(timeout=0.01)
+            return batch, empty, mailbox.get_metrics()
+
+        batch, empty, metrics = asyncio.run(scenario())
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(empty, [])
+        self.assertEqual(metrics["wakeups"], 1)
+        self.assertLess(metrics["max_wake_latency_ms"], 500)
+
+
+class TestStreamRuntimeProcessing(unittest.TestCase):
+
+    def test_closed_bars_survive_burst(self):
+        messages = []
+        for bar in range(3):
+            messages += [kline(bar * STEP, 100.0 + bar + tick / 10) for tick in range(50)]
+            messages.append(kline(bar * STEP, 200.0 + bar, closed=True))
+        messages.append(kline(3 * STEP, 300.0))
+
+        class Burst:
+            async def __aiter__(self):
+                for msg in messages:
+                    yield msg
+
+        async def scenario():
+            engine = RecordingEngine()
+            runtime = StreamRuntime(ws_provider=Burst(), data_provider=None, symbol="BTCUSDT",
+                                    interval="1m", engine=engine, debounce_sec=5.0)
+            runtime.running = True
+            processor = asyncio.create_task(runtime.process_micro_batches())
+            await runtime.collect_ws_messages()
+            while len(runtime.mailbox):
+                await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            runtime.stop()
+            processor.cancel()
+            return runtime, engine
+
+        runtime, engine = asyncio.run(scenario())
+
+        self.assertEqual([c["close"] for c in runtime.candles], [200.0, 201.0, 202.0, 300.0])
+        self.assertEqual(runtime.state.msgs_received, len(messages))
+        self.assertEqual(engine.seen, [(0, 200.0), (STEP, 201.0), (2 * STEP, 202.0), (3 * STEP, 300.0)])
+        self.assertEqual(runtime.get_mailbox_metrics()["conflated"], 150)
+        # Rastreador SMC persistente: só os candles fechados, um update por fechamento
+        self.assertEqual(engine.structure_counts, [1, 2, 3, 3])
+        self.assertEqual(runtime.structure.last_candle, (1.0, 2.0, 0.5, 202.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Testes do multiplexador de streams kline (market_data_ws)
+
+Servidor websockets local imitando o /stream da Binance (combined streams,
+SUBSCRIBE/UNSUBSCRIBE) e o tópico kline da Bybit: vários (symbol, interval)
+devem compartilhar uma conexão, cada canal recebe só o seu stream e a
+reconexão reassina tudo. Com o canal cheio, atualizações em formação são
+descartadas antes e candles fechados nunca.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+from websockets.asyncio.server import serve
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.data_providers.market_data_ws import (
+    BinanceUSStreamMultiplexer,
+    BybitStreamMultiplexer,
+    KlineStreamMultiplexer,
+    StreamSubscription,
+    get_shared_multiplexer,
+)
+from market_manus.engines.realtime_strategy_engine import RealtimeStrategyEngine
+
+
+def binance_event(stream: str, timestamp: int, close: float, closed: bool = False) -> dict:
+    symbol, interval = stream.split("@kline_")
+    return {
+        "stream": stream,
+        "data": {
+            "e": "kline", "E": timestamp + 1, "s": symbol.upper(),
+            "k": {"t": timestamp, "i": interval, "o": "1", "h": "2", "l": "0.5", "c": str(close), "v": "10", "x": closed},
+        },
+    }
+
+
+def bybit_event(topic: str, timestamp: int, close: float) -> dict:
+    interval = topic.split(".")[1]
+    return {
+        "topic": topic, "ts": timestamp + 1, "type": "snapshot",
+        "data": [{"start": timestamp, "interval": interval, "open": "1", "high": "2", "low": "0.5",
+                  "close": str(close), "volume": "10", "confirm": True}],
+    }
+
+
+class StubExchange:
+    """
+    Servidor WebSocket que registra (un)subscribe e, a cada assinatura,
+    envia um candle por stream assinado
+    """
+
+    def __init__(self, bybit: bool = False):
+        self.bybit = bybit
+        self.connections = 0
+        self.requests = []
+        self.sockets = []
+
+    async def handler(self, ws):
+        self.connections += 1
+        self.sockets.append(ws)
+        subscribed = set()
+        async for raw in ws:
+            request = json.loads(raw)
+            self.requests.append(request)
+            streams = request["args"] if self.bybit else request["params"]
+            method = (request["op"] if self.bybit else request["method"]).lower()
+            if method == "unsubscribe":
+                subscribed -= set(streams)
+                continue
+            subscribed |= set(streams)
+            if not self.bybit:
+                await ws.send(json.dumps({"result": None, "id": request["id"]}))
+            for i, stream in enumerate(sorted(subscribed)):
+                event = bybit_event(stream, 1000 * i, 10.0 + i) if self.bybit else binance_event(stream, 1000 * i, 10.0 + i)
+                await ws.send(json.dumps(event))
+
+    async def __aenter__(self):
+        self.server = await serve(self.handler, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+
+async def next_message(subscription, timeout: float = 2.0) -> dict:
+    return await asyncio.wait_for(subscription.get(), timeout)
+
+
+class TestBinanceMultiplexer(unittest.TestCase):
+
+    def test_one_connection_demultiplexed_channels(self):
+        async def scenario():
+            async with StubExchange() as exchange:
+                mux = BinanceUSStreamMultiplexer(url=exchange.url, initial_reconnect_delay=0.01)
+                btc_1m = await mux.subscribe("BTCUSDT", "1m")
+                btc_5m = await mux.subscribe("BTCUSDT", "5m")
+                first = await next_message(btc_1m)
+                await next_message(btc_5m)
+
+                # Assinatura dinâmica na conexão já aberta
+                eth_1m = await mux.subscribe("ETHUSDT", "1m")
+                eth = await next_message(eth_1m)
+
+                await btc_5m.close()
+                await asyncio.sleep(0.05)
+                metrics = eth_1m.get_health_metrics()
+                await mux.close()
+                return exchange, first, eth, metrics, mux
+
+        exchange, first, eth, metrics, mux = asyncio.run(scenario())
+
+        self.assertEqual(exchange.connections, 1)
+        self.assertEqual(first["symbol"], "BTCUSDT")
+        self.assertEqual(first["interval"], "1m")
+        self.assertEqual(eth["symbol"], "ETHUSDT")
+        self.assertEqual(eth["close"], 12.0)
+        self.assertEqual(
+            [(r["method"], r["params"]) for r in exchange.requests],
+            [("SUBSCRIBE", ["btcusdt@kline_1m", "btcusdt@kline_5m"]),
+             ("SUBSCRIBE", ["ethusdt@kline_1m"]),
+             ("UNSUBSCRIBE", ["btcusdt@kline_5m"])],
+        )
+        self.assertEqual(metrics["streams"], 2)
+        self.assertEqual(metrics["connection_count"], 1)
+        self.assertTrue(metrics["connected"])
+        self.assertEqual(metrics["stream"], "ethusdt@kline_1m")
+        self.assertEqual(mux.get_health_metrics()["subscribers"], 0)
+
+    def test_shared_subscribers_and_iteration(self):
+        async def scenario():
+            async with StubExchange() as exchange:
+                mux = BinanceUSStreamMultiplexer(url=exchange.url, initial_reconnect_delay=0.01)
+                a = await mux.subscribe("BTCUSDT", "1m")
+                b = await mux.subscribe("btcusdt", "1m")
+
+                received = []
+                async def consume():
+                    async for msg in a:
+                        received.append(msg)
+
+                consumer = asyncio.create_task(consume())
+                await next_message(b)
+                await a.close()
+                await asyncio.wait_for(consumer, 2.0)
+                requests = list(exchange.requests)
+                await mux.close()
+                return requests, received
+
+        requests, received = asyncio.run(scenario())
+
+        # Segundo assinante do mesmo stream não gera novo SUBSCRIBE; fechar um
+        # deles não cancela o stream
+        self.assertEqual([r["method"] for r in requests], ["SUBSCRIBE"])
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]["timestamp"], 0)
+
+    def test_reconnect_resubscribes_all_streams(self):
+        async def scenario():
+            async with StubExchange() as exchange:
+                mux = BinanceUSStreamMultiplexer(url=exchange.url, initial_reconnect_delay=0.01)
+                btc = await mux.subscribe("BTCUSDT", "1m")
+                eth = await mux.subscribe("ETHUSDT", "1m")
+                await next_message(btc)
+                await next_message(eth)
+
+                await exchange.sockets[0].close()
+                await next_message(btc)
+                await next_message(eth)
+                metrics = mux.get_health_metrics()
+                await mux.close()
+                return exchange, metrics
+
+        exchange, metrics = asyncio.run(scenario())
+
+        self.assertEqual(exchange.connections, 2)
+        self.assertEqual(metrics["connection_count"], 2)
+        self.assertEqual(exchange.requests[-1]["params"], ["btcusdt@kline_1m", "ethusdt@kline_1m"])
+
+
+class TestBybitMultiplexer(unittest.TestCase):
+
+    def test_topics_demultiplexed_and_batched(self):
+        async def scenario():
+            async with StubExchange(bybit=True) as exchange:
+                mux = BybitStreamMultiplexer(url=exchange.url, initial_reconnect_delay=0.01)
+                subscriptions = [await mux.subscribe(f"SYM{i}USDT", "5") for i in range(12)]
+                messages = [await next_message(s) for s in subscriptions]
+                await mux.close()
+                return exchange, messages
+
+        exchange, messages = asyncio.run(scenario())
+
+        self.assertEqual(exchange.connections, 1)
+        self.assertEqual([len(r["args"]) for r in exchange.requests], [10, 2])
+        self.assertEqual([m["symbol"] for m in messages], [f"SYM{i}USDT" for i in range(12)])
+        self.assertTrue(all(m["interval"] == "5" and m["is_closed"] for m in messages))
+
+
+def kline(timestamp: int, closed: bool) -> dict:
+    return {"timestamp": timestamp, "close": 10.0, "is_closed": closed}
+
+
+class TestSubscriptionBackpressure(unittest.TestCase):
+
+    def channel(self) -> StreamSubscription:
+        mux = BinanceUSStreamMultiplexer(url="ws://localhost")
+        return StreamSubscription(mux, "btcusdt@kline_1m", "BTCUSDT", "1m", max_queue_size=3)
+
+    def drain(self, subscription) -> list:
+        return [(m["timestamp"], m["is_closed"]) for m in list(subscription._pending)]
+
+    def test_full_channel_drops_forming_updates_first(self):
+        subscription = self.channel()
+        subscription._deliver(kline(0, True))
+        subscription._deliver(kline(60, False))
+        subscription._deliver(kline(60, False))
+        subscription._deliver(kline(60, True))
+
+        self.assertEqual(self.drain(subscription), [(0, True), (60, False), (60, True)])
+        self.assertEqual(subscription.dropped_messages, 1)
+
+    def test_closed_candles_are_never_dropped(self):
+        subscription = self.channel()
+        for timestamp in (0, 60, 120):
+            subscription._deliver(kline(timestamp, True))
+
+        # Só fechados na fila: a atualização em formação que chega é descartada...
+        subscription._deliver(kline(180, False))
+        # ...e um candle fechado entra mesmo acima do limite
+        subscription._deliver(kline(180, True))
+
+        self.assertEqual(self.drain(subscription), [(0, True), (60, True), (120, True), (180, True)])
+        self.assertEqual(subscription.dropped_messages, 1)
+        self.assertEqual(subscription.total_messages, 5)
+
+
+class NullLive:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def update(self, *args):
+        pass
+
+
+class TestSharedMultiplexer(unittest.TestCase):
+
+    def test_realtime_engines_share_one_connection(self):
+        received = {}
+
+        async def no_context(engine):
+            pass
+
+        async def bootstrapped(engine):
+            return True
+
+        async def first_candle_then_stop(engine, msg):
+            received[engine.symbol] = msg
+            engine.running = False
+            await engine.ws_provider.close()
+
+        async def scenario():
+            async with StubExchange() as exchange:
+                mux = BinanceUSStreamMultiplexer(url=exchange.url, initial_reconnect_delay=0.01)
+                engines = [
+                    RealtimeStrategyEngine(symbol=symbol, interval="1m", strategies=["rsi_mean_reversion"],
+                                           data_provider=None, executor="inline", multiplexer=mux)
+                    for symbol in ("BTCUSDT", "ETHUSDT")
+                ]
+                with patch.object(RealtimeStrategyEngine, "_analyze_context", no_context), \
+                        patch.object(RealtimeStrategyEngine, "bootstrap_historical_data", bootstrapped), \
+                        patch.object(RealtimeStrategyEngine, "process_candle", first_candle_then_stop), \
+                        patch.object(RealtimeStrategyEngine, "render_ui", lambda engine: None), \
+                        patch("market_manus.engines.realtime_strategy_engine.Live", NullLive):
+                    await asyncio.wait_for(asyncio.gather(*(engine.start() for engine in engines)), 5.0)
+                streams = mux.streams
+                await mux.close()
+                return exchange, engines, streams
+
+        exchange, engines, streams = asyncio.run(scenario())
+
+        self.assertEqual(exchange.connections, 1)
+        self.assertEqual({symbol: msg["symbol"] for symbol, msg in received.items()},
+                         {"BTCUSDT": "BTCUSDT", "ETHUSDT": "ETHUSDT"})
+        # Ao parar, cada engine cancela só o próprio canal
+        self.assertEqual(streams, [])
+        self.assertTrue(all(engine.ws_provider is None for engine in engines))
+
+    def test_one_instance_per_exchange(self):
+        binance = get_shared_multiplexer()
+        self.assertIsInstance(binance, BinanceUSStreamMultiplexer)
+        self.assertIs(get_shared_multiplexer(BinanceUSStreamMultiplexer), binance)
+        self.assertIsInstance(get_shared_multiplexer(BybitStreamMultiplexer), BybitStreamMultiplexer)
+
+
+class TestMultiplexerProtocol(unittest.TestCase):
+
+    def test_incomplete_subclass_fails_on_instantiation(self):
+        class PartialMultiplexer(KlineStreamMultiplexer):
+            def stream_name(self, symbol, interval):
+                return f"{symbol}.{interval}"
+
+        with self.assertRaises(TypeError):
+            PartialMultiplexer(url="ws://localhost")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Testes da matriz de combinações (CombinationMatrixBacktester)
+
+Cada célula combinação × modo calculada pela matriz de votos compartilhada
+deve dar exatamente o mesmo resultado que o caminho do menu
+(_calculate_confluence_signals + _simulate_trades_from_signals) com a
+combinação selecionada, sobre candles reais do parquet.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.confluence_mode.combination_matrix import (
+    CONFLUENCE_MODES,
+    CombinationMatrixBacktester,
+)
+from market_manus.confluence_mode.confluence_mode_module import ConfluenceModeModule
+from market_manus.confluence_mode.recommended_combinations import RecommendedCombinations
+from market_manus.data_providers.historical_cache import OHLCV_COLUMNS, HistoricalDataCache, klines_to_arrays
+from market_manus.data_providers.signal_cache import SignalCache
+from market_manus.performance.history_repository import PerformanceHistoryRepository
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "ADAUSDT_15_090725_until_091025.parquet"
+
+
+def fixture_klines(candles: int = 1500) -> list:
+    df = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE))
+    rows = df[list(OHLCV_COLUMNS)].iloc[:candles].values.tolist()
+    return [[str(int(row[0]))] + [str(value) for value in row[1:]] for row in rows]
+
+
+class FakeKlineProvider:
+    def __init__(self, klines: list):
+        self.klines = klines
+
+    def get_kline(self, category, symbol, interval, limit, start, end):
+        return [k for k in self.klines if start <= int(k[0]) <= end][:limit]
+
+
+class TestCombinationMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.klines = fixture_klines()
+        self.repo = PerformanceHistoryRepository(os.path.join(self.tmp.name, "perf.db"))
+        self.module = ConfluenceModeModule(
+            data_provider=FakeKlineProvider(self.klines), capital_manager=None, performance_repo=self.repo
+        )
+        self.module.cache = HistoricalDataCache(cache_dir=self.tmp.name)
+        self.module.signal_cache = SignalCache(cache_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.repo.close()
+        self.tmp.cleanup()
+
+    def menu_path(self, ohlcv: dict, strategies: list, mode: str):
+        """Caminho original: uma combinação por vez, sinais recalculados"""
+        closes, highs, lows, opens = ohlcv["close"], ohlcv["high"], ohlcv["low"], ohlcv["open"]
+        strategy_signals = {
+            key: {
+                "name": self.module.available_strategies[key]["name"],
+                "signal_indices": self.module._execute_strategy_on_data(key, closes, highs, lows, opens),
+                "weight": 1.0,
+            }
+            for key in strategies
+        }
+        filtered = self.module.volume_pipeline.apply_to_strategy_signals(strategy_signals, pd.Series(ohlcv["volume"]))
+        self.module.selected_confluence_mode = mode
+        signals = self.module._calculate_confluence_signals(filtered)
+        return signals, self.module._simulate_trades_from_signals(signals, closes, 10000, highs, lows)
+
+    def test_matrix_matches_per_combination_path(self):
+        ohlcv = klines_to_arrays(self.klines)
+        backtester = CombinationMatrixBacktester(self.module)
+        runs, matrix = backtester.evaluate_dataset(ohlcv, "15", 10000)
+
+        self.assertEqual(len(runs), len(backtester.combinations) * len(CONFLUENCE_MODES))
+        self.assertEqual(backtester.stats["strategy_runs"], len(set(matrix.keys)))
+
+        total_signals = 0
+        for run in runs:
+            with self.subTest(combination=run.combination_id, mode=run.confluence_mode):
+                signals, (final_capital, total_trades, winning_trades) = self.menu_path(ohlcv, run.strategies, run.confluence_mode)
+                self.assertEqual(run.confluence_signals, len(signals))
+                self.assertEqual(run.buy_signals, sum(1 for _, d in signals if d == "BUY"))
+                self.assertEqual(run.total_trades, total_trades)
+                self.assertEqual(run.winning_trades, winning_trades)
+                self.assertAlmostEqual(run.final_capital, final_capital, places=9)
+                total_signals += len(signals)
+        self.assertGreater(total_signals, 0)
+
+    def test_run_saves_all_cells_in_one_batch(self):
+        backtester = CombinationMatrixBacktester(self.module, combinations=self.all_combinations()[:3], modes=("ANY", "WEIGHTED"))
+        runs = backtester.run("ADAUSDT", ["15"], "2025-07-10", "2025-07-20")
+
+        self.assertEqual(len(runs), 6)
+        self.assertEqual([r.roi for r in runs], sorted((r.roi for r in runs), reverse=True))
+
+        saved = self.module.performance_repo.get_all_backtests()
+        self.assertEqual(len(saved), 6)
+        self.assertEqual({(b["combination_id"], b["confluence_mode"]) for b in saved},
+                         {(str(r.combination_id), r.confluence_mode) for r in runs})
+        self.assertEqual(len({b["timestamp"] for b in saved}), 1)
+
+        with sqlite3.connect(self.module.performance_repo.db_path) as conn:
+            contributions = conn.execute("SELECT COUNT(*) FROM strategy_stats").fetchone()[0]
+        self.assertEqual(contributions, sum(len(r.strategies) for r in runs))
+
+    @staticmethod
+    def all_combinations() -> list:
+        return [c for category in RecommendedCombinations.get_all_combinations().values() for c in category]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Testes de paridade do backtest de confluência pré-calculado
+
+iter_confluence_decisions (detectores e regime calculados uma vez) deve reproduzir
+confluence_decision(data.iloc[:i+1]) candle a candle, e backtest_confluence deve
+gerar os mesmos trades nos dois modos sobre dados reais (Parquet em data/).
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.backtest.confluence_backtest import backtest_confluence
+from market_manus.strategies.smc import patterns
+from market_manus.strategies.classic_analysis import CLASSIC_STRATEGIES, iter_classic_signals
+from market_manus.strategies.smc.patterns import (
+    detect_bos,
+    detect_choch,
+    detect_fvg,
+    detect_liquidity_sweep,
+    detect_order_blocks,
+    iter_bos_signals,
+    iter_choch_signals,
+    iter_fvg_signals,
+    iter_liquidity_sweep_signals,
+    iter_order_block_signals,
+)
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURES = [
+    "BTCUSDT_5_090925_until_091025.parquet",
+    "ADAUSDT_15_090725_until_091025.parquet",
+]
+CONFIG = {
+    "regime": {"adx_min": 15, "buy_threshold": 0.6, "sell_threshold": -0.6},
+    "weights": {"SMC:BOS": 1.5, "CLASSIC:RSI": 0.8},
+}
+
+
+def load_fixture(name: str, candles: int) -> pd.DataFrame:
+    df = pd.read_parquet(os.path.join(DATA_DIR, name))
+    return df[["timestamp", "open", "high", "low", "close", "volume"]].iloc[:candles].reset_index(drop=True)
+
+
+class SignalAssertions(unittest.TestCase):
+
+    def assertSignalEqual(self, expected, actual, msg: str, places: int = 12):
+        self.assertEqual(expected.action, actual.action, msg)
+        self.assertAlmostEqual(expected.confidence, actual.confidence, places=places, msg=msg)
+        self.assertEqual(expected.tags, actual.tags, msg)
+        self.assertEqual(expected.meta, actual.meta, msg)
+
+
+class TestPrefixSignals(SignalAssertions):
+    """iter_*_signals vs. detector aplicado ao prefixo"""
+
+    SMC_CASES = [
+        ("bos", detect_bos, iter_bos_signals),
+        ("choch", detect_choch, iter_choch_signals),
+        ("order_blocks", detect_order_blocks, iter_order_block_signals),
+        ("fvg", detect_fvg, iter_fvg_signals),
+        ("liquidity_sweep", detect_liquidity_sweep, iter_liquidity_sweep_signals),
+    ]
+
+    def test_smc_detectors(self):
+        for fixture in FIXTURES:
+            candles = load_fixture(fixture, 400)
+            for name, detector, iter_fn in self.SMC_CASES:
+                signals = list(iter_fn(candles))
+                self.assertEqual(len(signals), len(candles))
+                for i in list(range(6)) + list(range(40, len(candles), 9)):
+                    with self.subTest(fixture=fixture, detector=name, candle=i):
+                        self.assertSignalEqual(detector(candles.iloc[:i + 1]), signals[i], f"{name}:{i}")
+
+    def test_liquidity_sweep_merged_zones_fallback(self):
+        """Preços distintos a menos de tol entre si usam o detector de referência"""
+        candles = load_fixture(FIXTURES[0], 160)
+        candles.loc[90, "high"] = candles.loc[70, "high"] + 5e-6
+        signals = list(iter_liquidity_sweep_signals(candles, start=60))
+        for i in range(60, len(candles), 5):
+            with self.subTest(candle=i):
+                self.assertSignalEqual(detect_liquidity_sweep(candles.iloc[:i + 1]), signals[i - 60], str(i))
+
+    def test_classic_strategies_are_exact(self):
+        candles = load_fixture(FIXTURES[1], 400)
+        for name, strategy_fn in CLASSIC_STRATEGIES.items():
+            signals = list(iter_classic_signals(name, candles, start=30))
+            for i in range(30, len(candles), 7):
+                with self.subTest(strategy=name, candle=i):
+                    expected = strategy_fn(candles.iloc[:i + 1])
+                    self.assertSignalEqual(expected, signals[i - 30], f"{name}:{i}", places=15)
+                    self.assertEqual(expected.reasons, signals[i - 30].reasons)
+
+
+class TestBacktestConfluenceReplay(unittest.TestCase):
+    """backtest_confluence: modo pré-calculado vs. janela crescente"""
+
+    def test_same_trades_and_log(self):
+        for fixture in FIXTURES:
+            candles = load_fixture(fixture, 180)
+            with self.subTest(fixture=fixture):
+                expected = backtest_confluence(candles, config=CONFIG, precompute=False)
+                actual = backtest_confluence(candles, config=CONFIG)
+
+                self.assertEqual(len(expected["candle_log"]), len(actual["candle_log"]))
+                for exp, act in zip(expected["candle_log"], actual["candle_log"]):
+                    self.assertEqual(exp["action"], act["action"], exp["index"])
+                    self.assertEqual(exp["components"], act["components"], exp["index"])
+                    self.assertEqual(exp.get("trade_action"), act.get("trade_action"), exp["index"])
+                    self.assertAlmostEqual(exp["score"], act["score"], places=12)
+
+                self.assertEqual(
+                    [(t["entry_index"], t["exit_index"], t["type"], t["exit_reason"]) for t in expected["trades"]],
+                    [(t["entry_index"], t["exit_index"], t["type"], t["exit_reason"]) for t in actual["trades"]],
+                )
+                self.assertAlmostEqual(expected["stats"]["final_capital"], actual["stats"]["final_capital"], places=9)
+
+    def test_failing_detector_history_falls_back_per_detector(self):
+        candles = load_fixture(FIXTURES[0], 180)
+        original = patterns.iter_fvg_signals
+
+        def failing_history(candles, start=0):
+            for i, signal in enumerate(original(candles, start=start), start=start):
+                if i == 100:
+                    raise ValueError("falha no candle 100")
+                yield signal
+
+        expected = backtest_confluence(candles, config=CONFIG, precompute=False)
+        with mock.patch.object(patterns, "iter_fvg_signals", failing_history):
+            actual = backtest_confluence(candles, config=CONFIG)
+
+        self.assertFalse([log["index"] for log in actual["candle_log"] if "ERROR" in log["tags"]])
+        self.assertEqual([log["action"] for log in expected["candle_log"]], [log["action"] for log in actual["candle_log"]])
+        self.assertEqual([log["score"] for log in expected["candle_log"]], [log["score"] for log in actual["candle_log"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
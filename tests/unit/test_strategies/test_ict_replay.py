@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Testes do replay ICT (ICTFramework.analyze_series)
+
+Cada candle do replay deve receber o mesmo Signal que analyze() com os
+últimos `window` candles, o horário do candle e apenas os candles HTF já
+fechados, com o MarketStructureState reposicionado a cada avanço da janela.
+"""
+
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.strategies.smc.ict_framework import ICTFramework
+from market_manus.strategies.smc.market_structure import (
+    MarketStructureState,
+    OrderBlockSeries,
+    detect_order_blocks_advanced,
+)
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "BTCUSDT_5_090925_until_091025.parquet"
+WINDOW = 100
+
+
+def load_candles(candles: int = 700) -> pd.DataFrame:
+    df = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE)).iloc[:candles]
+    return df[["timestamp", "open", "high", "low", "close", "volume"]].reset_index(drop=True)
+
+
+def hourly(df: pd.DataFrame) -> pd.DataFrame:
+    hour = df["timestamp"] // 3_600_000 * 3_600_000
+    return df.groupby(hour).agg(
+        timestamp=("timestamp", "first"), open=("open", "first"), high=("high", "max"),
+        low=("low", "min"), close=("close", "last"), volume=("volume", "sum")
+    ).reset_index(drop=True)
+
+
+def signal_key(signal) -> tuple:
+    return signal.action, signal.tags, signal.reasons
+
+
+class TestICTReplay(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = load_candles()
+
+    def reference(self, df: pd.DataFrame, df_htf: pd.DataFrame = None) -> list:
+        """analyze() candle a candle sobre janelas móveis"""
+        framework = ICTFramework()
+        signals = []
+        previous_start = 0
+        for t in range(len(df)):
+            start = max(0, t + 1 - WINDOW)
+            framework.structure_state.shift(start - previous_start)
+            previous_start = start
+
+            bar_time = df["timestamp"].iat[t]
+            htf = None
+            if df_htf is not None:
+                closed = df_htf["timestamp"] + 3_600_000 <= bar_time + 300_000
+                htf = df_htf[closed]
+            timestamp = datetime.fromtimestamp(bar_time / 1000, tz=timezone.utc)
+            signals.append(framework.analyze(df.iloc[start:t + 1], df_htf=htf, timestamp=timestamp))
+        return signals
+
+    def assert_same_signals(self, replay: list, reference: list):
+        self.assertEqual(len(replay), len(reference))
+        for t, (fast, slow) in enumerate(zip(replay, reference)):
+            with self.subTest(bar=t):
+                self.assertEqual(signal_key(fast), signal_key(slow))
+                self.assertAlmostEqual(fast.confidence, slow.confidence, places=9)
+
+    def test_replay_matches_per_bar_analyze(self):
+        framework = ICTFramework()
+        replay = framework.analyze_series(self.df, window=WINDOW)
+        self.assert_same_signals(replay, self.reference(self.df))
+
+        tags = {signal.tags[0] for signal in replay}
+        self.assertIn("ICT:INSUFFICIENT_DATA", tags)
+        self.assertIn("ICT:SETUP", tags)
+        self.assertTrue(all(s.tags == ["ICT:INSUFFICIENT_DATA"] for s in replay[:49]))
+        self.assertIsNotNone(framework.structure_state.last_bos)
+
+    def test_replay_uses_only_closed_htf_candles(self):
+        df_htf = hourly(self.df)
+        replay = ICTFramework().analyze_series(self.df, df_htf=df_htf, window=WINDOW)
+        self.assert_same_signals(replay, self.reference(self.df, df_htf))
+
+        with self.assertRaises(ValueError):
+            ICTFramework().analyze_series(self.df.drop(columns=["timestamp"]), df_htf=df_htf)
+
+    def test_window_minimum(self):
+        with self.assertRaises(ValueError):
+            ICTFramework().analyze_series(self.df, window=49)
+
+    def test_order_block_series_matches_window_detector(self):
+        for min_range, window in ((0, WINDOW), (0, 10), (50.0, WINDOW)):
+            series = OrderBlockSeries(self.df, min_range=min_range)
+            for t in range(len(self.df)):
+                start = max(0, t + 1 - window)
+                with self.subTest(min_range=min_range, window=window, bar=t):
+                    fast, _ = series.detect(start, t, MarketStructureState())
+                    slow, _ = detect_order_blocks_advanced(self.df.iloc[start:t + 1], MarketStructureState(),
+                                                           min_range=min_range)
+                    self.assertEqual(signal_key(fast), signal_key(slow))
+                    self.assertAlmostEqual(fast.confidence, slow.confidence, places=12)
+                    self.assertEqual(fast.meta.get("index"), slow.meta.get("index"))
+
+    def test_state_shift(self):
+        bos = {"type": "BULLISH", "index": 80}
+        state = MarketStructureState(last_bos=bos, order_blocks=[{"index": 3, "status": "FRESH"}])
+        state.last_choch = {"type": "BEARISH", "index": 90, "invalidated_bos": bos}
+
+        state.shift(5)
+        self.assertEqual(state.last_bos["index"], 75)
+        self.assertEqual(state.last_choch["index"], 85)
+        self.assertEqual(state.order_blocks[0]["index"], 0)
+        # dicts já publicados em sinais anteriores não mudam
+        self.assertEqual(bos["index"], 80)
+        self.assertIs(state.last_choch["invalidated_bos"], bos)
+
+
+if __name__ == "__main__":
+    unittest.main()
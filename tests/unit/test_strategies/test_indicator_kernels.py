@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Testes dos kernels O(n) de indicadores (indicator_kernels)
+
+Cada kernel é comparado com a implementação ingênua por janela (np.mean/np.std/
+max/min por candle) ou com o equivalente pandas sobre dados reais (Parquet em data/).
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.strategies import indicator_kernels as kernels
+from market_manus.strategies.classic_analysis import calculate_stochastic
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "BTCUSDT_5_090925_until_091025.parquet"
+CANDLES = 2000
+
+
+def load_fixture(candles: int = CANDLES) -> pd.DataFrame:
+    df = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE))
+    return df[["open", "high", "low", "close", "volume"]].iloc[:candles].astype(float).reset_index(drop=True)
+
+
+def naive_windows(values: np.ndarray, window: int, fn) -> np.ndarray:
+    result = np.full(values.size, np.nan)
+    for i in range(window - 1, values.size):
+        result[i] = fn(values[i - window + 1:i + 1])
+    return result
+
+
+class TestRollingKernels(unittest.TestCase):
+    """Somas e extremos móveis vs. cálculo por janela"""
+
+    def setUp(self):
+        self.candles = load_fixture()
+        self.closes = self.candles["close"].to_numpy()
+
+    def test_rolling_mean_and_std(self):
+        for window in (2, 14, 20, 200):
+            with self.subTest(window=window):
+                np.testing.assert_allclose(
+                    kernels.rolling_mean(self.closes, window),
+                    naive_windows(self.closes, window, np.mean), rtol=1e-13)
+                np.testing.assert_allclose(
+                    kernels.rolling_std(self.closes, window, ddof=0),
+                    naive_windows(self.closes, window, np.std), rtol=1e-9, atol=1e-6)
+                np.testing.assert_allclose(
+                    kernels.rolling_std(self.closes, window, ddof=1),
+                    naive_windows(self.closes, window, lambda w: np.std(w, ddof=1)), rtol=1e-9, atol=1e-6)
+
+    def test_constant_window_has_zero_std(self):
+        values = np.concatenate([self.closes[:30], np.full(25, self.closes[30]), self.closes[30:60]])
+        std = kernels.rolling_std(values, 20)
+        np.testing.assert_array_equal(std[49:55], 0.0)
+
+    def test_rolling_max_min_exact(self):
+        for window in (1, 3, 14, 50):
+            with self.subTest(window=window):
+                np.testing.assert_array_equal(
+                    kernels.rolling_max(self.candles["high"], window),
+                    naive_windows(self.candles["high"].to_numpy(), window, np.max))
+                np.testing.assert_array_equal(
+                    kernels.rolling_min(self.candles["low"], window),
+                    naive_windows(self.candles["low"].to_numpy(), window, np.min))
+
+    def test_nan_propagates_like_pandas(self):
+        series = self.candles["close"].copy()
+        series.iloc[[100, 101, 700]] = np.nan
+        for window in (5, 20):
+            with self.subTest(window=window):
+                rolling = series.rolling(window)
+                np.testing.assert_allclose(kernels.rolling_mean(series, window), rolling.mean().to_numpy(), rtol=1e-12)
+                np.testing.assert_array_equal(kernels.rolling_max(series, window), rolling.max().to_numpy())
+                np.testing.assert_array_equal(kernels.rolling_min(series, window), rolling.min().to_numpy())
+
+    def test_short_and_empty_series(self):
+        self.assertEqual(kernels.rolling_mean([], 14).size, 0)
+        self.assertTrue(np.isnan(kernels.rolling_max([1.0, 2.0], 14)).all())
+        self.assertTrue(np.isnan(kernels.rolling_std([1.0, 2.0, 3.0], 14)).all())
+        with self.assertRaises(ValueError):
+            kernels.rolling_mean([1.0], 0)
+
+
+class TestIndicatorKernels(unittest.TestCase):
+    """Indicadores construídos sobre os kernels"""
+
+    def setUp(self):
+        self.candles = load_fixture()
+        self.closes = self.candles["close"].to_numpy()
+
+    def test_rsi_sma_matches_pandas(self):
+        delta = self.candles["close"].diff()
+        gain = delta.where(delta > 0, 0).rolling(14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+        expected = (100 - (100 / (1 + gain / loss))).to_numpy()
+        np.testing.assert_allclose(kernels.rsi(self.closes, 14, smoothing="sma"), expected, rtol=1e-10)
+
+    def test_rsi_flat_value(self):
+        flat = np.full(30, 100.0)
+        self.assertTrue(np.isnan(kernels.rsi(flat, 14, smoothing="sma")[13:]).all())
+        np.testing.assert_array_equal(kernels.rsi(flat, 14, smoothing="sma", flat_value=100.0)[13:], 100.0)
+
+    def test_wilder_smooth_recursion(self):
+        values = np.abs(np.diff(self.closes))
+        period = 14
+        expected = np.full(values.size, np.nan)
+        current = np.mean(values[:period])
+        expected[period - 1] = current
+        for i in range(period, values.size):
+            current = current + (values[i] - current) / period
+            expected[i] = current
+        np.testing.assert_allclose(kernels.wilder_smooth(values, period), expected, rtol=1e-12)
+
+    def test_ema_sma_seed(self):
+        period = 12
+        expected = np.full(self.closes.size, np.nan)
+        current = np.mean(self.closes[:period])
+        expected[period - 1] = current
+        for i in range(period, self.closes.size):
+            current = (self.closes[i] - current) * (2 / (period + 1)) + current
+            expected[i] = current
+        np.testing.assert_array_equal(kernels.ema(self.closes, period), expected)
+
+    def test_stochastic_and_williams(self):
+        highs, lows = self.candles["high"].to_numpy(), self.candles["low"].to_numpy()
+        hh = naive_windows(highs, 14, np.max)
+        ll = naive_windows(lows, 14, np.min)
+        with np.errstate(invalid="ignore"):
+            expected_k = np.where(hh == ll, 50.0, (self.closes - ll) / (hh - ll) * 100)
+            expected_wr = np.where(hh == ll, -50.0, (hh - self.closes) / (hh - ll) * -100)
+        np.testing.assert_array_equal(kernels.stochastic_k(highs, lows, self.closes, 14, flat_value=50.0), expected_k)
+        np.testing.assert_array_equal(kernels.williams_r(highs, lows, self.closes, 14, flat_value=-50.0), expected_wr)
+
+    def test_classic_stochastic_keeps_series_contract(self):
+        k, d = calculate_stochastic(self.candles, 14)
+        self.assertIsInstance(k, pd.Series)
+        self.assertTrue(k.index.equals(self.candles.index))
+        self.assertTrue(np.isnan(d.iloc[:17]).all())
+        self.assertFalse(np.isnan(d.iloc[17:]).any())
+
+    def test_adx_and_atr_shapes(self):
+        adx, plus_di, minus_di = kernels.adx(
+            self.candles["high"], self.candles["low"], self.candles["close"], 14, smoothing="wilder")
+        self.assertEqual(adx.shape, self.closes.shape)
+        self.assertTrue(np.isnan(adx[:27]).all())
+        self.assertFalse(np.isnan(adx[27:]).any())
+        atr = kernels.atr(self.candles["high"], self.candles["low"], self.candles["close"], 14, smoothing="sma")
+        self.assertFalse(np.isnan(atr[13:]).any())
+        with self.assertRaises(ValueError):
+            kernels.atr(self.candles["high"], self.candles["low"], self.candles["close"], 14, smoothing="ema")
+
+
+if __name__ == "__main__":
+    unittest.main()
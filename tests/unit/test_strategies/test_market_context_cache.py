@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Testes do MarketContextAnalyzer com janela em memória
+
+Dentro do TTL o contexto sai da memória sem chamadas à API; depois dele só os
+candles fechados desde a última atualização são buscados (uma chamada), e uma
+janela já coberta pelo HistoricalDataCache não chama a API. Os indicadores
+calculados sobre a cauda devem coincidir com o cálculo sobre a janela inteira.
+Uma lacuna que falhou é buscada de novo na atualização seguinte, e a
+atualização de um símbolo não espera pela de outro.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.analysis.market_context_analyzer import MarketContextAnalyzer
+from market_manus.data_providers.historical_cache import OHLCV_COLUMNS, HistoricalDataCache
+from market_manus.data_providers.kline_paginator import KlinePaginator
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "ADAUSDT_15_090725_until_091025.parquet"
+CANDLE_MS = 15 * 60 * 1000
+LOOKBACK_DAYS = 10
+
+
+class FakeKlineProvider:
+    def __init__(self, klines: list):
+        self.klines = klines
+        self.calls = 0
+
+    def get_kline(self, category, symbol, interval, limit, start, end):
+        self.calls += 1
+        return [k for k in self.klines if start <= int(k[0]) <= end][:limit]
+
+
+class FlakyKlineProvider(FakeKlineProvider):
+    """Falha em toda fatia que começa a partir de fail_from (None = saudável)"""
+
+    def __init__(self, klines: list, fail_from: int):
+        super().__init__(klines)
+        self.fail_from = fail_from
+
+    def get_kline(self, category, symbol, interval, limit, start, end):
+        if self.fail_from is not None and start >= self.fail_from:
+            raise ConnectionError("falha simulada")
+        return super().get_kline(category, symbol, interval, limit, start, end)
+
+
+class BlockingKlineProvider(FakeKlineProvider):
+    """Segura a busca até release ser sinalizado"""
+
+    def __init__(self, klines: list):
+        super().__init__(klines)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def get_kline(self, category, symbol, interval, limit, start, end):
+        self.entered.set()
+        self.release.wait(5)
+        return super().get_kline(category, symbol, interval, limit, start, end)
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def reference_context(analyzer: MarketContextAnalyzer, df: pd.DataFrame, now: float) -> tuple:
+    """Cálculo original sobre a janela inteira de candles fechados"""
+    closed_until = int(now * 1000) // CANDLE_MS * CANDLE_MS
+    start_ts = closed_until - LOOKBACK_DAYS * 24 * 60 * 60 * 1000
+    window = df[(df["timestamp"] >= start_ts) & (df["timestamp"] < closed_until)]
+    window = window.set_index(pd.to_datetime(window["timestamp"], unit="ms"))
+    ma_slope = analyzer._calculate_ma_slope(window)
+    adx = analyzer._calculate_adx(window)
+    atr = analyzer._calculate_normalized_atr(window)
+    change = (window["close"].iloc[-1] / window["close"].iloc[0] - 1) * 100
+    return len(window), ma_slope, adx, atr, change
+
+
+class TestMarketContextCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE))[list(OHLCV_COLUMNS)].iloc[:3000]
+        rows = cls.df.values.tolist()
+        cls.klines = [[str(int(row[0]))] + [str(value) for value in row[1:]] for row in rows]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.provider = FakeKlineProvider(self.klines)
+        # 20 candles antes do fim da fixture, no meio de um candle
+        self.clock = FakeClock(int(self.df["timestamp"].iat[-20]) / 1000 + 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def analyzer(self, cache_name: str = "klines") -> MarketContextAnalyzer:
+        return MarketContextAnalyzer(
+            lookback_days=LOOKBACK_DAYS,
+            cache=HistoricalDataCache(cache_dir=os.path.join(self.tmp.name, cache_name)),
+            ttl_seconds=300,
+            clock=self.clock
+        )
+
+    def analyze(self, analyzer: MarketContextAnalyzer, **kwargs):
+        self.provider.calls = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            return analyzer.analyze(self.provider, "ADAUSDT", "15m", **kwargs)
+
+    def assert_matches_reference(self, analyzer: MarketContextAnalyzer, context):
+        candles, ma_slope, adx, atr, change = reference_context(analyzer, self.df, self.clock.now)
+        self.assertEqual(len(analyzer._windows[("ADAUSDT", "15")].arrays["timestamp"]), candles)
+        self.assertAlmostEqual(context.trend_strength, adx, places=9)
+        self.assertAlmostEqual(context.volatility, atr, places=9)
+        self.assertAlmostEqual(context.price_change_pct, change, places=9)
+        regime, confidence = analyzer._determine_regime(ma_slope, adx, change)
+        self.assertEqual(context.regime, regime)
+        self.assertAlmostEqual(context.confidence, confidence, places=9)
+
+        arrays = analyzer._windows[("ADAUSDT", "15")].arrays
+        tail = analyzer._tail_frame(arrays, analyzer.MA_PERIOD + analyzer.MA_SLOPE_POINTS - 1)
+        tail_slope = analyzer._calculate_ma_slope(tail, avg_price=arrays["close"].mean())
+        self.assertAlmostEqual(tail_slope, ma_slope, places=12)
+
+    def test_ttl_and_incremental_refresh(self):
+        analyzer = self.analyzer()
+        cold = self.analyze(analyzer)
+        self.assertGreater(self.provider.calls, 0)
+        self.assertGreater(cold.trend_strength, 0)
+        self.assert_matches_reference(analyzer, cold)
+
+        self.clock.now += 60
+        self.assertIs(self.analyze(analyzer), cold)
+        self.assertEqual(self.provider.calls, 0)
+        self.assertEqual(analyzer.stats["memory_hits"], 1)
+
+        for _ in range(3):
+            self.clock.now += 3600
+            context = self.analyze(analyzer)
+            self.assertEqual(self.provider.calls, 1)
+            self.assert_matches_reference(analyzer, context)
+        self.assertEqual(analyzer.stats["candles_fetched"], len(analyzer._windows[("ADAUSDT", "15")].arrays["timestamp"]) + 12)
+
+        # Sem candle novo fechado: força atualização sem chamar a API
+        self.analyze(analyzer, force_refresh=True)
+        self.assertEqual(self.provider.calls, 0)
+
+    def test_window_served_from_historical_cache(self):
+        self.analyze(self.analyzer())
+        fresh = self.analyzer()
+        context = self.analyze(fresh)
+        self.assertEqual(self.provider.calls, 0)
+        self.assertEqual(fresh.stats["candles_fetched"], 0)
+        self.assert_matches_reference(fresh, context)
+
+        fresh.invalidate("ADAUSDT")
+        self.assertEqual(fresh._windows, {})
+
+    def test_insufficient_data(self):
+        self.clock.now = int(self.df["timestamp"].iat[0]) / 1000 + 30 * 60
+        analyzer = self.analyzer()
+        self.assertIsNone(self.analyze(analyzer))
+        np.testing.assert_array_equal(
+            analyzer._windows[("ADAUSDT", "15")].arrays["timestamp"], self.df["timestamp"].to_numpy()[:2]
+        )
+
+    def test_failed_gap_refetched_on_next_refresh(self):
+        analyzer = self.analyzer()
+        closed_until = int(self.clock.now * 1000) // CANDLE_MS * CANDLE_MS
+        start_ts = closed_until - LOOKBACK_DAYS * 24 * 60 * 60 * 1000
+        # Só a primeira fatia de 500 candles responde
+        provider = FlakyKlineProvider(self.klines, fail_from=start_ts + 500 * CANDLE_MS)
+        paginator = KlinePaginator(max_retries=0, backoff=0)
+        with mock.patch("market_manus.analysis.market_context_analyzer.get_paginator", return_value=paginator), \
+                contextlib.redirect_stdout(io.StringIO()):
+            analyzer.analyze(provider, "ADAUSDT", "15m")
+            window = analyzer._windows[("ADAUSDT", "15")]
+            self.assertEqual(window.covered_until, start_ts + 500 * CANDLE_MS)
+            self.assertEqual(len(window.arrays["timestamp"]), 500)
+
+            provider.fail_from = None
+            self.clock.now += 3600
+            context = analyzer.analyze(provider, "ADAUSDT", "15m")
+
+        self.assert_matches_reference(analyzer, context)
+        window = analyzer._windows[("ADAUSDT", "15")]
+        self.assertEqual(window.covered_until, int(self.clock.now * 1000) // CANDLE_MS * CANDLE_MS)
+
+    def test_refresh_of_one_symbol_does_not_block_another(self):
+        analyzer = self.analyzer()
+        slow = BlockingKlineProvider(self.klines)
+        finished = []
+
+        def slow_refresh():
+            with contextlib.redirect_stdout(io.StringIO()):
+                analyzer.analyze(slow, "SLOWUSDT", "15m")
+            finished.append("SLOWUSDT")
+
+        thread = threading.Thread(target=slow_refresh)
+        thread.start()
+        self.assertTrue(slow.entered.wait(5))
+        context = self.analyze(analyzer)
+        finished.append("ADAUSDT")
+        slow.release.set()
+        thread.join(10)
+
+        self.assertIsNotNone(context)
+        self.assertEqual(finished, ["ADAUSDT", "SLOWUSDT"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Testes de paridade: caminhos vetorizados (*_series) vs. detectores por janela
+
+Cada estratégia de janela deslizante expõe um caminho "série inteira" que deve
+produzir exatamente os mesmos (índice, direção) que o loop de referência
+run_windowed() sobre dados reais (Parquet em data/). No ConfluenceModeModule,
+_execute_strategy_series deve coincidir com _execute_strategy_reference para
+todas as estratégias disponíveis (kernels clássicos e detectores de janela).
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.confluence_mode.confluence_mode_module import ConfluenceModeModule
+from market_manus.performance.history_repository import PerformanceHistoryRepository
+from market_manus.strategies.cpr import cpr_series, cpr_signal
+from market_manus.strategies.parabolic_sar import parabolic_sar_series, parabolic_sar_signal
+from market_manus.strategies.signal_series import SignalSeries, run_windowed
+from market_manus.strategies.smc.patterns import (
+    detect_bos,
+    detect_bos_series,
+    detect_choch,
+    detect_choch_series,
+    detect_fvg,
+    detect_fvg_series,
+    detect_liquidity_sweep,
+    detect_liquidity_sweep_series,
+    detect_order_blocks,
+    detect_order_blocks_series,
+)
+from market_manus.strategies.vwap import vwap_series, vwap_signal
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURES = [
+    "BTCUSDT_5_090925_until_091025.parquet",
+    "ADAUSDT_15_090725_until_091025.parquet",
+]
+CANDLES = 260
+
+
+def load_fixture(name: str, candles: int = CANDLES) -> pd.DataFrame:
+    df = pd.read_parquet(os.path.join(DATA_DIR, name))
+    return df[["open", "high", "low", "close", "volume"]].iloc[:candles].reset_index(drop=True)
+
+
+class TestSignalSeriesParity(unittest.TestCase):
+    """Paridade bit a bit entre *_series e run_windowed"""
+
+    CASES = [
+        ("smc_bos", detect_bos, detect_bos_series),
+        ("smc_choch", detect_choch, detect_choch_series),
+        ("smc_order_blocks", detect_order_blocks, detect_order_blocks_series),
+        ("smc_fvg", detect_fvg, detect_fvg_series),
+        ("smc_liquidity_sweep", detect_liquidity_sweep, detect_liquidity_sweep_series),
+        ("parabolic_sar", parabolic_sar_signal, parabolic_sar_series),
+        ("vwap", vwap_signal, vwap_series),
+        ("cpr", cpr_signal, cpr_series),
+    ]
+
+    def assertSeriesEqual(self, expected: SignalSeries, actual: SignalSeries, msg: str):
+        np.testing.assert_array_equal(expected.index, actual.index, err_msg=msg)
+        np.testing.assert_array_equal(expected.direction, actual.direction, err_msg=msg)
+
+    def test_parity_on_parquet_fixtures(self):
+        for fixture in FIXTURES:
+            candles = load_fixture(fixture)
+            for name, detector, series_fn in self.CASES:
+                with self.subTest(fixture=fixture, strategy=name):
+                    expected = run_windowed(detector, candles)
+                    self.assertSeriesEqual(expected, series_fn(candles), f"{fixture}:{name}")
+
+    def test_liquidity_sweep_merged_zones_fallback(self):
+        """Preços distintos a menos de tol entre si usam o detector de referência"""
+        candles = load_fixture(FIXTURES[0], 120)
+        candles.loc[60, "high"] = candles.loc[58, "high"] + 5e-6
+        expected = run_windowed(detect_liquidity_sweep, candles)
+        self.assertSeriesEqual(expected, detect_liquidity_sweep_series(candles), "sweep-fallback")
+
+    def test_short_series_is_empty(self):
+        candles = load_fixture(FIXTURES[0], 40)
+        for name, _, series_fn in self.CASES:
+            with self.subTest(strategy=name):
+                self.assertEqual(len(series_fn(candles)), 0)
+
+
+class TestConfluenceModuleParity(unittest.TestCase):
+    """_execute_strategy_series vs. _execute_strategy_reference por chave de estratégia"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.module = ConfluenceModeModule(
+            data_provider=None, capital_manager=None,
+            performance_repo=PerformanceHistoryRepository(os.path.join(cls.tmp.name, "perf.db"))
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.module.performance_repo.close()
+        cls.tmp.cleanup()
+
+    @staticmethod
+    def trending_ohlc(candles: int = CANDLES) -> list:
+        """Alta seguida de queda: ADX acima de 25 (os fixtures não passam de ~24)"""
+        rng = np.random.default_rng(7)
+        steps = np.where(np.arange(candles) < candles // 2, 1.0, -1.0) + rng.normal(0, 0.5, candles)
+        closes = 100 + np.cumsum(steps)
+        opens = np.r_[closes[0], closes[:-1]]
+        highs = np.maximum(opens, closes) + rng.uniform(0, 0.5, candles)
+        lows = np.minimum(opens, closes) - rng.uniform(0, 0.5, candles)
+        return [closes.tolist(), highs.tolist(), lows.tolist(), opens.tolist()]
+
+    def test_all_available_strategies_match_reference(self):
+        datasets = {
+            fixture: [load_fixture(fixture)[column].tolist() for column in ("close", "high", "low", "open")]
+            for fixture in FIXTURES
+        }
+        datasets["trend"] = self.trending_ohlc()
+        with_signals = set()
+        for dataset, ohlc in datasets.items():
+            for key in self.module.available_strategies:
+                with self.subTest(dataset=dataset, strategy=key):
+                    # A referência emite na ordem do seu loop; o caminho vetorizado, por índice
+                    expected = sorted(self.module._execute_strategy_reference(key, *ohlc))
+                    actual = self.module._execute_strategy_series(key, *ohlc).to_tuples()
+                    self.assertEqual(actual, expected, f"{dataset}:{key}")
+                    if expected:
+                        with_signals.add(key)
+        # Paridade só vale se cada estratégia produziu sinais em algum dataset
+        self.assertEqual(with_signals, set(self.module.available_strategies))
+
+
+class TestSignalSeriesContainer(unittest.TestCase):
+    """Conversões do contrato SignalSeries"""
+
+    def test_roundtrip_tuples(self):
+        signals = [(12, "SELL"), (3, "BUY"), (40, "BUY")]
+        series = SignalSeries.from_tuples(signals)
+        self.assertEqual(series.to_tuples(), sorted(signals))
+        np.testing.assert_array_equal(series.to_dense(41)[[3, 12, 40]], [1, -1, 1])
+
+    def test_from_directions_offset(self):
+        series = SignalSeries.from_directions(np.array([0, 1, 0, -1]), offset=10)
+        self.assertEqual(series.to_tuples(), [(11, "BUY"), (13, "SELL")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Testes do backtest de estratégia única (Strategy Lab V6)
+
+As direções vetorizadas (classic_directions) devem reproduzir a ação de
+iter_classic_signals candle a candle; o backtest do Lab deve usar os candles
+do cache, os parâmetros configurados e os custos do FeeModel, e um ano de
+candles de 5m deve rodar em menos de 2 segundos por estratégia.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.backtest.strategy_backtest import LAB_STRATEGIES, run_strategy_backtest, strategy_directions
+from market_manus.backtest.trade_simulator import simulate_trades
+from market_manus.core.capital_manager import FeeModel
+from market_manus.data_providers.historical_cache import OHLCV_COLUMNS, HistoricalDataCache, date_to_ms
+from market_manus.strategies import indicator_kernels
+from market_manus.strategies.classic_analysis import CLASSIC_STRATEGY_STEPS, classic_directions, iter_classic_signals
+from market_manus.strategy_lab.STRATEGY_LAB_PROFESSIONAL_V6 import StrategyLabProfessionalV6
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "ETHUSDT_15_090725_until_091025.parquet"
+CUSTOM_PARAMS = {
+    "period": 9, "oversold": 35, "overbought": 65, "fast_period": 5, "slow_period": 30,
+    "fast": 8, "slow": 30, "signal": 5, "adx_threshold": 20, "smooth_d": 5,
+    "lookback": 30, "tolerance": 0.01, "std_dev": 1.5,
+}
+
+
+def load_candles(candles: int = 2000) -> pd.DataFrame:
+    df = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE)).iloc[:candles]
+    return df[list(OHLCV_COLUMNS)].reset_index(drop=True)
+
+
+def synthetic_year(candles: int = 365 * 288) -> dict:
+    """Passeio aleatório com um ano de candles de 5m"""
+    rng = np.random.default_rng(11)
+    closes = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, candles)))
+    return {
+        "timestamp": np.arange(candles, dtype=np.int64) * 300_000,
+        "open": np.r_[closes[0], closes[:-1]],
+        "high": closes * (1 + np.abs(rng.normal(0, 0.001, candles))),
+        "low": closes * (1 - np.abs(rng.normal(0, 0.001, candles))),
+        "close": closes,
+        "volume": np.ones(candles),
+    }
+
+
+class TestClassicDirections(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = load_candles()
+
+    def test_matches_iter_classic_signals(self):
+        actions = {"BUY": 1, "SELL": -1}
+        for name in CLASSIC_STRATEGY_STEPS:
+            for params in ({}, CUSTOM_PARAMS):
+                with self.subTest(strategy=name, params=bool(params)):
+                    expected = [actions.get(s.action, 0) for s in iter_classic_signals(name, self.df, params)]
+                    directions = classic_directions(name, self.df, params)
+                    self.assertEqual(directions.dtype, np.int8)
+                    self.assertEqual(directions.tolist(), expected)
+                    self.assertTrue(np.any(directions))
+
+
+class TestStrategyBacktest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        df = load_candles()
+        cls.ohlcv = {column: df[column].to_numpy() for column in OHLCV_COLUMNS}
+
+    def test_lab_params_are_mapped(self):
+        lab = {"rsi_period": 9.0, "oversold": 35, "overbought": 65}
+        expected = classic_directions("RSI", pd.DataFrame(self.ohlcv), {"period": 9, "oversold": 35, "overbought": 65})
+        np.testing.assert_array_equal(strategy_directions("rsi_mean_reversion", self.ohlcv, lab), expected)
+
+        fib = strategy_directions("fibonacci", self.ohlcv, {"lookback_period": 30, "tolerance_pct": 1.0})
+        expected = classic_directions("FIB", pd.DataFrame(self.ohlcv), {"lookback": 30, "tolerance": 0.01})
+        np.testing.assert_array_equal(fib, expected)
+
+        williams = indicator_kernels.williams_r(self.ohlcv["high"], self.ohlcv["low"], self.ohlcv["close"], 10, flat_value=-50.0)
+        directions = strategy_directions("williams_r", self.ohlcv, {"period": 10, "oversold": -85, "overbought": -15})
+        np.testing.assert_array_equal(directions == 1, williams < -85)
+        np.testing.assert_array_equal(directions == -1, williams > -15)
+
+        with self.assertRaises(ValueError):
+            strategy_directions("unknown", self.ohlcv)
+
+    def test_trades_include_fee_costs(self):
+        fee_model = FeeModel()
+        result = run_strategy_backtest("ema_crossover", self.ohlcv, initial_capital=5000.0, fee_model=fee_model)
+        expected = simulate_trades(
+            result.signals.to_tuples(), self.ohlcv["close"], 5000.0, self.ohlcv["high"], self.ohlcv["low"],
+            fee_model=fee_model
+        )
+        self.assertEqual(result.trades.totals(), expected.totals())
+        self.assertGreater(result.trades.total_trades, 0)
+        np.testing.assert_allclose(result.trades.costs, result.trades.position_size * fee_model.calculate_total_trade_cost(1.0))
+
+        gross = run_strategy_backtest("ema_crossover", self.ohlcv, initial_capital=5000.0)
+        self.assertLess(result.final_capital, gross.final_capital)
+
+        summary = result.summary()
+        self.assertEqual(summary["candles"], len(self.ohlcv["close"]))
+        self.assertAlmostEqual(summary["roi"], (result.final_capital / 5000.0 - 1) * 100)
+        self.assertGreaterEqual(summary["max_drawdown"], 0.0)
+
+    def test_year_of_5m_candles(self):
+        ohlcv = synthetic_year()
+        for strategy_key in list(LAB_STRATEGIES) + ["williams_r"]:
+            with self.subTest(strategy=strategy_key):
+                result = run_strategy_backtest(strategy_key, ohlcv, fee_model=FeeModel())
+                self.assertEqual(result.candles, 365 * 288)
+                self.assertGreater(result.trades.total_trades, 0)
+                self.assertLess(result.elapsed_seconds, 2.0)
+
+
+class FakeKlineProvider:
+    def __init__(self, klines: list):
+        self.klines = klines
+
+    def get_kline(self, category, symbol, interval, limit, start, end):
+        return [k for k in self.klines if start <= int(k[0]) <= end][:limit]
+
+
+class TestStrategyLabBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rows = load_candles(3000).values.tolist()
+        klines = [[str(int(row[0]))] + [str(value) for value in row[1:]] for row in rows]
+        self.lab = StrategyLabProfessionalV6(data_provider=FakeKlineProvider(klines))
+        self.lab.cache = HistoricalDataCache(cache_dir=self.tmp.name)
+        self.lab.selected_asset = "ETHUSDT"
+        self.lab.selected_timeframe = "15"
+        self.lab.selected_strategy = "macd"
+        self.lab.strategy_params = {"macd": {"fast_period": 8.0, "slow_period": 21.0, "signal_period": 5.0}}
+        self.lab.custom_start_date = "2025-07-12"
+        self.lab.custom_end_date = "2025-07-30"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_backtest(self) -> dict:
+        with mock.patch("builtins.input", return_value=""), contextlib.redirect_stdout(io.StringIO()):
+            self.lab._run_historical_backtest()
+        return self.lab.test_history[-1]
+
+    def test_backtest_uses_cached_candles(self):
+        first = self.run_backtest()
+        second = self.run_backtest()
+        self.assertEqual(self.lab.cache_stats["hits"], 1)
+        self.assertEqual(first["results"]["final_capital"], second["results"]["final_capital"])
+
+        arrays = self.lab.cache.get_range_arrays(
+            "ETHUSDT", "15", date_to_ms("2025-07-12"), date_to_ms("2025-07-30")
+        )
+        params = {"fast_period": 8.0, "slow_period": 21.0, "signal_period": 5.0}
+        expected = run_strategy_backtest("macd", arrays, params, 10000, fee_model=FeeModel())
+        self.assertEqual(first["type"], "Backtest")
+        self.assertEqual(first["params"], params)
+        self.assertEqual(first["results"]["candles"], 18 * 96)
+        self.assertEqual(first["results"]["total_trades"], expected.trades.total_trades)
+        self.assertAlmostEqual(first["results"]["final_capital"], expected.final_capital, places=9)
+        self.assertGreater(first["results"]["candles_per_second"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Testes do estado incremental de indicadores (streaming_indicators)
+
+O valor streaming após cada candle deve coincidir com o cálculo em lote
+(classic_analysis / indicator_kernels) sobre a mesma série, inclusive quando o
+último candle ainda está em formação (closed=False).
+"""
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.engines.realtime_strategy_engine import RealtimeStrategyEngine
+from market_manus.strategies.smc.patterns import detect_bos, detect_choch, detect_fvg, detect_order_blocks
+from market_manus.strategies.smc.structure_tracker import SMCStructureTracker
+from market_manus.strategies import indicator_kernels as kernels
+from market_manus.strategies.classic_analysis import (
+    calculate_adx,
+    calculate_bollinger_bands,
+    calculate_ema,
+    calculate_macd,
+    calculate_rsi,
+)
+from market_manus.strategies.streaming_indicators import (
+    RollingExtremes,
+    RollingWindowStats,
+    StreamingIndicators,
+)
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "BTCUSDT_5_090925_until_091025.parquet"
+CANDLES = 600
+
+
+def load_fixture(candles: int = CANDLES) -> pd.DataFrame:
+    df = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE))
+    return df[["timestamp", "open", "high", "low", "close", "volume"]].iloc[:candles].reset_index(drop=True)
+
+
+def batch_values(df: pd.DataFrame) -> dict:
+    """Valores em lote no último candle de df"""
+    upper, middle, lower = calculate_bollinger_bands(df["close"], 20, 2)
+    macd_line, signal_line, _ = calculate_macd(df["close"], 12, 26, 9)
+    adx, plus_di, minus_di = calculate_adx(df, 14)
+    return {
+        "rsi": calculate_rsi(df["close"], 14).iloc[-1],
+        "ema_fast": calculate_ema(df["close"], 12).iloc[-1],
+        "ema_slow": calculate_ema(df["close"], 26).iloc[-1],
+        "macd": macd_line.iloc[-1],
+        "signal": signal_line.iloc[-1],
+        "upper": upper.iloc[-1],
+        "lower": lower.iloc[-1],
+        "stochastic_k": kernels.stochastic_k(df["high"], df["low"], df["close"], 14)[-1],
+        "williams_r": kernels.williams_r(df["high"], df["low"], df["close"], 14, flat_value=-50.0)[-1],
+        "adx": adx.iloc[-1],
+        "plus_di": plus_di.iloc[-1],
+        "minus_di": minus_di.iloc[-1],
+    }
+
+
+def streaming_values(indicators: StreamingIndicators) -> dict:
+    return {
+        "rsi": indicators.rsi.value,
+        "ema_fast": indicators.ema_fast.value,
+        "ema_slow": indicators.ema_slow.value,
+        "macd": indicators.macd.macd,
+        "signal": indicators.macd.signal,
+        "upper": indicators.bollinger.upper,
+        "lower": indicators.bollinger.lower,
+        "stochastic_k": indicators.range.stochastic_k,
+        "williams_r": indicators.range.williams_r,
+        "adx": indicators.adx.adx,
+        "plus_di": indicators.adx.plus_di,
+        "minus_di": indicators.adx.minus_di,
+    }
+
+
+class TestStreamingIndicatorsParity(unittest.TestCase):
+    """Streaming vs. lote sobre dados reais"""
+
+    def setUp(self):
+        self.candles = load_fixture()
+        self.records = self.candles.to_dict("records")
+
+    def assertValuesClose(self, expected: dict, actual: dict, msg: str):
+        for name, value in expected.items():
+            np.testing.assert_allclose(actual[name], value, rtol=1e-9, atol=1e-7, err_msg=f"{msg}:{name}")
+
+    def test_closed_candles_match_batch(self):
+        indicators = StreamingIndicators()
+        for i, candle in enumerate(self.records):
+            indicators.update(candle, closed=True)
+            if i in (5, 13, 14, 27, 40, 199, len(self.records) - 1):
+                with self.subTest(candle=i):
+                    self.assertValuesClose(batch_values(self.candles.iloc[:i + 1]), streaming_values(indicators), str(i))
+
+    def test_forming_candle_is_provisional(self):
+        indicators = StreamingIndicators()
+        indicators.seed(self.records[:300])
+        before = streaming_values(indicators)
+
+        forming = dict(self.records[300], close=self.records[300]["close"] * 1.01)
+        forming["high"] = max(forming["high"], forming["close"])
+        indicators.update(dict(forming, close=self.records[300]["open"]), closed=False)
+        indicators.update(forming, closed=False)
+
+        provisional = pd.concat([self.candles.iloc[:300], pd.DataFrame([forming])], ignore_index=True)
+        self.assertValuesClose(batch_values(provisional), streaming_values(indicators), "forming")
+
+        # O candle em formação não altera o estado permanente
+        indicators.update(self.records[299], closed=False)
+        indicators.update(self.records[300], closed=True)
+        self.assertValuesClose(batch_values(self.candles.iloc[:301]), streaming_values(indicators), "closed")
+        self.assertNotEqual(before["rsi"], indicators.rsi.value)
+
+
+class TestStreamingPrimitives(unittest.TestCase):
+    """Janelas móveis incrementais"""
+
+    def test_rolling_window_stats_with_forming(self):
+        values = np.random.default_rng(7).normal(100.0, 2.0, 500)
+        stats = RollingWindowStats(20, ddof=1)
+        for i, value in enumerate(values):
+            if i >= 19:
+                window = np.append(values[i - 19:i], value)
+                self.assertAlmostEqual(stats.mean(value), window.mean(), places=9)
+                self.assertAlmostEqual(stats.std(value), window.std(ddof=1), places=9)
+            stats.push(value)
+        self.assertTrue(np.isnan(RollingWindowStats(5).mean()))
+
+    def test_rolling_extremes_with_forming(self):
+        rng = np.random.default_rng(3)
+        highs = rng.normal(10.0, 1.0, 300)
+        lows = highs - rng.uniform(0.1, 1.0, 300)
+        extremes = RollingExtremes(14)
+        for i in range(300):
+            if i >= 13:
+                expected = (highs[i - 13:i + 1].max(), lows[i - 13:i + 1].min())
+                self.assertEqual(extremes.extremes((highs[i], lows[i])), expected)
+            extremes.push(highs[i], lows[i])
+            if i >= 13:
+                self.assertEqual(extremes.extremes(), expected)
+
+
+class TestRealtimeEngineStreaming(unittest.TestCase):
+    """process_candle avalia estratégias clássicas a cada mensagem"""
+
+    def make_engine(self) -> RealtimeStrategyEngine:
+        engine = RealtimeStrategyEngine(
+            symbol="BTCUSDT",
+            interval="5m",
+            strategies=["rsi_mean_reversion", "bollinger_breakout", "stochastic", "smc_bos"],
+            data_provider=None,
+        )
+        records = load_fixture(200).to_dict("records")
+        engine.candles.extend(records[:150])
+        engine.indicators.seed(records[:150])
+        engine.structure.seed(records[:150])
+        return engine, records
+
+    def test_forming_tick_updates_state_without_counting(self):
+        engine, records = self.make_engine()
+        forming = dict(records[150], is_closed=False)
+        asyncio.run(engine.process_candle(forming))
+
+        self.assertEqual(len(engine.candles), 150)
+        self.assertEqual(engine.forming_candle["close"], records[150]["close"])
+        self.assertEqual(set(engine.state["signals"]), {"rsi_mean_reversion", "bollinger_breakout", "stochastic", "bos"})
+        self.assertEqual(engine.state["total_signals"], 0)
+
+        asyncio.run(engine.process_candle(dict(records[150], is_closed=True)))
+        self.assertEqual(len(engine.candles), 151)
+        self.assertIsNone(engine.forming_candle)
+        
+        # BOS lido do rastreador persistente, atualizado só pelo candle fechado
+        expected_structure = SMCStructureTracker.from_frame(pd.DataFrame(records[:151]))
+        self.assertEqual(engine.structure.get_state(), expected_structure.get_state())
+        bos = engine.state["signals"]["bos"]
+        self.assertEqual((bos.action, bos.reasons), (expected_structure.bos_signal().action, expected_structure.bos_signal().reasons))
+
+        df = engine.candles.to_frame(engine.processing_window)
+        expected = engine._apply_rsi_strategy(df)
+        self.assertEqual(engine.state["signals"]["rsi_mean_reversion"].action, expected.action)
+        self.assertAlmostEqual(engine.state["signals"]["rsi_mean_reversion"].confidence, expected.confidence, places=9)
+
+    def test_structure_keeps_processing_window(self):
+        """Após mais de processing_window candles, BOS/CHoCH/OB/FVG leem só a janela final"""
+        engine, records = self.make_engine()
+        engine.strategies = ["smc_bos", "smc_choch", "smc_order_blocks", "smc_fvg"]
+        records = load_fixture(engine.processing_window + 250).to_dict("records")
+        detectors = {
+            engine._stream_bos_strategy: detect_bos,
+            engine._stream_choch_strategy: detect_choch,
+            engine._stream_order_blocks_strategy: detect_order_blocks,
+            engine._stream_fvg_strategy: detect_fvg,
+        }
+        for i, record in enumerate(records[150:], start=150):
+            asyncio.run(engine.process_candle(dict(record, is_closed=True)))
+            if i < engine.processing_window or i % 9:
+                continue
+            window = engine.candles.to_frame(engine.processing_window)
+            self.assertEqual(engine.structure.count, engine.processing_window)
+            self.assertLessEqual(len(engine.structure.fresh_order_blocks) + len(engine.structure.open_fvgs),
+                                 2 * engine.processing_window)
+            for stream, detect in detectors.items():
+                with self.subTest(i=i, detector=detect.__name__):
+                    actual, expected = stream(), detect(window)
+                    self.assertEqual((actual.action, actual.reasons, actual.meta),
+                                     (expected.action, expected.reasons, expected.meta))
+                    self.assertAlmostEqual(actual.confidence, expected.confidence, places=9)
+
+    def test_bootstrap_skips_forming_kline(self):
+        step = 5 * 60 * 1000
+        records = load_fixture(201).to_dict("records")
+        # Último kline da API ainda em formação (aberto no intervalo atual)
+        current_open = int(time.time() * 1000) // step * step
+        for i, record in enumerate(records):
+            record["timestamp"] = current_open - (200 - i) * step
+        klines = [[str(r["timestamp"]), str(r["open"]), str(r["high"]), str(r["low"]), str(r["close"]), str(r["volume"])]
+                  for r in records]
+
+        class ReversedProvider:
+            """Como a Bybit: do mais recente para o mais antigo"""
+            async def get_kline_async(self, **kwargs):
+                return klines[::-1]
+
+        engine = RealtimeStrategyEngine(symbol="BTCUSDT", interval="5m", strategies=["rsi_mean_reversion"],
+                                        data_provider=ReversedProvider())
+        self.assertTrue(asyncio.run(engine.bootstrap_historical_data()))
+        self.assertEqual(len(engine.candles), 200)
+        self.assertEqual(engine.candles.last_timestamp, records[199]["timestamp"])
+
+        # O WebSocket fecha o candle que estava em formação; repetir o fechamento não muda nada
+        asyncio.run(engine.process_candle(dict(records[200], is_closed=True)))
+        asyncio.run(engine.process_candle(dict(records[200], is_closed=True)))
+        self.assertEqual(len(engine.candles), 201)
+
+        expected = StreamingIndicators()
+        expected.seed(records)
+        self.assertEqual(engine.indicators.closed_candles, 201)
+        self.assertEqual(engine.structure.count, engine.processing_window)
+        self.assertEqual(streaming_values(engine.indicators), streaming_values(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Testes do SMCStructureTracker
+
+As consultas do rastreador devem reproduzir exatamente os loops originais de
+detect_choch / detect_order_blocks / detect_fvg (mantidos aqui como
+referência) com candles reais; o estado incremental (OBs FRESH/MITIGATED,
+FVGs abertos, eventos BOS/CHoCH) é conferido contra varreduras completas.
+"""
+
+import os
+import sys
+import unittest
+
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.core.signal import Signal
+from market_manus.strategies.smc.patterns import (
+    confluence_decision,
+    detect_choch,
+    detect_fvg,
+    detect_order_blocks,
+    structure_tracker_for,
+)
+from market_manus.strategies.smc.structure_tracker import SMCStructureTracker
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURES = ["BTCUSDT_5_090925_until_091025.parquet", "ETHUSDT_15_090725_until_091025.parquet"]
+
+
+def load_candles(fixture: str, candles: int = 1200) -> pd.DataFrame:
+    df = pd.read_parquet(os.path.join(DATA_DIR, fixture)).iloc[:candles]
+    return df[["open", "high", "low", "close", "volume"]].reset_index(drop=True)
+
+
+# ==================== REFERÊNCIAS (loops originais, O(n²)) ====================
+
+def reference_choch(df: pd.DataFrame) -> tuple:
+    highs, lows, closes = df['high'], df['low'], df['close']
+    highs_idx = [i for i in range(1, len(df)) if closes.iat[i] > highs.iloc[:i].max()]
+    lows_idx = [i for i in range(1, len(df)) if closes.iat[i] < lows.iloc[:i].min()]
+    if len(highs_idx) >= 2 and lows_idx and lows_idx[-1] > (highs_idx[-1] if highs_idx else 0):
+        return "SELL", len(highs_idx), len(lows_idx)
+    if len(lows_idx) >= 2 and highs_idx and highs_idx[-1] > (lows_idx[-1] if lows_idx else 0):
+        return "BUY", len(highs_idx), len(lows_idx)
+    return "HOLD", None, None
+
+
+def reference_order_blocks(df: pd.DataFrame, min_range: float = 0) -> list:
+    obs = []
+    curr_max, curr_min = df['high'].iat[0], df['low'].iat[0]
+    for i in range(1, len(df)):
+        h, l, c = df['high'].iat[i], df['low'].iat[i], df['close'].iat[i]
+        prev_h, prev_l, prev_o, prev_c = df['high'].iat[i-1], df['low'].iat[i-1], df['open'].iat[i-1], df['close'].iat[i-1]
+        if c > curr_max:
+            if prev_c < prev_o and abs(prev_h - prev_l) >= min_range:
+                obs.append({"index": i-1, "type": "bullish", "zone": (prev_l, prev_h)})
+            curr_max = h
+        if c < curr_min:
+            if prev_c > prev_o and abs(prev_h - prev_l) >= min_range:
+                obs.append({"index": i-1, "type": "bearish", "zone": (prev_l, prev_h)})
+            curr_min = l
+    return obs
+
+
+def reference_fvgs(df: pd.DataFrame) -> list:
+    gaps = []
+    for i in range(1, len(df)):
+        if df['low'].iat[i] > df['high'].iat[i-1]:
+            gaps.append({"type": "bullish", "gap": (df['high'].iat[i-1], df['low'].iat[i]), "index": i})
+        elif df['high'].iat[i] < df['low'].iat[i-1]:
+            gaps.append({"type": "bearish", "gap": (df['high'].iat[i], df['low'].iat[i-1]), "index": i})
+    return gaps
+
+
+def signal_key(signal: Signal) -> tuple:
+    return signal.action, signal.confidence, signal.reasons, signal.tags, signal.meta
+
+
+class TestStructureTracker(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.frames = {fixture: load_candles(fixture) for fixture in FIXTURES}
+
+    def windows(self, df: pd.DataFrame, step: int = 13):
+        for i in range(2, len(df), step):
+            yield i, df.iloc[max(0, i - 50):i + 1].reset_index(drop=True)
+
+    def test_choch_matches_reference(self):
+        for fixture, df in self.frames.items():
+            for i, window in self.windows(df):
+                with self.subTest(fixture=fixture, i=i):
+                    action, highs_count, lows_count = reference_choch(window)
+                    signal = detect_choch(window)
+                    self.assertEqual(signal.action, action)
+                    if action != "HOLD":
+                        self.assertEqual((signal.meta["highs_count"], signal.meta["lows_count"]), (highs_count, lows_count))
+
+    def test_order_blocks_and_fvg_match_reference(self):
+        for fixture, df in self.frames.items():
+            for i, window in self.windows(df):
+                with self.subTest(fixture=fixture, i=i):
+                    obs = reference_order_blocks(window, min_range=5.0)
+                    signal = detect_order_blocks(window, min_range=5.0)
+                    if obs:
+                        self.assertEqual((signal.meta["index"], signal.meta["ob_type"]), (obs[-1]["index"], obs[-1]["type"]))
+                        self.assertEqual((signal.meta["zone_low"], signal.meta["zone_high"]), obs[-1]["zone"])
+                    else:
+                        self.assertEqual(signal.action, "HOLD")
+
+                    gaps = reference_fvgs(window)
+                    signal = detect_fvg(window)
+                    if gaps:
+                        self.assertEqual((signal.meta["index"], signal.meta["fvg_type"]), (gaps[-1]["index"], gaps[-1]["type"]))
+                        avg_range = window['high'].sub(window['low']).mean()
+                        size = gaps[-1]["gap"][1] - gaps[-1]["gap"][0]
+                        self.assertEqual(signal.confidence, min(0.4 + (size / avg_range) * 0.4, 1.0))
+                    else:
+                        self.assertEqual(signal.action, "HOLD")
+
+    def test_live_updates_match_full_rebuild(self):
+        df = self.frames[FIXTURES[0]].iloc[:400]
+        live = SMCStructureTracker()
+        for i, row in enumerate(df.itertuples(index=False)):
+            live.update(row.open, row.high, row.low, row.close)
+            if i % 37 == 0 and i >= 2:
+                rebuilt = SMCStructureTracker.from_frame(df.iloc[:i + 1])
+                self.assertEqual(signal_key(live.choch_signal()), signal_key(rebuilt.choch_signal()))
+                self.assertEqual(signal_key(live.order_block_signal()), signal_key(rebuilt.order_block_signal()))
+                self.assertEqual(signal_key(live.fvg_signal()), signal_key(rebuilt.fvg_signal()))
+                self.assertEqual(live.get_state(), rebuilt.get_state())
+
+    def test_window_matches_trailing_rebuild(self):
+        """Com window, o estado é o da janela final: eventos antigos saem e as zonas ficam limitadas"""
+        df = self.frames[FIXTURES[1]].iloc[:400]
+        live = SMCStructureTracker(min_range=5.0, window=60)
+        for i, row in enumerate(df.itertuples(index=False)):
+            live.update(row.open, row.high, row.low, row.close)
+            if i % 23 == 0:
+                window = df.iloc[max(0, i - 59):i + 1]
+                rebuilt = SMCStructureTracker.from_frame(window, min_range=5.0)
+                with self.subTest(i=i):
+                    self.assertEqual(signal_key(live.bos_signal()), signal_key(rebuilt.bos_signal()))
+                    self.assertEqual(signal_key(live.choch_signal()), signal_key(rebuilt.choch_signal()))
+                    self.assertEqual(signal_key(live.order_block_signal()), signal_key(rebuilt.order_block_signal()))
+                    self.assertEqual(signal_key(live.fvg_signal()), signal_key(rebuilt.fvg_signal()))
+                    self.assertEqual(live.get_state(), rebuilt.get_state())
+                    self.assertEqual(live.count, min(i + 1, 60))
+        self.assertEqual(SMCStructureTracker.from_frame(df, window=60).get_state(), live.get_state())
+
+    def test_mitigation_and_open_fvgs(self):
+        df = self.frames[FIXTURES[1]]
+        tracker = SMCStructureTracker.from_frame(df)
+        highs, lows = df['high'].tolist(), df['low'].tolist()
+
+        obs = reference_order_blocks(df)
+        fresh = []
+        for ob in obs:
+            zone_low, zone_high = ob["zone"]
+            touched = any(lows[j] <= zone_high and highs[j] >= zone_low for j in range(ob["index"] + 1, len(df)))
+            if not touched:
+                fresh.append(ob["index"])
+        self.assertEqual([ob["index"] for ob in tracker.fresh_order_blocks], fresh)
+        self.assertEqual(tracker.mitigated_order_blocks, len(obs) - len(fresh))
+
+        open_gaps = []
+        for gap in reference_fvgs(df):
+            later = range(gap["index"] + 1, len(df))
+            if gap["type"] == "bullish":
+                filled = any(lows[j] <= gap["gap"][0] for j in later)
+            else:
+                filled = any(highs[j] >= gap["gap"][1] for j in later)
+            if not filled:
+                open_gaps.append(gap["index"])
+        self.assertEqual([gap["index"] for gap in tracker.open_fvgs], open_gaps)
+
+    def test_structure_events(self):
+        tracker = SMCStructureTracker.from_frame(self.frames[FIXTURES[0]])
+        events = list(tracker.events)
+        self.assertGreater(len(events), 2)
+        self.assertEqual(events[0]["type"], "BOS")
+        for previous, event in zip(events, events[1:]):
+            expected = "CHOCH" if event["direction"] != previous["direction"] else "BOS"
+            self.assertEqual(event["type"], expected)
+            self.assertGreater(event["index"], previous["index"])
+        self.assertEqual(tracker.trend, events[-1]["direction"])
+
+    def test_confluence_decision_reads_persistent_tracker(self):
+        """Rastreador do stream alimentado candle a candle decide como o recálculo sobre a janela"""
+        config = {"use_classic": False, "smc": {"min_ob_range": 5.0},
+                  "regime": {"buy_threshold": 0.1, "sell_threshold": -0.1}}
+        df = self.frames[FIXTURES[0]].iloc[:300]
+        structure = structure_tracker_for(config)
+        self.assertEqual(structure.min_range, 5.0)
+        structure.seed(df.iloc[:250].to_dict("records"))
+        for i in range(250, len(df), 7):
+            for row in df.iloc[structure.count:i + 1].itertuples(index=False):
+                structure.update(row.open, row.high, row.low, row.close)
+            with self.subTest(i=i):
+                window = df.iloc[:i + 1]
+                expected = confluence_decision(window, "BTCUSDT", "5m", config)
+                actual = confluence_decision(window, "BTCUSDT", "5m", config, structure=structure)
+                self.assertEqual(signal_key(actual), signal_key(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Testes do simulador vetorizado de trades
+
+O simulador vetorizado deve reproduzir bit a bit o loop candle a candle de
+ConfluenceModeModule._simulate_trades_from_signals (vectorized=False) com
+candles reais do parquet, sinais densos e casos de borda.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.backtest import trade_simulator
+from market_manus.backtest.trade_simulator import EXIT_REASONS, simulate_trades
+from market_manus.confluence_mode.confluence_mode_module import ConfluenceModeModule
+from market_manus.core.capital_manager import FeeModel, FeePreset
+from market_manus.performance.history_repository import PerformanceHistoryRepository
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURES = ["BTCUSDT_5_090925_until_091025.parquet", "ADAUSDT_15_090725_until_091025.parquet"]
+
+
+def load_ohlc(fixture: str, candles: int = 3000):
+    df = pd.read_parquet(os.path.join(DATA_DIR, fixture)).iloc[:candles]
+    return [df[column].to_numpy(dtype=np.float64) for column in ("close", "high", "low")]
+
+
+def random_signals(length: int, count: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, length, size=count)
+    directions = rng.choice(["BUY", "SELL"], size=count)
+    return [(int(i), str(d)) for i, d in zip(indices, directions)]
+
+
+class TestTradeSimulatorParity(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.module = ConfluenceModeModule(
+            data_provider=None, capital_manager=None,
+            performance_repo=PerformanceHistoryRepository(os.path.join(cls.tmp.name, "perf.db"))
+        )
+        cls.data = {fixture: load_ohlc(fixture) for fixture in FIXTURES}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.module.performance_repo.close()
+        cls.tmp.cleanup()
+
+    def assert_parity(self, signals, closes, highs=None, lows=None, capital=10000):
+        reference = self.module._simulate_trades_from_signals(signals, closes, capital, highs, lows, vectorized=False)
+        vectorized = self.module._simulate_trades_from_signals(signals, closes, capital, highs, lows)
+        self.assertEqual(vectorized, reference)
+        return reference
+
+    def test_random_signals_match_loop(self):
+        for fixture, (closes, highs, lows) in self.data.items():
+            for count, seed in ((20, 1), (300, 2), (3000, 3)):
+                with self.subTest(fixture=fixture, count=count):
+                    _, total_trades, _ = self.assert_parity(random_signals(len(closes), count, seed), closes, highs, lows)
+                    self.assertGreater(total_trades, 0)
+
+    def test_confluence_signals_match_loop(self):
+        closes, highs, lows = self.data[FIXTURES[0]]
+        opens = closes
+        strategy_signals = {
+            key: {"name": key, "signal_indices": self.module._execute_strategy_on_data(key, closes, highs, lows, opens), "weight": 1.0}
+            for key in ("rsi_mean_reversion", "ema_crossover", "bollinger_breakout")
+        }
+        for mode in ("ALL", "ANY", "MAJORITY", "WEIGHTED"):
+            with self.subTest(mode=mode):
+                self.module.selected_confluence_mode = mode
+                self.assert_parity(self.module._calculate_confluence_signals(strategy_signals), closes, highs, lows)
+
+    def test_edge_cases(self):
+        closes, highs, lows = self.data[FIXTURES[1]]
+        n = len(closes)
+        cases = {
+            "empty": [],
+            "last_candle": [(n - 1, "BUY")],
+            "open_at_end": [(n - 10, "SELL")],
+            "out_of_range": [(-1, "BUY"), (n, "SELL"), (5, "BUY")],
+            "duplicates": [(100, "BUY"), (100, "SELL"), (101, "BUY")],
+        }
+        for name, signals in cases.items():
+            with self.subTest(case=name):
+                self.assert_parity(signals, closes, highs, lows)
+        with self.subTest(case="closes_only"):
+            self.assert_parity(random_signals(n, 500, 4), list(closes))
+
+    def test_trade_log(self):
+        closes, highs, lows = self.data[FIXTURES[0]]
+        log = simulate_trades(random_signals(len(closes), 400, 5), closes, 10000, highs, lows)
+
+        self.assertTrue(set(log.reason) <= set(EXIT_REASONS))
+        self.assertTrue(np.all(log.exit_index > log.entry_index))
+        self.assertTrue(np.all(log.entry_index[1:] > log.exit_index[:-1]))  # Uma posição por vez
+        self.assertTrue(np.all(log.exit_index[log.reason == "TIMEOUT"] - log.entry_index[log.reason == "TIMEOUT"] == 50))
+        self.assertTrue(np.all(log.pnl[log.reason == "SL"] < 0))
+        self.assertTrue(np.all(log.winning[log.reason == "TP"]))
+        self.assertAlmostEqual(log.initial_capital + log.pnl.sum(), log.final_capital, places=6)
+        self.assertEqual(log.totals()[1:], (log.total_trades, log.winning_trades))
+
+    def test_exit_scan_is_chunked(self):
+        closes, highs, lows = self.data[FIXTURES[0]]
+        signals = random_signals(len(closes), 3000, 7)
+        full = simulate_trades(signals, closes, 10000, highs, lows)
+
+        scanned = []
+        first_exits = trade_simulator._first_exits
+
+        def recording(entries, *args):
+            scanned.append(len(entries))
+            return first_exits(entries, *args)
+
+        # Blocos de 7 entradas: fronteiras de bloco caem no meio de posições abertas
+        with mock.patch.object(trade_simulator, "EXIT_SCAN_CELLS", 7 * 50), \
+                mock.patch.object(trade_simulator, "_first_exits", recording):
+            chunked = simulate_trades(signals, closes, 10000, highs, lows)
+
+        self.assertEqual(chunked.totals(), full.totals())
+        np.testing.assert_array_equal(chunked.exit_index, full.exit_index)
+        np.testing.assert_array_equal(chunked.reason, full.reason)
+        self.assertLessEqual(max(scanned), 7)
+        # Candidatas puladas por posições abertas além do bloco não são varridas
+        self.assertLess(sum(scanned), len({idx for idx, _ in signals}))
+
+    def test_trading_costs_are_opt_in(self):
+        closes, highs, lows = self.data[FIXTURES[0]]
+        signals = random_signals(len(closes), 400, 8)
+        self.assertIsNone(self.module._trade_fee_model())
+        gross = self.module._simulate_trades_from_signals(signals, closes, 10000, highs, lows, fee_model=self.module._trade_fee_model())
+        self.assertEqual(gross, self.module._simulate_trades_from_signals(signals, closes, 10000, highs, lows, vectorized=False))
+
+        self.module.trading_costs_enabled = True
+        try:
+            fee_model = self.module._trade_fee_model()
+            self.assertIs(fee_model, self.module.fee_model)
+            net = self.module._simulate_trades_from_signals(signals, closes, 10000, highs, lows, fee_model=fee_model)
+        finally:
+            self.module.trading_costs_enabled = False
+        self.assertEqual(net[1], gross[1])
+        self.assertLessEqual(net[2], gross[2])
+        self.assertLess(net[0], gross[0])
+
+    def test_fee_model_costs(self):
+        closes, highs, lows = self.data[FIXTURES[0]]
+        signals = random_signals(len(closes), 400, 6)
+        gross = simulate_trades(signals, closes, 10000, highs, lows)
+        fee_model = FeeModel.from_preset(FeePreset.LIVE)
+        net = simulate_trades(signals, closes, 10000, highs, lows, fee_model=fee_model)
+
+        np.testing.assert_array_equal(net.entry_index, gross.entry_index)
+        np.testing.assert_allclose(net.costs, [fee_model.calculate_total_trade_cost(size) for size in net.position_size])
+        self.assertLess(net.final_capital, gross.final_capital)
+        self.assertAlmostEqual(10000 + net.pnl.sum(), net.final_capital, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
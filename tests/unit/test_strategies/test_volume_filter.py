@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Testes do filtro de volume em lote (VolumeFilterPipeline) e do z-score streaming
+
+O caminho por máscaras deve aceitar exatamente os mesmos sinais e produzir os
+mesmos contadores que o loop original por tupla (mantido aqui como
+referência); o z-score incremental deve coincidir com o rolling do pandas.
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+)
+
+from market_manus.analysis.volume_filter import StreamingVolumeZScore, VolumeFilter, VolumeFilterPipeline
+from market_manus.strategies.signal_series import SignalSeries
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+)
+FIXTURE = "ADAUSDT_15_090725_until_091025.parquet"
+
+
+def reference_filter(volume_filter: VolumeFilter, strategy_signals: dict, volumes: pd.Series) -> tuple:
+    """Loop original de apply_to_strategy_signals (um lookup iloc por sinal)"""
+    stats = {"signals_received": 0, "signals_rejected": 0, "signals_boosted": 0, "signals_passed": 0}
+    volume_zscores = volume_filter.calculate_volume_zscore(volumes)
+    filtered = {}
+    for key, data in strategy_signals.items():
+        signal_indices = data["signal_indices"]
+        stats["signals_received"] += len(signal_indices)
+        kept = []
+        for item in signal_indices:
+            idx = item[0] if isinstance(item, tuple) else item
+            if idx >= len(volume_zscores):
+                continue
+            zscore = volume_zscores.iloc[idx]
+            if zscore < volume_filter.threshold_reject:
+                stats["signals_rejected"] += 1
+                continue
+            elif zscore > volume_filter.threshold_boost:
+                stats["signals_boosted"] += 1
+            else:
+                stats["signals_passed"] += 1
+            kept.append(item)
+        filtered[key] = kept
+    return filtered, stats
+
+
+class TestVolumeFilterPipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.volumes = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE))["volume"].iloc[:3000].reset_index(drop=True)
+        rng = np.random.default_rng(7)
+        cls.series = {}
+        for k in range(4):
+            index = np.sort(rng.choice(len(cls.volumes) + 40, size=900, replace=False))
+            cls.series[f"strategy_{k}"] = SignalSeries(index, rng.choice([-1, 1], size=index.size))
+
+    def strategy_signals(self) -> dict:
+        signals = {}
+        for k, (key, series) in enumerate(self.series.items()):
+            items = series.to_tuples() if k % 2 == 0 else series.index.tolist()
+            signals[key] = {"name": key, "signal_indices": items, "weight": 1.0}
+        return signals
+
+    def test_masks_match_reference_loop(self):
+        pipeline = VolumeFilterPipeline()
+        strategy_signals = self.strategy_signals()
+        filtered = pipeline.apply_to_strategy_signals(strategy_signals, self.volumes)
+        expected, expected_stats = reference_filter(pipeline.volume_filter, strategy_signals, self.volumes)
+
+        self.assertEqual(pipeline.stats, expected_stats)
+        self.assertGreater(expected_stats["signals_boosted"], 0)
+        for key, data in filtered.items():
+            self.assertEqual(data["signal_indices"], expected[key])
+            self.assertEqual(data["original_count"], len(strategy_signals[key]["signal_indices"]))
+            self.assertEqual(data["filtered_count"], len(expected[key]))
+            self.assertTrue(data["volume_filtered"])
+
+    def test_signal_series_path(self):
+        tuples = VolumeFilterPipeline()
+        arrays = VolumeFilterPipeline()
+        strategy_signals = {key: {"signal_indices": series.to_tuples()} for key, series in self.series.items()}
+
+        expected = tuples.apply_to_strategy_signals(strategy_signals, self.volumes)
+        filtered = arrays.apply_to_signal_series(self.series, self.volumes)
+
+        self.assertEqual(arrays.stats, tuples.stats)
+        for key, series in filtered.items():
+            self.assertEqual(series.to_tuples(), expected[key]["signal_indices"])
+            self.assertEqual(series.direction.dtype, np.int8)
+
+
+class TestStreamingVolumeZScore(unittest.TestCase):
+
+    def test_matches_rolling_zscore(self):
+        volumes = pd.read_parquet(os.path.join(DATA_DIR, FIXTURE))["volume"].iloc[:1500].reset_index(drop=True)
+        volume_filter = VolumeFilter(lookback_period=50)
+        expected = volume_filter.calculate_volume_zscore(volumes).to_numpy()
+
+        stream = volume_filter.streaming_zscore()
+        values = np.array([stream.update(v) for v in volumes.tolist()])
+        np.testing.assert_allclose(values, expected, rtol=1e-9, atol=1e-9)
+        self.assertTrue(np.all(values[:49] == 0.0))
+
+    def test_forming_candle_does_not_commit(self):
+        volumes = [10.0, 12.0, 9.0, 11.0, 30.0]
+        stream = StreamingVolumeZScore(lookback_period=3)
+        for v in volumes[:4]:
+            stream.update(v)
+        forming = stream.update(50.0, closed=False)
+        closed = stream.update(volumes[4])
+
+        expected = VolumeFilter(lookback_period=3).calculate_volume_zscore(pd.Series(volumes))
+        self.assertAlmostEqual(closed, expected.iat[-1], places=12)
+        window = np.array([9.0, 11.0, 50.0])
+        self.assertAlmostEqual(forming, (50.0 - window.mean()) / window.std(ddof=1), places=12)
+
+        flat = StreamingVolumeZScore(lookback_period=3)
+        self.assertEqual([flat.update(5.0) for _ in range(4)], [0.0] * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,12 +4,12 @@ Flask application para visualização e controle do sistema de trading
 """
 import os
 import sys
+import uuid
 from datetime import datetime
 from flask import Flask, render_template, jsonify, request
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 from flask_cors import CORS
-import asyncio
-from threading import Thread
+from threading import Lock, Thread
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente
@@ -23,8 +23,11 @@ from market_manus.confluence_mode.confluence_mode_module import ConfluenceModeMo
 from market_manus.confluence_mode.recommended_combinations import RecommendedCombinations
 from market_manus.performance.history_repository import PerformanceHistoryRepository
 from market_manus.performance.analytics_service import PerformanceAnalyticsService
-from market_manus.sentiment.sentiment_service import gather_sentiment
+from market_manus.sentiment.sentiment_service import gather_sentiment_sync
 from market_manus.explanations.strategy_explanations import StrategyExplanations
+from market_manus.backtest.backtest_jobs import (
+    BacktestJobQueue, BacktestQueueFull, missing_exchange_keys, normalize_backtest_config
+)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'market-manus-secret-key-2025'
@@ -66,11 +69,19 @@ def initialize_system():
     
     confluence_module = ConfluenceModeModule(
         data_provider=data_provider,
-        capital_manager=capital_manager
+        capital_manager=capital_manager,
+        performance_repo=performance_repo
     )
     
     print("✅ Sistema inicializado com sucesso!")
 
+def get_performance_repo() -> PerformanceHistoryRepository:
+    """Repositório compartilhado (uma conexão SQLite por thread, reutilizada entre requisições)"""
+    global performance_repo
+    if performance_repo is None:
+        performance_repo = PerformanceHistoryRepository()
+    return performance_repo
+
 @app.route('/')
 def index():
     """Dashboard principal"""
@@ -172,395 +183,84 @@ def get_combinations():
     
     return jsonify({'combinations': formatted_combos})
 
-@app.route('/api/backtest', methods=['POST'])
-def run_backtest():
-    """Executa backtest com configurações fornecidas"""
-    try:
-        data = request.json
-        # Helper para emitir progresso em tempo-real
-        def emit_progress(percent: int, message: str, extra: dict = None):
-            payload = {'percent': int(percent), 'message': message}
-            if extra:
-                payload.update(extra)
-            try:
-                socketio.emit('backtest_progress', payload, broadcast=True)
-            except Exception:
-                pass
-        
-        # Extrair parâmetros
-        asset = data.get('asset', 'BTCUSDT')
-        timeframe = data.get('timeframe', '15')
-        strategies = data.get('strategies', [])
-        confluence_mode = data.get('mode', 'weighted')
-        start_date = data.get('start_date')
-        end_date = data.get('end_date')
-        initial_capital = float(data.get('capital', 10000))
-        manus_ai_enabled = data.get('manus_ai', False)
-        sk_enabled = data.get('semantic_kernel', False)
+backtest_jobs = None
+_backtest_jobs_lock = Lock()
 
-        # Normalização de timeframe e datas para evitar 0 candles
-        # Aceitar formatos da UI (1m, 5m, 15m, 1h, 4h, 1d) e do engine (1,5,15,60,240,D)
-        tf_map_ui_to_engine = {
-            '1m': '1', '5m': '5', '15m': '15', '30m': '30', '1h': '60', '4h': '240', '1d': 'D'
-        }
-        # timeframe pode já vir como número/engine; manter se não houver mapeamento
-        tf_engine = tf_map_ui_to_engine.get(str(timeframe).lower(), str(timeframe))
 
-        from datetime import datetime, timedelta
-        def normalize_dates(s, e):
-            try:
-                s_dt = datetime.strptime(s, '%Y-%m-%d') if s else None
-            except Exception:
-                s_dt = None
-            try:
-                e_dt = datetime.strptime(e, '%Y-%m-%d') if e else None
-            except Exception:
-                e_dt = None
-            # End date padrão: hoje
-            if not e_dt:
-                e_dt = datetime.now()
-            # Se start ausente/igual/maior que end, usar janela padrão de 30 dias
-            if not s_dt or s_dt >= e_dt:
-                s_dt = e_dt - timedelta(days=30)
-            return s_dt.strftime('%Y-%m-%d'), e_dt.strftime('%Y-%m-%d')
+def _emit_backtest_progress(job_id: str, payload: dict):
+    """Progresso do job para os clientes inscritos na sala do job"""
+    socketio.emit('backtest_progress', payload, to=job_id)
 
-        norm_start_date, norm_end_date = normalize_dates(start_date, end_date)
-        
-        # Validar parâmetros
-        if not strategies or len(strategies) == 0:
-            return jsonify({
-                'status': 'error',
-                'message': 'Selecione pelo menos uma estratégia'
-            }), 400
-        
-        # Importar módulos necessários
-        from market_manus.confluence_mode.confluence_mode_module import ConfluenceModeModule
-        from datetime import datetime
-        import uuid
-        import os
-        
-        # Determinar exchange a usar
-        exchange = data.get('exchange', 'binance')
-        emit_progress(5, 'Iniciando backtest', {
-            'exchange': exchange,
-            'asset': asset,
-            'timeframe': tf_engine,
-            'strategies': strategies,
-            'mode': confluence_mode
-        })
-        
-        # Criar data provider baseado na exchange selecionada
-        if exchange == 'bybit':
-            from market_manus.data_providers.bybit_real_data_provider import BybitRealDataProvider
-            
-            api_key = os.getenv('BYBIT_API_KEY', '')
-            api_secret = os.getenv('BYBIT_API_SECRET', '')
-            
-            if not api_key or not api_secret:
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Chaves API do Bybit não configuradas. Configure BYBIT_API_KEY e BYBIT_API_SECRET.'
-                }), 500
-            
-            data_provider = BybitRealDataProvider(api_key=api_key, api_secret=api_secret)
-            emit_progress(10, 'Conectado à Bybit e preparando provider')
-        else:  # binance (default)
-            from market_manus.data_providers.binance_data_provider import BinanceDataProvider
-            
-            api_key = os.getenv('BINANCE_API_KEY', '')
-            api_secret = os.getenv('BINANCE_API_SECRET', '')
-            
-            if not api_key or not api_secret:
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Chaves API do Binance não configuradas. Configure BINANCE_API_KEY e BINANCE_API_SECRET.'
-                }), 500
-            
-            data_provider = BinanceDataProvider(api_key=api_key, api_secret=api_secret)
-            emit_progress(10, 'Conectado à Binance e preparando provider')
-        
-        # Criar módulo de confluência
-        confluence_module = ConfluenceModeModule(
-            data_provider=data_provider,
-            capital_manager=None
-        )
-        
-        # Configurar parâmetros
-        confluence_module.selected_asset = asset
-        confluence_module.selected_timeframe = tf_engine
-        confluence_module.selected_strategies = strategies
-        confluence_module.selected_confluence_mode = confluence_mode
-        confluence_module.custom_start_date = norm_start_date
-        confluence_module.custom_end_date = norm_end_date
-        confluence_module.manus_ai_enabled = manus_ai_enabled
-        confluence_module.sk_advisor_enabled = sk_enabled
-        
-        # Executar backtest programaticamente
-        print(f"\n🧪 Executando backtest via Web API...")
-        print(f"   Asset: {asset}, Timeframe: {tf_engine}")
-        print(f"   Strategies: {len(strategies)}, Mode: {confluence_mode}")
-        
-        # Buscar dados históricos
-        emit_progress(15, 'Carregando dados históricos', {
-            'start_date': norm_start_date,
-            'end_date': norm_end_date
-        })
-        klines, metrics = confluence_module._fetch_historical_klines(
-            symbol=asset,
-            interval=tf_engine,
-            start_date=norm_start_date,
-            end_date=norm_end_date
-        )
-        
-        if not klines or len(klines) < 50:
-            return jsonify({
-                'status': 'error',
-                'message': f'Dados insuficientes: {len(klines) if klines else 0} candles recebidos'
-            }), 400
-        
-        emit_progress(25, f'Dados carregados: {len(klines)} candles')
-        # Converter dados OHLCV
-        opens = [float(k[1]) for k in klines]
-        highs = [float(k[2]) for k in klines]
-        lows = [float(k[3]) for k in klines]
-        closes = [float(k[4]) for k in klines]
-        volumes_raw = [float(k[5]) if len(k) > 5 else 0.0 for k in klines]
-        
-        import pandas as pd
-        volumes = pd.Series(volumes_raw)
-        
-        emit_progress(35, 'Pré-processando OHLCV e volume')
-        # Executar estratégias
-        strategy_signals = {}
-        for idx, strategy_key in enumerate(strategies, start=1):
-            if strategy_key in confluence_module.available_strategies:
-                strategy = confluence_module.available_strategies[strategy_key]
-                emit_progress(35 + int(25 * (idx / max(1, len(strategies)))), f'Calculando sinais: {strategy["name"]}')
-                signal_indices = confluence_module._execute_strategy_on_data(
-                    strategy_key, closes, highs, lows, opens
-                )
-                strategy_signals[strategy_key] = {
-                    "name": strategy['name'],
-                    "signal_indices": signal_indices,
-                    "weight": strategy.get('weight', 1.0)
-                }
-        
-        # Aplicar filtro de volume
-        if volumes.sum() > 0:
-            confluence_module.volume_pipeline.reset_stats()
-            filtered_strategy_signals = confluence_module.volume_pipeline.apply_to_strategy_signals(
-                strategy_signals, volumes
-            )
-        else:
-            filtered_strategy_signals = strategy_signals
-        emit_progress(65, 'Aplicando filtro de volume e limpeza de sinais')
-        
-        # Calcular confluência
-        confluence_signals = confluence_module._calculate_confluence_signals(filtered_strategy_signals)
-        emit_progress(75, f'Confluência calculada — {len(confluence_signals)} sinais totais')
-        
-        # Simular trades
-        final_capital, total_trades, winning_trades = confluence_module._simulate_trades_from_signals(
-            confluence_signals, closes, initial_capital, highs, lows
-        )
-        emit_progress(90, f'Simulando trades — {total_trades} executados')
-        
-        losing_trades = total_trades - winning_trades
-        pnl = final_capital - initial_capital
-        roi = (pnl / initial_capital) * 100
-        win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
-        
-        # Contar sinais por direção
-        buy_signals = sum(1 for _, direction in confluence_signals if direction == "BUY")
-        sell_signals = sum(1 for _, direction in confluence_signals if direction == "SELL")
-        
-        # Salvar no repositório de performance
-        from market_manus.performance.history_repository import (
-            PerformanceHistoryRepository, BacktestResult, StrategyContribution
-        )
-        
-        repo = PerformanceHistoryRepository()
-        backtest_id = str(uuid.uuid4())[:8]
-        
-        # Preparar resultado
-        backtest_result = BacktestResult(
-            backtest_id=backtest_id,
-            timestamp=datetime.now().isoformat(),
-            combination_id=data.get('combination_id'),
-            combination_name=data.get('combination_name'),
-            strategies=strategies,
-            timeframe=tf_engine,
-            asset=asset,
-            start_date=norm_start_date or "auto",
-            end_date=norm_end_date or "auto",
-            confluence_mode=confluence_mode,
-            win_rate=win_rate,
-            total_trades=total_trades,
-            winning_trades=winning_trades,
-            losing_trades=losing_trades,
-            initial_capital=initial_capital,
-            final_capital=final_capital,
-            roi=roi,
-            total_signals=len(confluence_signals),
-            manus_ai_enabled=manus_ai_enabled,
-            semantic_kernel_enabled=sk_enabled
-        )
-        
-        # Preparar contribuições das estratégias
-        contributions = []
-        for strategy_key, data in filtered_strategy_signals.items():
-            contrib = StrategyContribution(
-                backtest_id=backtest_id,
-                strategy_key=strategy_key,
-                strategy_name=data['name'],
-                total_signals=data.get('original_count', len(data['signal_indices'])),
-                signals_after_volume_filter=len(data['signal_indices']),
-                winning_signals=0,  # Não temos dados granulares por estratégia
-                losing_signals=0,
-                win_rate=0.0,
-                weight=data['weight']
+
+def _emit_backtest_finished(job):
+    socketio.emit('backtest_finished', job.to_dict(include_result=False), to=job.job_id)
+
+
+def get_backtest_jobs() -> BacktestJobQueue:
+    """Fila de backtests criada sob demanda (workers/limite configuráveis por ambiente)"""
+    global backtest_jobs
+    with _backtest_jobs_lock:
+        if backtest_jobs is None:
+            backtest_jobs = BacktestJobQueue(
+                max_workers=int(os.getenv('BACKTEST_WORKERS', '2')),
+                max_queue=int(os.getenv('BACKTEST_QUEUE_LIMIT', '8')),
+                executor=os.getenv('BACKTEST_EXECUTOR', 'process'),
+                on_progress=_emit_backtest_progress,
+                on_finished=_emit_backtest_finished
             )
-            contributions.append(contrib)
-        
-        # Salvar no repositório
-        repo.save_backtest_result(backtest_result, contributions)
-        emit_progress(95, 'Salvando resultado e métricas no SQLite', {'backtest_id': backtest_id})
-        
-        print(f"✅ Backtest concluído: {win_rate:.1f}% win rate, {roi:+.2f}% ROI")
-        emit_progress(100, f'Concluído: ROI {roi:+.2f}% · Win rate {win_rate:.1f}%', {
-            'final_capital': final_capital,
-            'initial_capital': initial_capital,
-            'win_rate': win_rate,
-            'roi': roi
-        })
-        
-        # Preparar recomendações de IA e peso
-        ai_payload = {}
-        weight_recommendations_data = []
+        return backtest_jobs
 
-        try:
-            from market_manus.performance.analytics_service import PerformanceAnalyticsService
-            analytics = PerformanceAnalyticsService(repo)
-            current_weights = {k: v.get('weight', 1.0) for k, v in filtered_strategy_signals.items()}
-            weight_recs = analytics.calculate_weight_recommendations(backtest_id, current_weights)
-            weight_recommendations_data = [
-                {
-                    'strategy_key': rec.strategy_key,
-                    'strategy_name': rec.strategy_name,
-                    'current_weight': rec.current_weight,
-                    'recommended_weight': rec.recommended_weight,
-                    'reason': rec.reason,
-                    'confidence': rec.confidence
-                }
-                for rec in weight_recs
-            ]
-        except Exception:
-            weight_recommendations_data = []
 
-        if sk_enabled:
-            try:
-                from market_manus.ai.semantic_kernel_advisor import SemanticKernelAdvisor
-                sk = SemanticKernelAdvisor()
-                if sk.is_available():
-                    backtest_summary = {
-                        'asset': asset,
-                        'timeframe': tf_engine,
-                        'start_date': norm_start_date,
-                        'end_date': norm_end_date,
-                        'confluence_mode': confluence_mode,
-                        'win_rate': win_rate,
-                        'total_trades': total_trades,
-                        'roi': roi,
-                        'initial_capital': initial_capital,
-                        'final_capital': final_capital
-                    }
-                    strategy_contributions_data = [
-                        {
-                            'strategy_name': data.get('name'),
-                            'signals_after_volume_filter': len(data['signal_indices']),
-                            'win_rate': win_rate,
-                            'weight': data.get('weight', 1.0),
-                            'winning_signals': int(len(data['signal_indices']) * win_rate / 100),
-                            'losing_signals': int(len(data['signal_indices']) * (100 - win_rate) / 100)
-                        }
-                        for data in filtered_strategy_signals.values()
-                    ]
-                    sk_text = sk.generate_recommendations(
-                        backtest_summary,
-                        strategy_contributions_data,
-                        weight_recommendations_data
-                    )
-                    ai_payload['semantic_kernel'] = {'available': True, 'text': sk_text}
-                else:
-                    ai_payload['semantic_kernel'] = {'available': False, 'text': '❌ Semantic Kernel não disponível (OPENAI_API_KEY não configurada)'}
-            except Exception as e:
-                ai_payload['semantic_kernel'] = {'available': False, 'text': f'❌ Erro ao gerar recomendações SK: {str(e)}'}
+@app.route('/api/backtest', methods=['POST'])
+def run_backtest():
+    """Enfileira um backtest e retorna o job_id e o submitter (usado para cancelar) imediatamente (202)"""
+    data = request.json or {}
+    try:
+        config = normalize_backtest_config(data)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
 
-        if manus_ai_enabled:
-            try:
-                from market_manus.ai.manus_ai_integration import ManusAIAnalyzer
-                import pandas as pd, asyncio
-                analyzer = ManusAIAnalyzer()
-                df = pd.DataFrame({'open': opens, 'high': highs, 'low': lows, 'close': closes, 'volume': volumes.tolist() if hasattr(volumes, 'tolist') else volumes_raw})
-                strategies_votes = {
-                    s['name']: {
-                        'action': 'BUY' if buy_signals >= sell_signals else ('SELL' if sell_signals > buy_signals else 'NEUTRAL'),
-                        'confidence': max(0.3, min(0.9, (win_rate/100)))
-                    }
-                    for s in filtered_strategy_signals.values()
-                }
-                ai_analysis = asyncio.run(analyzer.analyze_market_context(df, asset, strategies_votes))
-                ai_payload['manus_ai'] = ai_analysis
-            except Exception as e:
-                ai_payload['manus_ai'] = {'ai_enabled': False, 'error': f'Erro Manus AI: {str(e)}'}
+    missing_keys = missing_exchange_keys(config['exchange'])
+    if missing_keys:
+        return jsonify({'status': 'error', 'message': missing_keys}), 500
 
-        return jsonify({
-            'status': 'success',
-            'backtest_id': backtest_id,
-            'results': {
-                'initial_capital': initial_capital,
-                'final_capital': final_capital,
-                'pnl': pnl,
-                'roi': roi,
-                'total_trades': total_trades,
-                'winning_trades': winning_trades,
-                'losing_trades': losing_trades,
-                'win_rate': win_rate,
-                'total_signals': len(confluence_signals),
-                'buy_signals': buy_signals,
-                'sell_signals': sell_signals,
-                'candles_analyzed': len(closes),
-                'strategies_used': len(strategies)
-            },
-            'strategy_details': [
-                {
-                    'name': data['name'],
-                    'signals': len(data['signal_indices']),
-                    'weight': data['weight']
-                }
-                for data in filtered_strategy_signals.values()
-            ],
-            'ai': ai_payload,
-            'weight_recommendations': weight_recommendations_data
-        })
-        
-    except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"❌ Erro no backtest: {str(e)}")
-        print(error_trace)
-        return jsonify({
-            'status': 'error',
-            'message': str(e),
-            'details': error_trace
-        }), 500
+    submitter = data.get('submitter') or uuid.uuid4().hex[:12]
+    try:
+        job = get_backtest_jobs().submit(config, submitter=submitter)
+    except BacktestQueueFull as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 429
+
+    return jsonify({**job.to_dict(include_result=False), 'submitter': submitter}), 202
+
+
+@app.route('/api/backtest/jobs/<job_id>')
+def get_backtest_job(job_id):
+    """Status, progresso e (quando concluído) resultado de um job"""
+    job = get_backtest_jobs().get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job não encontrado'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/backtest/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_backtest_job(job_id):
+    """Retira o solicitante do job; o job é cancelado quando nenhum outro o aguarda"""
+    submitter = (request.get_json(silent=True) or {}).get('submitter')
+    if not submitter:
+        return jsonify({'status': 'error', 'message': 'Informe o submitter retornado ao enfileirar'}), 400
+    jobs = get_backtest_jobs()
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job não encontrado'}), 404
+    if not jobs.cancel(job_id, submitter=submitter):
+        return jsonify({'status': 'error', 'message': 'Job já finalizado ou solicitante desconhecido'}), 409
+    return jsonify({'status': 'success', 'job_id': job_id, 'job_cancelled': not job.submitters})
 
 @app.route('/api/performance/summary')
 def get_performance_summary():
     """Retorna resumo de performance de todos os backtests"""
     try:
-        from market_manus.performance.history_repository import PerformanceHistoryRepository
-        repo = PerformanceHistoryRepository()
+        repo = get_performance_repo()
         
         all_backtests = repo.get_all_backtests(limit=100)
         
@@ -603,7 +303,8 @@ def get_performance_summary():
                 'name': best['combination_name'] or 'Custom',
                 'win_rate': best['win_rate']
             },
-            'recent_backtests': recent
+            'recent_backtests': recent,
+            'combinations': list(repo.get_all_combinations_summary().values())
         })
         
     except Exception as e:
@@ -614,10 +315,9 @@ def get_performance_summary():
 def export_backtest_report(backtest_id):
     """Exporta relatório de backtest em JSON"""
     try:
-        from market_manus.performance.history_repository import PerformanceHistoryRepository
         import json
         
-        repo = PerformanceHistoryRepository()
+        repo = get_performance_repo()
         backtest = repo.get_backtest_by_id(backtest_id)
         strategies = repo.get_strategy_contributions(backtest_id)
         
@@ -771,7 +471,7 @@ def get_sentiment(asset):
                 return jsonify(cached['data'])
         
         # Coletar dados reais de sentimento/mercado
-        result = asyncio.run(gather_sentiment(asset, "1d"))
+        result = gather_sentiment_sync(asset, "1d")
         sources = result.get('sources', [])
         score = result.get('score')
         coingecko = next((s for s in sources if s.get('source') == 'coingecko' and not s.get('error')), None)
@@ -1045,6 +745,20 @@ def handle_disconnect():
     """Cliente desconectado"""
     print(f"❌ Cliente desconectado")
 
+@socketio.on('backtest_subscribe')
+def handle_backtest_subscribe(data):
+    """Inscreve o cliente no progresso de um job de backtest"""
+    job_id = (data or {}).get('job_id')
+    if not job_id:
+        return
+    join_room(job_id)
+    job = get_backtest_jobs().get(job_id)
+    if job is not None:
+        # Estado atual para quem se inscreve depois do início (ou de um resultado em cache)
+        emit('backtest_progress', {'job_id': job_id, **job.progress})
+        if job.finished:
+            emit('backtest_finished', job.to_dict(include_result=False))
+
 def run_web_server(host='0.0.0.0', port=5000, debug=False):
     """Inicia servidor web"""
     initialize_system()
@@ -101,8 +101,9 @@ async function loadCombinations() {
 }
 
 // Função para executar backtest
-async function runBacktest(config) {
+async function runBacktest(config, onQueued, isCancelled) {
     try {
+        // O servidor enfileira o backtest e responde na hora com o job_id
         const response = await fetch('/api/backtest', {
             method: 'POST',
             headers: {
@@ -111,7 +112,14 @@ async function runBacktest(config) {
             body: JSON.stringify(config)
         });
         const data = await response.json();
-        return data;
+        if (response.status !== 202) {
+            return data;
+        }
+        if (onQueued) onQueued(data);
+
+        // Progresso chega pela sala do job; o resultado é consultado até o job terminar
+        (window.marketManusSocket || socket).emit('backtest_subscribe', {job_id: data.job_id});
+        return await waitForBacktestJob(data.job_id, 1000, isCancelled);
     } catch (error) {
         console.error('Erro ao executar backtest:', error);
         showToast('Erro', 'Não foi possível executar o backtest', 'danger');
@@ -119,6 +127,34 @@ async function runBacktest(config) {
     }
 }
 
+async function waitForBacktestJob(jobId, intervalMs = 1000, isCancelled = () => false) {
+    while (true) {
+        // Cancelado por este solicitante: o job pode seguir para outros, mas esta página para de aguardar
+        if (isCancelled()) {
+            return {status: 'error', message: 'Backtest cancelado'};
+        }
+        const response = await fetch(`/api/backtest/jobs/${jobId}`);
+        const job = await response.json();
+        if (job.status === 'done') {
+            return job.result;
+        }
+        if (job.status === 'error' || job.status === 'cancelled' || !response.ok) {
+            return {status: 'error', message: job.error || job.message || 'Backtest cancelado'};
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
+async function cancelBacktest(jobId, submitter) {
+    // submitter vem da resposta de POST /api/backtest (um job pode ter vários solicitantes)
+    const response = await fetch(`/api/backtest/jobs/${jobId}/cancel`, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({submitter})
+    });
+    return response.json();
+}
+
 // Spinner de carregamento
 function showSpinner(containerId) {
     const container = document.getElementById(containerId);